@@ -0,0 +1,224 @@
+"""
+准入控制 / 过载保护（/api/process）
+
+`/api/process` runs a multi-minute LLM pipeline per request. Without a cap a
+traffic spike starts hundreds of reasoning-model calls at once, trips the
+provider's rate limits and times everyone out. `AdmissionController` lets at
+most `max_concurrent` runs proceed; the rest wait in a bounded queue split into
+priority lanes (paid access codes ahead of free users, FIFO inside a lane).
+A request is rejected up front (429 + Retry-After) when the queue is full or
+its estimated wait — position / concurrency x the EWMA run time — exceeds
+`deadline_s`, instead of waiting only to time out. Waiters are told their
+position whenever the queue moves. Limits are per worker process.
+
+Env:
+  - PROCESS_MAX_CONCURRENT: default 4
+  - PROCESS_MAX_QUEUE: waiting requests across lanes, default 50
+  - PROCESS_QUEUE_DEADLINE_S: max estimated wait before rejecting, default 120
+  - PROCESS_EXPECTED_RUN_S: run-time estimate until real runs are measured, default 60
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from app.core.performance import metrics
+
+logger = logging.getLogger("ai_job_helper")
+
+PAID = "paid"
+FREE = "free"
+LANES: Tuple[str, ...] = (PAID, FREE)  # highest priority first
+
+PositionCallback = Callable[[int, float], Awaitable[Any]]
+
+
+class AdmissionRejected(Exception):
+    """The request would wait past the deadline (or the queue is full); retry later."""
+
+    def __init__(self, reason: str, retry_after_s: float, queued: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+        self.queued = queued
+
+
+class _Waiter:
+    __slots__ = ("future", "on_position")
+
+    def __init__(self, future: "asyncio.Future[None]", on_position: Optional[PositionCallback]):
+        self.future = future
+        self.on_position = on_position
+
+
+class AdmissionController:
+    """Concurrency cap + priority queue for one event loop."""
+
+    def __init__(
+        self,
+        max_concurrent: int = 4,
+        max_queue: int = 50,
+        deadline_s: float = 120.0,
+        expected_run_s: float = 60.0,
+        alpha: float = 0.2,
+        now_fn: Optional[Callable[[], float]] = None,
+    ):
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.max_queue = max(0, int(max_queue))
+        self.deadline_s = float(deadline_s)
+        self.alpha = float(alpha)
+        self._run_s = max(0.1, float(expected_run_s))
+        self._now = now_fn or time.monotonic
+        self._active = 0
+        self._lanes: Dict[str, Deque[_Waiter]] = {lane: deque() for lane in LANES}
+        self._stats = {"admitted": 0, "queued": 0, "rejected": 0}
+
+    def queued(self) -> int:
+        return sum(len(q) for q in self._lanes.values())
+
+    def _ahead_of_lane(self, lane: str) -> int:
+        """Waiters that will be served before a newcomer in `lane`."""
+        n = 0
+        for name in LANES:
+            n += len(self._lanes[name])
+            if name == lane:
+                break
+        return n
+
+    def estimate_wait(self, position: int) -> float:
+        """Seconds until the request at queue `position` (1-based) starts."""
+        if position <= 0:
+            return 0.0
+        return math.ceil(position / self.max_concurrent) * self._run_s
+
+    def _positions(self):
+        pos = 0
+        for name in LANES:
+            for w in self._lanes[name]:
+                pos += 1
+                yield w, pos
+
+    @staticmethod
+    async def _report(cb: PositionCallback, position: int, eta_s: float) -> None:
+        try:
+            await cb(position, eta_s)
+        except Exception:
+            logger.debug("queue position callback failed", exc_info=True)
+
+    def _notify_positions(self) -> None:
+        for w, pos in self._positions():
+            if w.on_position is not None and not w.future.done():
+                asyncio.ensure_future(self._report(w.on_position, pos, self.estimate_wait(pos)))
+
+    def _grant_next(self) -> None:
+        while self._active < self.max_concurrent:
+            waiter = None
+            for name in LANES:
+                lane = self._lanes[name]
+                while lane and lane[0].future.done():
+                    lane.popleft()  # cancelled while waiting
+                if lane:
+                    waiter = lane.popleft()
+                    break
+            if waiter is None:
+                return
+            self._active += 1
+            waiter.future.set_result(None)
+
+    def _release(self, started_at: Optional[float]) -> None:
+        self._active -= 1
+        if started_at is not None:
+            took = max(0.0, self._now() - started_at)
+            self._run_s = (1 - self.alpha) * self._run_s + self.alpha * took
+        self._grant_next()
+        self._notify_positions()
+
+    def check(self, lane: str = FREE) -> float:
+        """
+        Raise `AdmissionRejected` if a request in `lane` would be turned away right
+        now; otherwise return its estimated wait (0 when a slot is free).
+        """
+        if self._active < self.max_concurrent and not self.queued():
+            return 0.0
+        wait_s = self.estimate_wait(self._ahead_of_lane(lane if lane in self._lanes else FREE) + 1)
+        if self.queued() >= self.max_queue or wait_s > self.deadline_s:
+            self._stats["rejected"] += 1
+            metrics.inc("admission_total", lane=lane, result="rejected")
+            if self.queued() >= self.max_queue:
+                reason, retry_s = "queue_full", self._run_s / self.max_concurrent
+            else:
+                reason, retry_s = "deadline", wait_s - self.deadline_s
+            raise AdmissionRejected(reason, retry_after_s=float(max(1, math.ceil(retry_s))), queued=self.queued())
+        return wait_s
+
+    async def _acquire(self, lane: str, on_position: Optional[PositionCallback]) -> None:
+        if lane not in self._lanes:
+            lane = FREE
+        if not self.check(lane):
+            self._active += 1
+            self._stats["admitted"] += 1
+            metrics.inc("admission_total", lane=lane, result="admitted")
+            return
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), on_position)
+        self._lanes[lane].append(waiter)
+        self._stats["queued"] += 1
+        metrics.inc("admission_total", lane=lane, result="queued")
+        # Newcomers in a higher lane push everyone behind them back one place.
+        self._notify_positions()
+        t0 = self._now()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self._release(None)  # slot was handed over just as the caller went away
+            else:
+                try:
+                    self._lanes[lane].remove(waiter)
+                except ValueError:
+                    pass
+                self._notify_positions()
+            raise
+        self._stats["admitted"] += 1
+        metrics.observe("admission_queue_wait_seconds", self._now() - t0, lane=lane)
+
+    @asynccontextmanager
+    async def slot(self, lane: str = FREE, on_position: Optional[PositionCallback] = None) -> AsyncIterator[None]:
+        """
+        Hold one run slot for the duration of the block. Raises `AdmissionRejected`
+        immediately instead of queueing when the wait would exceed the deadline.
+        `on_position(position, eta_s)` runs as a task whenever the queue moves.
+        """
+        await self._acquire(lane, on_position)
+        started_at = self._now()
+        try:
+            yield
+        finally:
+            self._release(started_at)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self._active,
+            "max_concurrent": self.max_concurrent,
+            "waiting": {name: len(q) for name, q in self._lanes.items()},
+            "max_queue": self.max_queue,
+            "deadline_s": self.deadline_s,
+            "expected_run_s": round(self._run_s, 1),
+            **self._stats,
+        }
+
+
+def admission_from_env() -> AdmissionController:
+    return AdmissionController(
+        max_concurrent=int(os.getenv("PROCESS_MAX_CONCURRENT", "4") or "4"),
+        max_queue=int(os.getenv("PROCESS_MAX_QUEUE", "50") or "50"),
+        deadline_s=float(os.getenv("PROCESS_QUEUE_DEADLINE_S", "120") or "120"),
+        expected_run_s=float(os.getenv("PROCESS_EXPECTED_RUN_S", "60") or "60"),
+    )
@@ -8,10 +8,17 @@ import asyncio
 from typing import Dict, Any, List
 from dotenv import load_dotenv
 import time
+from app.core.incremental import get_stage_memo
 from app.core.llm_client import get_async_llm_client, get_llm_settings
+from app.core.performance import metrics
+from app.core.startup import LazyService
 
 load_dotenv()
 
+# A stage's inputs are its prompt, the model and the context it is given (resume and upstream outputs):
+# a resubmitted resume reuses every stage whose context did not change.
+_stages = get_stage_memo()
+
 class HighPerformanceAIEngine:
     """高性能AI引擎 - 并行处理"""
     
@@ -109,20 +116,24 @@ class HighPerformanceAIEngine:
         """快速AI思考 - 流式输出"""
         prompt = self.prompts.get(role, "")
         
-        try:
+        async def call() -> str:
             # 使用流式API，更快
-            response = await self.client.chat.completions.create(
-                model=self.chat_model,  # 使用环境变量模型
-                messages=[
-                    {"role": "system", "content": prompt},
-                    {"role": "user", "content": context}
-                ],
-                temperature=0.7,
-                max_tokens=1200,  # 增加token限制以支持更详细的输出
-                stream=False  # 先不用流式，确保稳定
-            )
+            with metrics.timer("llm_call_duration_seconds", role=role):
+                response = await self.client.chat.completions.create(
+                    model=self.chat_model,  # 使用环境变量模型
+                    messages=[
+                        {"role": "system", "content": prompt},
+                        {"role": "user", "content": context}
+                    ],
+                    temperature=0.7,
+                    max_tokens=1200,  # 增加token限制以支持更详细的输出
+                    stream=False  # 先不用流式，确保稳定
+                )
             
             return response.choices[0].message.content.strip()
+
+        try:
+            return await _stages.run(role, (self.chat_model, prompt, context, 1200), call)
         except Exception as e:
             return f"AI处理出错: {str(e)}"
     
@@ -199,6 +210,6 @@ class FastJobApplicationPipeline:
             loop.close()
 
 
-# 全局实例
-fast_pipeline = FastJobApplicationPipeline()
+# 全局实例（首次使用时才创建 LLM 客户端）
+fast_pipeline = LazyService(FastJobApplicationPipeline, "fast_pipeline")
 
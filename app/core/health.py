@@ -0,0 +1,118 @@
+"""
+健康检查快照
+
+Platform probes hit `/api/health` every few seconds; the data behind it
+(`BusinessService.metrics()`, provider statistics) costs a dozen SQL scans.
+`SnapshotCache` serves the last computed value and refreshes it in a
+background thread once it is older than `ttl_s`, so probes never wait on the
+DB after the first load, and every response says how old the data is. Async
+handlers use `aget()`, which runs that first load in a worker thread; the app
+also warms the snapshot at startup.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger("ai_job_helper")
+
+
+class SnapshotCache:
+    """Stale-while-revalidate holder for one expensive snapshot."""
+
+    def __init__(
+        self,
+        name: str,
+        loader: Callable[[], Any],
+        ttl_s: float = 30.0,
+        max_stale_s: float = 300.0,
+        now_fn: Optional[Callable[[], float]] = None,
+    ):
+        self.name = name
+        self.loader = loader
+        self.ttl_s = max(0.0, float(ttl_s))
+        self.max_stale_s = max(self.ttl_s, float(max_stale_s))
+        self._now = now_fn or time.monotonic
+        self._lock = threading.Lock()
+        self._value: Any = None
+        self._loaded_at: Optional[float] = None
+        self._refreshed_at_iso = ""
+        self._refresh_ms = 0.0
+        self._refreshing = False
+        self._last_error = ""
+
+    def _load(self) -> None:
+        t0 = time.perf_counter()
+        try:
+            value = self.loader()
+        except Exception as e:
+            with self._lock:
+                self._last_error = str(e)[:300]
+                self._refreshing = False
+            logger.warning("snapshot refresh failed name=%s err=%s", self.name, e)
+            return
+        with self._lock:
+            self._value = value
+            self._loaded_at = self._now()
+            self._refreshed_at_iso = datetime.now().isoformat()
+            self._refresh_ms = round((time.perf_counter() - t0) * 1000, 2)
+            self._last_error = ""
+            self._refreshing = False
+
+    def refresh(self) -> Tuple[Any, Dict[str, Any]]:
+        """Reload synchronously (deep checks / admin views)."""
+        with self._lock:
+            self._refreshing = True
+        self._load()
+        return self.get()
+
+    def _kick_background_refresh(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._load, name=f"snapshot-{self.name}", daemon=True).start()
+
+    def get(self) -> Tuple[Any, Dict[str, Any]]:
+        """Return (value, meta). Only the very first call blocks on the loader."""
+        if self._loaded_at is None:
+            with self._lock:
+                first = self._loaded_at is None and not self._refreshing
+                if first:
+                    self._refreshing = True
+            if first:
+                self._load()
+        value, meta = self._value, self.meta()
+        if meta["age_s"] is not None and meta["stale"]:
+            self._kick_background_refresh()
+        return value, meta
+
+    async def aget(self) -> Tuple[Any, Dict[str, Any]]:
+        """`get()` for async handlers: a cold first load runs off the event loop."""
+        if self._loaded_at is None:
+            return await asyncio.to_thread(self.get)
+        return self.get()
+
+    def age_s(self) -> Optional[float]:
+        loaded = self._loaded_at
+        return None if loaded is None else max(0.0, self._now() - loaded)
+
+    def meta(self) -> Dict[str, Any]:
+        age = self.age_s()
+        with self._lock:
+            return {
+                "name": self.name,
+                "refreshed_at": self._refreshed_at_iso,
+                "age_s": None if age is None else round(age, 1),
+                "ttl_s": self.ttl_s,
+                "stale": age is None or age >= self.ttl_s,
+                "expired": age is None or age >= self.max_stale_s,
+                "refreshing": self._refreshing,
+                "refresh_ms": self._refresh_ms,
+                "last_error": self._last_error,
+            }
@@ -0,0 +1,136 @@
+"""
+增量重算：阶段结果按输入复用
+
+A user who edits one section of a resume and resubmits gets a different
+fingerprint, so the whole-pipeline cache misses and every LLM stage ran again.
+`StageMemo.run(stage, inputs, compute)` keys each stage on its complete input
+— for an LLM stage the model and the rendered prompt, which already embeds
+whatever it depends on (resume text, extracted skills, matched jobs, an
+upstream stage's output) — and reuses the stored output when it is unchanged.
+Only stages whose prompt differs are re-executed: editing a project
+description reruns the resume optimizer but reuses the market advice (same
+skills) and interview prep (same top job).
+
+Only successful outputs are stored — a stage that raises falls back in the
+caller and is retried next time. Outputs live in the shared state backend.
+`trace()` records which stages were reused / recomputed for the current run;
+`trace(refresh=True)` recomputes every stage and overwrites what was stored.
+
+Env:
+  - STAGE_CACHE_ENABLED: default on
+  - STAGE_CACHE_TTL_S: default 86400
+  - STAGE_CACHE_MAX_ENTRIES: default 2000
+"""
+
+from __future__ import annotations
+
+import contextvars
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, TypeVar
+
+from app.core.performance import metrics
+from app.core.shared_state import SharedState, get_shared_state
+from app.core.single_flight import content_key
+
+logger = logging.getLogger("ai_job_helper")
+
+T = TypeVar("T")
+
+_NS = "pipeline_stages"
+_trace: "contextvars.ContextVar[Optional[Dict[str, List[str]]]]" = contextvars.ContextVar("stage_trace", default=None)
+_refresh: "contextvars.ContextVar[bool]" = contextvars.ContextVar("stage_refresh", default=False)
+
+
+class StageMemo:
+    """Stage outputs by (stage name, digest of the stage's complete inputs)."""
+
+    def __init__(
+        self,
+        store: Optional[SharedState] = None,
+        ttl_s: float = 86400.0,
+        max_entries: int = 2000,
+        enabled: bool = True,
+    ):
+        self._store = store
+        self.ttl_s = float(ttl_s)
+        self.max_entries = max(1, int(max_entries))
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stats = {"reused": 0, "recomputed": 0}
+
+    @property
+    def store(self) -> SharedState:
+        if self._store is None:
+            self._store = get_shared_state()
+        return self._store
+
+    def _record(self, stage: str, result: str) -> None:
+        with self._lock:
+            self._stats[result] += 1
+        metrics.inc("pipeline_stage_total", stage=stage, result=result)
+        trace = _trace.get()
+        if trace is not None:
+            trace[result].append(stage)
+
+    async def run(self, stage: str, inputs: Any, compute: Callable[[], Awaitable[T]]) -> T:
+        """Stored output for these inputs, else `await compute()` (stored if it returns)."""
+        if not self.enabled:
+            return await compute()
+        key = f"{stage}:{content_key(inputs)}"
+        entry = None
+        if not _refresh.get():
+            try:
+                entry = self.store.get(_NS, key)
+            except Exception:
+                logger.warning("stage cache read failed stage=%s", stage, exc_info=True)
+        if entry is not None:
+            self._record(stage, "reused")
+            return entry["value"]
+
+        value = await compute()
+        self._record(stage, "recomputed")
+        try:
+            self.store.set(_NS, key, {"value": value}, ttl_s=self.ttl_s)
+            self.store.trim(_NS, self.max_entries)
+        except Exception:
+            logger.warning("stage cache write failed stage=%s", stage, exc_info=True)
+        return value
+
+    @contextmanager
+    def trace(self, refresh: bool = False) -> Iterator[Dict[str, List[str]]]:
+        """
+        Collect `{"reused": [...], "recomputed": [...]}` for the stages run inside
+        the block; with `refresh` every stage recomputes and overwrites its entry.
+        """
+        record: Dict[str, List[str]] = {"reused": [], "recomputed": []}
+        token = _trace.set(record)
+        refresh_token = _refresh.set(bool(refresh))
+        try:
+            yield record
+        finally:
+            _refresh.reset(refresh_token)
+            _trace.reset(token)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"enabled": self.enabled, "ttl_s": self.ttl_s, "max_entries": self.max_entries, **self._stats}
+
+
+_stage_memo: Optional[StageMemo] = None
+_stage_memo_lock = threading.Lock()
+
+
+def get_stage_memo() -> StageMemo:
+    global _stage_memo
+    if _stage_memo is None:
+        with _stage_memo_lock:
+            if _stage_memo is None:
+                _stage_memo = StageMemo(
+                    ttl_s=float(os.getenv("STAGE_CACHE_TTL_S", "86400") or "86400"),
+                    max_entries=int(os.getenv("STAGE_CACHE_MAX_ENTRIES", "2000") or "2000"),
+                    enabled=os.getenv("STAGE_CACHE_ENABLED", "1").strip().lower() in {"1", "true", "yes", "on"},
+                )
+    return _stage_memo
@@ -1,8 +1,9 @@
 import os
 import random
-from typing import Dict
+from typing import TYPE_CHECKING, Dict
 
-from openai import AsyncOpenAI, OpenAI
+if TYPE_CHECKING:  # openai 导入较慢，只在真正创建客户端时加载
+    from openai import AsyncOpenAI, OpenAI
 
 
 def _first_non_empty(*keys: str) -> str:
@@ -78,12 +79,16 @@ def get_llm_settings() -> Dict[str, str]:
     }
 
 
-def get_async_llm_client() -> AsyncOpenAI:
+def get_async_llm_client() -> "AsyncOpenAI":
+    from openai import AsyncOpenAI
+
     s = get_llm_settings()
     return AsyncOpenAI(api_key=s["api_key"], base_url=s["base_url"], timeout=s["timeout_s"])
 
 
-def get_sync_llm_client() -> OpenAI:
+def get_sync_llm_client() -> "OpenAI":
+    from openai import OpenAI
+
     s = get_llm_settings()
     return OpenAI(api_key=s["api_key"], base_url=s["base_url"], timeout=s["timeout_s"])
 
@@ -7,10 +7,21 @@ import os
 import asyncio
 from typing import Dict, List, Any
 from dotenv import load_dotenv
+from app.core.incremental import get_stage_memo
 from app.core.llm_client import get_async_llm_client, get_llm_settings
+from app.core.performance import metrics
+from app.core.single_flight import SingleFlight, content_key
+from app.core.startup import LazyService
 
 load_dotenv()
 
+# Identical prompts in flight at the same time (same resume template, same top job) share one completion.
+_llm_flight = SingleFlight("llm")
+# Bump whenever a prompt below changes: cached /api/process results of older prompts are then ignored.
+PROMPT_VERSION = "market_prompts.v2"
+# Each LLM stage is keyed on its model + prompt; an edited resume only reruns the stages whose prompt changed.
+_stages = get_stage_memo()
+
 class JobMarketEngine:
     """求职市场引擎 - 核心驱动"""
     
@@ -24,6 +35,29 @@ class JobMarketEngine:
         self.skill_demands = self._load_skill_demands()
         self.company_rankings = self._load_company_rankings()
     
+    async def _complete(self, role: str, prompt: str, max_tokens: int, temperature: float = 0.7) -> str:
+        """One chat completion; concurrent calls with the same model + prompt are coalesced."""
+        messages = [{"role": "user", "content": prompt}]
+
+        async def call() -> str:
+            with metrics.timer("llm_call_duration_seconds", role=role):
+                response = await self.client.chat.completions.create(
+                    model=self.chat_model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+            return response.choices[0].message.content.strip()
+
+        key = content_key(self.chat_model, messages, temperature, max_tokens)
+        return await _llm_flight.do(key, call)
+
+    async def _complete_stage(self, role: str, prompt: str, max_tokens: int) -> str:
+        """`_complete` behind the stage memo: the prompt is the stage's complete input."""
+        return await _stages.run(
+            role, (self.chat_model, prompt, max_tokens), lambda: self._complete(role, prompt, max_tokens=max_tokens)
+        )
+    
     def _load_hot_jobs(self) -> List[Dict]:
         """加载热门岗位（真实市场数据）"""
         return [
@@ -273,13 +307,7 @@ class JobMarketEngine:
 要求：简洁、实用、可执行。150字以内。"""
         
         try:
-            response = await self.client.chat.completions.create(
-                model=self.chat_model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-                max_tokens=500
-            )
-            return response.choices[0].message.content.strip()
+            return await self._complete_stage("market_advice", prompt, max_tokens=500)
         except:
             return "市场分析中..."
     
@@ -291,7 +319,7 @@ class JobMarketEngine:
         for job in target_jobs[:3]:  # 取前3个岗位
             all_requirements.extend(job.get("requirements", []))
         
-        key_requirements = list(set(all_requirements))[:10]  # 去重，取前10个
+        key_requirements = list(dict.fromkeys(all_requirements))[:10]  # 去重（保持岗位顺序），取前10个
         
         prompt = f"""作为简历优化专家，根据市场热门岗位需求优化简历：
 
@@ -310,13 +338,7 @@ class JobMarketEngine:
 输出优化后的完整简历，500字以内。"""
         
         try:
-            response = await self.client.chat.completions.create(
-                model=self.chat_model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-                max_tokens=1500
-            )
-            return response.choices[0].message.content.strip()
+            return await self._complete_stage("resume_optimizer", prompt, max_tokens=1500)
         except:
             return resume_text
     
@@ -342,13 +364,7 @@ class JobMarketEngine:
 要求：实战、具体、易记。300字以内。"""
         
         try:
-            response = await self.client.chat.completions.create(
-                model=self.chat_model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-                max_tokens=800
-            )
-            return response.choices[0].message.content.strip()
+            return await self._complete_stage("interview_prep", prompt, max_tokens=800)
         except:
             return "面试准备中..."
 
@@ -359,39 +375,42 @@ class MarketDrivenPipeline:
     def __init__(self):
         self.market_engine = JobMarketEngine()
     
-    async def process_resume(self, resume_text: str, progress_callback=None) -> Dict[str, Any]:
-        """以市场为核心处理简历"""
+    async def process_resume(self, resume_text: str, progress_callback=None, refresh: bool = False) -> Dict[str, Any]:
+        """以市场为核心处理简历（refresh=True 时所有 LLM 阶段重新生成并覆盖已存结果）"""
         
-        # 步骤1: 分析市场匹配度
-        if progress_callback:
-            await progress_callback(1, "分析市场匹配度...", "市场分析引擎")
+        with _stages.trace(refresh=refresh) as stage_trace:
+            # 步骤1: 分析市场匹配度
+            if progress_callback:
+                await progress_callback(1, "分析市场匹配度...", "市场分析引擎")
         
-        market_fit = await self.market_engine.analyze_market_fit(resume_text)
+            market_fit = await self.market_engine.analyze_market_fit(resume_text)
         
-        # 步骤2: 根据市场优化简历
-        if progress_callback:
-            await progress_callback(3, "根据市场需求优化简历...", "简历优化引擎")
-        
-        optimized_resume = await self.market_engine.optimize_resume_for_market(
-            resume_text, 
-            market_fit["matched_jobs"]
-        )
+            # 步骤2: 根据市场优化简历
+            if progress_callback:
+                await progress_callback(3, "根据市场需求优化简历...", "简历优化引擎")
         
-        # 步骤3: 生成面试准备
-        if progress_callback:
-            await progress_callback(5, "生成面试准备...", "面试辅导引擎")
+            optimized_resume = await self.market_engine.optimize_resume_for_market(
+                resume_text, 
+                market_fit["matched_jobs"]
+            )
         
-        interview_prep = await self.market_engine.generate_interview_prep(
-            market_fit["matched_jobs"]
-        )
+            # 步骤3: 生成面试准备
+            if progress_callback:
+                await progress_callback(5, "生成面试准备...", "面试辅导引擎")
         
+            interview_prep = await self.market_engine.generate_interview_prep(
+                market_fit["matched_jobs"]
+            )
+
         # 格式化输出
         return {
             "market_analysis": self._format_market_analysis(market_fit),
             "job_recommendations": self._format_job_recommendations(market_fit["matched_jobs"]),
             "optimized_resume": optimized_resume,
             "interview_prep": interview_prep,
-            "salary_analysis": self._format_salary_analysis(market_fit["salary_potential"])
+            "salary_analysis": self._format_salary_analysis(market_fit["salary_potential"]),
+            # Which LLM stages reused an earlier output (inputs unchanged) vs ran again.
+            "stage_trace": stage_trace,
         }
     
     def _format_market_analysis(self, market_fit: Dict) -> str:
@@ -445,6 +464,6 @@ class MarketDrivenPipeline:
 """
 
 
-# 全局实例
-market_driven_pipeline = MarketDrivenPipeline()
+# 全局实例（首次使用时才创建 LLM 客户端）
+market_driven_pipeline = LazyService(MarketDrivenPipeline, "market_driven_pipeline")
 
@@ -6,9 +6,9 @@
 import os
 import json
 from typing import List, Dict, Any
-from openai import OpenAI
 from dotenv import load_dotenv
 from app.core.llm_client import get_sync_llm_client, get_llm_settings
+from app.core.performance import metrics
 
 # 加载.env文件
 load_dotenv()
@@ -242,11 +242,12 @@ class MultiAIDebateEngine:
                         self.reasoning_model = settings["reasoning_model"]
                         print(f"重试 {attempt + 1}/{max_retries}，使用新的 API Key...")
 
-                    response = self.llm_client.chat.completions.create(
-                        model=self.reasoning_model,
-                        messages=[{"role": "user", "content": prompt}],
-                        temperature=0.7
-                    )
+                    with metrics.timer("llm_call_duration_seconds", role=role):
+                        response = self.llm_client.chat.completions.create(
+                            model=self.reasoning_model,
+                            messages=[{"role": "user", "content": prompt}],
+                            temperature=0.7
+                        )
 
                     message = response.choices[0].message
                     reasoning = getattr(message, "reasoning_content", "") or ""
@@ -1,224 +1,339 @@
 """
 性能监控 - 实时监控系统性能
+
+延迟直方图（p50/p95/p99）+ 计数器，按路由 / provider / LLM 角色 / DB 调用打标签，
+并可导出 Prometheus 文本格式（/metrics）。
 """
+import bisect
+import re
+import sqlite3
+import threading
 import time
-import psutil
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, Any
+from functools import lru_cache, wraps
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-class PerformanceMonitor:
-    """性能监控器"""
-    
-    def __init__(self):
-        self.start_time = time.time()
-        self.request_count = 0
-        self.error_count = 0
-        self.total_response_time = 0
-    
-    def record_request(self, response_time: float, is_error: bool = False):
-        """记录请求"""
-        self.request_count += 1
-        self.total_response_time += response_time
-        if is_error:
-            self.error_count += 1
-    
-    def get_stats(self) -> Dict[str, Any]:
-        """获取统计信息"""
-        uptime = time.time() - self.start_time
-        avg_response_time = (
-            self.total_response_time / self.request_count 
-            if self.request_count > 0 else 0
-        )
-        
-        return {
-            "uptime_seconds": round(uptime, 2),
-            "uptime_hours": round(uptime / 3600, 2),
-            "total_requests": self.request_count,
-            "error_count": self.error_count,
-            "error_rate": round(self.error_count / self.request_count * 100, 2) if self.request_count > 0 else 0,
-            "avg_response_time_ms": round(avg_response_time * 1000, 2),
-            "requests_per_second": round(self.request_count / uptime, 2) if uptime > 0 else 0,
-            "cpu_percent": psutil.cpu_percent(),
-            "memory_percent": psutil.virtual_memory().percent,
-            "timestamp": datetime.now().isoformat()
-        }
+try:
+    import psutil
+except ImportError:  # psutil is optional (not installed on every deploy target)
+    psutil = None
 
-# 全局监控实例
-monitor = PerformanceMonitor()
 
-def track_performance(func):
-    """性能追踪装饰器"""
-    async def wrapper(*args, **kwargs):
-        start = time.time()
-        error = False
-        try:
-            result = await func(*args, **kwargs)
-            return result
-        except Exception as e:
-            error = True
-            raise e
-        finally:
-            response_time = time.time() - start
-            monitor.record_request(response_time, error)
-    return wrapper
+# Prometheus-style upper bounds (seconds). Wide enough for 5ms routes and
+# multi-minute LLM pipelines.
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+)
 
-性能监控 - 实时监控系统性能
-"""
-import time
-import psutil
-from datetime import datetime
-from typing import Dict, Any
+LabelKey = Tuple[Tuple[str, str], ...]
 
-class PerformanceMonitor:
-    """性能监控器"""
-    
-    def __init__(self):
-        self.start_time = time.time()
-        self.request_count = 0
-        self.error_count = 0
-        self.total_response_time = 0
-    
-    def record_request(self, response_time: float, is_error: bool = False):
-        """记录请求"""
-        self.request_count += 1
-        self.total_response_time += response_time
-        if is_error:
-            self.error_count += 1
-    
-    def get_stats(self) -> Dict[str, Any]:
-        """获取统计信息"""
-        uptime = time.time() - self.start_time
-        avg_response_time = (
-            self.total_response_time / self.request_count 
-            if self.request_count > 0 else 0
-        )
-        
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((str(k), str(v)) for k, v in labels.items()))
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram.
+
+    Writes are lock-free: every thread increments its own shard (a plain list
+    owned by that thread), and readers merge shards on demand. Shard creation
+    is a single dict assignment, which is atomic under the GIL.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._shards: Dict[int, List[float]] = {}
+
+    def _shard(self) -> List[float]:
+        tid = threading.get_ident()
+        shard = self._shards.get(tid)
+        if shard is None:
+            # [bucket counts..., +Inf count, sum]
+            shard = [0.0] * (len(self.buckets) + 2)
+            self._shards[tid] = shard
+        return shard
+
+    def observe(self, seconds: float) -> None:
+        shard = self._shard()
+        shard[bisect.bisect_left(self.buckets, seconds)] += 1
+        shard[-1] += seconds
+
+    def _merged(self) -> List[float]:
+        merged = [0.0] * (len(self.buckets) + 2)
+        for shard in list(self._shards.values()):
+            for i, v in enumerate(shard):
+                merged[i] += v
+        return merged
+
+    def snapshot(self) -> Dict[str, Any]:
+        merged = self._merged()
+        counts = merged[:-1]
+        total = int(sum(counts))
         return {
-            "uptime_seconds": round(uptime, 2),
-            "uptime_hours": round(uptime / 3600, 2),
-            "total_requests": self.request_count,
-            "error_count": self.error_count,
-            "error_rate": round(self.error_count / self.request_count * 100, 2) if self.request_count > 0 else 0,
-            "avg_response_time_ms": round(avg_response_time * 1000, 2),
-            "requests_per_second": round(self.request_count / uptime, 2) if uptime > 0 else 0,
-            "cpu_percent": psutil.cpu_percent(),
-            "memory_percent": psutil.virtual_memory().percent,
-            "timestamp": datetime.now().isoformat()
+            "count": total,
+            "sum": merged[-1],
+            "buckets": counts,
+            "p50": self._quantile(counts, total, 0.50),
+            "p95": self._quantile(counts, total, 0.95),
+            "p99": self._quantile(counts, total, 0.99),
         }
 
-# 全局监控实例
-monitor = PerformanceMonitor()
+    def _quantile(self, counts: List[float], total: int, q: float) -> Optional[float]:
+        """Linear interpolation inside the bucket that holds the q-th observation."""
+        if total <= 0:
+            return None
+        rank = q * total
+        seen = 0.0
+        for i, c in enumerate(counts):
+            if seen + c >= rank and c > 0:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i >= len(self.buckets):
+                    return self.buckets[-1]
+                upper = self.buckets[i]
+                return lower + (upper - lower) * ((rank - seen) / c)
+            seen += c
+        return self.buckets[-1]
 
-def track_performance(func):
-    """性能追踪装饰器"""
-    async def wrapper(*args, **kwargs):
-        start = time.time()
-        error = False
-        try:
-            result = await func(*args, **kwargs)
-            return result
-        except Exception as e:
-            error = True
-            raise e
-        finally:
-            response_time = time.time() - start
-            monitor.record_request(response_time, error)
-    return wrapper
 
-性能监控 - 实时监控系统性能
-"""
-import time
-import psutil
-from datetime import datetime
-from typing import Dict, Any
+class _ShardedCounter:
+    def __init__(self):
+        self._shards: Dict[int, List[float]] = {}
+
+    def inc(self, amount: float = 1.0) -> None:
+        tid = threading.get_ident()
+        shard = self._shards.get(tid)
+        if shard is None:
+            shard = [0.0]
+            self._shards[tid] = shard
+        shard[0] += amount
+
+    def value(self) -> float:
+        return sum(s[0] for s in list(self._shards.values()))
+
+
+class MetricsRegistry:
+    """Named histograms / counters keyed by label set."""
 
-class PerformanceMonitor:
-    """性能监控器"""
-    
     def __init__(self):
-        self.start_time = time.time()
-        self.request_count = 0
-        self.error_count = 0
-        self.total_response_time = 0
-    
-    def record_request(self, response_time: float, is_error: bool = False):
-        """记录请求"""
-        self.request_count += 1
-        self.total_response_time += response_time
-        if is_error:
-            self.error_count += 1
-    
-    def get_stats(self) -> Dict[str, Any]:
-        """获取统计信息"""
-        uptime = time.time() - self.start_time
-        avg_response_time = (
-            self.total_response_time / self.request_count 
-            if self.request_count > 0 else 0
-        )
-        
-        return {
-            "uptime_seconds": round(uptime, 2),
-            "uptime_hours": round(uptime / 3600, 2),
-            "total_requests": self.request_count,
-            "error_count": self.error_count,
-            "error_rate": round(self.error_count / self.request_count * 100, 2) if self.request_count > 0 else 0,
-            "avg_response_time_ms": round(avg_response_time * 1000, 2),
-            "requests_per_second": round(self.request_count / uptime, 2) if uptime > 0 else 0,
-            "cpu_percent": psutil.cpu_percent(),
-            "memory_percent": psutil.virtual_memory().percent,
-            "timestamp": datetime.now().isoformat()
-        }
+        self._lock = threading.Lock()  # only taken when a new series is created
+        self._histograms: Dict[str, Dict[LabelKey, LatencyHistogram]] = {}
+        self._counters: Dict[str, Dict[LabelKey, _ShardedCounter]] = {}
+        self._help: Dict[str, str] = {}
 
-# 全局监控实例
-monitor = PerformanceMonitor()
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
 
-def track_performance(func):
-    """性能追踪装饰器"""
-    async def wrapper(*args, **kwargs):
-        start = time.time()
-        error = False
+    def histogram(self, name: str, **labels: Any) -> LatencyHistogram:
+        key = _label_key(labels)
+        series = self._histograms.get(name)
+        hist = series.get(key) if series is not None else None
+        if hist is None:
+            with self._lock:
+                series = self._histograms.setdefault(name, {})
+                hist = series.setdefault(key, LatencyHistogram())
+        return hist
+
+    def counter(self, name: str, **labels: Any) -> _ShardedCounter:
+        key = _label_key(labels)
+        series = self._counters.get(name)
+        c = series.get(key) if series is not None else None
+        if c is None:
+            with self._lock:
+                series = self._counters.setdefault(name, {})
+                c = series.setdefault(key, _ShardedCounter())
+        return c
+
+    def observe(self, name: str, seconds: float, **labels: Any) -> None:
+        self.histogram(name, **labels).observe(seconds)
+
+    def inc(self, name: str, amount: float = 1.0, **labels: Any) -> None:
+        self.counter(name, **labels).inc(amount)
+
+    @contextmanager
+    def timer(self, name: str, **labels: Any) -> Iterator[None]:
+        start = time.perf_counter()
         try:
-            result = await func(*args, **kwargs)
-            return result
-        except Exception as e:
-            error = True
-            raise e
+            yield
         finally:
-            response_time = time.time() - start
-            monitor.record_request(response_time, error)
-    return wrapper
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name: str, **labels: Any):
+        """Decorator form of `timer` for sync and async callables."""
+
+        def deco(func):
+            import asyncio
+
+            if asyncio.iscoroutinefunction(func):
+
+                @wraps(func)
+                async def awrapper(*args, **kwargs):
+                    with self.timer(name, **labels):
+                        return await func(*args, **kwargs)
+
+                return awrapper
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return deco
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-friendly view: percentiles in milliseconds per series."""
+        out: Dict[str, Any] = {"histograms": {}, "counters": {}}
+        for name, series in list(self._histograms.items()):
+            rows = []
+            for key, hist in list(series.items()):
+                snap = hist.snapshot()
+                rows.append(
+                    {
+                        "labels": dict(key),
+                        "count": snap["count"],
+                        "p50_ms": _ms(snap["p50"]),
+                        "p95_ms": _ms(snap["p95"]),
+                        "p99_ms": _ms(snap["p99"]),
+                        "avg_ms": _ms(snap["sum"] / snap["count"]) if snap["count"] else None,
+                    }
+                )
+            out["histograms"][name] = rows
+        for name, series in list(self._counters.items()):
+            out["counters"][name] = [
+                {"labels": dict(key), "value": c.value()} for key, c in list(series.items())
+            ]
+        return out
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        for name, series in sorted(self._histograms.items()):
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, hist in sorted(series.items()):
+                snap = hist.snapshot()
+                cumulative = 0.0
+                for bound, c in zip(hist.buckets, snap["buckets"]):
+                    cumulative += c
+                    lines.append(f"{name}_bucket{_fmt_labels(key, le=_fmt_float(bound))} {int(cumulative)}")
+                lines.append(f"{name}_bucket{_fmt_labels(key, le='+Inf')} {snap['count']}")
+                lines.append(f"{name}_sum{_fmt_labels(key)} {snap['sum']:.6f}")
+                lines.append(f"{name}_count{_fmt_labels(key)} {snap['count']}")
+        for name, series in sorted(self._counters.items()):
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} counter")
+            for key, c in sorted(series.items()):
+                lines.append(f"{name}{_fmt_labels(key)} {_fmt_float(c.value())}")
+        return "\n".join(lines) + "\n"
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+
+def _fmt_float(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(key: LabelKey, **extra: str) -> str:
+    pairs = list(key) + sorted(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + "}"
+
+
+# 全局指标注册表
+metrics = MetricsRegistry()
+metrics.describe("http_request_duration_seconds", "HTTP request latency by route template.")
+metrics.describe("provider_search_duration_seconds", "Job provider search latency.")
+metrics.describe("provider_failures_total", "Job provider searches that raised.")
+metrics.describe("llm_call_duration_seconds", "LLM completion latency by pipeline role.")
+metrics.describe("db_call_duration_seconds", "SQLite call latency by operation.")
+metrics.describe("cache_requests_total", "Cache lookups by cache name and result (hit/miss).")
+
+
+_SQL_TABLE_PATTERNS = (
+    re.compile(r"\bFROM\s+([A-Za-z_][\w]*)", re.IGNORECASE),
+    re.compile(r"\bINTO\s+([A-Za-z_][\w]*)", re.IGNORECASE),
+    re.compile(r"^\s*UPDATE\s+([A-Za-z_][\w]*)", re.IGNORECASE),
+)
+
+
+@lru_cache(maxsize=1024)
+def _sql_op(sql: str) -> str:
+    """Low-cardinality label for a statement, e.g. "SELECT events"."""
+    m = re.match(r"\s*(\w+)", sql or "")
+    verb = (m.group(1) if m else "SQL").upper()
+    if verb in {"CREATE", "ALTER", "DROP", "PRAGMA"}:
+        return "DDL"
+    for pat in _SQL_TABLE_PATTERNS:
+        t = pat.search(sql or "")
+        if t:
+            return f"{verb} {t.group(1).lower()}"
+    return verb
+
+
+_connection_factories: Dict[str, type] = {}
+
+
+def sqlite_connection_factory(db: str) -> type:
+    """
+    `sqlite3.connect(..., factory=...)` class whose `execute` feeds
+    `db_call_duration_seconds{db, op}`. Measures statement execution (the
+    first step); rows fetched afterwards are not included.
+    """
+    cls = _connection_factories.get(db)
+    if cls is not None:
+        return cls
+
+    class _TimedConnection(sqlite3.Connection):
+        def execute(self, sql, parameters=(), /):
+            start = time.perf_counter()
+            try:
+                return super().execute(sql, parameters)
+            finally:
+                metrics.observe("db_call_duration_seconds", time.perf_counter() - start, db=db, op=_sql_op(sql))
+
+    _connection_factories[db] = _TimedConnection
+    return _TimedConnection
 
-性能监控 - 实时监控系统性能
-"""
-import time
-import psutil
-from datetime import datetime
-from typing import Dict, Any
 
 class PerformanceMonitor:
-    """性能监控器"""
-    
+    """性能监控器（汇总视图；明细见 metrics）"""
+
     def __init__(self):
         self.start_time = time.time()
         self.request_count = 0
         self.error_count = 0
         self.total_response_time = 0
-    
+        # Prime psutil so later cpu_percent(interval=None) calls return a real
+        # value immediately instead of blocking or reporting 0.0.
+        if psutil is not None:
+            psutil.cpu_percent(interval=None)
+
     def record_request(self, response_time: float, is_error: bool = False):
         """记录请求"""
         self.request_count += 1
         self.total_response_time += response_time
         if is_error:
             self.error_count += 1
-    
+
     def get_stats(self) -> Dict[str, Any]:
         """获取统计信息"""
         uptime = time.time() - self.start_time
         avg_response_time = (
-            self.total_response_time / self.request_count 
+            self.total_response_time / self.request_count
             if self.request_count > 0 else 0
         )
-        
+
         return {
             "uptime_seconds": round(uptime, 2),
             "uptime_hours": round(uptime / 3600, 2),
@@ -227,8 +342,9 @@ class PerformanceMonitor:
             "error_rate": round(self.error_count / self.request_count * 100, 2) if self.request_count > 0 else 0,
             "avg_response_time_ms": round(avg_response_time * 1000, 2),
             "requests_per_second": round(self.request_count / uptime, 2) if uptime > 0 else 0,
-            "cpu_percent": psutil.cpu_percent(),
-            "memory_percent": psutil.virtual_memory().percent,
+            # Non-blocking: utilisation since the previous call.
+            "cpu_percent": psutil.cpu_percent(interval=None) if psutil is not None else None,
+            "memory_percent": psutil.virtual_memory().percent if psutil is not None else None,
             "timestamp": datetime.now().isoformat()
         }
 
@@ -237,6 +353,7 @@ monitor = PerformanceMonitor()
 
 def track_performance(func):
     """性能追踪装饰器"""
+    @wraps(func)
     async def wrapper(*args, **kwargs):
         start = time.time()
         error = False
@@ -250,6 +367,3 @@ def track_performance(func):
             response_time = time.time() - start
             monitor.record_request(response_time, error)
     return wrapper
-
-
-
@@ -0,0 +1,140 @@
+"""
+简历处理结果缓存（整条流水线）
+
+Users re-run `/api/process` on the very same resume all the time (refresh,
+retry after a UI glitch, switching pages), and every run repeats the market
+analysis, the job seeding search, the quality gate and the rendering — several
+LLM calls for an answer we already have. `PipelineResultCache` stores the final
+payload keyed by a fingerprint of the normalized resume text (whitespace and
+Unicode width differences do not count) plus the pipeline version (response
+schema, prompt version, models), so a prompt or model change never serves an
+old answer. Callers pass `refresh=True` to recompute and overwrite.
+
+Entries live in the shared state backend, so every worker (and, with the
+sqlite/redis backends, every restart) sees them. This sits above the per-call
+LLM coalescing in `single_flight`: it skips the whole pipeline, not one call.
+
+Env:
+  - PIPELINE_CACHE_ENABLED: default on
+  - PIPELINE_CACHE_TTL_S: default 21600 (recommendations embed live job postings)
+  - PIPELINE_CACHE_MAX_ENTRIES: default 500
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.performance import metrics
+from app.core.shared_state import SharedState
+
+logger = logging.getLogger("ai_job_helper")
+
+_NS = "pipeline_results"
+
+
+def normalize_resume(text: str) -> str:
+    """NFKC, unified newlines, collapsed blanks; case and wording are kept (they change the output)."""
+    t = unicodedata.normalize("NFKC", text or "").replace("\r\n", "\n").replace("\r", "\n")
+    lines = [re.sub(r"[ \t　]+", " ", line).strip() for line in t.split("\n")]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def resume_fingerprint(text: str) -> str:
+    return hashlib.sha256(normalize_resume(text).encode("utf-8")).hexdigest()
+
+
+class PipelineResultCache:
+    """Finished pipeline payloads by (pipeline version, resume fingerprint)."""
+
+    def __init__(
+        self,
+        store: SharedState,
+        version: Callable[[], str],
+        ttl_s: float = 21600.0,
+        max_entries: int = 500,
+        enabled: bool = True,
+        now_fn: Optional[Callable[[], float]] = None,
+    ):
+        self.store = store
+        self.version = version
+        self.ttl_s = float(ttl_s)
+        self.max_entries = max(1, int(max_entries))
+        self.enabled = enabled
+        self._now = now_fn or time.time
+        self._lock = threading.Lock()
+        self._stats = {"hit": 0, "miss": 0, "refresh": 0, "stored": 0}
+
+    def key(self, resume_text: str) -> str:
+        version = hashlib.sha1(self.version().encode("utf-8")).hexdigest()[:12]
+        return f"{version}:{resume_fingerprint(resume_text)}"
+
+    def _count(self, result: str) -> None:
+        with self._lock:
+            self._stats[result] += 1
+        metrics.inc("pipeline_cache_total", result=result)
+
+    def lookup(self, resume_text: str, refresh: bool = False) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Return (payload or None, meta); meta["status"] is HIT, MISS, REFRESH (caller
+        asked to recompute) or BYPASS (cache disabled), plus the entry's age.
+        """
+        if not self.enabled:
+            return None, {"status": "BYPASS", "age_s": 0}
+        if refresh:
+            self._count("refresh")
+            return None, {"status": "REFRESH", "age_s": 0}
+        try:
+            entry = self.store.get(_NS, self.key(resume_text))
+        except Exception:
+            # A corrupt entry / unreachable Redis degrades to running the pipeline.
+            logger.warning("pipeline cache read failed", exc_info=True)
+            entry = None
+        if not entry:
+            self._count("miss")
+            return None, {"status": "MISS", "age_s": 0}
+        self._count("hit")
+        return entry["payload"], {"status": "HIT", "age_s": max(0.0, self._now() - float(entry["stored_at"]))}
+
+    def store_result(self, resume_text: str, payload: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        try:
+            self.store.set(_NS, self.key(resume_text), {"payload": payload, "stored_at": self._now()}, ttl_s=self.ttl_s)
+            self.store.trim(_NS, self.max_entries)
+        except Exception:
+            # A full disk / unreachable Redis must not fail a pipeline run that already succeeded.
+            logger.warning("pipeline cache write failed", exc_info=True)
+            return
+        self._count("stored")
+
+    def invalidate(self, resume_text: str) -> None:
+        self.store.delete(_NS, self.key(resume_text))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._stats)
+        lookups = counts["hit"] + counts["miss"]
+        return {
+            "enabled": self.enabled,
+            "ttl_s": self.ttl_s,
+            "max_entries": self.max_entries,
+            "hit_ratio": round(counts["hit"] / lookups, 3) if lookups else None,
+            **counts,
+        }
+
+
+def pipeline_cache_from_env(store: SharedState, version: Callable[[], str]) -> PipelineResultCache:
+    return PipelineResultCache(
+        store,
+        version,
+        ttl_s=float(os.getenv("PIPELINE_CACHE_TTL_S", "21600") or "21600"),
+        max_entries=int(os.getenv("PIPELINE_CACHE_MAX_ENTRIES", "500") or "500"),
+        enabled=os.getenv("PIPELINE_CACHE_ENABLED", "1").strip().lower() in {"1", "true", "yes", "on"},
+    )
@@ -0,0 +1,285 @@
+"""
+简历处理异步任务（submit / poll / subscribe）
+
+`/api/process` keeps the HTTP request open for the whole multi-call LLM
+pipeline, which proxies cut off and which pins a worker slot per user.
+`ProcessJobRunner.submit` instead stores a job record and returns its id at
+once; the pipeline runs in a background task that holds an `AdmissionController`
+slot (so the controller's concurrency cap is the worker pool size and its lanes
+still put paid users first). Every state change is written to the job record
+and published as an event, so:
+
+  - `get(job_id)` polls the record (status, progress, queue position, result)
+  - `events(job_id)` yields the events for SSE / WebSocket subscribers, on any
+    worker when SHARED_STATE_BACKEND is shared
+
+Records live in the shared state backend when it is shared, otherwise in a
+small SQLite file so results survive a restart. The worker that owns a queued
+or running job refreshes its `heartbeat_at`; a record whose heartbeat is older
+than 4 heartbeats (its worker died or restarted) is reported as failed with
+error "interrupted" instead of running forever. Store writes go through a
+thread so SQLite / Redis I/O never blocks the event loop.
+
+Env:
+  - PROCESS_JOBS_DB_PATH: default data/process_jobs.db (next to APP_DATA_DB_PATH)
+  - PROCESS_JOB_TTL_S: how long finished records are kept, default 86400
+  - PROCESS_JOB_HEARTBEAT_S: owner heartbeat interval, default 15
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from app.core.admission import FREE, AdmissionController
+from app.core.performance import metrics
+from app.core.shared_state import WORKER_ID, SharedState, SQLiteState
+
+logger = logging.getLogger("ai_job_helper")
+
+_NS = "process_jobs"
+_CHANNEL = "process_jobs"
+TERMINAL = {"succeeded", "failed"}
+
+ProgressFn = Callable[[int, str, Optional[str]], Awaitable[None]]
+ExecuteFn = Callable[..., Awaitable[Dict[str, Any]]]
+
+
+def _progress(step: int, message: str, agent: Optional[str] = None) -> Dict[str, Any]:
+    return {"step": step, "total_steps": 5, "percentage": round(step / 5 * 100), "message": message, "agent": agent}
+
+
+def _default_db_path() -> str:
+    base = os.path.dirname(os.getenv("APP_DATA_DB_PATH", "data/app_data.db")) or "data"
+    return os.getenv("PROCESS_JOBS_DB_PATH", "").strip() or os.path.join(base, "process_jobs.db")
+
+
+def default_job_state(shared: SharedState) -> SharedState:
+    """Persist records in the shared backend when there is one, else in a private SQLite file."""
+    return shared if shared.shared else SQLiteState(_default_db_path())
+
+
+class ProcessJobRunner:
+    """
+    `execute(resume_text, progress, **options)` runs the pipeline and returns the
+    response payload; `progress(step, message, agent)` reports steps 1..5.
+    """
+
+    def __init__(
+        self,
+        execute: ExecuteFn,
+        admission: AdmissionController,
+        bus: SharedState,
+        store: Optional[SharedState] = None,
+        ttl_s: Optional[float] = None,
+        heartbeat_s: Optional[float] = None,
+    ):
+        self.execute = execute
+        self.admission = admission
+        self.bus = bus
+        self._store = store
+        self.ttl_s = float(ttl_s if ttl_s is not None else os.getenv("PROCESS_JOB_TTL_S", "86400") or "86400")
+        self.heartbeat_s = float(
+            heartbeat_s if heartbeat_s is not None else os.getenv("PROCESS_JOB_HEARTBEAT_S", "15") or "15"
+        )
+        self.stale_s = 4 * self.heartbeat_s
+        self._tasks: Dict[str, "asyncio.Task[None]"] = {}
+        # Live records of the jobs this worker owns (queued or running here).
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._write_locks: Dict[str, asyncio.Lock] = {}
+        self._heartbeat_task: Optional["asyncio.Task[None]"] = None
+        self._listeners: Dict[str, List["asyncio.Queue[Dict[str, Any]]"]] = {}
+        self._unsubscribe: Optional[Callable[[], None]] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    # -- records -------------------------------------------------------------------
+
+    @property
+    def store(self) -> SharedState:
+        # Opened on first use so importing the app does not create the SQLite file.
+        if self._store is None:
+            self._store = default_job_state(self.bus)
+        return self._store
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """The stored record (blocking I/O: call via `asyncio.to_thread` from async code)."""
+        record = self.store.get(_NS, job_id)
+        if record and record.get("status") not in TERMINAL and job_id not in self._records:
+            seen = float(record.get("heartbeat_at") or record.get("updated_at") or 0)
+            if time.time() - seen > self.stale_s:
+                # The owning worker stopped heartbeating: it died or restarted mid-run.
+                now = time.time()
+                record.update(status="failed", error="interrupted", finished_at=now, updated_at=now)
+                self._persist(record, "status")
+                metrics.inc("process_jobs_total", lane=record.get("lane") or FREE, result="interrupted")
+        return record
+
+    def _persist(self, record: Dict[str, Any], event: Optional[str] = None) -> None:
+        self.store.set(_NS, record["job_id"], record, ttl_s=self.ttl_s)
+        if event:
+            payload = {k: v for k, v in record.items() if k != "result"}
+            self.bus.publish(_CHANNEL, {"job_id": record["job_id"], "event": event, "job": payload})
+
+    async def _write(self, record: Dict[str, Any], event: Optional[str] = None) -> None:
+        """Persist a snapshot off the loop; writes of one job are applied in order."""
+        snapshot = dict(record)
+        lock = self._write_locks.setdefault(record["job_id"], asyncio.Lock())
+        async with lock:
+            await asyncio.to_thread(self._persist, snapshot, event)
+
+    async def _update(self, record: Dict[str, Any], event: str, **fields: Any) -> None:
+        """Only the task running a job writes its record, so read-modify-write is safe."""
+        now = time.time()
+        record.update(fields, updated_at=now, heartbeat_at=now)
+        await self._write(record, event)
+
+    async def _heartbeat_loop(self) -> None:
+        while self._records:
+            await asyncio.sleep(self.heartbeat_s)
+            now = time.time()
+            for record in list(self._records.values()):
+                record["heartbeat_at"] = now
+                try:
+                    await self._write(record)
+                except Exception:
+                    logger.warning("process job heartbeat failed job_id=%s", record["job_id"], exc_info=True)
+        self._heartbeat_task = None
+
+    # -- submit / run ----------------------------------------------------------------
+
+    async def submit(
+        self,
+        resume_text: str,
+        lane: str = FREE,
+        meta: Optional[Dict[str, Any]] = None,
+        result: Optional[Dict[str, Any]] = None,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Create a job and start it; raises `AdmissionRejected` when the queue cannot
+        take it. With `result` (an already known answer, e.g. a pipeline cache hit)
+        the job is recorded as succeeded without queueing. `options` are passed to
+        `execute` as keyword arguments (e.g. refresh=True).
+        """
+        eta_s = self.admission.check(lane) if result is None else 0.0
+        now = time.time()
+        record: Dict[str, Any] = {
+            "job_id": uuid.uuid4().hex,
+            "status": "queued",
+            "lane": lane,
+            "worker": WORKER_ID,
+            "created_at": now,
+            "updated_at": now,
+            "started_at": None,
+            "finished_at": None,
+            "queue": {"position": None, "eta_s": round(eta_s, 1)},
+            "progress": _progress(0, ""),
+            "error": None,
+            "meta": meta or {},
+            "heartbeat_at": now,
+        }
+        if result is not None:
+            record.update(status="succeeded", started_at=now, finished_at=now, progress=_progress(5, "完成"), result=result)
+            await self._write(record)
+            self._write_locks.pop(record["job_id"], None)
+            metrics.inc("process_jobs_total", lane=lane, result="cached")
+            return record
+        job_id = record["job_id"]
+        self._records[job_id] = record
+        await self._write(record)
+        metrics.inc("process_jobs_total", lane=lane, result="submitted")
+        self._tasks[job_id] = asyncio.ensure_future(self._run(record, resume_text, options or {}))
+        if self._heartbeat_task is None:
+            self._heartbeat_task = asyncio.ensure_future(self._heartbeat_loop())
+        return dict(record)
+
+    async def _run(self, record: Dict[str, Any], resume_text: str, options: Dict[str, Any]) -> None:
+        job_id = record["job_id"]
+
+        async def on_position(position: int, eta_s: float) -> None:
+            if record["status"] == "queued":
+                await self._update(record, "queue", queue={"position": position, "eta_s": round(eta_s, 1)})
+
+        async def on_progress(step: int, message: str, agent: Optional[str] = None) -> None:
+            await self._update(record, "progress", progress=_progress(step, message, agent))
+
+        try:
+            async with self.admission.slot(record["lane"], on_position=on_position):
+                await self._update(record, "status", status="running", started_at=time.time(), queue={"position": 0, "eta_s": 0})
+                result = await self.execute(resume_text, on_progress, **options)
+            await self._update(
+                record, "status", status="succeeded", finished_at=time.time(), progress=_progress(5, "完成"), result=result
+            )
+            metrics.inc("process_jobs_total", lane=record["lane"], result="succeeded")
+        except asyncio.CancelledError:
+            record.update(status="failed", finished_at=time.time(), error="cancelled")
+            self._persist(record, "status")  # the loop may be shutting down: write inline
+            raise
+        except Exception as e:
+            logger.exception("process job failed job_id=%s", job_id)
+            await self._update(record, "status", status="failed", finished_at=time.time(), error=str(e)[:500])
+            metrics.inc("process_jobs_total", lane=record["lane"], result="failed")
+        finally:
+            self._tasks.pop(job_id, None)
+            self._records.pop(job_id, None)
+            self._write_locks.pop(job_id, None)
+
+    # -- subscribe -----------------------------------------------------------------
+
+    def _ensure_subscribed(self) -> None:
+        if self._unsubscribe is None:
+            self._loop = asyncio.get_running_loop()
+            self._unsubscribe = self.bus.subscribe(_CHANNEL, self._on_message)
+
+    def _on_message(self, message: Dict[str, Any]) -> None:
+        queues = self._listeners.get(str(message.get("job_id") or ""))
+        if queues and self._loop is not None:
+            for q in list(queues):
+                self._loop.call_soon_threadsafe(q.put_nowait, message)
+
+    async def events(self, job_id: str, heartbeat_s: float = 15.0) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Current snapshot first, then every update until the job finishes. Yields
+        `{"event": "heartbeat"}` when nothing happened for `heartbeat_s`.
+        """
+        self._ensure_subscribed()
+        q: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+        self._listeners.setdefault(job_id, []).append(q)
+        try:
+            record = await asyncio.to_thread(self.get, job_id)
+            if record is None:
+                return
+            yield {"job_id": job_id, "event": "snapshot", "job": record}
+            if record.get("status") in TERMINAL:
+                return
+            while True:
+                try:
+                    message = await asyncio.wait_for(q.get(), timeout=heartbeat_s)
+                except asyncio.TimeoutError:
+                    # Also notices a job whose owner died (get() marks it interrupted).
+                    record = await asyncio.to_thread(self.get, job_id)
+                    if record is None or record.get("status") in TERMINAL:
+                        yield {"job_id": job_id, "event": "done", "job": record}
+                        return
+                    yield {"job_id": job_id, "event": "heartbeat"}
+                    continue
+                job = message.get("job") or {}
+                if job.get("status") in TERMINAL:
+                    # The published copy leaves out the result; send the stored record.
+                    stored = await asyncio.to_thread(self.get, job_id)
+                    yield {"job_id": job_id, "event": "done", "job": stored or job}
+                    return
+                yield message
+        finally:
+            queues = self._listeners.get(job_id) or []
+            if q in queues:
+                queues.remove(q)
+            if not queues:
+                self._listeners.pop(job_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"running_here": len(self._tasks), "subscribed_jobs": len(self._listeners)}
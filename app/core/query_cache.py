@@ -0,0 +1,219 @@
+"""
+岗位搜索结果缓存（stale-while-revalidate）
+
+Identical searches are common (`/api/process` seeds one from the top skills of
+every resume). `SearchResultCache` keys results by a normalized query
+(`search_cache_key`: case-folded, de-duplicated, sorted keywords + canonical
+city + the options that change the result) and keeps them for a TTL chosen by
+the provider that answered (crawler cache results go stale faster than a Baidu
+scrape). Past the TTL the old result is still served for `stale_s` while one
+background thread refreshes it; empty results are cached briefly (negative
+caching) so a query with no jobs does not hammer every fallback provider.
+
+Env:
+  - SEARCH_CACHE_ENABLED: default on
+  - SEARCH_CACHE_TTLS: per-provider TTLs, e.g. "cloud=60,baidu=900" (defaults below)
+  - SEARCH_CACHE_DEFAULT_TTL_S: default 600
+  - SEARCH_CACHE_NEGATIVE_TTL_S: default 60
+  - SEARCH_CACHE_STALE_S: default 1800
+  - SEARCH_CACHE_MAX_ENTRIES: default 1000
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from app.core.performance import metrics
+
+logger = logging.getLogger("ai_job_helper")
+
+DEFAULT_PROVIDER_TTLS: Dict[str, float] = {
+    # Crawler pushes replace the cache every few minutes; uploads also invalidate it.
+    "cloud": 60.0,
+    "enterprise_api": 300.0,
+    "cn_portal": 3600.0,
+}
+
+_CITY_ALIASES = {
+    "beijing": "北京",
+    "shanghai": "上海",
+    "shenzhen": "深圳",
+    "guangzhou": "广州",
+    "hangzhou": "杭州",
+    "chengdu": "成都",
+    "wuhan": "武汉",
+    "nanjing": "南京",
+    "xian": "西安",
+    "suzhou": "苏州",
+}
+_ANYWHERE = {"", "全国", "不限", "any", "anywhere", "china", "中国"}
+
+
+def canonical_city(location: Optional[str]) -> str:
+    loc = re.sub(r"\s+", "", (location or "")).casefold()
+    if loc in _ANYWHERE:
+        return ""
+    for suffix in ("特别行政区", "市"):
+        if loc.endswith(suffix) and len(loc) > len(suffix) + 1:
+            loc = loc[: -len(suffix)]
+            break
+    return _CITY_ALIASES.get(loc, loc)
+
+
+def search_cache_key(keywords: Iterable[str], location: Optional[str], limit: int, **options: Any) -> str:
+    kws = sorted({k.strip().casefold() for k in (keywords or []) if k and k.strip()})
+    opts = ",".join(f"{k}={options[k]}" for k in sorted(options) if options[k] not in (None, "", False))
+    return f"{'|'.join(kws)}@{canonical_city(location)}#{int(limit)}{';' + opts if opts else ''}"
+
+
+def _parse_ttls(raw: str) -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for part in (raw or "").split(","):
+        name, _, value = part.partition("=")
+        try:
+            if name.strip():
+                out[name.strip().lower()] = float(value)
+        except ValueError:
+            continue
+    return out
+
+
+class _Entry:
+    __slots__ = ("payload", "stored_at", "fresh_until", "stale_until", "refreshing")
+
+    def __init__(self, payload: Dict[str, Any], stored_at: float, fresh_until: float, stale_until: float):
+        self.payload = payload
+        self.stored_at = stored_at
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+        self.refreshing = False
+
+
+class SearchResultCache:
+    """Bounded LRU of search payloads (`{"jobs": [...], "provider_mode": ...}`)."""
+
+    def __init__(
+        self,
+        provider_ttls: Optional[Dict[str, float]] = None,
+        default_ttl_s: float = 600.0,
+        negative_ttl_s: float = 60.0,
+        stale_s: float = 1800.0,
+        max_entries: int = 1000,
+        enabled: bool = True,
+        now_fn: Optional[Callable[[], float]] = None,
+    ):
+        self.provider_ttls = {**DEFAULT_PROVIDER_TTLS, **(provider_ttls or {})}
+        self.default_ttl_s = float(default_ttl_s)
+        self.negative_ttl_s = float(negative_ttl_s)
+        self.stale_s = max(0.0, float(stale_s))
+        self.max_entries = max(1, int(max_entries))
+        self.enabled = enabled
+        self._now = now_fn or time.monotonic
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+
+    def ttl_for(self, payload: Dict[str, Any]) -> float:
+        if not payload.get("jobs"):
+            return self.negative_ttl_s
+        mode = str(payload.get("provider_mode") or "").lower()
+        return float(self.provider_ttls.get(mode, self.default_ttl_s))
+
+    def _store(self, key: str, payload: Dict[str, Any]) -> _Entry:
+        now = self._now()
+        ttl = self.ttl_for(payload)
+        # Negative entries are never served stale: once they expire the query is retried.
+        stale = self.stale_s if payload.get("jobs") else 0.0
+        entry = _Entry(payload, now, now + ttl, now + ttl + stale)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def _meta(self, status: str, entry: Optional[_Entry]) -> Dict[str, Any]:
+        if entry is None:
+            return {"status": status, "age_s": 0.0, "ttl_s": 0.0}
+        now = self._now()
+        return {
+            "status": status,
+            "age_s": round(max(0.0, now - entry.stored_at), 1),
+            "ttl_s": round(max(0.0, entry.fresh_until - now), 1),
+        }
+
+    def _refresh(self, key: str, loader: Callable[[], Dict[str, Any]]) -> None:
+        try:
+            self._store(key, loader())
+        except Exception as e:
+            logger.warning("search cache refresh failed key=%s err=%s", key[:120], e)
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.refreshing = False
+
+    def get_or_load(
+        self, key: str, loader: Callable[[], Dict[str, Any]], refresh_loader: Optional[Callable[[], Dict[str, Any]]] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Return (payload, meta); meta["status"] is HIT, STALE, NEGATIVE (cached empty
+        result), MISS or BYPASS. `refresh_loader` (default `loader`) runs in a background
+        thread for STALE hits, so it must not depend on the request (no progress callbacks).
+        """
+        if not self.enabled:
+            return loader(), self._meta("BYPASS", None)
+        now = self._now()
+        kick = False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now >= entry.stale_until:
+                self._entries.pop(key, None)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if now >= entry.fresh_until and not entry.refreshing:
+                    entry.refreshing = kick = True
+        if entry is not None:
+            if now < entry.fresh_until:
+                status = "HIT" if entry.payload.get("jobs") else "NEGATIVE"
+            else:
+                status = "STALE"
+            if kick:
+                threading.Thread(
+                    target=self._refresh, args=(key, refresh_loader or loader), name="search-cache-refresh", daemon=True
+                ).start()
+            metrics.inc("cache_requests_total", cache="search_results", result=status.lower())
+            return entry.payload, self._meta(status, entry)
+
+        payload = loader()
+        entry = self._store(key, payload)
+        metrics.inc("cache_requests_total", cache="search_results", result="miss")
+        return payload, self._meta("MISS", entry)
+
+    def invalidate(self, prefix: str = "") -> int:
+        """Drop every entry whose key starts with `prefix` (all entries by default)."""
+        with self._lock:
+            keys = [k for k in self._entries if k.startswith(prefix)]
+            for k in keys:
+                self._entries.pop(k, None)
+        return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries, "enabled": self.enabled}
+
+
+def search_cache_from_env() -> SearchResultCache:
+    return SearchResultCache(
+        provider_ttls=_parse_ttls(os.getenv("SEARCH_CACHE_TTLS", "")),
+        default_ttl_s=float(os.getenv("SEARCH_CACHE_DEFAULT_TTL_S", "600") or "600"),
+        negative_ttl_s=float(os.getenv("SEARCH_CACHE_NEGATIVE_TTL_S", "60") or "60"),
+        stale_s=float(os.getenv("SEARCH_CACHE_STALE_S", "1800") or "1800"),
+        max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1000") or "1000"),
+        enabled=os.getenv("SEARCH_CACHE_ENABLED", "1").strip().lower() in {"1", "true", "yes", "on"},
+    )
@@ -4,10 +4,13 @@
 """
 
 import asyncio
+import logging
 from typing import Dict, List, Callable
 from datetime import datetime
 import json
 
+logger = logging.getLogger("ai_job_helper")
+
 class RealtimeProgressTracker:
     """实时进度追踪器"""
     
@@ -23,6 +26,32 @@ class RealtimeProgressTracker:
             "start_time": None,
             "current_agent": None
         }
+        # 多 worker：通过共享状态 pub/sub 转发广播（见 attach）
+        self._state = None
+        self._loop = None
+        self._channel = "progress"
+        self._origin = ""
+    
+    def attach(self, state, loop, channel: str = "progress", origin: str = ""):
+        """
+        Relay every broadcast through `state` pub/sub so WebSockets held by other
+        workers receive it too; messages from other workers are delivered to the
+        local sockets on `loop`.
+        """
+        self._state = state
+        self._loop = loop
+        self._channel = channel
+        self._origin = origin or f"{id(self)}"
+        return state.subscribe(channel, self._on_remote)
+    
+    def _on_remote(self, message: Dict):
+        if message.get("origin") == self._origin:
+            return
+        progress = message.get("progress")
+        if isinstance(progress, dict):
+            self.current_progress = progress
+        if self._loop is not None and self.connections:
+            asyncio.run_coroutine_threadsafe(self._send_local(message.get("data") or {}), self._loop)
     
     async def connect(self, websocket):
         """添加WebSocket连接"""
@@ -62,6 +91,19 @@ class RealtimeProgressTracker:
             "data": ai_msg
         })
     
+    async def queue_position(self, position: int, eta_s: float, lane: str = "", client_id: str = ""):
+        """排队位置（/api/process 准入控制）；client_id 由前端随请求传入，用于区分自己的请求"""
+        await self.broadcast({
+            "type": "queue",
+            "data": {
+                "position": position,
+                "eta_s": round(eta_s, 1),
+                "lane": lane,
+                "client_id": client_id,
+                "timestamp": datetime.now().isoformat()
+            }
+        })
+    
     async def complete(self):
         """完成处理"""
         self.current_progress.update({
@@ -84,6 +126,16 @@ class RealtimeProgressTracker:
     
     async def broadcast(self, data: Dict):
         """广播消息到所有连接"""
+        if self._state is not None:
+            try:
+                self._state.publish(
+                    self._channel, {"origin": self._origin, "data": data, "progress": self.current_progress}
+                )
+            except Exception:
+                logger.exception("progress publish failed")
+        await self._send_local(data)
+    
+    async def _send_local(self, data: Dict):
         if not self.connections:
             return
         
@@ -0,0 +1,613 @@
+"""
+跨 worker 共享状态 + 进度事件 pub/sub
+
+Module-level dicts in `web_app` (recent search results, auto-apply tasks,
+provider job details, the crawler job cache) only exist in the worker that
+wrote them, which pins the app to one uvicorn worker. `get_shared_state()`
+returns a backend chosen by env:
+
+  - SHARED_STATE_BACKEND=memory (default): in-process dicts, same behaviour as before
+  - SHARED_STATE_BACKEND=sqlite: one SQLite file (SHARED_STATE_DB_PATH) shared by
+    every worker on the host; pub/sub by polling a message table
+  - SHARED_STATE_BACKEND=redis: SHARED_STATE_URL (redis:// or any Redis-compatible
+    server), for several nodes; needs the optional `redis` package
+
+Values are JSON documents: what you read is a copy, so write nested changes
+back (`tasks[tid] = task`).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, MutableMapping, Optional, Tuple
+
+from app.core.performance import sqlite_connection_factory
+
+logger = logging.getLogger("ai_job_helper")
+
+Subscriber = Callable[[Dict[str, Any]], None]
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class SharedState:
+    """Namespaced key/value store with optional TTL plus fan-out pub/sub."""
+
+    backend = "base"
+    # True when other processes see the same data (sqlite/redis).
+    shared = False
+
+    def get(self, ns: str, key: str, default: Any = None) -> Any:
+        raise NotImplementedError
+
+    def get_many(self, ns: str, keys: List[str]) -> Dict[str, Any]:
+        """Values for the keys that exist (missing / expired keys are left out)."""
+        missing = object()
+        found = {k: self.get(ns, k, missing) for k in keys}
+        return {k: v for k, v in found.items() if v is not missing}
+
+    def set(self, ns: str, key: str, value: Any, ttl_s: Optional[float] = None) -> None:
+        self.set_many(ns, {key: value}, ttl_s=ttl_s)
+
+    def set_many(self, ns: str, items: Dict[str, Any], ttl_s: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, ns: str, *keys: str) -> None:
+        raise NotImplementedError
+
+    def items(self, ns: str) -> List[Tuple[str, Any]]:
+        raise NotImplementedError
+
+    def count(self, ns: str) -> int:
+        return len(self.items(ns))
+
+    def clear(self, ns: str) -> None:
+        self.delete(ns, *[k for k, _ in self.items(ns)])
+
+    def trim(self, ns: str, max_items: int) -> int:
+        """Drop the least recently written keys beyond `max_items`; returns how many were dropped."""
+        raise NotImplementedError
+
+    def incr(self, ns: str, key: str, amount: int = 1) -> int:
+        raise NotImplementedError
+
+    def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def subscribe(self, channel: str, callback: Subscriber) -> Callable[[], None]:
+        """Call `callback(message)` for every message published on `channel` (from any worker)."""
+        raise NotImplementedError
+
+    def mapping(self, ns: str, ttl_s: Optional[float] = None) -> "SharedMap":
+        return SharedMap(self, ns, ttl_s=ttl_s)
+
+
+class MemoryState(SharedState):
+    """In-process backend (dev / single worker). Values are stored by reference."""
+
+    backend = "memory"
+    shared = False
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # ns -> key -> (value, expires_at or None); dict order = write order
+        self._data: Dict[str, Dict[str, Tuple[Any, Optional[float]]]] = {}
+        self._subs: Dict[str, List[Subscriber]] = {}
+
+    def _bucket(self, ns: str) -> Dict[str, Tuple[Any, Optional[float]]]:
+        return self._data.setdefault(ns, {})
+
+    def get(self, ns: str, key: str, default: Any = None) -> Any:
+        with self._lock:
+            hit = self._bucket(ns).get(key)
+            if hit is None:
+                return default
+            if hit[1] is not None and hit[1] <= time.time():
+                self._bucket(ns).pop(key, None)
+                return default
+            return hit[0]
+
+    def set_many(self, ns: str, items: Dict[str, Any], ttl_s: Optional[float] = None) -> None:
+        expires = time.time() + ttl_s if ttl_s else None
+        with self._lock:
+            bucket = self._bucket(ns)
+            for key, value in items.items():
+                bucket.pop(key, None)
+                bucket[key] = (value, expires)
+
+    def delete(self, ns: str, *keys: str) -> None:
+        with self._lock:
+            bucket = self._bucket(ns)
+            for key in keys:
+                bucket.pop(key, None)
+
+    def items(self, ns: str) -> List[Tuple[str, Any]]:
+        now = time.time()
+        with self._lock:
+            return [(k, v) for k, (v, exp) in self._bucket(ns).items() if exp is None or exp > now]
+
+    def count(self, ns: str) -> int:
+        return len(self.items(ns))
+
+    def trim(self, ns: str, max_items: int) -> int:
+        with self._lock:
+            bucket = self._bucket(ns)
+            extra = len(bucket) - max(0, int(max_items))
+            for key in list(bucket)[: max(0, extra)]:
+                bucket.pop(key, None)
+            return max(0, extra)
+
+    def incr(self, ns: str, key: str, amount: int = 1) -> int:
+        with self._lock:
+            value = int(self.get(ns, key, 0) or 0) + int(amount)
+            self._bucket(ns)[key] = (value, None)
+            return value
+
+    def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        with self._lock:
+            subs = list(self._subs.get(channel, []))
+        for cb in subs:
+            try:
+                cb(message)
+            except Exception:
+                logger.exception("shared_state subscriber failed channel=%s", channel)
+
+    def subscribe(self, channel: str, callback: Subscriber) -> Callable[[], None]:
+        with self._lock:
+            self._subs.setdefault(channel, []).append(callback)
+
+        def _unsubscribe() -> None:
+            with self._lock:
+                if callback in self._subs.get(channel, []):
+                    self._subs[channel].remove(callback)
+
+        return _unsubscribe
+
+
+class SQLiteState(SharedState):
+    """
+    Host-local backend: every worker opens the same WAL-mode file.
+    Pub/sub appends to a message table; one poller thread per process fans
+    new rows out to local subscribers every `poll_s`.
+    """
+
+    backend = "sqlite"
+    shared = True
+
+    def __init__(self, db_path: str, poll_s: float = 0.2, message_retention_s: float = 300.0):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.poll_s = max(0.02, float(poll_s))
+        self.message_retention_s = max(10.0, float(message_retention_s))
+        self._lock = threading.Lock()
+        self._subs: Dict[str, List[Subscriber]] = {}
+        self._poller: Optional[threading.Thread] = None
+        self._last_message_id = 0
+        self._init_db()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path, timeout=10, check_same_thread=False, factory=sqlite_connection_factory("shared_state")
+        )
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self) -> None:
+        conn = self._conn()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS kv (
+                    ns TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value_json TEXT NOT NULL,
+                    expires_at REAL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (ns, key)
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_kv_updated ON kv(ns, updated_at)")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    channel TEXT NOT NULL,
+                    payload_json TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get(self, ns: str, key: str, default: Any = None) -> Any:
+        conn = self._conn()
+        try:
+            row = conn.execute(
+                "SELECT value_json FROM kv WHERE ns = ? AND key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (ns, key, time.time()),
+            ).fetchone()
+        finally:
+            conn.close()
+        return default if row is None else json.loads(row["value_json"])
+
+    def get_many(self, ns: str, keys: List[str]) -> Dict[str, Any]:
+        keys = list(dict.fromkeys(keys))
+        out: Dict[str, Any] = {}
+        conn = self._conn()
+        try:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i : i + 500]
+                rows = conn.execute(
+                    f"""
+                    SELECT key, value_json FROM kv
+                    WHERE ns = ? AND key IN ({','.join('?' * len(chunk))}) AND (expires_at IS NULL OR expires_at > ?)
+                    """,
+                    (ns, *chunk, time.time()),
+                ).fetchall()
+                out.update({r["key"]: json.loads(r["value_json"]) for r in rows})
+        finally:
+            conn.close()
+        return out
+
+    def set_many(self, ns: str, items: Dict[str, Any], ttl_s: Optional[float] = None) -> None:
+        if not items:
+            return
+        now = time.time()
+        expires = now + ttl_s if ttl_s else None
+        conn = self._conn()
+        try:
+            conn.executemany(
+                """
+                INSERT INTO kv(ns, key, value_json, expires_at, updated_at) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(ns, key) DO UPDATE SET
+                    value_json = excluded.value_json, expires_at = excluded.expires_at, updated_at = excluded.updated_at
+                """,
+                [(ns, k, json.dumps(v, ensure_ascii=False), expires, now) for k, v in items.items()],
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def delete(self, ns: str, *keys: str) -> None:
+        if not keys:
+            return
+        conn = self._conn()
+        try:
+            conn.executemany("DELETE FROM kv WHERE ns = ? AND key = ?", [(ns, k) for k in keys])
+            conn.commit()
+        finally:
+            conn.close()
+
+    def items(self, ns: str) -> List[Tuple[str, Any]]:
+        conn = self._conn()
+        try:
+            rows = conn.execute(
+                "SELECT key, value_json FROM kv WHERE ns = ? AND (expires_at IS NULL OR expires_at > ?) ORDER BY updated_at, rowid",
+                (ns, time.time()),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [(r["key"], json.loads(r["value_json"])) for r in rows]
+
+    def count(self, ns: str) -> int:
+        conn = self._conn()
+        try:
+            return int(
+                conn.execute(
+                    "SELECT COUNT(*) FROM kv WHERE ns = ? AND (expires_at IS NULL OR expires_at > ?)", (ns, time.time())
+                ).fetchone()[0]
+            )
+        finally:
+            conn.close()
+
+    def clear(self, ns: str) -> None:
+        conn = self._conn()
+        try:
+            conn.execute("DELETE FROM kv WHERE ns = ?", (ns,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def trim(self, ns: str, max_items: int) -> int:
+        now = time.time()
+        conn = self._conn()
+        try:
+            cur = conn.execute(
+                """
+                DELETE FROM kv WHERE ns = ? AND (
+                    (expires_at IS NOT NULL AND expires_at <= ?)
+                    OR key NOT IN (
+                        SELECT key FROM kv WHERE ns = ? AND (expires_at IS NULL OR expires_at > ?)
+                        ORDER BY updated_at DESC, rowid DESC LIMIT ?
+                    )
+                )
+                """,
+                (ns, now, ns, now, max(0, int(max_items))),
+            )
+            conn.commit()
+            return int(cur.rowcount or 0)
+        finally:
+            conn.close()
+
+    def incr(self, ns: str, key: str, amount: int = 1) -> int:
+        conn = self._conn()
+        try:
+            rows = conn.execute(
+                """
+                INSERT INTO kv(ns, key, value_json, expires_at, updated_at) VALUES (?, ?, ?, NULL, ?)
+                ON CONFLICT(ns, key) DO UPDATE SET
+                    value_json = CAST(CAST(kv.value_json AS INTEGER) + ? AS TEXT), updated_at = excluded.updated_at
+                RETURNING value_json
+                """,
+                (ns, key, str(int(amount)), time.time(), int(amount)),
+            ).fetchall()
+            conn.commit()
+            return int(rows[0]["value_json"])
+        finally:
+            conn.close()
+
+    def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        conn = self._conn()
+        try:
+            conn.execute(
+                "INSERT INTO messages(channel, payload_json, created_at) VALUES (?, ?, ?)",
+                (channel, json.dumps(message, ensure_ascii=False), time.time()),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def subscribe(self, channel: str, callback: Subscriber) -> Callable[[], None]:
+        with self._lock:
+            self._subs.setdefault(channel, []).append(callback)
+            if self._poller is None:
+                conn = self._conn()
+                try:
+                    # Only deliver messages published after the first subscription.
+                    self._last_message_id = int(conn.execute("SELECT COALESCE(MAX(id), 0) FROM messages").fetchone()[0])
+                finally:
+                    conn.close()
+                self._poller = threading.Thread(target=self._poll_loop, name="shared-state-pubsub", daemon=True)
+                self._poller.start()
+
+        def _unsubscribe() -> None:
+            with self._lock:
+                if callback in self._subs.get(channel, []):
+                    self._subs[channel].remove(callback)
+
+        return _unsubscribe
+
+    def poll_once(self) -> int:
+        with self._lock:
+            channels = [c for c, subs in self._subs.items() if subs]
+        if not channels:
+            return 0
+        conn = self._conn()
+        try:
+            rows = conn.execute(
+                f"""
+                SELECT id, channel, payload_json FROM messages
+                WHERE id > ? AND channel IN ({','.join('?' * len(channels))})
+                ORDER BY id
+                """,
+                (self._last_message_id, *channels),
+            ).fetchall()
+            if rows:
+                self._last_message_id = int(rows[-1]["id"])
+            if self._last_message_id % 500 < len(rows):
+                conn.execute("DELETE FROM messages WHERE created_at < ?", (time.time() - self.message_retention_s,))
+                conn.commit()
+        finally:
+            conn.close()
+        for row in rows:
+            with self._lock:
+                subs = list(self._subs.get(row["channel"], []))
+            message = json.loads(row["payload_json"])
+            for cb in subs:
+                try:
+                    cb(message)
+                except Exception:
+                    logger.exception("shared_state subscriber failed channel=%s", row["channel"])
+        return len(rows)
+
+    def _poll_loop(self) -> None:
+        while True:
+            try:
+                self.poll_once()
+            except Exception:
+                logger.exception("shared_state pubsub poll failed")
+            time.sleep(self.poll_s)
+
+
+class RedisState(SharedState):
+    """Multi-node backend over any Redis-compatible server (`pip install redis`)."""
+
+    backend = "redis"
+    shared = True
+
+    def __init__(self, url: str, prefix: str = "ajh:"):
+        try:
+            import redis  # type: ignore
+        except ImportError as e:
+            raise RuntimeError("SHARED_STATE_BACKEND=redis requires the `redis` package") from e
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self._pubsub = None
+        self._subs: Dict[str, List[Subscriber]] = {}
+        self._lock = threading.Lock()
+
+    def _hash(self, ns: str) -> str:
+        return f"{self.prefix}{ns}"
+
+    def _order(self, ns: str) -> str:
+        return f"{self.prefix}{ns}:order"
+
+    def get(self, ns: str, key: str, default: Any = None) -> Any:
+        raw = self._redis.get(f"{self._hash(ns)}:{key}")
+        return default if raw is None else json.loads(raw)
+
+    def get_many(self, ns: str, keys: List[str]) -> Dict[str, Any]:
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        values = self._redis.mget([f"{self._hash(ns)}:{k}" for k in keys])
+        return {k: json.loads(v) for k, v in zip(keys, values) if v is not None}
+
+    def set_many(self, ns: str, items: Dict[str, Any], ttl_s: Optional[float] = None) -> None:
+        if not items:
+            return
+        now = time.time()
+        pipe = self._redis.pipeline()
+        for key, value in items.items():
+            pipe.set(f"{self._hash(ns)}:{key}", json.dumps(value, ensure_ascii=False), ex=int(ttl_s) if ttl_s else None)
+            pipe.zadd(self._order(ns), {key: now})
+        pipe.execute()
+
+    def delete(self, ns: str, *keys: str) -> None:
+        if not keys:
+            return
+        pipe = self._redis.pipeline()
+        pipe.delete(*[f"{self._hash(ns)}:{k}" for k in keys])
+        pipe.zrem(self._order(ns), *keys)
+        pipe.execute()
+
+    def items(self, ns: str) -> List[Tuple[str, Any]]:
+        keys = list(self._redis.zrange(self._order(ns), 0, -1))
+        if not keys:
+            return []
+        values = self._redis.mget([f"{self._hash(ns)}:{k}" for k in keys])
+        expired = [k for k, v in zip(keys, values) if v is None]
+        if expired:
+            self._redis.zrem(self._order(ns), *expired)
+        return [(k, json.loads(v)) for k, v in zip(keys, values) if v is not None]
+
+    def count(self, ns: str) -> int:
+        return int(self._redis.zcard(self._order(ns)))
+
+    def trim(self, ns: str, max_items: int) -> int:
+        extra = self.count(ns) - max(0, int(max_items))
+        if extra <= 0:
+            return 0
+        self.delete(ns, *list(self._redis.zrange(self._order(ns), 0, extra - 1)))
+        return extra
+
+    def incr(self, ns: str, key: str, amount: int = 1) -> int:
+        return int(self._redis.incrby(f"{self._hash(ns)}:{key}", int(amount)))
+
+    def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        self._redis.publish(f"{self.prefix}{channel}", json.dumps(message, ensure_ascii=False))
+
+    def subscribe(self, channel: str, callback: Subscriber) -> Callable[[], None]:
+        full = f"{self.prefix}{channel}"
+        with self._lock:
+            self._subs.setdefault(channel, []).append(callback)
+            if self._pubsub is None:
+                self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            self._pubsub.subscribe(**{full: lambda msg, ch=channel: self._dispatch(ch, msg)})
+            if not getattr(self, "_thread", None):
+                self._thread = self._pubsub.run_in_thread(sleep_time=0.05, daemon=True)
+
+        def _unsubscribe() -> None:
+            with self._lock:
+                if callback in self._subs.get(channel, []):
+                    self._subs[channel].remove(callback)
+
+        return _unsubscribe
+
+    def _dispatch(self, channel: str, msg: Dict[str, Any]) -> None:
+        message = json.loads(msg.get("data") or "{}")
+        with self._lock:
+            subs = list(self._subs.get(channel, []))
+        for cb in subs:
+            try:
+                cb(message)
+            except Exception:
+                logger.exception("shared_state subscriber failed channel=%s", channel)
+
+
+class SharedMap(MutableMapping):
+    """dict-like view of one namespace, so call sites keep `m[key]`, `in`, `.values()`."""
+
+    def __init__(self, state: SharedState, ns: str, ttl_s: Optional[float] = None):
+        self.state = state
+        self.ns = ns
+        self.ttl_s = ttl_s
+
+    def __getitem__(self, key: str) -> Any:
+        missing = object()
+        value = self.state.get(self.ns, key, missing)
+        if value is missing:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.state.get(self.ns, key, default)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.state.set(self.ns, key, value, ttl_s=self.ttl_s)
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self.state.delete(self.ns, key)
+
+    def __contains__(self, key: object) -> bool:
+        missing = object()
+        return self.state.get(self.ns, str(key), missing) is not missing
+
+    def __iter__(self) -> Iterator[str]:
+        return iter([k for k, _ in self.state.items(self.ns)])
+
+    def __len__(self) -> int:
+        return self.state.count(self.ns)
+
+    def items(self) -> List[Tuple[str, Any]]:  # type: ignore[override]
+        return self.state.items(self.ns)
+
+    def values(self) -> List[Any]:  # type: ignore[override]
+        return [v for _, v in self.state.items(self.ns)]
+
+    def update(self, other: Any = (), **kwargs: Any) -> None:  # type: ignore[override]
+        self.state.set_many(self.ns, {**dict(other), **kwargs}, ttl_s=self.ttl_s)
+
+    def clear(self) -> None:
+        self.state.clear(self.ns)
+
+    def trim(self, max_items: int) -> int:
+        return self.state.trim(self.ns, max_items)
+
+
+_shared_state: Optional[SharedState] = None
+_shared_state_lock = threading.Lock()
+
+
+def build_shared_state(backend: str = "", url: str = "", db_path: str = "") -> SharedState:
+    kind = (backend or os.getenv("SHARED_STATE_BACKEND", "memory")).strip().lower() or "memory"
+    if kind == "sqlite":
+        path = db_path or os.getenv("SHARED_STATE_DB_PATH", "").strip() or os.path.join(
+            os.path.dirname(os.getenv("APP_DATA_DB_PATH", "data/app_data.db")) or "data", "shared_state.db"
+        )
+        return SQLiteState(path, poll_s=float(os.getenv("SHARED_STATE_POLL_S", "0.2") or "0.2"))
+    if kind == "redis":
+        return RedisState(url or os.getenv("SHARED_STATE_URL", "redis://127.0.0.1:6379/0"))
+    if kind != "memory":
+        logger.warning("unknown SHARED_STATE_BACKEND=%s, using memory", kind)
+    return MemoryState()
+
+
+def get_shared_state() -> SharedState:
+    global _shared_state
+    if _shared_state is None:
+        with _shared_state_lock:
+            if _shared_state is None:
+                _shared_state = build_shared_state()
+    return _shared_state
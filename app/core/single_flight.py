@@ -0,0 +1,99 @@
+"""
+相同请求合并（single-flight）
+
+When the same resume template or query arrives from many users at once, every
+request would otherwise call the LLM / job provider / parser on its own. A
+single-flight group keys in-flight work by content (`content_key`): the first
+caller ("leader") runs it, identical callers that arrive while it is running
+await the same result (or exception) instead of starting their own. Nothing is
+kept after the call finishes — caching is `query_cache` / `detail_cache`'s job.
+
+Two flavours: `SingleFlight` for coroutines (the work runs as its own task, so
+a cancelled leader does not cancel the waiters) and `ThreadSingleFlight` for
+blocking calls made from worker threads. Results are shared by reference, so
+callers must not mutate them in place.
+
+Metrics: `singleflight_calls_total{group, result="leader"|"coalesced"}`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+from app.core.performance import metrics
+
+T = TypeVar("T")
+
+
+def content_key(*parts: Any) -> str:
+    """Stable digest of JSON-serializable parts (dict order does not matter)."""
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """Coalesces identical coroutine calls within one event loop."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[str, "asyncio.Task[Any]"] = {}
+
+    def _forget(self, key: str, task: "asyncio.Task[Any]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop():
+            metrics.inc("singleflight_calls_total", group=self.name, result="coalesced")
+        else:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+            metrics.inc("singleflight_calls_total", group=self.name, result="leader")
+        return await asyncio.shield(task)
+
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+
+class ThreadSingleFlight:
+    """Coalesces identical blocking calls across threads."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, "Future[Any]"] = {}
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        with self._lock:
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = Future()
+                self._inflight[key] = fut
+        if not leader:
+            metrics.inc("singleflight_calls_total", group=self.name, result="coalesced")
+            return fut.result()
+
+        metrics.inc("singleflight_calls_total", group=self.name, result="leader")
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            fut.set_exception(e)
+            raise
+        with self._lock:
+            self._inflight.pop(key, None)
+        fut.set_result(result)
+        return result
+
+    def inflight(self) -> int:
+        with self._lock:
+            return len(self._inflight)
@@ -0,0 +1,109 @@
+"""
+启动耗时统计 + 懒加载服务
+
+Cold starts on free-tier hosts are dominated by what `web_app` builds at import
+time. `startup_report` records named phases (and each lazy build) so
+`/api/version` can show where the time goes; `LazyService` defers constructing
+a service until its first attribute access.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+class StartupReport:
+    """Ordered phase timings measured from the moment this module was imported."""
+
+    def __init__(self):
+        self._t0 = time.perf_counter()
+        self._last = self._t0
+        self._lock = threading.Lock()
+        self.phases: List[Dict[str, Any]] = []
+        self.lazy: List[Dict[str, Any]] = []
+        self.ready_ms: Optional[float] = None
+
+    def mark(self, name: str) -> float:
+        """Close the phase that started at the previous mark; returns its duration (ms)."""
+        now = time.perf_counter()
+        with self._lock:
+            took = (now - self._last) * 1000
+            self.phases.append({"phase": name, "ms": round(took, 2), "at_ms": round((now - self._t0) * 1000, 2)})
+            self._last = now
+        return took
+
+    def ready(self) -> None:
+        self.mark("app_startup")
+        self.ready_ms = round((time.perf_counter() - self._t0) * 1000, 2)
+
+    def record_lazy(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.lazy.append(
+                {
+                    "service": name,
+                    "ms": round(seconds * 1000, 2),
+                    "at_ms": round((time.perf_counter() - self._t0) * 1000, 2),
+                }
+            )
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "phases": list(self.phases),
+                "import_ms": round(sum(p["ms"] for p in self.phases if p["phase"] != "app_startup"), 2),
+                "ready_ms": self.ready_ms,
+                "lazy_services": list(self.lazy),
+            }
+
+
+startup_report = StartupReport()
+
+
+class LazyService:
+    """
+    Attribute-forwarding proxy that builds `factory()` on first use.
+
+    Call sites keep using the module global (`real_job_service.search_jobs(...)`);
+    only the first access pays the construction cost, which is recorded in
+    `startup_report`.
+    """
+
+    __slots__ = ("_factory", "_name", "_instance", "_lock", "_report")
+
+    def __init__(self, factory: Callable[[], Any], name: str, report: Optional[StartupReport] = None):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+        object.__setattr__(self, "_report", report or startup_report)
+
+    @property
+    def built(self) -> bool:
+        return self._instance is not None
+
+    def get(self) -> Any:
+        inst = self._instance
+        if inst is not None:
+            return inst
+        with self._lock:
+            if self._instance is None:
+                t0 = time.perf_counter()
+                built = self._factory()
+                self._report.record_lazy(self._name, time.perf_counter() - t0)
+                object.__setattr__(self, "_instance", built)
+            return self._instance
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self.get(), item)
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        setattr(self.get(), key, value)
+
+    def __delattr__(self, key: str) -> None:
+        delattr(self.get(), key)
+
+    def __repr__(self) -> str:
+        state = "built" if self.built else "pending"
+        return f"<LazyService {self._name} ({state})>"
@@ -0,0 +1,70 @@
+"""
+后台数据流式导出
+
+Turns a row iterator (e.g. `CommerceService.iter_export`) into CSV or JSONL
+byte chunks for a streaming HTTP response. Rows are buffered only up to
+`flush_bytes`, so exports of any size use constant memory.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+from typing import Any, Dict, Iterable, Iterator, List
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson; charset=utf-8",
+}
+
+
+# Spreadsheet apps evaluate cells starting with these as formulas (CSV injection).
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _cell(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        # Buyer names / notes are user input: a leading quote keeps them literal text.
+        return "'" + value
+    return "" if value is None else value
+
+
+def iter_csv(rows: Iterable[Dict[str, Any]], columns: List[str], flush_bytes: int = 64 * 1024) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    # BOM so Excel opens UTF-8 (Chinese) columns correctly
+    buf.write("\ufeff")
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([_cell(row.get(c)) for c in columns])
+        if buf.tell() >= flush_bytes:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate(0)
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def iter_jsonl(rows: Iterable[Dict[str, Any]], flush_bytes: int = 64 * 1024) -> Iterator[bytes]:
+    parts: List[str] = []
+    size = 0
+    for row in rows:
+        line = json.dumps(row, ensure_ascii=False) + "\n"
+        parts.append(line)
+        size += len(line)
+        if size >= flush_bytes:
+            yield "".join(parts).encode("utf-8")
+            parts, size = [], 0
+    if parts:
+        yield "".join(parts).encode("utf-8")
+
+
+def iter_export_bytes(rows: Iterable[Dict[str, Any]], columns: List[str], fmt: str) -> Iterator[bytes]:
+    if fmt == "csv":
+        return iter_csv(rows, columns)
+    if fmt == "jsonl":
+        return iter_jsonl(rows)
+    raise ValueError("unsupported_export_format")
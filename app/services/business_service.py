@@ -1,11 +1,29 @@
 from __future__ import annotations
 
+import gzip
 import json
 import os
 import sqlite3
 import threading
 from datetime import UTC, datetime, timedelta
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.core.performance import sqlite_connection_factory
+
+
+def _flag(value: Any) -> Optional[int]:
+    """Normalize an `ok`/`passed` payload flag to 1/0 (None when absent or unrecognized)."""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return 1 if value == 1 else (0 if value == 0 else None)
+    if isinstance(value, str):
+        low = value.strip().lower()
+        if low in {"1", "true"}:
+            return 1
+        if low in {"0", "false"}:
+            return 0
+    return None
 
 
 class BusinessService:
@@ -14,11 +32,19 @@ class BusinessService:
     def __init__(self, db_path: Optional[str] = None):
         self.db_path = db_path or os.getenv("APP_DATA_DB_PATH", "data/app_data.db")
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.archive_dir = os.getenv("EVENTS_ARCHIVE_DIR", "").strip() or os.path.join(
+            os.path.dirname(self.db_path) or "data", "archive", "events"
+        )
         self._lock = threading.Lock()
         self._init_db()
 
     def _conn(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=10,
+            check_same_thread=False,
+            factory=sqlite_connection_factory("business"),
+        )
         conn.row_factory = sqlite3.Row
         return conn
 
@@ -26,6 +52,8 @@ class BusinessService:
         with self._lock:
             conn = self._conn()
             try:
+                # Only takes effect on a fresh file; compact_events() converts older DBs once.
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
                 conn.execute(
                     """
                     CREATE TABLE IF NOT EXISTS leads (
@@ -68,10 +96,281 @@ class BusinessService:
                 conn.execute("CREATE INDEX IF NOT EXISTS idx_events_name_time ON events(event_name, created_at)")
                 conn.execute("CREATE INDEX IF NOT EXISTS idx_events_time ON events(created_at)")
                 conn.execute("CREATE INDEX IF NOT EXISTS idx_feedback_time ON feedback(created_at)")
+                self._migrate_event_flags(conn)
+                # 按天/事件预聚合的漏斗计数，写事件时同事务累加，metrics() 只读这张小表
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS event_rollups (
+                        day TEXT NOT NULL,
+                        event_name TEXT NOT NULL,
+                        total INTEGER NOT NULL DEFAULT 0,
+                        ok_count INTEGER NOT NULL DEFAULT 0,
+                        not_passed_count INTEGER NOT NULL DEFAULT 0,
+                        PRIMARY KEY (day, event_name)
+                    )
+                    """
+                )
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS event_archives (
+                        partition TEXT PRIMARY KEY,
+                        path TEXT NOT NULL,
+                        rows INTEGER NOT NULL DEFAULT 0,
+                        first_at TEXT,
+                        last_at TEXT,
+                        archived_at TEXT NOT NULL,
+                        last_id INTEGER
+                    )
+                    """
+                )
+                archive_cols = {str(r["name"]) for r in conn.execute("PRAGMA table_info(event_archives)").fetchall()}
+                if "last_id" not in archive_cols:
+                    # Highest event id committed to each archive; rows past it are an interrupted batch.
+                    conn.execute("ALTER TABLE event_archives ADD COLUMN last_id INTEGER")
+                has_rollups = conn.execute("SELECT 1 FROM event_rollups LIMIT 1").fetchone()
+                has_events = conn.execute("SELECT 1 FROM events LIMIT 1").fetchone()
+                if has_events and not has_rollups:
+                    self._rebuild_rollups(conn)
                 conn.commit()
             finally:
                 conn.close()
 
+    def _migrate_event_flags(self, conn: sqlite3.Connection) -> None:
+        """Promote the `ok`/`passed` payload flags to real columns (backfilled once)."""
+        cols = {str(r["name"]) for r in conn.execute("PRAGMA table_info(events)").fetchall()}
+        if "ok" not in cols:
+            conn.execute("ALTER TABLE events ADD COLUMN ok INTEGER")
+            conn.execute(
+                """
+                UPDATE events SET ok = CASE CAST(json_extract(payload_json, '$.ok') AS TEXT)
+                    WHEN '1' THEN 1 WHEN 'true' THEN 1 WHEN 'True' THEN 1
+                    WHEN '0' THEN 0 WHEN 'false' THEN 0 WHEN 'False' THEN 0
+                END
+                WHERE json_extract(payload_json, '$.ok') IS NOT NULL
+                """
+            )
+        if "passed" not in cols:
+            conn.execute("ALTER TABLE events ADD COLUMN passed INTEGER")
+            conn.execute(
+                """
+                UPDATE events SET passed = CASE CAST(json_extract(payload_json, '$.passed') AS TEXT)
+                    WHEN '1' THEN 1 WHEN 'true' THEN 1 WHEN 'True' THEN 1
+                    WHEN '0' THEN 0 WHEN 'false' THEN 0 WHEN 'False' THEN 0
+                END
+                WHERE json_extract(payload_json, '$.passed') IS NOT NULL
+                """
+            )
+
+    def _rebuild_rollups(self, conn: sqlite3.Connection) -> None:
+        # Days already moved to the archive keep their rollups; only hot days are recomputed.
+        first_day = conn.execute("SELECT MIN(substr(created_at, 1, 10)) FROM events").fetchone()[0]
+        if first_day is None:
+            return  # every event is archived: the rollups are all that is left of them
+        conn.execute("DELETE FROM event_rollups WHERE day >= ?", (first_day,))
+        conn.execute(
+            """
+            INSERT INTO event_rollups(day, event_name, total, ok_count, not_passed_count)
+            SELECT
+                substr(created_at, 1, 10),
+                event_name,
+                COUNT(*),
+                SUM(CASE WHEN ok = 1 THEN 1 ELSE 0 END),
+                SUM(CASE WHEN passed = 0 THEN 1 ELSE 0 END)
+            FROM events
+            GROUP BY substr(created_at, 1, 10), event_name
+            """
+        )
+
+    def rebuild_rollups(self) -> int:
+        """Recompute `event_rollups` from the events table; returns the number of rollup rows."""
+        with self._lock:
+            conn = self._conn()
+            try:
+                self._rebuild_rollups(conn)
+                conn.commit()
+                return self._count(conn, "SELECT COUNT(*) FROM event_rollups")
+            finally:
+                conn.close()
+
+    def compact_events(self, retain_days: int = 30, batch_size: int = 5000, vacuum_pages: int = 2000) -> Dict[str, Any]:
+        """
+        Move events older than `retain_days` (whole UTC days) into monthly
+        gzip JSONL archives, delete them from the hot table and reclaim pages
+        with an incremental vacuum. Rollups are untouched, so metrics keep the
+        full history; `iter_events()` reads archives + hot rows together.
+
+        The lock is taken per batch and the vacuum runs outside it, so event
+        writes interleave with a long compaction. A batch appended to an
+        archive is only committed (rows deleted, `last_id` advanced) after the
+        file is fsynced; if the process dies in between, the next run appends
+        the same rows again and readers drop the duplicates by id.
+        """
+        keep = max(1, int(retain_days or 30))
+        cutoff = (datetime.now(UTC) - timedelta(days=keep)).date().isoformat()
+        os.makedirs(self.archive_dir, exist_ok=True)
+        archived = 0
+        partitions: Dict[str, int] = {}
+        while True:
+            with self._lock:
+                conn = self._conn()
+                try:
+                    rows = conn.execute(
+                        """
+                        SELECT id, event_name, payload_json, created_at
+                        FROM events
+                        WHERE created_at < ?
+                        ORDER BY id ASC
+                        LIMIT ?
+                        """,
+                        (cutoff, max(100, int(batch_size))),
+                    ).fetchall()
+                    if not rows:
+                        break
+                    by_month: Dict[str, List[sqlite3.Row]] = {}
+                    for r in rows:
+                        by_month.setdefault(str(r["created_at"])[:7], []).append(r)
+                    for month, chunk in by_month.items():
+                        path = os.path.join(self.archive_dir, f"events-{month}.jsonl.gz")
+                        # Each batch is appended as its own gzip member; readers see one stream.
+                        with gzip.open(path, "at", encoding="utf-8") as f:
+                            for r in chunk:
+                                f.write(
+                                    json.dumps(
+                                        {
+                                            "id": r["id"],
+                                            "event_name": r["event_name"],
+                                            "payload_json": r["payload_json"],
+                                            "created_at": r["created_at"],
+                                        },
+                                        ensure_ascii=False,
+                                    )
+                                    + "\n"
+                                )
+                            f.flush()
+                            os.fsync(f.fileno())
+                        conn.execute(
+                            """
+                            INSERT INTO event_archives(partition, path, rows, first_at, last_at, archived_at, last_id)
+                            VALUES(?, ?, ?, ?, ?, ?, ?)
+                            ON CONFLICT(partition) DO UPDATE SET
+                                rows = rows + excluded.rows,
+                                first_at = MIN(first_at, excluded.first_at),
+                                last_at = MAX(last_at, excluded.last_at),
+                                archived_at = excluded.archived_at,
+                                last_id = MAX(COALESCE(last_id, 0), excluded.last_id)
+                            """,
+                            (
+                                month,
+                                path,
+                                len(chunk),
+                                chunk[0]["created_at"],
+                                chunk[-1]["created_at"],
+                                datetime.now(UTC).isoformat(),
+                                chunk[-1]["id"],
+                            ),
+                        )
+                        partitions[month] = partitions.get(month, 0) + len(chunk)
+                    conn.execute(
+                        "DELETE FROM events WHERE id <= ? AND created_at < ?",
+                        (rows[-1]["id"], cutoff),
+                    )
+                    conn.commit()
+                    archived += len(rows)
+                finally:
+                    conn.close()
+
+        # SQLite serialises the vacuum against writers itself; our lock is not needed.
+        conn = self._conn()
+        try:
+            if int(conn.execute("PRAGMA auto_vacuum").fetchone()[0]) != 2:
+                # One-off conversion of pre-existing files; later runs vacuum incrementally.
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                conn.execute("VACUUM")
+            conn.execute(f"PRAGMA incremental_vacuum({max(0, int(vacuum_pages))})")
+            hot = self._count(conn, "SELECT COUNT(*) FROM events")
+        finally:
+            conn.close()
+        return {"cutoff": cutoff, "archived": archived, "partitions": partitions, "hot_events": hot}
+
+    def iter_events(
+        self,
+        event_name: str = "",
+        since: str = "",
+        until: str = "",
+        chunk_size: int = 1000,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield events (archived partitions first, then the hot table) in time order."""
+        with self._lock:
+            conn = self._conn()
+            try:
+                archives = conn.execute(
+                    "SELECT partition, path, last_id FROM event_archives ORDER BY partition ASC"
+                ).fetchall()
+            finally:
+                conn.close()
+
+        def wanted(name: str, created_at: str) -> bool:
+            if event_name and name != event_name:
+                return False
+            if since and created_at < since:
+                return False
+            if until and created_at >= until:
+                return False
+            return True
+
+        for a in archives:
+            month = str(a["partition"])
+            if (since and month < since[:7]) or (until and month > until[:7]):
+                continue
+            if not os.path.exists(a["path"]):
+                continue
+            committed = a["last_id"]
+            seen = 0
+            with gzip.open(a["path"], "rt", encoding="utf-8") as f:
+                for line in f:
+                    row = json.loads(line)
+                    rid = int(row["id"])
+                    # Ids are appended in ascending order: a smaller one is a re-archived
+                    # duplicate, one past `last_id` an uncommitted batch still in the hot table.
+                    if rid <= seen or (committed is not None and rid > int(committed)):
+                        continue
+                    seen = rid
+                    if wanted(row["event_name"], row["created_at"]):
+                        row["payload"] = json.loads(row.pop("payload_json") or "{}")
+                        yield row
+
+        sql = "SELECT id, event_name, payload_json, created_at FROM events WHERE id > ?"
+        params: List[Any] = []
+        if event_name:
+            sql += " AND event_name = ?"
+            params.append(event_name)
+        if since:
+            sql += " AND created_at >= ?"
+            params.append(since)
+        if until:
+            sql += " AND created_at < ?"
+            params.append(until)
+        sql += " ORDER BY id ASC LIMIT ?"
+        last = 0
+        while True:
+            # Page by id so the lock is never held while the caller consumes rows.
+            with self._lock:
+                conn = self._conn()
+                try:
+                    rows = conn.execute(sql, (last, *params, max(1, int(chunk_size)))).fetchall()
+                finally:
+                    conn.close()
+            if not rows:
+                return
+            for r in rows:
+                yield {
+                    "id": r["id"],
+                    "event_name": r["event_name"],
+                    "payload": json.loads(r["payload_json"] or "{}"),
+                    "created_at": r["created_at"],
+                }
+            last = int(rows[-1]["id"])
+
     def add_lead(
         self,
         email: str,
@@ -102,13 +401,28 @@ class BusinessService:
 
     def track_event(self, event_name: str, payload: Optional[Dict[str, Any]] = None) -> None:
         now = datetime.now(UTC).isoformat()
-        payload_json = json.dumps(payload or {}, ensure_ascii=False)
+        payload = payload or {}
+        payload_json = json.dumps(payload, ensure_ascii=False)
+        name = event_name.strip()
+        ok = _flag(payload.get("ok"))
+        passed = _flag(payload.get("passed"))
         with self._lock:
             conn = self._conn()
             try:
                 conn.execute(
-                    "INSERT INTO events(event_name, payload_json, created_at) VALUES(?, ?, ?)",
-                    (event_name.strip(), payload_json, now),
+                    "INSERT INTO events(event_name, payload_json, created_at, ok, passed) VALUES(?, ?, ?, ?, ?)",
+                    (name, payload_json, now, ok, passed),
+                )
+                conn.execute(
+                    """
+                    INSERT INTO event_rollups(day, event_name, total, ok_count, not_passed_count)
+                    VALUES(?, ?, 1, ?, ?)
+                    ON CONFLICT(day, event_name) DO UPDATE SET
+                        total = total + 1,
+                        ok_count = ok_count + excluded.ok_count,
+                        not_passed_count = not_passed_count + excluded.not_passed_count
+                    """,
+                    (now[:10], name, 1 if ok == 1 else 0, 1 if passed == 0 else 0),
                 )
                 conn.commit()
             finally:
@@ -193,6 +507,151 @@ class BusinessService:
             "recent": [dict(r) for r in rows],
         }
 
+    def search_demand(self, days: int = 7, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Aggregate `job_search` events into (keywords, location) demand rows.
+
+        Reads the hot table only: `days` beyond EVENTS_RETENTION_DAYS sees no
+        archived searches (use `iter_events()` for a full-history scan).
+        """
+        d = max(1, min(int(days or 7), 90))
+        n = max(1, min(int(limit or 100), 500))
+        since = (datetime.now(UTC) - timedelta(days=d)).isoformat()
+        with self._lock:
+            conn = self._conn()
+            try:
+                rows = conn.execute(
+                    """
+                    SELECT
+                        json_extract(payload_json, '$.query_key') AS query_key,
+                        COALESCE(json_extract(payload_json, '$.location'), '') AS location,
+                        MAX(json_extract(payload_json, '$.keywords')) AS keywords_json,
+                        COUNT(*) AS searches,
+                        SUM(CASE WHEN json_extract(payload_json, '$.cache_hit') = 1 THEN 0 ELSE 1 END) AS misses,
+                        MAX(created_at) AS last_seen
+                    FROM events
+                    WHERE event_name='job_search'
+                      AND created_at >= ?
+                      AND COALESCE(json_extract(payload_json, '$.query_key'), '') != ''
+                    GROUP BY query_key, location
+                    ORDER BY misses DESC, searches DESC
+                    LIMIT ?
+                    """,
+                    (since, n),
+                ).fetchall()
+            finally:
+                conn.close()
+
+        out: List[Dict[str, Any]] = []
+        for r in rows:
+            try:
+                keywords = json.loads(r["keywords_json"] or "[]")
+            except (TypeError, ValueError):
+                keywords = []
+            if not isinstance(keywords, list) or not keywords:
+                keywords = [k for k in str(r["query_key"]).split(",") if k]
+            searches = int(r["searches"] or 0)
+            misses = int(r["misses"] or 0)
+            out.append(
+                {
+                    "query_key": r["query_key"],
+                    "keywords": keywords,
+                    "location": r["location"] or "",
+                    "searches": searches,
+                    "misses": misses,
+                    "hit_rate_pct": round(((searches - misses) / searches) * 100, 2) if searches else 0.0,
+                    "last_seen": r["last_seen"],
+                }
+            )
+        return out
+
+    def cache_hit_rate_by_cycle(self, cycles: int = 10) -> List[Dict[str, Any]]:
+        """
+        Cloud-cache hit rate of `job_search` in the window after each crawl cycle.
+
+        A cycle is the set of `crawler_upload` events sharing a `cycle_id`
+        (uploads without one count as their own cycle); its window runs until
+        the next cycle starts. Only cycles still in the hot table are covered;
+        archived events (older than EVENTS_RETENTION_DAYS) are not read.
+        """
+        n = max(1, min(int(cycles or 10), 100))
+        with self._lock:
+            conn = self._conn()
+            try:
+                starts = conn.execute(
+                    """
+                    SELECT cycle_id, MIN(created_at) AS started_at, SUM(new_jobs) AS new_jobs
+                    FROM (
+                        SELECT
+                            COALESCE(json_extract(payload_json, '$.cycle_id'), 'event-' || id) AS cycle_id,
+                            created_at,
+                            COALESCE(json_extract(payload_json, '$.new'), 0) AS new_jobs
+                        FROM events
+                        WHERE event_name='crawler_upload'
+                    )
+                    GROUP BY cycle_id
+                    ORDER BY started_at DESC
+                    LIMIT ?
+                    """,
+                    (n,),
+                ).fetchall()
+                starts = list(reversed(starts))
+                out: List[Dict[str, Any]] = []
+                for i, row in enumerate(starts):
+                    end = starts[i + 1]["started_at"] if i + 1 < len(starts) else "9999"
+                    agg = conn.execute(
+                        """
+                        SELECT
+                            COUNT(*) AS searches,
+                            SUM(CASE WHEN json_extract(payload_json, '$.cache_hit') = 1 THEN 1 ELSE 0 END) AS hits
+                        FROM events
+                        WHERE event_name='job_search' AND created_at >= ? AND created_at < ?
+                        """,
+                        (row["started_at"], end),
+                    ).fetchone()
+                    searches = int(agg["searches"] or 0)
+                    hits = int(agg["hits"] or 0)
+                    out.append(
+                        {
+                            "cycle_id": row["cycle_id"],
+                            "started_at": row["started_at"],
+                            "new_jobs": int(row["new_jobs"] or 0),
+                            "searches": searches,
+                            "hits": hits,
+                            "hit_rate_pct": round((hits / searches) * 100, 2) if searches else None,
+                        }
+                    )
+            finally:
+                conn.close()
+
+        prev: Optional[float] = None
+        for row in out:
+            rate = row["hit_rate_pct"]
+            row["delta_pct"] = round(rate - prev, 2) if rate is not None and prev is not None else None
+            if rate is not None:
+                prev = rate
+        return out
+
+    def daily_event_counts(self, since_day: str) -> Dict[str, Dict[str, int]]:
+        """{day: {event_name: count}} from the rollups, for days >= `since_day` (YYYY-MM-DD)."""
+        with self._lock:
+            conn = self._conn()
+            try:
+                rows = conn.execute(
+                    """
+                    SELECT day, event_name, total FROM event_rollups
+                    WHERE day >= ?
+                    ORDER BY day ASC
+                    """,
+                    (since_day,),
+                ).fetchall()
+            finally:
+                conn.close()
+        out: Dict[str, Dict[str, int]] = {}
+        for r in rows:
+            out.setdefault(str(r["day"]), {})[str(r["event_name"])] = int(r["total"] or 0)
+        return out
+
     def _count(self, conn: sqlite3.Connection, sql: str, params: tuple = ()) -> int:
         row = conn.execute(sql, params).fetchone()
         return int(row[0] if row and row[0] is not None else 0)
@@ -208,12 +667,32 @@ class BusinessService:
                     ((datetime.now(UTC) - timedelta(days=7)).isoformat(),),
                 )
 
-                uploads = self._count(conn, "SELECT COUNT(*) FROM events WHERE event_name='resume_uploaded'")
-                process_runs = self._count(conn, "SELECT COUNT(*) FROM events WHERE event_name='resume_processed'")
-                searches = self._count(conn, "SELECT COUNT(*) FROM events WHERE event_name='job_search'")
-                applies = self._count(conn, "SELECT COUNT(*) FROM events WHERE event_name='job_apply'")
-                job_link_clicks = self._count(conn, "SELECT COUNT(*) FROM events WHERE event_name='job_link_click'")
-                result_downloads = self._count(conn, "SELECT COUNT(*) FROM events WHERE event_name='result_download'")
+                rollup = {
+                    str(r["event_name"]): r
+                    for r in conn.execute(
+                        """
+                        SELECT event_name, SUM(total) AS total, SUM(ok_count) AS ok_count,
+                               SUM(not_passed_count) AS not_passed_count
+                        FROM event_rollups
+                        WHERE event_name IN (
+                            'resume_uploaded', 'resume_processed', 'job_search', 'job_apply',
+                            'job_link_click', 'result_download', 'process_quality_gate', 'api_error'
+                        )
+                        GROUP BY event_name
+                        """
+                    ).fetchall()
+                }
+
+                def total(name: str, col: str = "total") -> int:
+                    row = rollup.get(name)
+                    return int(row[col] or 0) if row else 0
+
+                uploads = total("resume_uploaded")
+                process_runs = total("resume_processed")
+                searches = total("job_search")
+                applies = total("job_apply")
+                job_link_clicks = total("job_link_click")
+                result_downloads = total("result_download")
                 feedback_total = self._count(conn, "SELECT COUNT(*) FROM feedback")
                 feedback_7d = self._count(
                     conn,
@@ -221,19 +700,9 @@ class BusinessService:
                     ((datetime.now(UTC) - timedelta(days=7)).isoformat(),),
                 )
 
-                processed_success = self._count(
-                    conn,
-                    "SELECT COUNT(*) FROM events WHERE event_name='resume_processed' AND json_extract(payload_json, '$.ok') = 1",
-                )
-                quality_gate_failures = self._count(
-                    conn,
-                    """
-                    SELECT COUNT(*) FROM events
-                    WHERE event_name='process_quality_gate'
-                      AND CAST(json_extract(payload_json, '$.passed') AS TEXT) IN ('0', 'false', 'False')
-                    """,
-                )
-                errors = self._count(conn, "SELECT COUNT(*) FROM events WHERE event_name='api_error'")
+                processed_success = total("resume_processed", "ok_count")
+                quality_gate_failures = total("process_quality_gate", "not_passed_count")
+                errors = total("api_error")
             finally:
                 conn.close()
 
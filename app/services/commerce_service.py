@@ -1,14 +1,20 @@
 from __future__ import annotations
 
 import json
+import logging
 import os
+import re
 import secrets
 import sqlite3
 import threading
 import uuid
 import shutil
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.core.performance import sqlite_connection_factory
+
+logger = logging.getLogger("ai_job_helper")
 
 
 def _utc_now() -> datetime:
@@ -37,6 +43,139 @@ def _json_load(value: Any) -> Any:
         return {}
 
 
+# 后台搜索的 FTS5 影子索引：index -> (源表, 参与检索的列)。
+# 索引为 contentless + trigram，等价于原先的 LIKE '%q%' 子串匹配，但不再全表扫描。
+SEARCH_INDEXES: Dict[str, tuple[str, tuple[str, ...]]] = {
+    "buyers_fts": ("buyers", ("buyer_id", "name", "phone", "email", "access_code")),
+    "orders_fts": ("orders", ("order_id", "buyer_id", "product_name", "access_code")),
+    "access_codes_fts": ("access_codes", ("code", "buyer_id", "order_id", "label")),
+    "tickets_fts": ("support_tickets", ("ticket_id", "buyer_id", "subject", "content")),
+    "ledger_fts": ("credit_ledger", ("ledger_id", "order_id", "access_code", "action", "note")),
+    "payment_proofs_fts": ("payment_proofs", ("proof_id", "order_id", "access_code", "note")),
+}
+# 后台导出：kind -> (表, 主键, 导出列, 需要解析的 JSON 列)
+EXPORT_TABLES: Dict[str, tuple[str, str, tuple[str, ...], tuple[str, ...]]] = {
+    "buyers": (
+        "buyers",
+        "buyer_id",
+        ("buyer_id", "name", "phone", "email", "source", "channel", "status", "note", "access_code", "created_at", "expires_at", "last_active_at"),
+        (),
+    ),
+    "orders": (
+        "orders",
+        "order_id",
+        (
+            "order_id", "buyer_id", "product_name", "amount", "currency", "payment_channel", "payment_status",
+            "delivery_status", "access_code", "note", "created_at", "updated_at", "package_id", "credits",
+            "wallet_granted_at", "activation_mode",
+        ),
+        (),
+    ),
+    "access_codes": (
+        "access_codes",
+        "code",
+        ("code", "buyer_id", "order_id", "label", "status", "max_uses", "used_count", "expires_at", "activated_at", "last_used_at", "note", "created_at"),
+        (),
+    ),
+    "tickets": (
+        "support_tickets",
+        "ticket_id",
+        ("ticket_id", "buyer_id", "order_id", "subject", "content", "channel", "status", "priority", "assignee", "note", "created_at", "updated_at"),
+        (),
+    ),
+    "credit_ledger": (
+        "credit_ledger",
+        "ledger_id",
+        (
+            "ledger_id", "buyer_id", "order_id", "access_code", "direction", "amount", "balance_after",
+            "action", "package_id", "note", "meta_json", "created_at",
+        ),
+        ("meta_json",),
+    ),
+    "payment_proofs": (
+        "payment_proofs",
+        "proof_id",
+        (
+            "proof_id", "buyer_id", "order_id", "access_code", "status", "amount", "note",
+            "file_name", "mime_type", "reviewed_note", "created_at", "updated_at",
+        ),
+        (),
+    ),
+    "local_tasks": (
+        "local_tasks",
+        "task_id",
+        (
+            "task_id", "agent_id", "buyer_id", "access_code", "task_type", "status", "payload_json",
+            "progress_json", "result_json", "created_at", "updated_at", "started_at", "completed_at",
+        ),
+        ("payload_json", "progress_json", "result_json"),
+    ),
+}
+# summary() 计数器：name -> (表, 每行贡献值的 SQL 表达式, 对账 SQL)。
+# 由触发器在同一事务内增量维护，summary 读一行即可；_reconcile_summary_counters 定期全量校准。
+SUMMARY_COUNTERS: Dict[str, tuple[str, str, str]] = {
+    "buyers_total": ("buyers", "1", "SELECT COUNT(*) FROM buyers"),
+    "paid_orders": ("orders", "({r}.payment_status = 'paid')", "SELECT COUNT(*) FROM orders WHERE payment_status = 'paid'"),
+    "pending_orders": (
+        "orders",
+        "({r}.payment_status = 'pending')",
+        "SELECT COUNT(*) FROM orders WHERE payment_status = 'pending'",
+    ),
+    "open_tickets": (
+        "support_tickets",
+        "({r}.status IN ('open', 'todo', 'pending'))",
+        "SELECT COUNT(*) FROM support_tickets WHERE status IN ('open', 'todo', 'pending')",
+    ),
+    "online_agents": ("local_agents", "({r}.status = 'online')", "SELECT COUNT(*) FROM local_agents WHERE status = 'online'"),
+    "queued_tasks": ("local_tasks", "({r}.status = 'queued')", "SELECT COUNT(*) FROM local_tasks WHERE status = 'queued'"),
+    "running_tasks": ("local_tasks", "({r}.status = 'running')", "SELECT COUNT(*) FROM local_tasks WHERE status = 'running'"),
+    "wallets_total": ("wallets", "1", "SELECT COUNT(*) FROM wallets"),
+    "total_credit_balance": ("wallets", "COALESCE({r}.balance, 0)", "SELECT COALESCE(SUM(balance), 0) FROM wallets"),
+    "total_credits_granted": ("wallets", "COALESCE({r}.granted_total, 0)", "SELECT COALESCE(SUM(granted_total), 0) FROM wallets"),
+    "total_credits_consumed": ("wallets", "COALESCE({r}.consumed_total, 0)", "SELECT COALESCE(SUM(consumed_total), 0) FROM wallets"),
+}
+_COUNTERS_RECONCILED_AT = "_reconciled_at"
+
+_WALLET_COLUMNS = "buyer_id, balance, held, granted_total, consumed_total, last_grant_at, last_consume_at, created_at, updated_at"
+# UPDATE ... RETURNING (SQLite >= 3.35) saves the read-back round trip after a conditional debit.
+_SQLITE_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+_PHONE_RE = re.compile(r"^\+?[\d\s\-()]{5,}$")
+_PHONE_SEPARATORS = ("-", " ", "+", "(", ")")
+
+
+def _search_terms(search: str) -> List[str]:
+    """Split an admin query into terms; a phone-like query stays one phrase, emails are lower-cased."""
+    q = str(search or "").strip()
+    if not q:
+        return []
+    if _PHONE_RE.match(q):
+        return [q]
+    return [t.lower() if "@" in t else t for t in (part.strip().rstrip("*") for part in q.split()) if t]
+
+
+def _phone_digits(search: str) -> str:
+    """Separator-free form of a phone-like query ("" otherwise); only matched against phone columns."""
+    q = str(search or "").strip()
+    return re.sub(r"\D", "", q) if _PHONE_RE.match(q) else ""
+
+
+def _phone_sql(column: str) -> str:
+    expr = f"COALESCE({column}, '')"
+    for sep in _PHONE_SEPARATORS:
+        expr = f"replace({expr}, '{sep}', '')"
+    return expr
+
+
+def _search_body_sql(ref: str, columns: tuple[str, ...]) -> str:
+    return " || char(31) || ".join(f"COALESCE({ref}.{c}, '')" for c in columns)
+
+
+def _search_row_sql(ref: str, columns: tuple[str, ...]) -> str:
+    """Values of one index row: the body, plus the separator-free phone for tables that have one."""
+    body = _search_body_sql(ref, columns)
+    return f"{body}, {_phone_sql(f'{ref}.phone')}" if "phone" in columns else body
+
+
 CREDIT_PACKAGES: List[Dict[str, Any]] = [
     {
         "package_id": "trial",
@@ -102,10 +241,20 @@ class CommerceService:
         self.payment_proof_dir = os.path.join(os.path.dirname(self.db_path) or "data", "payment_proofs")
         os.makedirs(self.payment_proof_dir, exist_ok=True)
         self._lock = threading.RLock()
+        self._fts_enabled = False
+        # Holds captured by this instance since the last settlement; the rows themselves are
+        # persisted as status='captured', so any worker's settle_captures() picks them up.
+        self._pending_captures: List[str] = []
+        self._settle_batch = max(1, int(os.getenv("CREDIT_SETTLE_BATCH", "50") or "50"))
         self._init_db()
 
     def _conn(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=10,
+            check_same_thread=False,
+            factory=sqlite_connection_factory("commerce"),
+        )
         conn.row_factory = sqlite3.Row
         return conn
 
@@ -285,6 +434,34 @@ class CommerceService:
                 self._ensure_column(conn, "orders", "credits", "INTEGER NOT NULL DEFAULT 0")
                 self._ensure_column(conn, "orders", "wallet_granted_at", "TEXT DEFAULT ''")
                 self._ensure_column(conn, "orders", "activation_mode", "TEXT DEFAULT ''")
+                self._ensure_column(conn, "wallets", "held", "INTEGER NOT NULL DEFAULT 0")
+                self._ensure_column(conn, "credit_ledger", "idempotency_key", "TEXT DEFAULT ''")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS credit_holds (
+                        hold_id TEXT PRIMARY KEY,
+                        buyer_id TEXT NOT NULL,
+                        access_code TEXT,
+                        amount INTEGER NOT NULL DEFAULT 0,
+                        action TEXT,
+                        status TEXT NOT NULL,
+                        idempotency_key TEXT DEFAULT '',
+                        note TEXT,
+                        meta_json TEXT,
+                        created_at TEXT NOT NULL,
+                        expires_at TEXT NOT NULL,
+                        updated_at TEXT NOT NULL
+                    )
+                    """
+                )
+                conn.execute(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS idx_credit_ledger_idem ON credit_ledger(idempotency_key) WHERE idempotency_key <> ''"
+                )
+                self._ensure_column(conn, "credit_holds", "captured_amount", "INTEGER")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_credit_holds_status ON credit_holds(status, expires_at)")
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_credit_holds_idem ON credit_holds(idempotency_key) WHERE idempotency_key <> ''"
+                )
                 conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_buyer ON orders(buyer_id, created_at)")
                 conn.execute("CREATE INDEX IF NOT EXISTS idx_access_buyer ON access_codes(buyer_id, created_at)")
                 conn.execute("CREATE INDEX IF NOT EXISTS idx_tickets_buyer ON support_tickets(buyer_id, created_at)")
@@ -294,6 +471,17 @@ class CommerceService:
                 conn.execute("CREATE INDEX IF NOT EXISTS idx_credit_ledger_order ON credit_ledger(order_id, created_at)")
                 conn.execute("CREATE INDEX IF NOT EXISTS idx_payment_proofs_order ON payment_proofs(order_id, created_at)")
                 conn.execute("CREATE INDEX IF NOT EXISTS idx_payment_proofs_buyer ON payment_proofs(buyer_id, created_at)")
+                # 后台列表按 (created_at, id) 倒序做 keyset 分页
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_buyers_created ON buyers(created_at, buyer_id)")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_created ON orders(created_at, order_id)")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_access_created ON access_codes(created_at, code)")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_tickets_created ON support_tickets(created_at, ticket_id)")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_credit_ledger_created ON credit_ledger(created_at, ledger_id)")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_payment_proofs_created ON payment_proofs(created_at, proof_id)")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_local_tasks_created ON local_tasks(created_at, task_id)")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_access_status_expiry ON access_codes(status, expires_at)")
+                self._fts_enabled = self._ensure_search_indexes(conn)
+                self._ensure_summary_counters(conn)
                 conn.commit()
             finally:
                 conn.close()
@@ -313,16 +501,235 @@ class CommerceService:
                 return code
         raise RuntimeError("unable_to_generate_unique_access_code")
 
-    def _buyer_search_where(self, search: str, alias: str = "") -> tuple[str, List[str]]:
-        q = str(search or "").strip()
-        if not q:
+    def _ensure_search_indexes(self, conn: sqlite3.Connection) -> bool:
+        """Create FTS5 shadow indexes + sync triggers; returns False when FTS5/trigram is unavailable."""
+        try:
+            for index, (table, columns) in SEARCH_INDEXES.items():
+                # Tables with a phone get a second column holding it without separators.
+                fields = "body, phone" if "phone" in columns else "body"
+                current = [str(r[1]) for r in conn.execute(f"PRAGMA table_info({index})").fetchall()]
+                if current and current != fields.split(", "):
+                    conn.execute(f"DROP TABLE {index}")  # older layout: rebuilt and backfilled below
+                conn.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5({fields}, content='', tokenize='trigram')"
+                )
+                new_row, old_row = _search_row_sql("new", columns), _search_row_sql("old", columns)
+                for suffix in ("ai", "ad", "au"):
+                    conn.execute(f"DROP TRIGGER IF EXISTS {index}_{suffix}")
+                conn.execute(
+                    f"""
+                    CREATE TRIGGER {index}_ai AFTER INSERT ON {table} BEGIN
+                        INSERT INTO {index}(rowid, {fields}) VALUES (new.rowid, {new_row});
+                    END
+                    """
+                )
+                conn.execute(
+                    f"""
+                    CREATE TRIGGER {index}_ad AFTER DELETE ON {table} BEGIN
+                        INSERT INTO {index}({index}, rowid, {fields}) VALUES ('delete', old.rowid, {old_row});
+                    END
+                    """
+                )
+                conn.execute(
+                    f"""
+                    CREATE TRIGGER {index}_au AFTER UPDATE ON {table} BEGIN
+                        INSERT INTO {index}({index}, rowid, {fields}) VALUES ('delete', old.rowid, {old_row});
+                        INSERT INTO {index}(rowid, {fields}) VALUES (new.rowid, {new_row});
+                    END
+                    """
+                )
+                if current != fields.split(", "):
+                    # 首次建索引：回填已有数据
+                    conn.execute(
+                        f"INSERT INTO {index}(rowid, {fields}) SELECT rowid, {_search_row_sql(table, columns)} FROM {table}"
+                    )
+            return True
+        except sqlite3.OperationalError:
+            return False
+
+    def _ensure_summary_counters(self, conn: sqlite3.Connection) -> None:
+        conn.execute("CREATE TABLE IF NOT EXISTS commerce_counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL DEFAULT 0)")
+        by_table: Dict[str, List[tuple[str, str]]] = {}
+        for name, (table, expr, _) in SUMMARY_COUNTERS.items():
+            by_table.setdefault(table, []).append((name, expr))
+        for table, counters in by_table.items():
+            names = ", ".join(f"'{name}'" for name, _ in counters)
+
+            def delta(*terms: str) -> str:
+                # A predicate over a NULL column is NULL, not 0; value is NOT NULL.
+                cases = " ".join(
+                    f"WHEN '{name}' THEN "
+                    + " ".join(term.format(expr=f"COALESCE({expr.format(r=ref)}, 0)") for term, ref in terms)
+                    for name, expr in counters
+                )
+                return f"UPDATE commerce_counters SET value = value + CASE name {cases} ELSE 0 END WHERE name IN ({names});"
+
+            bodies = {
+                "ai": ("INSERT", delta(("+ ({expr})", "new"))),
+                "ad": ("DELETE", delta(("- ({expr})", "old"))),
+                "au": ("UPDATE", delta(("+ ({expr})", "new"), ("- ({expr})", "old"))),
+            }
+            for suffix, (event, body) in bodies.items():
+                # Recreated on every start so databases with older trigger bodies pick up fixes.
+                conn.execute(f"DROP TRIGGER IF EXISTS {table}_counters_{suffix}")
+                conn.execute(
+                    f"""
+                    CREATE TRIGGER {table}_counters_{suffix} AFTER {event} ON {table} BEGIN
+                        {body}
+                    END
+                    """
+                )
+        seeded = conn.execute("SELECT 1 FROM commerce_counters WHERE name = ?", (_COUNTERS_RECONCILED_AT,)).fetchone()
+        if not seeded:
+            self._reconcile_summary_counters(conn)
+
+    def _reconcile_summary_counters(self, conn: sqlite3.Connection) -> Dict[str, int]:
+        """Recompute every counter from the base tables; returns non-zero drift per counter."""
+        current = {str(r["name"]): int(r["value"] or 0) for r in conn.execute("SELECT name, value FROM commerce_counters")}
+        drift: Dict[str, int] = {}
+        for name, (_, _, sql) in SUMMARY_COUNTERS.items():
+            actual = int(conn.execute(sql).fetchone()[0] or 0)
+            if name in current and current[name] != actual:
+                drift[name] = actual - current[name]
+            conn.execute(
+                "INSERT INTO commerce_counters(name, value) VALUES(?, ?) ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+                (name, actual),
+            )
+        conn.execute(
+            "INSERT INTO commerce_counters(name, value) VALUES(?, ?) ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+            (_COUNTERS_RECONCILED_AT, int(_utc_now().timestamp())),
+        )
+        return drift
+
+    def reconcile_summary_counters(self) -> Dict[str, Any]:
+        with self._lock:
+            conn = self._conn()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                drift = self._reconcile_summary_counters(conn)
+                conn.commit()
+                return {"ok": True, "drift": drift}
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+
+    def _search_clause(self, index: str, search: str, alias: str = "") -> tuple[str, List[Any]]:
+        """
+        SQL predicate matching `search` against one shadow index.
+        Terms shorter than 3 chars cannot use trigrams, so those queries fall
+        back to the original LIKE scan over the same columns. A phone-like
+        query matches as typed anywhere, or without separators on the phone.
+        """
+        terms = _search_terms(search)
+        if not terms:
             return "", []
-        like = f"%{q}%"
         prefix = f"{alias}." if alias else ""
-        return (
-            f" WHERE {prefix}buyer_id LIKE ? OR {prefix}name LIKE ? OR {prefix}phone LIKE ? OR {prefix}email LIKE ? OR {prefix}access_code LIKE ? ",
-            [like] * 5,
-        )
+        columns = SEARCH_INDEXES[index][1]
+        digits = _phone_digits(search) if "phone" in columns else ""
+        if self._fts_enabled and all(len(t) >= 3 for t in terms):
+            match = " AND ".join('"' + t.replace('"', '""') + '"' for t in terms)
+            if digits:
+                match = f'body : ({match}) OR phone : "{digits}"'
+            return f"{prefix}rowid IN (SELECT rowid FROM {index} WHERE {index} MATCH ?)", [match]
+        like = f"%{str(search or '').strip()}%"
+        clauses, params = [f"{prefix}{c} LIKE ?" for c in columns], [like] * len(columns)
+        if digits:
+            clauses.append(f"{_phone_sql(prefix + 'phone')} LIKE ?")
+            params.append(f"%{digits}%")
+        return "(" + " OR ".join(clauses) + ")", params
+
+    @staticmethod
+    def _keyset_clause(cursor: str, created_col: str, id_col: str) -> tuple[str, List[Any]]:
+        """Rows strictly after `cursor` ("created_at|id") in (created_at DESC, id DESC) order."""
+        raw = str(cursor or "").strip()
+        if not raw or "|" not in raw:
+            return "", []
+        created_at, row_id = raw.rsplit("|", 1)
+        return f"({created_col} < ? OR ({created_col} = ? AND {id_col} < ?))", [created_at, created_at, row_id]
+
+    @staticmethod
+    def page_cursor(rows: List[Dict[str, Any]], id_key: str, created_key: str = "created_at", limit: int = 0) -> str:
+        """Cursor for the page after `rows`; empty when the page was not full."""
+        if not rows or (limit and len(rows) < min(int(limit), 500)):
+            return ""
+        last = rows[-1]
+        return f"{last.get(created_key) or ''}|{last.get(id_key) or ''}"
+
+    def _paged_where(self, index: str, search: str, cursor: str, id_col: str) -> tuple[str, List[Any]]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        for clause, values in (
+            self._search_clause(index, search),
+            self._keyset_clause(cursor, "created_at", id_col),
+        ):
+            if clause:
+                clauses.append(clause)
+                params.extend(values)
+        return (f" WHERE {' AND '.join(clauses)} " if clauses else ""), params
+
+    def export_columns(self, kind: str) -> List[str]:
+        if kind not in EXPORT_TABLES:
+            raise ValueError("unknown_export_kind")
+        _, _, columns, json_columns = EXPORT_TABLES[kind]
+        return [c[: -len("_json")] if c in json_columns else c for c in columns]
+
+    def iter_export(self, kind: str, since: str = "", until: str = "", chunk_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Yield every row of `kind` in (created_at, id) order, `chunk_size` rows
+        per query. Each chunk uses a fresh connection and resumes from the last
+        key, so memory stays flat and writers are never blocked for the whole export.
+        """
+        if kind not in EXPORT_TABLES:
+            raise ValueError("unknown_export_kind")
+        table, id_col, columns, json_columns = EXPORT_TABLES[kind]
+        size = max(1, min(int(chunk_size or 1000), 5000))
+        base: List[str] = []
+        base_params: List[Any] = []
+        if since:
+            base.append("created_at >= ?")
+            base_params.append(str(since))
+        if until:
+            base.append("created_at < ?")
+            base_params.append(str(until))
+        last: Optional[tuple[str, str]] = None
+        while True:
+            clauses = list(base)
+            params = list(base_params)
+            if last is not None:
+                clauses.append(f"(created_at > ? OR (created_at = ? AND {id_col} > ?))")
+                params.extend([last[0], last[0], last[1]])
+            where_sql = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+            with self._lock:
+                conn = self._conn()
+                try:
+                    rows = conn.execute(
+                        f"""
+                        SELECT {', '.join(columns)}
+                        FROM {table}
+                        {where_sql}
+                        ORDER BY created_at ASC, {id_col} ASC
+                        LIMIT ?
+                        """,
+                        tuple(params + [size]),
+                    ).fetchall()
+                finally:
+                    conn.close()
+            for row in rows:
+                item = dict(row)
+                for col in json_columns:
+                    item[col[: -len("_json")]] = _json_load(item.pop(col, ""))
+                yield item
+            if len(rows) < size:
+                return
+            last = (str(rows[-1]["created_at"] or ""), str(rows[-1][id_col] or ""))
+
+    def _buyer_search_where(self, search: str, alias: str = "") -> tuple[str, List[str]]:
+        clause, params = self._search_clause("buyers_fts", search, alias=alias)
+        if not clause:
+            return "", []
+        return f" WHERE {clause} ", params
 
     def _join_bundle_row(self, row: sqlite3.Row) -> Dict[str, Any]:
         return {
@@ -382,6 +789,7 @@ class CommerceService:
             return {
                 "buyer_id": "",
                 "balance": 0,
+                "held": 0,
                 "granted_total": 0,
                 "consumed_total": 0,
                 "last_grant_at": "",
@@ -392,6 +800,7 @@ class CommerceService:
         return {
             "buyer_id": str(row["buyer_id"] or ""),
             "balance": int(row["balance"] or 0),
+            "held": int(row["held"] or 0) if "held" in row.keys() else 0,
             "granted_total": int(row["granted_total"] or 0),
             "consumed_total": int(row["consumed_total"] or 0),
             "last_grant_at": str(row["last_grant_at"] or ""),
@@ -404,33 +813,114 @@ class CommerceService:
         bid = str(buyer_id or "").strip()
         if not bid:
             raise ValueError("buyer_id_required")
-        row = conn.execute(
-            """
-            SELECT buyer_id, balance, granted_total, consumed_total, last_grant_at, last_consume_at, created_at, updated_at
-            FROM wallets WHERE buyer_id = ?
-            """,
-            (bid,),
-        ).fetchone()
-        if row:
-            return self._wallet_row_to_dict(row)
+        self._insert_wallet_if_missing(conn, bid)
+        row = conn.execute(f"SELECT {_WALLET_COLUMNS} FROM wallets WHERE buyer_id = ?", (bid,)).fetchone()
+        return self._wallet_row_to_dict(row)
 
+    def _insert_wallet_if_missing(self, conn: sqlite3.Connection, buyer_id: str) -> None:
         now = _iso_now()
         conn.execute(
             """
-            INSERT INTO wallets(
+            INSERT OR IGNORE INTO wallets(
                 buyer_id, balance, granted_total, consumed_total, last_grant_at, last_consume_at, created_at, updated_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ) VALUES (?, 0, 0, 0, '', '', ?, ?)
             """,
-            (bid, 0, 0, 0, "", "", now, now),
+            (buyer_id, now, now),
         )
+
+    def _update_wallet(
+        self,
+        conn: sqlite3.Connection,
+        buyer_id: str,
+        set_sql: str,
+        params: List[Any],
+        guard_sql: str = "",
+        guard_params: Optional[List[Any]] = None,
+    ) -> Optional[sqlite3.Row]:
+        """
+        One relative UPDATE (e.g. `balance = balance - ?`) guarded by `guard_sql`
+        (e.g. `balance >= ?`). Returns the new wallet row, or None when the guard
+        rejected the update. Never read-modify-write: concurrent writers from
+        other processes cannot lose updates.
+        """
+        where_sql = "buyer_id = ?" + (f" AND {guard_sql}" if guard_sql else "")
+        sql = f"UPDATE wallets SET {set_sql} WHERE {where_sql}"
+        args = tuple(params) + (buyer_id,) + tuple(guard_params or [])
+        if _SQLITE_HAS_RETURNING:
+            # fetchall() steps the statement to completion so the transaction can commit.
+            rows = conn.execute(f"{sql} RETURNING {_WALLET_COLUMNS}", args).fetchall()
+            return rows[0] if rows else None
+        if conn.execute(sql, args).rowcount == 0:
+            return None
+        return conn.execute(f"SELECT {_WALLET_COLUMNS} FROM wallets WHERE buyer_id = ?", (buyer_id,)).fetchone()
+
+    def _ledger_by_idempotency_key(self, conn: sqlite3.Connection, key: str) -> Dict[str, Any]:
+        if not key:
+            return {}
         row = conn.execute(
             """
-            SELECT buyer_id, balance, granted_total, consumed_total, last_grant_at, last_consume_at, created_at, updated_at
-            FROM wallets WHERE buyer_id = ?
+            SELECT ledger_id, buyer_id, order_id, access_code, direction, amount, balance_after, action, package_id, note, meta_json, created_at
+            FROM credit_ledger WHERE idempotency_key = ?
             """,
-            (bid,),
+            (key,),
         ).fetchone()
-        return self._wallet_row_to_dict(row)
+        if not row:
+            return {}
+        payload = dict(row)
+        payload["meta"] = _json_load(payload.pop("meta_json", ""))
+        return payload
+
+    def _debit_in_transaction(
+        self,
+        conn: sqlite3.Connection,
+        buyer_id: str,
+        amount: int,
+        action: str,
+        access_code: str = "",
+        order_id: str = "",
+        note: str = "",
+        meta: Optional[Dict[str, Any]] = None,
+        idempotency_key: str = "",
+    ) -> Dict[str, Any]:
+        """
+        Conditional debit + ledger row inside the caller's BEGIN IMMEDIATE
+        transaction. The caller commits (or rolls back on a failed result).
+        """
+        self._insert_wallet_if_missing(conn, buyer_id)
+        now = _iso_now()
+        row = self._update_wallet(
+            conn,
+            buyer_id,
+            "balance = balance - ?, consumed_total = consumed_total + ?, last_consume_at = ?, updated_at = ?",
+            [amount, amount, now, now],
+            guard_sql="balance >= ?",
+            guard_params=[amount],
+        )
+        if row is None:
+            wallet = self._ensure_wallet_row(conn, buyer_id)
+            return {
+                "ok": False,
+                "error": "insufficient_credits",
+                "required": amount,
+                "balance": int(wallet.get("balance") or 0),
+                "wallet": wallet,
+            }
+        wallet = self._wallet_row_to_dict(row)
+        ledger = self._append_credit_ledger(
+            conn,
+            buyer_id=buyer_id,
+            order_id=order_id,
+            access_code=access_code,
+            direction="debit",
+            amount=amount,
+            balance_after=wallet["balance"],
+            action=action,
+            package_id="",
+            note=note,
+            meta=meta or {},
+            idempotency_key=idempotency_key,
+        )
+        return {"ok": True, "wallet": wallet, "ledger": ledger, "required": amount, "balance": wallet["balance"]}
 
     def _append_credit_ledger(
         self,
@@ -445,40 +935,45 @@ class CommerceService:
         package_id: str = "",
         note: str = "",
         meta: Optional[Dict[str, Any]] = None,
+        idempotency_key: str = "",
     ) -> Dict[str, Any]:
-        ledger_id = self._new_id("ledger")
-        created_at = _iso_now()
+        payload = {
+            "ledger_id": self._new_id("ledger"),
+            "buyer_id": str(buyer_id or "").strip(),
+            "order_id": str(order_id or "").strip(),
+            "access_code": str(access_code or "").strip().upper(),
+            "direction": str(direction or "").strip(),
+            "amount": int(amount or 0),
+            "balance_after": int(balance_after or 0),
+            "action": str(action or "").strip(),
+            "package_id": str(package_id or "").strip(),
+            "note": str(note or "").strip(),
+            "meta": dict(meta or {}),
+            "created_at": _iso_now(),
+        }
         conn.execute(
             """
             INSERT INTO credit_ledger(
                 ledger_id, buyer_id, order_id, access_code, direction, amount, balance_after,
-                action, package_id, note, meta_json, created_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                action, package_id, note, meta_json, created_at, idempotency_key
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
             (
-                ledger_id,
-                str(buyer_id or "").strip(),
-                str(order_id or "").strip(),
-                str(access_code or "").strip().upper(),
-                str(direction or "").strip(),
-                int(amount or 0),
-                int(balance_after or 0),
-                str(action or "").strip(),
-                str(package_id or "").strip(),
-                str(note or "").strip(),
-                _json_dump(meta or {}),
-                created_at,
+                payload["ledger_id"],
+                payload["buyer_id"],
+                payload["order_id"],
+                payload["access_code"],
+                payload["direction"],
+                payload["amount"],
+                payload["balance_after"],
+                payload["action"],
+                payload["package_id"],
+                payload["note"],
+                _json_dump(payload["meta"]),
+                payload["created_at"],
+                str(idempotency_key or "").strip(),
             ),
         )
-        row = conn.execute(
-            """
-            SELECT ledger_id, buyer_id, order_id, access_code, direction, amount, balance_after, action, package_id, note, meta_json, created_at
-            FROM credit_ledger WHERE ledger_id = ?
-            """,
-            (ledger_id,),
-        ).fetchone()
-        payload = dict(row or {})
-        payload["meta"] = _json_load(payload.pop("meta_json", ""))
         return payload
 
     def _find_buyer_account(
@@ -668,23 +1163,16 @@ class CommerceService:
         if credits <= 0:
             return order
 
-        wallet = self._ensure_wallet_row(conn, str(order.get("buyer_id") or "").strip())
-        balance_after = int(wallet.get("balance") or 0) + credits
+        grant_buyer_id = str(order.get("buyer_id") or "").strip()
+        self._ensure_wallet_row(conn, grant_buyer_id)
         now = _iso_now()
-        conn.execute(
-            """
-            UPDATE wallets
-            SET balance = ?, granted_total = ?, last_grant_at = ?, updated_at = ?
-            WHERE buyer_id = ?
-            """,
-            (
-                balance_after,
-                int(wallet.get("granted_total") or 0) + credits,
-                now,
-                now,
-                str(order.get("buyer_id") or "").strip(),
-            ),
+        wallet_row = self._update_wallet(
+            conn,
+            grant_buyer_id,
+            "balance = balance + ?, granted_total = granted_total + ?, last_grant_at = ?, updated_at = ?",
+            [credits, credits, now, now],
         )
+        balance_after = int(wallet_row["balance"] or 0) if wallet_row else credits
         self._append_credit_ledger(
             conn,
             buyer_id=str(order.get("buyer_id") or "").strip(),
@@ -697,6 +1185,7 @@ class CommerceService:
             package_id=str(order.get("package_id") or "").strip(),
             note=f"订单 {oid} 到账",
             meta={"source": "order_payment"},
+            idempotency_key=f"grant:{oid}",
         )
         conn.execute(
             """
@@ -1055,16 +1544,20 @@ class CommerceService:
             finally:
                 conn.close()
 
-    def list_credit_ledger(self, limit: int = 50, search: str = "", buyer_id: str = "") -> List[Dict[str, Any]]:
+    def list_credit_ledger(self, limit: int = 50, search: str = "", buyer_id: str = "", cursor: str = "") -> List[Dict[str, Any]]:
         n = max(1, min(int(limit or 50), 500))
-        q = str(search or "").strip()
         bid = str(buyer_id or "").strip()
         params: List[Any] = []
         clauses: List[str] = []
-        if q:
-            like = f"%{q}%"
-            clauses.append("(l.ledger_id LIKE ? OR l.order_id LIKE ? OR l.access_code LIKE ? OR l.action LIKE ? OR b.email LIKE ? OR b.name LIKE ?)")
-            params.extend([like, like, like, like, like, like])
+        ledger_clause, ledger_params = self._search_clause("ledger_fts", search, alias="l")
+        if ledger_clause:
+            buyer_clause, buyer_params = self._search_clause("buyers_fts", search)
+            clauses.append(f"({ledger_clause} OR l.buyer_id IN (SELECT buyer_id FROM buyers WHERE {buyer_clause}))")
+            params.extend(ledger_params + buyer_params)
+        page_clause, page_params = self._keyset_clause(cursor, "l.created_at", "l.ledger_id")
+        if page_clause:
+            clauses.append(page_clause)
+            params.extend(page_params)
         if bid:
             clauses.append("l.buyer_id = ?")
             params.append(bid)
@@ -1081,7 +1574,7 @@ class CommerceService:
                     FROM credit_ledger l
                     LEFT JOIN buyers b ON b.buyer_id = l.buyer_id
                     {where_sql}
-                    ORDER BY l.created_at DESC
+                    ORDER BY l.created_at DESC, l.ledger_id DESC
                     LIMIT ?
                     """,
                     tuple(params + [n]),
@@ -1308,18 +1801,30 @@ class CommerceService:
             finally:
                 conn.close()
 
-    def list_payment_proofs(self, limit: int = 50, search: str = "", status: str = "", buyer_id: str = "", order_id: str = "") -> List[Dict[str, Any]]:
+    def list_payment_proofs(
+        self,
+        limit: int = 50,
+        search: str = "",
+        status: str = "",
+        buyer_id: str = "",
+        order_id: str = "",
+        cursor: str = "",
+    ) -> List[Dict[str, Any]]:
         n = max(1, min(int(limit or 50), 500))
-        q = str(search or "").strip()
         wanted_status = str(status or "").strip()
         bid = str(buyer_id or "").strip()
         oid = str(order_id or "").strip()
         clauses: List[str] = []
         params: List[Any] = []
-        if q:
-            like = f"%{q}%"
-            clauses.append("(p.proof_id LIKE ? OR p.order_id LIKE ? OR p.access_code LIKE ? OR p.note LIKE ? OR b.email LIKE ? OR b.name LIKE ?)")
-            params.extend([like, like, like, like, like, like])
+        proof_clause, proof_params = self._search_clause("payment_proofs_fts", search, alias="p")
+        if proof_clause:
+            buyer_clause, buyer_params = self._search_clause("buyers_fts", search)
+            clauses.append(f"({proof_clause} OR p.buyer_id IN (SELECT buyer_id FROM buyers WHERE {buyer_clause}))")
+            params.extend(proof_params + buyer_params)
+        page_clause, page_params = self._keyset_clause(cursor, "p.created_at", "p.proof_id")
+        if page_clause:
+            clauses.append(page_clause)
+            params.extend(page_params)
         if wanted_status:
             clauses.append("p.status = ?")
             params.append(wanted_status)
@@ -1342,7 +1847,7 @@ class CommerceService:
                     FROM payment_proofs p
                     LEFT JOIN buyers b ON b.buyer_id = p.buyer_id
                     {where_sql}
-                    ORDER BY p.created_at DESC
+                    ORDER BY p.created_at DESC, p.proof_id DESC
                     LIMIT ?
                     """,
                     tuple(params + [n]),
@@ -1404,7 +1909,13 @@ class CommerceService:
         note: str = "",
         order_id: str = "",
         meta: Optional[Dict[str, Any]] = None,
+        idempotency_key: str = "",
     ) -> Dict[str, Any]:
+        """
+        Debit `amount` credits with one conditional UPDATE and the ledger row in
+        the same BEGIN IMMEDIATE transaction (safe across worker processes).
+        A repeated `idempotency_key` returns the original debit instead of charging twice.
+        """
         needed = max(0, int(amount or 0))
         normalized_code = str(access_code or "").strip().upper()
         if normalized_code == self._direct_access_code():
@@ -1428,51 +1939,45 @@ class CommerceService:
                 raise ValueError("buyer_id_or_access_code_required")
             redeem = self.redeem_access_code(resolved_access_code, consume_use=False)
             resolved_buyer_id = str(redeem.get("buyer_id") or "").strip()
+        if not resolved_buyer_id:
+            raise ValueError("buyer_id_required")
+        key = str(idempotency_key or "").strip()
         with self._lock:
             conn = self._conn()
             try:
-                wallet = self._ensure_wallet_row(conn, resolved_buyer_id)
-                balance = int(wallet.get("balance") or 0)
-                if balance < needed:
+                conn.execute("BEGIN IMMEDIATE")
+                existing = self._ledger_by_idempotency_key(conn, key)
+                if existing:
+                    wallet = self._ensure_wallet_row(conn, resolved_buyer_id)
+                    conn.rollback()
                     return {
-                        "ok": False,
-                        "error": "insufficient_credits",
-                        "required": needed,
-                        "balance": balance,
+                        "ok": True,
+                        "skipped": True,
+                        "reason": "duplicate_idempotency_key",
                         "wallet": wallet,
+                        "ledger": existing,
+                        "required": needed,
+                        "balance": int(wallet.get("balance") or 0),
                     }
-                balance_after = balance - needed
-                now = _iso_now()
-                conn.execute(
-                    """
-                    UPDATE wallets
-                    SET balance = ?, consumed_total = ?, last_consume_at = ?, updated_at = ?
-                    WHERE buyer_id = ?
-                    """,
-                    (
-                        balance_after,
-                        int(wallet.get("consumed_total") or 0) + needed,
-                        now,
-                        now,
-                        resolved_buyer_id,
-                    ),
-                )
-                ledger = self._append_credit_ledger(
+                result = self._debit_in_transaction(
                     conn,
                     buyer_id=resolved_buyer_id,
-                    order_id=order_id,
-                    access_code=resolved_access_code,
-                    direction="debit",
                     amount=needed,
-                    balance_after=balance_after,
                     action=action,
-                    package_id="",
+                    access_code=resolved_access_code,
+                    order_id=order_id,
                     note=note,
                     meta=meta or {},
+                    idempotency_key=key,
                 )
-                conn.commit()
-                refreshed = self._ensure_wallet_row(conn, resolved_buyer_id)
-                return {"ok": True, "wallet": refreshed, "ledger": ledger, "required": needed, "balance": balance_after}
+                if result["ok"]:
+                    conn.commit()
+                else:
+                    conn.rollback()
+                return result
+            except Exception:
+                conn.rollback()
+                raise
             finally:
                 conn.close()
 
@@ -1531,9 +2036,12 @@ class CommerceService:
         with self._lock:
             conn = self._conn()
             try:
+                # Write lock first: the duplicate check and the debit are one critical section across workers.
+                conn.execute("BEGIN IMMEDIATE")
                 wallet = self._ensure_wallet_row(conn, resolved_buyer_id)
                 balance = int(wallet.get("balance") or 0)
-                existing = self._find_credit_debit_for_resource_with_conn(
+                key = f"resource:{action_key}:{resolved_buyer_id}:{wanted_resource.lower()}"
+                existing = self._ledger_by_idempotency_key(conn, key) or self._find_credit_debit_for_resource_with_conn(
                     conn=conn,
                     action=action_key,
                     resource_id=wanted_resource,
@@ -1543,6 +2051,7 @@ class CommerceService:
                     scan_limit=scan_limit,
                 )
                 if existing:
+                    conn.rollback()
                     return {
                         "ok": True,
                         "skipped": True,
@@ -1555,57 +2064,33 @@ class CommerceService:
                         "balance": balance,
                     }
 
-                if balance < needed:
-                    return {
-                        "ok": False,
-                        "error": "insufficient_credits",
-                        "required": needed,
-                        "balance": balance,
-                        "wallet": wallet,
-                    }
-
-                balance_after = balance - needed
-                now = _iso_now()
-                conn.execute(
-                    """
-                    UPDATE wallets
-                    SET balance = ?, consumed_total = ?, last_consume_at = ?, updated_at = ?
-                    WHERE buyer_id = ?
-                    """,
-                    (
-                        balance_after,
-                        int(wallet.get("consumed_total") or 0) + needed,
-                        now,
-                        now,
-                        resolved_buyer_id,
-                    ),
-                )
                 meta_map = dict(meta or {}) if isinstance(meta, dict) else {}
                 if wanted_resource:
                     meta_map.setdefault("resource_id", wanted_resource)
                     meta_map.setdefault("job_id", wanted_resource)
-                ledger = self._append_credit_ledger(
+                result = self._debit_in_transaction(
                     conn,
                     buyer_id=resolved_buyer_id,
-                    order_id=order_id,
-                    access_code=resolved_access_code,
-                    direction="debit",
                     amount=needed,
-                    balance_after=balance_after,
                     action=action_key,
-                    package_id="",
+                    access_code=resolved_access_code,
+                    order_id=order_id,
                     note=note,
                     meta=meta_map,
+                    idempotency_key=key,
                 )
+                if not result["ok"]:
+                    conn.rollback()
+                    return result
                 conn.commit()
-                refreshed = self._ensure_wallet_row(conn, resolved_buyer_id)
+                ledger = result["ledger"]
                 return {
                     "ok": True,
-                    "wallet": refreshed,
+                    "wallet": result["wallet"],
                     "ledger": ledger,
                     "ledger_id": str((ledger or {}).get("ledger_id") or ""),
                     "required": needed,
-                    "balance": balance_after,
+                    "balance": result["balance"],
                     "resource_id": wanted_resource,
                 }
             except Exception:
@@ -1618,6 +2103,275 @@ class CommerceService:
             finally:
                 conn.close()
 
+    def authorize_credits(
+        self,
+        amount: int,
+        action: str,
+        access_code: str = "",
+        buyer_id: str = "",
+        ttl_s: int = 600,
+        note: str = "",
+        meta: Optional[Dict[str, Any]] = None,
+        idempotency_key: str = "",
+    ) -> Dict[str, Any]:
+        """
+        Pre-authorize credits: move `amount` from balance to held with one
+        conditional UPDATE. Follow with capture_credits() (charged at the next
+        batched settlement) or release_credits(); uncaptured holds expire.
+        A retry with the same `idempotency_key` returns the original hold.
+        """
+        needed = max(1, int(amount or 0))
+        resolved_buyer_id = str(buyer_id or "").strip()
+        normalized_code = str(access_code or "").strip().upper()
+        if not resolved_buyer_id:
+            if not normalized_code:
+                raise ValueError("buyer_id_or_access_code_required")
+            redeem = self.redeem_access_code(normalized_code, consume_use=False)
+            resolved_buyer_id = str(redeem.get("buyer_id") or "").strip()
+        key = str(idempotency_key or "").strip()
+        now = _utc_now()
+        with self._lock:
+            conn = self._conn()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                existing = self._hold_by_idempotency_key(conn, key)
+                if existing is not None:
+                    wallet = self._ensure_wallet_row(conn, resolved_buyer_id)
+                    conn.rollback()
+                    return {**existing, "ok": True, "skipped": True, "reason": "duplicate_idempotency_key", "wallet": wallet}
+                self._insert_wallet_if_missing(conn, resolved_buyer_id)
+                row = self._update_wallet(
+                    conn,
+                    resolved_buyer_id,
+                    "balance = balance - ?, held = held + ?, updated_at = ?",
+                    [needed, needed, now.isoformat()],
+                    guard_sql="balance >= ?",
+                    guard_params=[needed],
+                )
+                if row is None:
+                    wallet = self._ensure_wallet_row(conn, resolved_buyer_id)
+                    conn.rollback()
+                    return {
+                        "ok": False,
+                        "error": "insufficient_credits",
+                        "required": needed,
+                        "balance": int(wallet.get("balance") or 0),
+                        "wallet": wallet,
+                    }
+                hold_id = self._new_id("hold")
+                conn.execute(
+                    """
+                    INSERT INTO credit_holds(
+                        hold_id, buyer_id, access_code, amount, action, status, idempotency_key,
+                        note, meta_json, created_at, expires_at, updated_at
+                    ) VALUES (?, ?, ?, ?, ?, 'held', ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        hold_id,
+                        resolved_buyer_id,
+                        normalized_code,
+                        needed,
+                        str(action or "").strip(),
+                        key,
+                        str(note or "").strip(),
+                        _json_dump(meta or {}),
+                        now.isoformat(),
+                        (now + timedelta(seconds=max(1, int(ttl_s or 600)))).isoformat(),
+                        now.isoformat(),
+                    ),
+                )
+                conn.commit()
+                return {"ok": True, "hold_id": hold_id, "amount": needed, "wallet": self._wallet_row_to_dict(row)}
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+
+    def _hold_by_idempotency_key(self, conn: sqlite3.Connection, key: str) -> Optional[Dict[str, Any]]:
+        """The hold (or, for keys already charged directly, the ledger row) created with `key`."""
+        if not key:
+            return None
+        hold = conn.execute(
+            "SELECT hold_id, amount, status FROM credit_holds WHERE idempotency_key = ? ORDER BY created_at ASC LIMIT 1",
+            (key,),
+        ).fetchone()
+        if hold:
+            return {"hold_id": str(hold["hold_id"]), "amount": int(hold["amount"] or 0), "status": str(hold["status"])}
+        ledger = self._ledger_by_idempotency_key(conn, key)
+        if ledger:
+            meta = ledger.get("meta") if isinstance(ledger.get("meta"), dict) else {}
+            return {
+                "hold_id": str(meta.get("hold_id") or ""),
+                "amount": int(ledger.get("amount") or 0),
+                "status": "settled",
+                "ledger": ledger,
+            }
+        return None
+
+    def capture_credits(self, hold_id: str, amount: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Mark a hold captured (optionally for less than authorized). Captured holds
+        no longer expire; they are charged by the next settle_captures(), which
+        runs here once this instance has queued a batch.
+        """
+        hid = str(hold_id or "").strip()
+        if not hid:
+            raise ValueError("hold_id_required")
+        with self._lock:
+            conn = self._conn()
+            try:
+                changed = conn.execute(
+                    """
+                    UPDATE credit_holds SET status = 'captured', captured_amount = ?, updated_at = ?
+                    WHERE hold_id = ? AND status = 'held'
+                    """,
+                    (None if amount is None else max(0, int(amount)), _iso_now(), hid),
+                ).rowcount
+                conn.commit()
+            finally:
+                conn.close()
+            if not changed:
+                return {"ok": False, "error": "hold_not_active", "hold_id": hid, "pending": len(self._pending_captures)}
+            self._pending_captures.append(hid)
+            pending = len(self._pending_captures)
+        if pending >= self._settle_batch:
+            self.settle_captures()
+            pending = 0
+        return {"ok": True, "hold_id": hid, "pending": pending}
+
+    def pending_captures(self) -> int:
+        with self._lock:
+            conn = self._conn()
+            try:
+                return int(conn.execute("SELECT COUNT(*) FROM credit_holds WHERE status = 'captured'").fetchone()[0])
+            finally:
+                conn.close()
+
+    def settle_captures(self) -> Dict[str, Any]:
+        """
+        Charge every captured hold in one transaction: ledger rows + held/consumed
+        totals. Each hold settles in its own savepoint, so one bad row is logged
+        and left captured for the next run instead of blocking the others.
+        """
+        with self._lock:
+            self._pending_captures = []
+            conn = self._conn()
+            settled = credits = failed = 0
+            try:
+                # Plain read first: an idle run must not take the write lock.
+                if conn.execute("SELECT 1 FROM credit_holds WHERE status = 'captured' LIMIT 1").fetchone() is None:
+                    return {"settled": 0, "credits": 0, "failed": 0}
+                conn.execute("BEGIN IMMEDIATE")
+                holds = conn.execute(
+                    "SELECT * FROM credit_holds WHERE status = 'captured' ORDER BY updated_at ASC"
+                ).fetchall()
+                if not holds:
+                    conn.rollback()
+                    return {"settled": 0, "credits": 0, "failed": 0}
+                now = _iso_now()
+                for hold in holds:
+                    hid = str(hold["hold_id"])
+                    conn.execute("SAVEPOINT settle_hold")
+                    try:
+                        charged = self._settle_hold(conn, hold, now)
+                    except sqlite3.Error:
+                        conn.execute("ROLLBACK TO SAVEPOINT settle_hold")
+                        conn.execute("RELEASE SAVEPOINT settle_hold")
+                        logger.warning("credit hold settlement failed hold_id=%s", hid, exc_info=True)
+                        failed += 1
+                        continue
+                    conn.execute("RELEASE SAVEPOINT settle_hold")
+                    settled += 1
+                    credits += charged
+                conn.commit()
+            except Exception:
+                # Nothing is lost: captured holds stay captured until a later run commits them.
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+        return {"settled": settled, "credits": credits, "failed": failed}
+
+    def _settle_hold(self, conn: sqlite3.Connection, hold: sqlite3.Row, now: str) -> int:
+        hid = str(hold["hold_id"])
+        held_amount = int(hold["amount"] or 0)
+        wanted = hold["captured_amount"]
+        charged = held_amount if wanted is None else min(int(wanted), held_amount)
+        row = self._update_wallet(
+            conn,
+            str(hold["buyer_id"]),
+            "held = held - ?, balance = balance + ?, consumed_total = consumed_total + ?, "
+            "last_consume_at = ?, updated_at = ?",
+            [held_amount, held_amount - charged, charged, now, now],
+        )
+        conn.execute(
+            "UPDATE credit_holds SET status = 'settled', amount = ?, updated_at = ? WHERE hold_id = ?",
+            (charged, now, hid),
+        )
+        if charged > 0:
+            meta = _json_load(hold["meta_json"])
+            meta_map = dict(meta) if isinstance(meta, dict) else {}
+            meta_map["hold_id"] = hid
+            if hold["idempotency_key"]:
+                meta_map["idempotency_key"] = str(hold["idempotency_key"])
+            self._append_credit_ledger(
+                conn,
+                buyer_id=str(hold["buyer_id"]),
+                access_code=str(hold["access_code"] or ""),
+                direction="debit",
+                amount=charged,
+                balance_after=int(row["balance"] or 0) if row else 0,
+                action=str(hold["action"] or ""),
+                note=str(hold["note"] or ""),
+                meta=meta_map,
+                # Own namespace: the caller's key may already be used by a direct consume_credits().
+                idempotency_key=f"hold:{hid}",
+            )
+        return charged
+
+    def release_credits(self, hold_id: str) -> Dict[str, Any]:
+        """Return an uncaptured hold to the balance."""
+        released = self._release_holds("hold_id = ?", [str(hold_id or "").strip()])
+        return {"ok": bool(released), "released": released}
+
+    def release_expired_holds(self) -> Dict[str, Any]:
+        """Release uncaptured holds past their TTL (e.g. the worker holding them died); captured ones still settle."""
+        return {"released": self._release_holds("expires_at < ?", [_iso_now()])}
+
+    def _release_holds(self, where_sql: str, params: List[Any]) -> int:
+        with self._lock:
+            conn = self._conn()
+            try:
+                probe = f"SELECT 1 FROM credit_holds WHERE status = 'held' AND {where_sql} LIMIT 1"
+                if conn.execute(probe, tuple(params)).fetchone() is None:
+                    return 0
+                conn.execute("BEGIN IMMEDIATE")
+                holds = conn.execute(
+                    f"SELECT hold_id, buyer_id, amount FROM credit_holds WHERE status = 'held' AND {where_sql}",
+                    tuple(params),
+                ).fetchall()
+                now = _iso_now()
+                for hold in holds:
+                    amount = int(hold["amount"] or 0)
+                    self._update_wallet(
+                        conn,
+                        str(hold["buyer_id"]),
+                        "held = held - ?, balance = balance + ?, updated_at = ?",
+                        [amount, amount, now],
+                    )
+                    conn.execute(
+                        "UPDATE credit_holds SET status = 'released', updated_at = ? WHERE hold_id = ?",
+                        (now, hold["hold_id"]),
+                    )
+                conn.commit()
+                return len(holds)
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+
     def create_bundle(
         self,
         name: str = "",
@@ -1765,9 +2519,9 @@ class CommerceService:
             finally:
                 conn.close()
 
-    def list_buyers(self, limit: int = 50, search: str = "") -> List[Dict[str, Any]]:
+    def list_buyers(self, limit: int = 50, search: str = "", cursor: str = "") -> List[Dict[str, Any]]:
         n = max(1, min(int(limit or 50), 500))
-        where_sql, params = self._buyer_search_where(search)
+        where_sql, params = self._paged_where("buyers_fts", search, cursor, "buyer_id")
         with self._lock:
             conn = self._conn()
             try:
@@ -1776,7 +2530,7 @@ class CommerceService:
                     SELECT buyer_id, name, phone, email, source, channel, status, note, access_code, created_at, expires_at, last_active_at
                     FROM buyers
                     {where_sql}
-                    ORDER BY created_at DESC
+                    ORDER BY created_at DESC, buyer_id DESC
                     LIMIT ?
                     """,
                     tuple(params + [n]),
@@ -1785,15 +2539,9 @@ class CommerceService:
             finally:
                 conn.close()
 
-    def list_orders(self, limit: int = 50, search: str = "") -> List[Dict[str, Any]]:
+    def list_orders(self, limit: int = 50, search: str = "", cursor: str = "") -> List[Dict[str, Any]]:
         n = max(1, min(int(limit or 50), 500))
-        q = str(search or "").strip()
-        params: List[Any] = []
-        where_sql = ""
-        if q:
-            like = f"%{q}%"
-            where_sql = " WHERE order_id LIKE ? OR buyer_id LIKE ? OR product_name LIKE ? OR access_code LIKE ? "
-            params.extend([like, like, like, like])
+        where_sql, params = self._paged_where("orders_fts", search, cursor, "order_id")
         with self._lock:
             conn = self._conn()
             try:
@@ -1803,7 +2551,7 @@ class CommerceService:
                            delivery_status, access_code, note, created_at, updated_at, package_id, credits, wallet_granted_at, activation_mode
                     FROM orders
                     {where_sql}
-                    ORDER BY created_at DESC
+                    ORDER BY created_at DESC, order_id DESC
                     LIMIT ?
                     """,
                     tuple(params + [n]),
@@ -1812,15 +2560,9 @@ class CommerceService:
             finally:
                 conn.close()
 
-    def list_access_codes(self, limit: int = 50, search: str = "") -> List[Dict[str, Any]]:
+    def list_access_codes(self, limit: int = 50, search: str = "", cursor: str = "") -> List[Dict[str, Any]]:
         n = max(1, min(int(limit or 50), 500))
-        q = str(search or "").strip()
-        params: List[Any] = []
-        where_sql = ""
-        if q:
-            like = f"%{q}%"
-            where_sql = " WHERE code LIKE ? OR buyer_id LIKE ? OR order_id LIKE ? OR label LIKE ? "
-            params.extend([like, like, like, like])
+        where_sql, params = self._paged_where("access_codes_fts", search, cursor, "code")
         with self._lock:
             conn = self._conn()
             try:
@@ -1830,7 +2572,7 @@ class CommerceService:
                            activated_at, last_used_at, note, created_at
                     FROM access_codes
                     {where_sql}
-                    ORDER BY created_at DESC
+                    ORDER BY created_at DESC, code DESC
                     LIMIT ?
                     """,
                     tuple(params + [n]),
@@ -2121,15 +2863,9 @@ class CommerceService:
             finally:
                 conn.close()
 
-    def list_tickets(self, limit: int = 50, search: str = "") -> List[Dict[str, Any]]:
+    def list_tickets(self, limit: int = 50, search: str = "", cursor: str = "") -> List[Dict[str, Any]]:
         n = max(1, min(int(limit or 50), 500))
-        q = str(search or "").strip()
-        params: List[Any] = []
-        where_sql = ""
-        if q:
-            like = f"%{q}%"
-            where_sql = " WHERE ticket_id LIKE ? OR buyer_id LIKE ? OR subject LIKE ? OR content LIKE ? "
-            params.extend([like, like, like, like])
+        where_sql, params = self._paged_where("tickets_fts", search, cursor, "ticket_id")
         with self._lock:
             conn = self._conn()
             try:
@@ -2138,7 +2874,7 @@ class CommerceService:
                     SELECT ticket_id, buyer_id, order_id, subject, content, channel, status, priority, assignee, note, created_at, updated_at
                     FROM support_tickets
                     {where_sql}
-                    ORDER BY created_at DESC
+                    ORDER BY created_at DESC, ticket_id DESC
                     LIMIT ?
                     """,
                     tuple(params + [n]),
@@ -2447,15 +3183,20 @@ class CommerceService:
             finally:
                 conn.close()
 
-    def list_local_tasks(self, limit: int = 50, search: str = "") -> List[Dict[str, Any]]:
+    def list_local_tasks(self, limit: int = 50, search: str = "", cursor: str = "") -> List[Dict[str, Any]]:
         n = max(1, min(int(limit or 50), 500))
         q = str(search or "").strip()
         params: List[Any] = []
-        where_sql = ""
+        clauses: List[str] = []
         if q:
             like = f"%{q}%"
-            where_sql = " WHERE task_id LIKE ? OR buyer_id LIKE ? OR access_code LIKE ? OR task_type LIKE ? OR status LIKE ? "
+            clauses.append("(task_id LIKE ? OR buyer_id LIKE ? OR access_code LIKE ? OR task_type LIKE ? OR status LIKE ?)")
             params.extend([like, like, like, like, like])
+        page_clause, page_params = self._keyset_clause(cursor, "created_at", "task_id")
+        if page_clause:
+            clauses.append(page_clause)
+            params.extend(page_params)
+        where_sql = f" WHERE {' AND '.join(clauses)} " if clauses else ""
         with self._lock:
             conn = self._conn()
             try:
@@ -2465,7 +3206,7 @@ class CommerceService:
                            created_at, updated_at, started_at, completed_at
                     FROM local_tasks
                     {where_sql}
-                    ORDER BY created_at DESC
+                    ORDER BY created_at DESC, task_id DESC
                     LIMIT ?
                     """,
                     tuple(params + [n]),
@@ -2543,44 +3284,33 @@ class CommerceService:
 
     def summary(self) -> Dict[str, Any]:
         now = _iso_now()
+        reconcile_every = max(0, int(os.getenv("COMMERCE_COUNTERS_RECONCILE_S", "3600") or "3600"))
         with self._lock:
             conn = self._conn()
             try:
-                buyers_total = int(conn.execute("SELECT COUNT(*) FROM buyers").fetchone()[0] or 0)
+                counters = {str(r["name"]): int(r["value"] or 0) for r in conn.execute("SELECT name, value FROM commerce_counters")}
+                last = counters.get(_COUNTERS_RECONCILED_AT, 0)
+                if reconcile_every and _utc_now().timestamp() - last >= reconcile_every:
+                    # 定期对账：修正手工改库等绕过触发器的漂移
+                    conn.execute("BEGIN IMMEDIATE")
+                    self._reconcile_summary_counters(conn)
+                    conn.commit()
+                    counters = {str(r["name"]): int(r["value"] or 0) for r in conn.execute("SELECT name, value FROM commerce_counters")}
+                # 过期与否随时间变化，无法用计数器维护；(status, expires_at) 索引只扫描未过期的码
                 active_codes = int(
                     conn.execute(
-                        "SELECT COUNT(*) FROM access_codes WHERE status IN ('active', 'issued') AND (expires_at = '' OR expires_at >= ?)",
+                        """
+                        SELECT
+                            (SELECT COUNT(*) FROM access_codes WHERE status IN ('active', 'issued') AND expires_at = '')
+                          + (SELECT COUNT(*) FROM access_codes WHERE status IN ('active', 'issued') AND expires_at >= ?)
+                        """,
                         (now,),
                     ).fetchone()[0]
                     or 0
                 )
-                paid_orders = int(conn.execute("SELECT COUNT(*) FROM orders WHERE payment_status = 'paid'").fetchone()[0] or 0)
-                pending_orders = int(conn.execute("SELECT COUNT(*) FROM orders WHERE payment_status = 'pending'").fetchone()[0] or 0)
-                open_tickets = int(
-                    conn.execute("SELECT COUNT(*) FROM support_tickets WHERE status IN ('open', 'todo', 'pending')").fetchone()[0]
-                    or 0
-                )
-                online_agents = int(conn.execute("SELECT COUNT(*) FROM local_agents WHERE status = 'online'").fetchone()[0] or 0)
-                queued_tasks = int(conn.execute("SELECT COUNT(*) FROM local_tasks WHERE status = 'queued'").fetchone()[0] or 0)
-                running_tasks = int(conn.execute("SELECT COUNT(*) FROM local_tasks WHERE status = 'running'").fetchone()[0] or 0)
-                wallets_total = int(conn.execute("SELECT COUNT(*) FROM wallets").fetchone()[0] or 0)
-                total_credit_balance = int(conn.execute("SELECT COALESCE(SUM(balance), 0) FROM wallets").fetchone()[0] or 0)
-                total_credits_granted = int(conn.execute("SELECT COALESCE(SUM(granted_total), 0) FROM wallets").fetchone()[0] or 0)
-                total_credits_consumed = int(conn.execute("SELECT COALESCE(SUM(consumed_total), 0) FROM wallets").fetchone()[0] or 0)
             finally:
                 conn.close()
-        return {
-            "buyers_total": buyers_total,
-            "active_codes": active_codes,
-            "paid_orders": paid_orders,
-            "pending_orders": pending_orders,
-            "open_tickets": open_tickets,
-            "online_agents": online_agents,
-            "queued_tasks": queued_tasks,
-            "running_tasks": running_tasks,
-            "wallets_total": wallets_total,
-            "total_credit_balance": total_credit_balance,
-            "total_credits_granted": total_credits_granted,
-            "total_credits_consumed": total_credits_consumed,
-            "generated_at": now,
-        }
+        out: Dict[str, Any] = {"buyers_total": counters.get("buyers_total", 0), "active_codes": active_codes}
+        out.update({name: counters.get(name, 0) for name in SUMMARY_COUNTERS if name != "buyers_total"})
+        out["generated_at"] = now
+        return out
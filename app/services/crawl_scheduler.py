@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def _pair_key(keywords: List[str], location: str) -> Tuple[str, str]:
+    kw = ",".join(sorted({str(k).strip().lower() for k in (keywords or []) if str(k).strip()}))
+    return kw, (location or "").strip()
+
+
+class DemandScheduler:
+    """
+    Pick which keyword×city pairs to crawl in a cycle.
+
+    Demand comes from `/api/crawler/demand` (aggregated `job_search` events):
+    pairs that users search for and miss the cloud cache on score highest.
+    Every pair is discounted by how recently it was crawled, so a fixed
+    per-cycle budget rotates through hot pairs instead of re-crawling the same
+    ones. The static seed lists keep a reserved share of the budget so
+    coverage does not collapse onto a handful of queries.
+    """
+
+    def __init__(
+        self,
+        seed_keywords: List[List[str]],
+        seed_cities: List[str],
+        budget: int = 48,
+        seed_share: float = 0.25,
+        miss_weight: float = 2.0,
+        staleness_half_life_h: float = 12.0,
+        now_fn: Optional[Callable[[], float]] = None,
+    ):
+        self.seed_keywords = [list(k) for k in seed_keywords]
+        self.seed_cities = list(seed_cities)
+        self.budget = max(1, int(budget))
+        self.seed_share = max(0.0, min(1.0, float(seed_share)))
+        self.miss_weight = max(0.0, float(miss_weight))
+        self.staleness_half_life_h = max(0.01, float(staleness_half_life_h))
+        self._now = now_fn or time.time
+        self.last_crawled: Dict[Tuple[str, str], float] = {}
+
+    def _staleness(self, key: Tuple[str, str]) -> float:
+        """0 right after a crawl, 0.5 after one half-life, approaching 1 (never crawled = 1)."""
+        ts = self.last_crawled.get(key)
+        if ts is None:
+            return 1.0
+        age_h = max(0.0, (self._now() - ts) / 3600.0)
+        return age_h / (age_h + self.staleness_half_life_h)
+
+    def plan(self, demand: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """Return up to `budget` pairs: {keywords, location, score, source}."""
+        picked: List[Dict[str, Any]] = []
+        seen: set[Tuple[str, str]] = set()
+
+        scored: List[Dict[str, Any]] = []
+        for row in demand or []:
+            keywords = [str(k) for k in (row.get("keywords") or []) if str(k).strip()]
+            if not keywords:
+                continue
+            location = str(row.get("location") or "")
+            key = _pair_key(keywords, location)
+            searches = int(row.get("searches") or 0)
+            misses = int(row.get("misses") or 0)
+            score = (searches + self.miss_weight * misses) * self._staleness(key)
+            if score <= 0:
+                continue
+            scored.append(
+                {
+                    "keywords": keywords,
+                    "location": location,
+                    "score": round(score, 3),
+                    "source": "demand",
+                    "_key": key,
+                }
+            )
+        scored.sort(key=lambda r: r["score"], reverse=True)
+
+        demand_slots = self.budget - int(round(self.budget * self.seed_share))
+        for row in scored:
+            if len(picked) >= demand_slots:
+                break
+            if row["_key"] in seen:
+                continue
+            seen.add(row["_key"])
+            picked.append(row)
+
+        seeds: List[Dict[str, Any]] = []
+        for keywords in self.seed_keywords:
+            for city in self.seed_cities:
+                key = _pair_key(keywords, city)
+                if key in seen:
+                    continue
+                seeds.append(
+                    {
+                        "keywords": list(keywords),
+                        "location": city,
+                        "score": round(self._staleness(key), 3),
+                        "source": "seed",
+                        "_key": key,
+                    }
+                )
+        # Stable sort: equally stale seeds keep their declared order.
+        seeds.sort(key=lambda r: r["score"], reverse=True)
+        for row in seeds:
+            if len(picked) >= self.budget:
+                break
+            seen.add(row["_key"])
+            picked.append(row)
+
+        # Leftover budget (few seeds) goes back to demand.
+        for row in scored:
+            if len(picked) >= self.budget:
+                break
+            if row["_key"] not in seen:
+                seen.add(row["_key"])
+                picked.append(row)
+
+        for row in picked:
+            row.pop("_key", None)
+        return picked
+
+    def mark_crawled(self, pairs: List[Dict[str, Any]]) -> None:
+        now = self._now()
+        for p in pairs:
+            self.last_crawled[_pair_key(p.get("keywords") or [], p.get("location") or "")] = now
@@ -0,0 +1,449 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import heapq
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import requests
+
+
+# Fields that define "the same posting" for delta sync. Bookkeeping fields such
+# as received_at / provider are deliberately excluded so re-crawls hash equal.
+SYNC_HASH_FIELDS = (
+    "title",
+    "company",
+    "location",
+    "salary",
+    "description",
+    "requirements",
+    "platform",
+    "link",
+    "apply_url",
+    "updated",
+)
+
+
+def job_sync_key(job: Dict[str, Any]) -> str:
+    """Identity of a posting on both sides of the sync (matches cloud dedupe)."""
+    return str(job.get("link") or job.get("apply_url") or job.get("id") or "").strip().lower()
+
+
+def job_content_hash(job: Dict[str, Any]) -> str:
+    body = json.dumps(
+        {k: job.get(k) for k in SYNC_HASH_FIELDS},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha1(body.encode("utf-8")).hexdigest()[:16]
+
+
+def encode_ndjson(rows: Iterable[Dict[str, Any]]) -> bytes:
+    return b"".join(json.dumps(r, ensure_ascii=False).encode("utf-8") + b"\n" for r in rows)
+
+
+@dataclass(order=True)
+class CrawlTask:
+    """One (keywords, location) unit of crawl work.
+
+    Tasks are ordered by ``ready_at`` so the work queue can hold retries that
+    are still backing off without blocking a worker thread.
+    """
+
+    ready_at: float
+    seq: int
+    keywords: List[str] = field(compare=False)
+    location: str = field(compare=False, default="")
+    limit: int = field(compare=False, default=10)
+    domain: str = field(compare=False, default="")
+    attempt: int = field(compare=False, default=0)
+    last_error: str = field(compare=False, default="")
+
+
+class DomainBudget:
+    """Per-domain politeness: max in-flight requests + min interval between starts."""
+
+    def __init__(self, min_interval_s: float = 2.0, max_inflight: int = 1):
+        self.min_interval_s = max(0.0, float(min_interval_s))
+        self.max_inflight = max(1, int(max_inflight))
+        self._cond = threading.Condition()
+        self._inflight: Dict[str, int] = {}
+        self._next_start: Dict[str, float] = {}
+
+    def wait_time(self, domain: str) -> float:
+        """Seconds until ``domain`` may start a new request (0 = now)."""
+        with self._cond:
+            return self._wait_time_locked(domain, time.monotonic())
+
+    def _wait_time_locked(self, domain: str, now: float) -> float:
+        if self._inflight.get(domain, 0) >= self.max_inflight:
+            return self.min_interval_s or 0.05
+        return max(0.0, self._next_start.get(domain, 0.0) - now)
+
+    def try_acquire(self, domain: str) -> bool:
+        with self._cond:
+            now = time.monotonic()
+            if self._wait_time_locked(domain, now) > 0:
+                return False
+            self._inflight[domain] = self._inflight.get(domain, 0) + 1
+            self._next_start[domain] = now + self.min_interval_s
+            return True
+
+    def release(self, domain: str) -> None:
+        with self._cond:
+            left = self._inflight.get(domain, 0) - 1
+            if left > 0:
+                self._inflight[domain] = left
+            else:
+                self._inflight.pop(domain, None)
+            self._cond.notify_all()
+
+
+class BatchUploader:
+    """Accumulate crawled jobs and push them to the cloud in large gzip batches.
+
+    ``add`` is thread-safe and only triggers a network call once ``batch_size``
+    jobs are buffered; ``close`` flushes the tail. Failed batches are retried
+    with exponential backoff and then counted as dropped.
+
+    With ``delta=True`` each batch is synced in two steps: the uploader first
+    posts a ``{key, hash}`` manifest to ``/api/crawler/manifest`` and then
+    uploads only the postings the cloud reports as missing or changed, as an
+    NDJSON body. ``known_hashes`` (key -> content hash acknowledged by the
+    cloud) can be shared across cycles so unchanged postings are skipped
+    without even entering the manifest. Servers without the manifest endpoint
+    (404) are handled by falling back to full uploads.
+    """
+
+    def __init__(
+        self,
+        cloud_api_url: str,
+        api_key: str,
+        batch_size: int = 200,
+        compress: bool = True,
+        max_retries: int = 3,
+        backoff_base_s: float = 2.0,
+        timeout_s: int = 60,
+        source: str = "openclaw_local",
+        post_fn: Optional[Callable[..., Any]] = None,
+        delta: bool = False,
+        known_hashes: Optional[Dict[str, str]] = None,
+        cycle_id: str = "",
+    ):
+        base = cloud_api_url.rstrip("/")
+        self.url = f"{base}/api/crawler/upload"
+        self.manifest_url = f"{base}/api/crawler/manifest"
+        self.api_key = api_key
+        self.batch_size = max(1, int(batch_size))
+        self.compress = bool(compress)
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base_s = max(0.0, float(backoff_base_s))
+        self.timeout_s = timeout_s
+        self.source = source
+        self.delta = bool(delta)
+        self.known_hashes: Dict[str, str] = known_hashes if known_hashes is not None else {}
+        # Lets the cloud group a cycle's batches when computing per-cycle hit rate.
+        self.cycle_id = cycle_id
+        self._post = post_fn or requests.post
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._buffer: List[Dict[str, Any]] = []
+        self.stats: Dict[str, int] = {
+            "batches": 0,
+            "uploaded": 0,
+            "new": 0,
+            "updated": 0,
+            "skipped_unchanged": 0,
+            "failed_batches": 0,
+            "dropped": 0,
+            "bytes_sent": 0,
+        }
+
+    def add(self, jobs: List[Dict[str, Any]]) -> None:
+        if not jobs:
+            return
+        ready: List[List[Dict[str, Any]]] = []
+        with self._lock:
+            self._buffer.extend(jobs)
+            while len(self._buffer) >= self.batch_size:
+                ready.append(self._buffer[: self.batch_size])
+                del self._buffer[: self.batch_size]
+        for batch in ready:
+            self._send(batch)
+
+    def close(self) -> None:
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        if batch:
+            self._send(batch)
+
+    def _headers(self, content_type: str) -> Dict[str, str]:
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": content_type,
+            "X-Crawler-Source": self.source,
+        }
+        if self.cycle_id:
+            headers["X-Crawl-Cycle"] = self.cycle_id
+        if self.compress:
+            headers["Content-Encoding"] = "gzip"
+        return headers
+
+    def _body(self, raw: bytes) -> bytes:
+        return gzip.compress(raw) if self.compress else raw
+
+    def _encode(self, jobs: List[Dict[str, Any]]) -> tuple[bytes, Dict[str, str]]:
+        if self.delta:
+            return self._body(encode_ndjson(jobs)), self._headers("application/x-ndjson")
+        data = {
+            "jobs": jobs,
+            "timestamp": datetime.now().isoformat(),
+            "source": self.source,
+        }
+        return self._body(json.dumps(data, ensure_ascii=False).encode("utf-8")), self._headers("application/json")
+
+    def _post_with_retry(self, url: str, body: bytes, headers: Dict[str, str]) -> tuple[Optional[Any], str]:
+        """POST with backoff; returns (200 response or None, last error)."""
+        last_err = ""
+        for attempt in range(self.max_retries + 1):
+            try:
+                resp = self._post(url, data=body, headers=headers, timeout=self.timeout_s)
+                self.stats["bytes_sent"] += len(body)
+                if resp.status_code == 200:
+                    return resp, ""
+                last_err = f"{resp.status_code} - {str(resp.text)[:200]}"
+                # 4xx (bad key / bad payload / no endpoint) will not fix itself on retry.
+                if 400 <= resp.status_code < 500 and resp.status_code != 429:
+                    return None, last_err
+            except Exception as e:
+                last_err = str(e)
+            if attempt < self.max_retries:
+                time.sleep(_backoff_delay(self.backoff_base_s, attempt))
+        return None, last_err
+
+    def _negotiate(self, keyed: List[tuple[str, str, Dict[str, Any]]]) -> Optional[set]:
+        """Ask the cloud which keys it needs; None means "send everything"."""
+        manifest = {"items": [{"key": k, "hash": h} for k, h, _ in keyed]}
+        body = self._body(json.dumps(manifest, ensure_ascii=False).encode("utf-8"))
+        resp, err = self._post_with_retry(self.manifest_url, body, self._headers("application/json"))
+        if resp is None:
+            if err.startswith("404"):
+                print("⚠️ 云端不支持增量同步（/api/crawler/manifest 404），改为全量推送")
+                self.delta = False
+            return None
+        try:
+            need = (resp.json() or {}).get("need")
+        except Exception:
+            return None
+        return {str(k) for k in need} if isinstance(need, list) else None
+
+    def _send(self, jobs: List[Dict[str, Any]]) -> bool:
+        # One batch on the wire at a time keeps the server-side dedupe cheap
+        # and avoids hammering a cold cloud instance.
+        with self._send_lock:
+            keyed: List[tuple[str, str, Dict[str, Any]]] = []
+            if self.delta:
+                for job in jobs:
+                    key, h = job_sync_key(job), job_content_hash(job)
+                    if key and self.known_hashes.get(key) == h:
+                        self.stats["skipped_unchanged"] += 1
+                        continue
+                    keyed.append((key, h, job))
+                if not keyed:
+                    return True
+                need = self._negotiate(keyed)
+                if need is not None:
+                    for key, h, _ in keyed:
+                        if key and key not in need:
+                            self.known_hashes[key] = h
+                    self.stats["skipped_unchanged"] += sum(1 for k, _, _ in keyed if k and k not in need)
+                    keyed = [row for row in keyed if not row[0] or row[0] in need]
+                    if not keyed:
+                        return True
+                jobs = [job for _, _, job in keyed]
+
+            body, headers = self._encode(jobs)
+            resp, err = self._post_with_retry(self.url, body, headers)
+            if resp is None:
+                print(f"❌ 批量推送失败（{len(jobs)} 个岗位）：{err}")
+                self.stats["failed_batches"] += 1
+                self.stats["dropped"] += len(jobs)
+                return False
+
+            try:
+                payload = resp.json() or {}
+            except Exception:
+                payload = {}
+            self.stats["batches"] += 1
+            self.stats["uploaded"] += len(jobs)
+            self.stats["new"] += int(payload.get("new") or 0)
+            self.stats["updated"] += int(payload.get("updated") or 0)
+            for key, h, _ in keyed:
+                if key:
+                    self.known_hashes[key] = h
+            return True
+
+
+def _backoff_delay(base_s: float, attempt: int, cap_s: float = 60.0) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(cap_s, base_s * (2 ** attempt)))
+
+
+class CrawlerEngine:
+    """Work-queue crawler with bounded concurrency and per-domain budgets.
+
+    ``fetch`` is called as ``fetch(task) -> List[job]`` from worker threads; any
+    exception is treated as retryable until ``max_retries`` is exhausted. A
+    failed task is re-queued with a ``ready_at`` in the future rather than
+    sleeping inside the worker, so other domains keep making progress.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[CrawlTask], List[Dict[str, Any]]],
+        uploader: Optional[BatchUploader] = None,
+        max_workers: int = 4,
+        budget: Optional[DomainBudget] = None,
+        max_retries: int = 2,
+        backoff_base_s: float = 5.0,
+        on_result: Optional[Callable[[CrawlTask, List[Dict[str, Any]]], None]] = None,
+    ):
+        self.fetch = fetch
+        self.uploader = uploader
+        self.max_workers = max(1, int(max_workers))
+        self.budget = budget or DomainBudget()
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base_s = max(0.0, float(backoff_base_s))
+        self.on_result = on_result
+
+        self._cond = threading.Condition()
+        self._queue: List[CrawlTask] = []
+        self._seq = 0
+        self._pending = 0
+
+    def make_task(self, keywords: List[str], location: str = "", limit: int = 10, domain: str = "") -> CrawlTask:
+        with self._cond:
+            self._seq += 1
+            return CrawlTask(
+                ready_at=0.0,
+                seq=self._seq,
+                keywords=list(keywords),
+                location=location,
+                limit=limit,
+                domain=domain,
+            )
+
+    def run(self, tasks: List[CrawlTask]) -> Dict[str, Any]:
+        """Run all tasks to completion; returns crawl statistics."""
+        started = time.monotonic()
+        stats: Dict[str, Any] = {
+            "tasks": len(tasks),
+            "succeeded": 0,
+            "failed": 0,
+            "retries": 0,
+            "jobs": 0,
+            "errors": [],
+        }
+        stats_lock = threading.Lock()
+
+        with self._cond:
+            for t in tasks:
+                heapq.heappush(self._queue, t)
+            self._pending = len(tasks)
+
+        def _worker() -> None:
+            while True:
+                task = self._next_task()
+                if task is None:
+                    return
+                try:
+                    jobs = self.fetch(task) or []
+                except Exception as e:
+                    self.budget.release(task.domain)
+                    task.last_error = str(e)[:300]
+                    if task.attempt < self.max_retries:
+                        task.attempt += 1
+                        task.ready_at = time.monotonic() + _backoff_delay(self.backoff_base_s, task.attempt - 1)
+                        with stats_lock:
+                            stats["retries"] += 1
+                        with self._cond:
+                            heapq.heappush(self._queue, task)
+                            self._cond.notify_all()
+                        continue
+                    with stats_lock:
+                        stats["failed"] += 1
+                        stats["errors"].append(
+                            {"keywords": task.keywords, "location": task.location, "error": task.last_error}
+                        )
+                    self._task_done()
+                    continue
+
+                self.budget.release(task.domain)
+                with stats_lock:
+                    stats["succeeded"] += 1
+                    stats["jobs"] += len(jobs)
+                if self.on_result:
+                    try:
+                        self.on_result(task, jobs)
+                    except Exception:
+                        pass
+                if self.uploader and jobs:
+                    self.uploader.add(jobs)
+                self._task_done()
+
+        workers = [
+            threading.Thread(target=_worker, name=f"crawler-{i}", daemon=True)
+            for i in range(min(self.max_workers, max(1, len(tasks))))
+        ]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+
+        if self.uploader:
+            self.uploader.close()
+            stats["upload"] = dict(self.uploader.stats)
+        stats["elapsed_s"] = round(time.monotonic() - started, 3)
+        return stats
+
+    def _task_done(self) -> None:
+        with self._cond:
+            self._pending -= 1
+            self._cond.notify_all()
+
+    def _next_task(self) -> Optional[CrawlTask]:
+        """Pop the earliest runnable task whose domain budget allows a start.
+
+        Blocks until one is available; returns None once every task finished.
+        """
+        with self._cond:
+            while True:
+                if self._pending <= 0:
+                    return None
+                now = time.monotonic()
+                wait_s = 0.5
+                deferred: List[CrawlTask] = []
+                picked: Optional[CrawlTask] = None
+                while self._queue:
+                    task = heapq.heappop(self._queue)
+                    if task.ready_at > now:
+                        wait_s = min(wait_s, task.ready_at - now)
+                        deferred.append(task)
+                        break
+                    if self.budget.try_acquire(task.domain):
+                        picked = task
+                        break
+                    wait_s = min(wait_s, self.budget.wait_time(task.domain) or 0.05)
+                    deferred.append(task)
+                for t in deferred:
+                    heapq.heappush(self._queue, t)
+                if picked is not None:
+                    return picked
+                self._cond.wait(timeout=max(0.01, wait_s))
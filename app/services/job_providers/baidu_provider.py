@@ -10,6 +10,9 @@ from urllib.parse import quote_plus, urlparse
 import requests
 
 from .base import JobProvider, JobSearchParams
+from .circuit_breaker import ProviderBlocked, ProviderRateLimited
+from .detail_cache import get_job_detail_cache
+from .redirect_resolver import get_redirect_resolver
 
 
 class BaiduSearchProvider(JobProvider):
@@ -29,15 +32,18 @@ class BaiduSearchProvider(JobProvider):
       - JOB_SEARCH_SITES: optional comma-separated domains to restrict
         e.g. "zhipin.com,liepin.com,zhaopin.com,51job.com"
       - BAIDU_TIMEOUT_S: optional, default 12
+      - BAIDU_SEARCH_URL: optional, default https://www.baidu.com/s (load tests point it at a stub)
     """
 
     name = "baidu"
 
     def __init__(self, timeout_s: Optional[int] = None):
         self.timeout_s = int(timeout_s or os.getenv("BAIDU_TIMEOUT_S", "12") or "12")
+        self.search_url = os.getenv("BAIDU_SEARCH_URL", "").strip() or "https://www.baidu.com/s"
         sites = os.getenv("JOB_SEARCH_SITES", "").strip()
         self.sites = [s.strip().lstrip(".") for s in sites.split(",") if s.strip()] if sites else []
-        self._cache: Dict[str, Dict[str, Any]] = {}
+        # 所有 provider 共用一个有界 LRU（跨 worker 时写穿到共享状态）
+        self._cache = get_job_detail_cache().view(self.name)
 
     def _job_id(self, url: str) -> str:
         return "baidu_" + hashlib.sha1(url.encode("utf-8", errors="ignore")).hexdigest()[:16]
@@ -57,18 +63,11 @@ class BaiduSearchProvider(JobProvider):
             return "前程无忧"
         return host or "百度"
 
+    def _is_job_board(self, url: str) -> bool:
+        return self._platform_from_url(url) in {"Boss直聘", "猎聘", "智联招聘", "前程无忧"}
+
     def _resolve_redirect(self, url: str) -> str:
-        # Baidu uses redirector links; follow once to get the final job board URL.
-        try:
-            r = requests.get(
-                url,
-                headers={"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/122"},
-                timeout=self.timeout_s,
-                allow_redirects=True,
-            )
-            return r.url or url
-        except Exception:
-            return url
+        return get_redirect_resolver().resolve(url, skip=self._is_job_board)
 
     def search_jobs(self, params: JobSearchParams) -> List[Dict[str, Any]]:
         limit = max(1, min(int(params.limit or 50), 50))
@@ -88,7 +87,7 @@ class BaiduSearchProvider(JobProvider):
 
         def fetch(query: str, n: int) -> List[tuple[str, str]]:
             wd = quote_plus(query)
-            url = f"https://www.baidu.com/s?wd={wd}&rn={max(1, min(n, 50))}"
+            url = f"{self.search_url}?wd={wd}&rn={max(1, min(n, 50))}"
             resp = requests.get(
                 url,
                 headers={
@@ -97,15 +96,17 @@ class BaiduSearchProvider(JobProvider):
                 },
                 timeout=self.timeout_s,
             )
-            # Baidu may redirect to captcha page.
+            if resp.status_code == 429:
+                raise ProviderRateLimited("百度请求过于频繁 (HTTP 429)，请稍后重试。")
+            # Baidu may redirect to captcha page (opens the circuit breaker for a while).
             if "wappass.baidu.com" in (resp.url or "") or "captcha" in (resp.url or ""):
-                raise RuntimeError("百度触发安全验证/验证码，无法继续实时搜索。请稍后重试或改用第三方API。")
+                raise ProviderBlocked("百度触发安全验证/验证码，无法继续实时搜索。请稍后重试或改用第三方API。")
             text = resp.text or ""
             if ("安全验证" in text) or ("请输入验证码" in text):
-                raise RuntimeError("百度触发安全验证/验证码，无法继续实时搜索。请稍后重试或改用本地数据/第三方API。")
+                raise ProviderBlocked("百度触发安全验证/验证码，无法继续实时搜索。请稍后重试或改用本地数据/第三方API。")
 
             # Typical pattern: <h3 ...><a href="...">TITLE</a>
-            pattern = re.compile(r"<h3[^>]*>\\s*<a\\s+[^>]*href=\"([^\"]+)\"[^>]*>(.*?)</a>", re.I | re.S)
+            pattern = re.compile(r"<h3[^>]*>\s*<a\s+[^>]*href=\"([^\"]+)\"[^>]*>(.*?)</a>", re.I | re.S)
             matches = pattern.findall(text)
             pairs: List[tuple[str, str]] = []
             for href, raw_title in matches:
@@ -127,12 +128,16 @@ class BaiduSearchProvider(JobProvider):
         else:
             pairs = fetch(base_query, limit)
 
+        # Baidu uses redirector links: resolve the whole page at once (concurrent HEADs,
+        # cached); results that already point at a job board need no round trip.
+        finals = get_redirect_resolver().resolve_many((href for _, href in pairs), skip=self._is_job_board)
+
         out: List[Dict[str, Any]] = []
         seen: set[str] = set()
         for title, href in pairs:
             if len(out) >= limit:
                 break
-            final_url = self._resolve_redirect(href)
+            final_url = finals.get(href, href)
             if final_url in seen:
                 continue
             seen.add(final_url)
@@ -151,9 +156,9 @@ class BaiduSearchProvider(JobProvider):
                 "updated": "",
                 "provider": self.name,
             }
-            self._cache[job_id] = job
             out.append(job)
 
+        self._cache.update({j["id"]: j for j in out})
         return out
 
     def get_job_detail(self, job_id: str) -> Optional[Dict[str, Any]]:
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import os
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional
 
+# 搜索结果详情缓存（共享状态）保留时长
+JOB_DETAIL_CACHE_TTL_S = float(os.getenv("JOB_DETAIL_CACHE_TTL_S", "86400") or "86400")
+
 
 @dataclass
 class JobSearchParams:
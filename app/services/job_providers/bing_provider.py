@@ -8,6 +8,8 @@ from urllib.parse import urlparse
 import requests
 
 from .base import JobProvider, JobSearchParams
+from .circuit_breaker import ProviderRateLimited, retry_after_s
+from .detail_cache import get_job_detail_cache
 
 
 class BingWebSearchProvider(JobProvider):
@@ -33,7 +35,8 @@ class BingWebSearchProvider(JobProvider):
         self.api_key = (api_key or os.getenv("BING_SEARCH_API_KEY", "")).strip()
         self.endpoint = (endpoint or os.getenv("BING_SEARCH_ENDPOINT", "")).strip() or "https://api.bing.microsoft.com/v7.0/search"
         self.timeout_s = timeout_s
-        self._cache: Dict[str, Dict[str, Any]] = {}
+        # 所有 provider 共用一个有界 LRU（跨 worker 时写穿到共享状态）
+        self._cache = get_job_detail_cache().view(self.name)
 
         sites = os.getenv("JOB_SEARCH_SITES", "").strip()
         self.sites = [s.strip().lstrip(".") for s in sites.split(",") if s.strip()] if sites else []
@@ -83,6 +86,8 @@ class BingWebSearchProvider(JobProvider):
         except requests.RequestException as e:
             raise RuntimeError(f"Bing Search API 请求失败: {e}") from e
 
+        if resp.status_code == 429:
+            raise ProviderRateLimited("Bing Search API 限流: HTTP 429", retry_after_s(resp))
         if resp.status_code != 200:
             raise RuntimeError(f"Bing Search API 返回异常: HTTP {resp.status_code}")
 
@@ -109,9 +114,9 @@ class BingWebSearchProvider(JobProvider):
                 "updated": "",
                 "provider": self.name,
             }
-            self._cache[job_id] = job
             out.append(job)
 
+        self._cache.update({j["id"]: j for j in out})
         return out
 
     def get_job_detail(self, job_id: str) -> Optional[Dict[str, Any]]:
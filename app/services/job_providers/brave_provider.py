@@ -8,6 +8,8 @@ from urllib.parse import urlparse
 import requests
 
 from .base import JobProvider, JobSearchParams
+from .circuit_breaker import ProviderRateLimited, retry_after_s
+from .detail_cache import get_job_detail_cache
 
 
 class BraveSearchProvider(JobProvider):
@@ -36,7 +38,8 @@ class BraveSearchProvider(JobProvider):
 
         sites = os.getenv("JOB_SEARCH_SITES", "").strip()
         self.sites = [s.strip().lstrip(".") for s in sites.split(",") if s.strip()] if sites else []
-        self._cache: Dict[str, Dict[str, Any]] = {}
+        # 所有 provider 共用一个有界 LRU（跨 worker 时写穿到共享状态）
+        self._cache = get_job_detail_cache().view(self.name)
 
     def _job_id(self, url: str) -> str:
         return "brave_" + hashlib.sha1(url.encode("utf-8", errors="ignore")).hexdigest()[:16]
@@ -92,6 +95,8 @@ class BraveSearchProvider(JobProvider):
         except requests.RequestException as e:
             raise RuntimeError(f"Brave Search API 请求失败: {e}") from e
 
+        if resp.status_code == 429:
+            raise ProviderRateLimited("Brave Search API 限流: HTTP 429", retry_after_s(resp))
         if resp.status_code != 200:
             raise RuntimeError(f"Brave Search API 返回异常: HTTP {resp.status_code}")
 
@@ -117,9 +122,9 @@ class BraveSearchProvider(JobProvider):
                 "updated": "",
                 "provider": self.name,
             }
-            self._cache[job_id] = job
             out.append(job)
 
+        self._cache.update({j["id"]: j for j in out})
         return out
 
     def get_job_detail(self, job_id: str) -> Optional[Dict[str, Any]]:
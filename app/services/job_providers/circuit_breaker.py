@@ -0,0 +1,369 @@
+"""
+岗位数据源熔断器 + 健康评分
+
+Scraped providers fail in bursts: Baidu starts redirecting to a captcha page
+(`wappass.baidu.com`), DuckDuckGo / Bing answer 429 or an anti-bot page, and
+each later search would still try them first and wait for the failure. Every
+provider gets a `CircuitBreaker`:
+
+  closed     normal; `failures` consecutive errors (slow calls count too) open it
+  open       calls are skipped for a cooldown that doubles on each re-open
+             (a captcha opens it at once for CAPTCHA_OPEN_S, a 429 for Retry-After)
+  half_open  after the cooldown one probe call is let through; success closes
+             the breaker, failure re-opens it
+
+Each breaker also keeps a health score in [0, 1] (EWMA of success and latency,
+0 while open). `ProviderHealth.order` keeps the configured priority order and
+only moves a provider behind the healthy ones while its breaker is not closed
+or its success EWMA is below PROVIDER_BREAKER_DEMOTE_BELOW, so a blocked
+provider costs nothing until it recovers and latency noise never reshuffles
+the chain. State is per worker.
+
+Env:
+  - PROVIDER_BREAKER_FAILURES: consecutive failures that open a breaker, default 3
+  - PROVIDER_BREAKER_OPEN_S: first cooldown, default 60
+  - PROVIDER_BREAKER_MAX_OPEN_S: cooldown cap, default 900
+  - PROVIDER_BREAKER_CAPTCHA_OPEN_S: cooldown after a captcha page, default 600
+  - PROVIDER_BREAKER_SLOW_S: a call slower than this counts as a failure, default 8
+  - PROVIDER_BREAKER_SLOW_S_<NAME>: per-provider override, e.g. PROVIDER_BREAKER_SLOW_S_OPENCLAW=120;
+    0 disables slow-call failures for that provider. Browser-backed providers
+    default to DEFAULT_SLOW_S below (an OpenClaw multi-site search is normally slow).
+  - PROVIDER_BREAKER_DEMOTE_BELOW: success EWMA under which a closed provider is
+    tried after the healthy ones, default 0.5
+"""
+
+from __future__ import annotations
+
+import functools
+import logging
+import math
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from app.core.performance import metrics
+
+logger = logging.getLogger("ai_job_helper")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_CAPTCHA_URL_MARKERS = ("wappass.baidu.com", "/captcha", "captcha.", "/challenge")
+# Page markers only (not words a job title could contain); Baidu checks its own Chinese captcha text.
+_CAPTCHA_TEXT_MARKERS = ("anomaly-modal", "bots use DuckDuckGo", "captcha-form", "g-recaptcha")
+
+
+class ProviderError(RuntimeError):
+    """A provider failure with a known class (`kind`) the breaker can act on."""
+
+    kind = "error"
+
+
+class ProviderBlocked(ProviderError):
+    """The provider served a captcha / anti-bot page instead of results."""
+
+    kind = "captcha"
+
+
+class ProviderRateLimited(ProviderError):
+    kind = "rate_limited"
+
+    def __init__(self, message: str, retry_after_s: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after_s = retry_after_s
+
+
+class ProviderUnavailable(ProviderError):
+    """Raised instead of calling a provider whose breaker is open."""
+
+    kind = "open"
+
+
+def classify_error(exc: BaseException) -> str:
+    """Error class used by the breaker: captcha, rate_limited, timeout, http or error."""
+    if isinstance(exc, ProviderError):
+        return exc.kind
+    chain = [exc, exc.__cause__, exc.__context__]
+    for e in chain:
+        if e is None:
+            continue
+        if isinstance(e, TimeoutError) or "Timeout" in type(e).__name__:
+            return "timeout"
+    text = str(exc)
+    if "HTTP 429" in text:
+        return "rate_limited"
+    if "HTTP " in text:
+        return "http"
+    return "error"
+
+
+def retry_after_s(resp: Any) -> Optional[float]:
+    """Seconds from a `Retry-After` header, if present and numeric."""
+    try:
+        return float((getattr(resp, "headers", None) or {}).get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def check_response(resp: Any, provider: str) -> None:
+    """Raise `ProviderBlocked` / `ProviderRateLimited` for captcha pages and 429s."""
+    if getattr(resp, "status_code", 200) == 429:
+        raise ProviderRateLimited(f"{provider} rate limited (HTTP 429)", retry_after_s(resp))
+    url = (getattr(resp, "url", "") or "").lower()
+    if any(m in url for m in _CAPTCHA_URL_MARKERS):
+        raise ProviderBlocked(f"{provider} served a captcha page")
+    text = (getattr(resp, "text", "") or "")[:20000]
+    if any(m in text for m in _CAPTCHA_TEXT_MARKERS):
+        raise ProviderBlocked(f"{provider} served a captcha page")
+
+
+class CircuitBreaker:
+    """Thread-safe breaker + health score for one provider."""
+
+    def __init__(
+        self,
+        name: str,
+        failures: int = 3,
+        open_s: float = 60.0,
+        max_open_s: float = 900.0,
+        captcha_open_s: float = 600.0,
+        slow_s: float = 8.0,
+        alpha: float = 0.3,
+        now_fn: Optional[Callable[[], float]] = None,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, int(failures))
+        self.open_s = float(open_s)
+        self.max_open_s = max(self.open_s, float(max_open_s))
+        self.captcha_open_s = float(captcha_open_s)
+        # 0 / negative: no call counts as slow, and latency no longer lowers the score.
+        self.slow_s = float(slow_s) if slow_s and float(slow_s) > 0 else math.inf
+        self.alpha = float(alpha)
+        self._now = now_fn or time.monotonic
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self._consecutive = 0
+        self._reopens = 0
+        self._open_until = 0.0
+        self._probe_inflight = False
+        self._success_ewma = 1.0
+        self._latency_ewma = 0.0
+        self._last_error: Optional[str] = None
+        self._last_kind: Optional[str] = None
+        self._counts = {"success": 0, "failure": 0, "skipped": 0}
+
+    def _transition(self, state: str) -> None:
+        if state != self.state:
+            logger.info("provider breaker %s: %s -> %s", self.name, self.state, state)
+            self.state = state
+            metrics.inc("provider_breaker_transitions_total", provider=self.name, state=state)
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; in half_open only one probe at a time."""
+        with self._lock:
+            if self.state == OPEN and self._now() >= self._open_until:
+                self._transition(HALF_OPEN)
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._probe_inflight:
+                self._probe_inflight = True
+                return True
+            self._counts["skipped"] += 1
+        metrics.inc("provider_breaker_skips_total", provider=self.name)
+        return False
+
+    def _observe(self, ok: bool, latency_s: Optional[float]) -> None:
+        a = self.alpha
+        self._success_ewma = (1 - a) * self._success_ewma + a * (1.0 if ok else 0.0)
+        if latency_s is not None:
+            self._latency_ewma = latency_s if not self._counts["success"] + self._counts["failure"] else (
+                (1 - a) * self._latency_ewma + a * latency_s
+            )
+
+    def _open(self, cooldown_s: float) -> None:
+        self._open_until = self._now() + cooldown_s
+        self._probe_inflight = False
+        self._transition(OPEN)
+
+    def record_success(self, latency_s: float = 0.0) -> None:
+        with self._lock:
+            slow = latency_s > self.slow_s
+            self._observe(not slow, latency_s)
+            self._counts["success"] += 1
+            if slow:
+                self._fail_locked("slow", f"slow call {latency_s:.1f}s")
+                return
+            self._consecutive = 0
+            self._probe_inflight = False
+            if self.state != CLOSED:
+                self._reopens = 0
+                self._transition(CLOSED)
+
+    def record_failure(self, exc: Any = None, latency_s: Optional[float] = None) -> str:
+        """Record a failed call (`exc` is an exception or an error-class string); returns the class."""
+        kind = exc if isinstance(exc, str) else classify_error(exc) if exc is not None else "error"
+        with self._lock:
+            self._observe(False, latency_s)
+            self._counts["failure"] += 1
+            retry_after = getattr(exc, "retry_after_s", None)
+            self._fail_locked(kind, str(exc)[:300] if exc is not None else kind, retry_after)
+        metrics.inc("provider_failures_by_class_total", provider=self.name, kind=kind)
+        return kind
+
+    def _fail_locked(self, kind: str, message: str, retry_after: Optional[float] = None) -> None:
+        self._last_kind = kind
+        self._last_error = message
+        self._consecutive += 1
+        if kind == "captcha":
+            self._reopens += 1
+            self._open(max(self.captcha_open_s, self._backoff()))
+        elif kind == "rate_limited":
+            self._reopens += 1
+            self._open(retry_after if retry_after else self._backoff())
+        elif self.state == HALF_OPEN or self._consecutive >= self.failure_threshold:
+            self._reopens += 1
+            self._open(self._backoff())
+
+    def _backoff(self) -> float:
+        return min(self.max_open_s, self.open_s * (2 ** max(0, self._reopens - 1)))
+
+    def score(self) -> float:
+        with self._lock:
+            if self.state == OPEN and self._now() < self._open_until:
+                return 0.0
+            sampled = self._counts["success"] + self._counts["failure"] > 0
+            latency_factor = 1.0 / (1.0 + self._latency_ewma / self.slow_s) if sampled else 1.0
+            value = self._success_ewma * latency_factor
+            return round(value * (0.5 if self.state != CLOSED else 1.0), 4)
+
+    def healthy(self, min_success: float) -> bool:
+        """Closed and succeeding often enough to keep its place in the priority order."""
+        with self._lock:
+            return self.state == CLOSED and self._success_ewma >= min_success
+
+    def snapshot(self) -> Dict[str, Any]:
+        score = self.score()
+        with self._lock:
+            return {
+                "state": self.state,
+                "score": score,
+                "consecutive_failures": self._consecutive,
+                "retry_in_s": round(max(0.0, self._open_until - self._now()), 1) if self.state == OPEN else 0.0,
+                "latency_ewma_s": round(self._latency_ewma, 3),
+                "success_ewma": round(self._success_ewma, 4),
+                "last_error_kind": self._last_kind,
+                "last_error": self._last_error,
+                **self._counts,
+            }
+
+
+class ProviderHealth:
+    """Registry of breakers keyed by provider name."""
+
+    def __init__(
+        self,
+        breaker_factory: Optional[Callable[[str], CircuitBreaker]] = None,
+        demote_below: float = 0.5,
+    ):
+        self._factory = breaker_factory or _breaker_from_env
+        self.demote_below = float(demote_below)
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def breaker(self, name: str) -> CircuitBreaker:
+        b = self._breakers.get(name)
+        if b is None:
+            with self._lock:
+                b = self._breakers.get(name)
+                if b is None:
+                    b = self._breakers[name] = self._factory(name)
+        return b
+
+    def order(self, names: Iterable[str]) -> List[str]:
+        """
+        Healthy providers in the given (priority) order, then the demoted ones
+        (breaker not closed, or success EWMA below `demote_below`) by score.
+        """
+        names = list(names)
+        healthy = [n for n in names if self.breaker(n).healthy(self.demote_below)]
+        demoted = [n for n in names if n not in healthy]
+        scores = {n: self.breaker(n).score() for n in demoted}
+        return healthy + sorted(demoted, key=lambda n: -scores[n])
+
+    def call(self, name: str, fn: Callable[[], Any]) -> Any:
+        """Run `fn` through the breaker; raises `ProviderUnavailable` while it is open."""
+        b = self.breaker(name)
+        if not b.allow():
+            raise ProviderUnavailable(f"{name} temporarily disabled (circuit open)")
+        t0 = time.perf_counter()
+        try:
+            result = fn()
+        except Exception as e:
+            b.record_failure(e, time.perf_counter() - t0)
+            raise
+        b.record_success(time.perf_counter() - t0)
+        return result
+
+    def protect(self, name: str, default: Callable[[], Any] = list):
+        """Decorator for search functions that should return `default()` instead of raising."""
+
+        def deco(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                try:
+                    return self.call(name, lambda: func(*args, **kwargs))
+                except ProviderUnavailable:
+                    return default()
+                except Exception as e:
+                    logger.info("provider %s failed: %s", name, str(e)[:200])
+                    return default()
+
+            return wrapper
+
+        return deco
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {name: b.snapshot() for name, b in sorted(breakers.items())}
+
+
+# Browser-driven providers render several sites per search; 8s would open them on normal calls.
+DEFAULT_SLOW_S: Dict[str, float] = {"openclaw": 180.0}
+
+
+def slow_threshold_s(name: str) -> float:
+    raw = os.getenv(f"PROVIDER_BREAKER_SLOW_S_{name.upper()}", "").strip()
+    if raw:
+        return float(raw)
+    if name in DEFAULT_SLOW_S:
+        return DEFAULT_SLOW_S[name]
+    return float(os.getenv("PROVIDER_BREAKER_SLOW_S", "8") or "8")
+
+
+def _breaker_from_env(name: str) -> CircuitBreaker:
+    return CircuitBreaker(
+        name,
+        failures=int(os.getenv("PROVIDER_BREAKER_FAILURES", "3") or "3"),
+        open_s=float(os.getenv("PROVIDER_BREAKER_OPEN_S", "60") or "60"),
+        max_open_s=float(os.getenv("PROVIDER_BREAKER_MAX_OPEN_S", "900") or "900"),
+        captcha_open_s=float(os.getenv("PROVIDER_BREAKER_CAPTCHA_OPEN_S", "600") or "600"),
+        slow_s=slow_threshold_s(name),
+    )
+
+
+_provider_health: Optional[ProviderHealth] = None
+_provider_health_lock = threading.Lock()
+
+
+def get_provider_health() -> ProviderHealth:
+    global _provider_health
+    if _provider_health is None:
+        with _provider_health_lock:
+            if _provider_health is None:
+                _provider_health = ProviderHealth(
+                    demote_below=float(os.getenv("PROVIDER_BREAKER_DEMOTE_BELOW", "0.5") or "0.5"),
+                )
+    return _provider_health
@@ -0,0 +1,208 @@
+"""
+岗位详情缓存（所有 provider 共用，有界 LRU）
+
+Every provider keeps the jobs it returned so `get_job_detail` / `/api/jobs/{id}`
+can answer without another search. They all share one `JobDetailCache`:
+an OrderedDict LRU (O(1) hit / insert / evict) bounded by entry count *and*
+serialized bytes, with a TTL, keyed `"{provider}:{job_id}"`. Hits, misses and
+evictions go to `metrics` (`cache_requests_total{cache="job_detail_lru"}`).
+
+With a shared `SHARED_STATE_BACKEND` the local LRU is a first tier: writes go
+through to the `job_detail` namespace so another worker can still serve the
+detail page, and local misses fall back to it.
+
+Env:
+  - JOB_DETAIL_CACHE_MAX_ITEMS: default 5000
+  - JOB_DETAIL_CACHE_MAX_BYTES: default 33554432 (32 MiB)
+  - JOB_DETAIL_CACHE_TTL_S: default 86400
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.performance import metrics
+from app.core.shared_state import SharedState, get_shared_state
+
+from .base import JOB_DETAIL_CACHE_TTL_S
+
+_NS = "job_detail"
+
+
+def _size_of(job: Dict[str, Any]) -> int:
+    return len(json.dumps(job, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+class JobDetailCache:
+    """Thread-safe bounded LRU of job dicts."""
+
+    def __init__(
+        self,
+        max_items: int = 5000,
+        max_bytes: int = 32 * 1024 * 1024,
+        ttl_s: float = JOB_DETAIL_CACHE_TTL_S,
+        state: Optional[SharedState] = None,
+        now_fn: Optional[Callable[[], float]] = None,
+    ):
+        self.max_items = max(1, int(max_items))
+        self.max_bytes = max(1, int(max_bytes))
+        self.ttl_s = float(ttl_s)
+        self._state = state
+        self._now = now_fn or time.monotonic
+        self._lock = threading.Lock()
+        # key -> (job, size_bytes, expires_at)
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], int, float]]" = OrderedDict()
+        self._bytes = 0
+        self._writes = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    @staticmethod
+    def key(provider: str, job_id: str) -> str:
+        return f"{provider}:{job_id}"
+
+    def _shared(self) -> Optional[SharedState]:
+        state = self._state
+        return state if state is not None and state.shared else None
+
+    def _drop(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _insert(self, key: str, job: Dict[str, Any], expires_at: float) -> int:
+        """Caller holds the lock; returns how many entries were evicted."""
+        if key in self._entries:
+            self._drop(key)
+        size = _size_of(job)
+        self._entries[key] = (job, size, expires_at)
+        self._bytes += size
+        evicted = 0
+        while len(self._entries) > self.max_items or (self._bytes > self.max_bytes and len(self._entries) > 1):
+            old_key = next(iter(self._entries))
+            self._drop(old_key)
+            evicted += 1
+        self._stats["evictions"] += evicted
+        return evicted
+
+    def put_many(self, provider: str, jobs: Dict[str, Dict[str, Any]]) -> None:
+        if not jobs:
+            return
+        expires_at = self._now() + self.ttl_s
+        evicted = 0
+        with self._lock:
+            for job_id, job in jobs.items():
+                evicted += self._insert(self.key(provider, job_id), job, expires_at)
+            self._writes += len(jobs)
+            trim_shared = self._writes >= 256
+            if trim_shared:
+                self._writes = 0
+        if evicted:
+            metrics.inc("cache_evictions_total", evicted, cache="job_detail_lru")
+        shared = self._shared()
+        if shared is not None:
+            shared.set_many(_NS, {self.key(provider, k): v for k, v in jobs.items()}, ttl_s=self.ttl_s)
+            if trim_shared:
+                shared.trim(_NS, self.max_items)
+
+    def put(self, provider: str, job_id: str, job: Dict[str, Any]) -> None:
+        self.put_many(provider, {job_id: job})
+
+    def get(self, provider: str, job_id: str) -> Optional[Dict[str, Any]]:
+        key = self.key(provider, job_id)
+        now = self._now()
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is not None and hit[2] <= now:
+                self._drop(key)
+                self._stats["expired"] += 1
+                hit = None
+            if hit is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+        if hit is not None:
+            metrics.inc("cache_requests_total", cache="job_detail_lru", result="hit")
+            return hit[0]
+
+        shared = self._shared()
+        job = shared.get(_NS, key) if shared is not None else None
+        if job is not None:
+            with self._lock:
+                self._insert(key, job, now + self.ttl_s)
+                self._stats["hits"] += 1
+            metrics.inc("cache_requests_total", cache="job_detail_lru", result="shared_hit")
+            return job
+        with self._lock:
+            self._stats["misses"] += 1
+        metrics.inc("cache_requests_total", cache="job_detail_lru", result="miss")
+        return None
+
+    def contains(self, provider: str, job_id: str) -> bool:
+        with self._lock:
+            hit = self._entries.get(self.key(provider, job_id))
+            if hit is not None and hit[2] > self._now():
+                return True
+        shared = self._shared()
+        return shared is not None and shared.get(_NS, self.key(provider, job_id)) is not None
+
+    def view(self, provider: str) -> "ProviderCacheView":
+        return ProviderCacheView(self, provider)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "items": len(self._entries),
+                "bytes": self._bytes,
+                "max_items": self.max_items,
+                "max_bytes": self.max_bytes,
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else None,
+            }
+
+
+class ProviderCacheView:
+    """The slice of the cache owned by one provider; supports the dict calls providers use."""
+
+    def __init__(self, cache: JobDetailCache, provider: str):
+        self.cache = cache
+        self.provider = provider
+
+    def __setitem__(self, job_id: str, job: Dict[str, Any]) -> None:
+        self.cache.put(self.provider, job_id, job)
+
+    def get(self, job_id: str, default: Any = None) -> Any:
+        job = self.cache.get(self.provider, job_id)
+        return default if job is None else job
+
+    def __contains__(self, job_id: object) -> bool:
+        return self.cache.contains(self.provider, str(job_id))
+
+    def update(self, jobs: Dict[str, Dict[str, Any]]) -> None:
+        self.cache.put_many(self.provider, dict(jobs))
+
+
+_job_detail_cache: Optional[JobDetailCache] = None
+_job_detail_cache_lock = threading.Lock()
+
+
+def get_job_detail_cache() -> JobDetailCache:
+    global _job_detail_cache
+    if _job_detail_cache is None:
+        with _job_detail_cache_lock:
+            if _job_detail_cache is None:
+                _job_detail_cache = JobDetailCache(
+                    max_items=int(os.getenv("JOB_DETAIL_CACHE_MAX_ITEMS", "5000") or "5000"),
+                    max_bytes=int(os.getenv("JOB_DETAIL_CACHE_MAX_BYTES", str(32 * 1024 * 1024)) or "33554432"),
+                    ttl_s=JOB_DETAIL_CACHE_TTL_S,
+                    state=get_shared_state(),
+                )
+    return _job_detail_cache
@@ -7,6 +7,8 @@ from typing import Any, Dict, List, Optional
 import requests
 
 from .base import JobProvider, JobSearchParams
+from .circuit_breaker import ProviderRateLimited, retry_after_s
+from .detail_cache import get_job_detail_cache
 
 
 class JoobleProvider(JobProvider):
@@ -21,7 +23,8 @@ class JoobleProvider(JobProvider):
     def __init__(self, api_key: Optional[str] = None, timeout_s: int = 12):
         self.api_key = api_key or os.getenv("JOOBLE_API_KEY", "").strip()
         self.timeout_s = timeout_s
-        self._cache: Dict[str, Dict[str, Any]] = {}
+        # 所有 provider 共用一个有界 LRU（跨 worker 时写穿到共享状态）
+        self._cache = get_job_detail_cache().view(self.name)
 
     def _job_id(self, job: Dict[str, Any]) -> str:
         # Jooble returns an "id" but it's not always present. We create a stable
@@ -61,6 +64,8 @@ class JoobleProvider(JobProvider):
         except requests.RequestException as e:
             raise RuntimeError(f"Jooble API 请求失败: {e}") from e
 
+        if resp.status_code == 429:
+            raise ProviderRateLimited("Jooble API 限流: HTTP 429", retry_after_s(resp))
         if resp.status_code != 200:
             # Jooble returns JSON error body sometimes; keep it short.
             raise RuntimeError(f"Jooble API 返回异常: HTTP {resp.status_code}")
@@ -84,9 +89,9 @@ class JoobleProvider(JobProvider):
                 "updated": j.get("updated") or "",
                 "provider": self.name,
             }
-            self._cache[job_id] = job
             out.append(job)
 
+        self._cache.update({j["id"]: j for j in out})
         return out
 
     def get_job_detail(self, job_id: str) -> Optional[Dict[str, Any]]:
@@ -0,0 +1,190 @@
+"""
+OpenClaw 常驻控制进程（每个 browser profile 一个）
+
+`OpenClawBrowserProvider` used to spawn one `openclaw browser ...` CLI process
+per step (attach probe, navigate, two waits, evaluate), i.e. 5+ Node start-ups
+per site. `OpenClawBridge` keeps a single controller process alive per profile
+and talks newline-delimited JSON-RPC over its stdin/stdout:
+
+    -> {"id": 7, "method": "navigate", "params": {"url": "...", "tab": "t2"}}
+    <- {"id": 7, "result": {...}}            or {"id": 7, "error": "..."}
+
+Requests are multiplexed by id, so several threads (one per job-site tab) can
+have commands in flight at once. The controller command comes from
+OPENCLAW_BRIDGE_CMD (`--browser-profile <name>` is appended); methods used:
+`evaluate`, `navigate`, `wait`, `tab.open`, `tab.close`.
+"""
+
+from __future__ import annotations
+
+import atexit
+import itertools
+import json
+import logging
+import os
+import shlex
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("ai_job_helper")
+
+
+class BridgeError(RuntimeError):
+    pass
+
+
+class OpenClawBridge:
+    """One long-lived controller process; thread-safe, restarts itself once if it dies."""
+
+    def __init__(self, cmd: List[str], browser_profile: str, attach_ttl_s: float = 60.0):
+        self.cmd = list(cmd)
+        self.browser_profile = browser_profile
+        self.attach_ttl_s = max(0.0, float(attach_ttl_s))
+        self._proc: Optional[subprocess.Popen] = None
+        self._ids = itertools.count(1)
+        # In-flight requests per controller process, so a dead process only fails its own.
+        self._pending: Dict[subprocess.Popen, Dict[int, Future]] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._attached_at: Optional[float] = None
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def _start(self) -> None:
+        exe = shutil.which(self.cmd[0]) or self.cmd[0]
+        self._proc = subprocess.Popen(
+            [exe, *self.cmd[1:], "--browser-profile", self.browser_profile],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            bufsize=1,
+        )
+        self._attached_at = None
+        proc = self._proc
+        threading.Thread(target=self._read_loop, args=(proc,), name="openclaw-bridge", daemon=True).start()
+        threading.Thread(target=self._drain_stderr, args=(proc,), name="openclaw-bridge-err", daemon=True).start()
+
+    def _read_loop(self, proc: subprocess.Popen) -> None:
+        for line in proc.stdout:  # type: ignore[union-attr]
+            line = line.strip()
+            if not line.startswith("{"):
+                # Plugin logs / warnings share stdout with the protocol.
+                continue
+            try:
+                msg = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            with self._lock:
+                fut = self._pending.get(proc, {}).pop(msg.get("id"), None)
+            if fut is None:
+                continue
+            if msg.get("error"):
+                fut.set_exception(BridgeError(str(msg["error"])[:500]))
+            else:
+                fut.set_result(msg.get("result"))
+        # Process exited: fail everything still waiting on it (not on a replacement process).
+        with self._lock:
+            pending = self._pending.pop(proc, {})
+        for fut in pending.values():
+            if not fut.done():
+                fut.set_exception(BridgeError("OpenClaw 控制进程已退出"))
+
+    @staticmethod
+    def _drain_stderr(proc: subprocess.Popen) -> None:
+        for line in proc.stderr:  # type: ignore[union-attr]
+            logger.debug("openclaw bridge: %s", line.rstrip())
+
+    def call(self, method: str, params: Optional[Dict[str, Any]] = None, timeout_s: float = 60.0) -> Any:
+        for attempt in (0, 1):
+            with self._lock:
+                if not self.alive:
+                    self._start()
+                rid = next(self._ids)
+                fut: Future = Future()
+                proc = self._proc
+                self._pending.setdefault(proc, {})[rid] = fut
+            line = json.dumps({"id": rid, "method": method, "params": params or {}}, ensure_ascii=False)
+            try:
+                with self._write_lock:
+                    proc.stdin.write(line + "\n")  # type: ignore[union-attr]
+                    proc.stdin.flush()  # type: ignore[union-attr]
+            except (BrokenPipeError, OSError, ValueError):
+                with self._lock:
+                    self._pending.get(proc, {}).pop(rid, None)
+                if attempt == 0:
+                    continue
+                raise BridgeError("无法写入 OpenClaw 控制进程")
+            try:
+                return fut.result(timeout=timeout_s)
+            except FutureTimeout:
+                with self._lock:
+                    self._pending.get(proc, {}).pop(rid, None)
+                raise BridgeError(f"OpenClaw {method} 超时（{timeout_s}s）")
+        raise BridgeError("OpenClaw 控制进程不可用")
+
+    def ensure_attached(self, timeout_s: float = 20.0) -> None:
+        """Probe the attached tab at most once per `attach_ttl_s`."""
+        at = self._attached_at
+        if at is not None and time.monotonic() - at < self.attach_ttl_s:
+            return
+        self.call("evaluate", {"fn": "(() => 1)"}, timeout_s=timeout_s)
+        self._attached_at = time.monotonic()
+
+    def invalidate_attachment(self) -> None:
+        self._attached_at = None
+
+    def close(self) -> None:
+        with self._lock:
+            proc, self._proc = self._proc, None
+        if proc is not None and proc.poll() is None:
+            try:
+                proc.stdin.close()  # type: ignore[union-attr]
+                proc.wait(timeout=3)
+            except Exception:
+                proc.kill()
+
+
+_bridges: Dict[str, OpenClawBridge] = {}
+_bridges_lock = threading.Lock()
+
+
+def bridge_command() -> List[str]:
+    return shlex.split(os.getenv("OPENCLAW_BRIDGE_CMD", "").strip())
+
+
+def get_bridge(browser_profile: str) -> Optional[OpenClawBridge]:
+    """Shared bridge for `browser_profile`, or None when OPENCLAW_BRIDGE_CMD is not configured."""
+    cmd = bridge_command()
+    if not cmd:
+        return None
+    with _bridges_lock:
+        bridge = _bridges.get(browser_profile)
+        if bridge is None or bridge.cmd != cmd:
+            if bridge is not None:
+                bridge.close()
+            bridge = OpenClawBridge(
+                cmd,
+                browser_profile,
+                attach_ttl_s=float(os.getenv("OPENCLAW_ATTACH_TTL_S", "60") or "60"),
+            )
+            _bridges[browser_profile] = bridge
+        return bridge
+
+
+def close_bridges() -> None:
+    with _bridges_lock:
+        bridges = list(_bridges.values())
+        _bridges.clear()
+    for bridge in bridges:
+        bridge.close()
+
+
+atexit.register(close_bridges)
@@ -7,11 +7,14 @@ import time
 import shutil
 import re
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import quote
 
 from .base import JobProvider, JobSearchParams
+from .detail_cache import get_job_detail_cache
+from .openclaw_bridge import BridgeError, OpenClawBridge, get_bridge
 
 
 class _OpenClawError(RuntimeError):
@@ -44,12 +47,16 @@ def _extract_json(text: str) -> Any:
     # Strip ANSI escape sequences.
     s = re.sub(r"\x1b\[[0-9;]*m", "", s)
 
+    # Fast path: `--json` output usually sits alone on its own line(s).
+    try:
+        return json.loads(s)
+    except json.JSONDecodeError:
+        pass
+
     dec = json.JSONDecoder()
-    for i, ch in enumerate(s):
-        if ch not in "{[":
-            continue
+    for m in re.finditer(r"[{\[]", s):
         try:
-            obj, _ = dec.raw_decode(s[i:])
+            obj, _ = dec.raw_decode(s, m.start())
             return obj
         except json.JSONDecodeError:
             continue
@@ -57,6 +64,40 @@ def _extract_json(text: str) -> Any:
     raise _OpenClawError("无法从 OpenClaw 输出中解析 JSON。")
 
 
+# Pull anchors from the current page.
+_LINKS_JS = (
+    "() => Array.from(document.querySelectorAll('a[href]')).map(a => ({"
+    "href: a.href, text: (a.innerText || a.textContent || '').trim()"
+    "})).filter(x => x.href && x.text && x.text.length >= 2).slice(0, 800)"
+)
+
+
+def _attach_error(msg: str) -> _OpenClawError:
+    low = msg.lower()
+    if "no tab is connected" in low:
+        return _OpenClawError(
+            "❌ OpenClaw 浏览器未连接标签页\n\n"
+            "📋 解决步骤（只需做一次）：\n"
+            "1️⃣ 打开命令行，运行: openclaw browser start\n"
+            "2️⃣ 在弹出的Chrome中访问Boss直聘: https://www.zhipin.com\n"
+            "3️⃣ 点击浏览器右上角的OpenClaw扩展图标（🔧）\n"
+            "4️⃣ 点击 'Attach' 按钮连接当前标签页\n"
+            "5️⃣ 返回本页面，重新点击搜索\n\n"
+            "💡 提示：连接一次后，只要不关闭浏览器就一直有效"
+        )
+    if "command not found" in low or "not recognized" in low:
+        return _OpenClawError(
+            "❌ OpenClaw 未安装\n\n"
+            "📦 安装步骤：\n"
+            "1️⃣ 安装Python包: pip install openclaw\n"
+            "2️⃣ 安装Chrome扩展: openclaw browser install-extension\n"
+            "3️⃣ 重启浏览器\n"
+            "4️⃣ 返回本页面重试\n\n"
+            "📖 详细文档: docs/howto/OPENCLAW_BOSS_MVP.md"
+        )
+    return _OpenClawError(f"❌ OpenClaw 错误: {msg[:500]}\n\n请检查OpenClaw是否正确安装和配置")
+
+
 class OpenClawBrowserProvider(JobProvider):
     """
     Real-time job link scanning using the local OpenClaw dedicated browser.
@@ -68,6 +109,10 @@ class OpenClawBrowserProvider(JobProvider):
       3) Then call `/api/jobs/search` with JOB_DATA_PROVIDER=openclaw
 
     This provider only returns job URLs for manual apply (no auto-submit).
+
+    With OPENCLAW_BRIDGE_CMD set, commands go through one long-lived controller
+    per profile (`openclaw_bridge.py`) and multiple sites load in parallel tabs;
+    otherwise each step is an `openclaw browser` CLI call.
     """
 
     name = "openclaw"
@@ -75,7 +120,15 @@ class OpenClawBrowserProvider(JobProvider):
     def __init__(self, browser_profile: Optional[str] = None, timeout_s: int = 90):
         self.browser_profile = (browser_profile or os.getenv("OPENCLAW_BROWSER_PROFILE", "")).strip() or "chrome"
         self.timeout_s = timeout_s
-        self._cache: Dict[str, Dict[str, Any]] = {}
+        # 所有 provider 共用一个有界 LRU（跨 worker 时写穿到共享状态）
+        self._cache = get_job_detail_cache().view(self.name)
+        # CLI 模式下缓存 attach 探测结果，避免每次搜索都多起一个进程
+        self.attach_ttl_s = float(os.getenv("OPENCLAW_ATTACH_TTL_S", "60") or "60")
+        self.max_tabs = max(1, int(os.getenv("OPENCLAW_MAX_TABS", "4") or "4"))
+        self._attached_at: Optional[float] = None
+
+    def _bridge(self) -> Optional[OpenClawBridge]:
+        return get_bridge(self.browser_profile)
 
     def _oc(self, *args: str, json_out: bool = False, timeout_s: Optional[int] = None) -> _CmdResult:
         cmd = ["openclaw", "browser", "--browser-profile", self.browser_profile]
@@ -85,55 +138,63 @@ class OpenClawBrowserProvider(JobProvider):
         return _run(cmd, timeout_s=timeout_s or self.timeout_s)
 
     def _ensure_attached(self) -> None:
+        if self._attached_at is not None and time.monotonic() - self._attached_at < self.attach_ttl_s:
+            return
         r = self._oc("evaluate", "--fn", "(() => 1)", json_out=True, timeout_s=20)
         if r.code == 0:
+            self._attached_at = time.monotonic()
             return
-        msg = (r.stdout + "\n" + r.stderr).strip()
-        if "no tab is connected" in msg.lower():
-            raise _OpenClawError(
-                "❌ OpenClaw 浏览器未连接标签页\n\n"
-                "📋 解决步骤（只需做一次）：\n"
-                "1️⃣ 打开命令行，运行: openclaw browser start\n"
-                "2️⃣ 在弹出的Chrome中访问Boss直聘: https://www.zhipin.com\n"
-                "3️⃣ 点击浏览器右上角的OpenClaw扩展图标（🔧）\n"
-                "4️⃣ 点击 'Attach' 按钮连接当前标签页\n"
-                "5️⃣ 返回本页面，重新点击搜索\n\n"
-                "💡 提示：连接一次后，只要不关闭浏览器就一直有效"
-            )
-        if "command not found" in msg.lower() or "not recognized" in msg.lower():
-            raise _OpenClawError(
-                "❌ OpenClaw 未安装\n\n"
-                "📦 安装步骤：\n"
-                "1️⃣ 安装Python包: pip install openclaw\n"
-                "2️⃣ 安装Chrome扩展: openclaw browser install-extension\n"
-                "3️⃣ 重启浏览器\n"
-                "4️⃣ 返回本页面重试\n\n"
-                "📖 详细文档: docs/howto/OPENCLAW_BOSS_MVP.md"
-            )
-        raise _OpenClawError(f"❌ OpenClaw 错误: {msg[:500]}\n\n请检查OpenClaw是否正确安装和配置")
+        raise _attach_error((r.stdout + "\n" + r.stderr).strip())
 
     def _navigate_and_collect(self, url: str, want_hosts: List[str], limit: int) -> List[Tuple[str, str]]:
         self._ensure_attached()
 
         r = self._oc("navigate", url, timeout_s=60)
         if r.code != 0:
+            # The tab may have been detached since the cached probe.
+            self._attached_at = None
             raise _OpenClawError(f"导航失败: {(r.stdout + r.stderr)[:300]}")
 
         # Let SPA settle a bit.
         self._oc("wait", "--load", "domcontentloaded", "--timeout-ms", "20000", timeout_s=30)
         self._oc("wait", "--time", "1200", timeout_s=10)
 
-        # Pull anchors.
-        js = (
-            "() => Array.from(document.querySelectorAll('a[href]')).map(a => ({"
-            "href: a.href, text: (a.innerText || a.textContent || '').trim()"
-            "})).filter(x => x.href && x.text && x.text.length >= 2).slice(0, 800)"
-        )
-        r2 = self._oc("evaluate", "--fn", js, json_out=True, timeout_s=30)
+        r2 = self._oc("evaluate", "--fn", _LINKS_JS, json_out=True, timeout_s=30)
         if r2.code != 0:
             raise _OpenClawError(f"读取页面链接失败: {(r2.stdout + r2.stderr)[:300]}")
 
-        data = _extract_json(r2.stdout + "\n" + r2.stderr)
+        return self._filter_links(_extract_json(r2.stdout + "\n" + r2.stderr), want_hosts, limit)
+
+    def _bridge_collect(
+        self, bridge: OpenClawBridge, url: str, want_hosts: List[str], limit: int, new_tab: bool = False
+    ) -> List[Tuple[str, str]]:
+        """Same steps as `_navigate_and_collect`, over the persistent bridge (optionally in its own tab)."""
+        tab: Dict[str, Any] = {}
+        try:
+            bridge.ensure_attached()
+            if new_tab:
+                opened = bridge.call("tab.open", {"url": "about:blank"}, timeout_s=20)
+                tab_id = opened.get("tab") if isinstance(opened, dict) else opened
+                if tab_id:
+                    tab = {"tab": tab_id}
+            try:
+                bridge.call("navigate", {"url": url, **tab}, timeout_s=60)
+                bridge.call("wait", {"load": "domcontentloaded", "timeout_ms": 20000, **tab}, timeout_s=30)
+                bridge.call("wait", {"time_ms": 1200, **tab}, timeout_s=10)
+                data = bridge.call("evaluate", {"fn": _LINKS_JS, **tab}, timeout_s=30)
+            finally:
+                if tab:
+                    try:
+                        bridge.call("tab.close", tab, timeout_s=10)
+                    except BridgeError:
+                        pass
+        except BridgeError as e:
+            bridge.invalidate_attachment()
+            raise _attach_error(str(e))
+        return self._filter_links(data, want_hosts, limit)
+
+    @staticmethod
+    def _filter_links(data: Any, want_hosts: List[str], limit: int) -> List[Tuple[str, str]]:
         # OpenClaw returns {"result": ...}. Some commands may return {"value": ...}.
         items = (data.get("result") or data.get("value")) if isinstance(data, dict) else data
         if not isinstance(items, list):
@@ -190,9 +251,32 @@ class OpenClawBrowserProvider(JobProvider):
         urls = self._build_urls(params)
         limit = max(1, min(int(params.limit or 50), 50))
 
-        results: List[Dict[str, Any]] = []
         per_site = max(3, min(15, limit // max(1, len(urls))))
 
+        bridge = self._bridge()
+        pool: Optional[ThreadPoolExecutor] = None
+        pending: List[Any] = []
+        if bridge is not None and len(urls) > 1:
+            # 多站点并行：每个站点一个标签页，命令经同一个常驻控制进程复用
+            pool = ThreadPoolExecutor(max_workers=min(self.max_tabs, len(urls)), thread_name_prefix="openclaw-tab")
+            pending = [pool.submit(self._bridge_collect, bridge, url, hosts, per_site, True) for _, url, hosts in urls]
+        try:
+            return self._merge_sites(params, urls, per_site, limit, bridge, pending, progress_callback)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    def _merge_sites(
+        self,
+        params: JobSearchParams,
+        urls: List[Tuple[str, str, List[str]]],
+        per_site: int,
+        limit: int,
+        bridge: Optional[OpenClawBridge],
+        pending: List[Any],
+        progress_callback=None,
+    ) -> List[Dict[str, Any]]:
+        results: List[Dict[str, Any]] = []
         total_sites = max(1, len(urls))
         for idx, (platform, url, hosts) in enumerate(urls):
             if progress_callback:
@@ -204,7 +288,12 @@ class OpenClawBrowserProvider(JobProvider):
                 except Exception:
                     pass
             try:
-                pairs = self._navigate_and_collect(url, hosts, per_site)
+                if pending:
+                    pairs = pending[idx].result()
+                elif bridge is not None:
+                    pairs = self._bridge_collect(bridge, url, hosts, per_site)
+                else:
+                    pairs = self._navigate_and_collect(url, hosts, per_site)
             except _OpenClawError:
                 # Bubble up with actionable error rather than silent fallback.
                 raise
@@ -274,6 +363,22 @@ class OpenClawBrowserProvider(JobProvider):
             "tab_attached": False
         }
         
+        bridge = self._bridge()
+        if bridge is not None:
+            try:
+                bridge.call("evaluate", {"fn": "(() => 1)"}, timeout_s=10)
+                result.update(
+                    available=True,
+                    status="ok",
+                    browser_connected=True,
+                    tab_attached=True,
+                    message="✅ OpenClaw已就绪（常驻控制进程），可以抓取Boss直聘岗位",
+                )
+            except BridgeError as e:
+                result["browser_connected"] = bridge.alive
+                result["message"] = f"⚠️ OpenClaw控制进程异常: {str(e)[:200]}"
+            return result
+
         # 1. 检查OpenClaw命令是否存在
         if not shutil.which("openclaw"):
             result["message"] = "OpenClaw未安装。请运行: pip install openclaw"
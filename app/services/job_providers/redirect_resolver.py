@@ -0,0 +1,204 @@
+"""
+搜索引擎跳转链接解析（并发 + 持久缓存）
+
+Search-engine providers get result links wrapped in redirectors
+(`baidu.com/link?url=...`, `duckduckgo.com/l/?uddg=...`, `bing.com/ck/a?...&u=a1...`).
+`RedirectResolver.resolve_many` unwraps the ones that carry the target in the
+query string without any request, then resolves the rest concurrently over one
+pooled `requests.Session` with HEAD (falling back to a streamed GET whose body
+is never read). Results are cached in a small SQLite file with a TTL so the same
+redirect is fetched once per REDIRECT_CACHE_TTL_S across searches and restarts.
+
+Env:
+  - REDIRECT_CACHE_DB_PATH: default redirect_cache.db in the directory of APP_DATA_DB_PATH
+  - REDIRECT_CACHE_TTL_S: default 604800 (7 days)
+  - REDIRECT_CONCURRENCY: parallel requests per batch, default 8
+  - REDIRECT_TIMEOUT_S: per-request timeout, default 8
+"""
+
+from __future__ import annotations
+
+import base64
+import html as html_lib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from urllib.parse import parse_qs, unquote, urlparse
+
+from app.core.shared_state import SQLiteState
+
+logger = logging.getLogger("ai_job_helper")
+
+_UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/122"
+_NS = "redirects"
+
+
+def unwrap_redirect(href: str) -> str:
+    """
+    Decode redirectors that embed the target URL (DuckDuckGo `uddg`, Bing `u=a1<base64>`).
+    Returns "" for a DuckDuckGo redirect without a target, and the href unchanged otherwise.
+    """
+    href = html_lib.unescape((href or "").strip())
+    if not href:
+        return ""
+    if href.startswith("//"):
+        href = "https:" + href
+    if href.startswith("/l/?"):
+        href = "https://duckduckgo.com" + href
+    parsed = urlparse(href)
+    host = parsed.netloc.lower()
+    if host.endswith("duckduckgo.com") and parsed.path == "/l/":
+        uddg = (parse_qs(parsed.query).get("uddg") or [""])[0]
+        return unquote(uddg) if uddg else ""
+    if host.endswith("bing.com") and parsed.path == "/ck/a":
+        u = (parse_qs(parsed.query).get("u") or [""])[0]
+        if u.startswith("a1"):
+            try:
+                raw = u[2:]
+                return base64.urlsafe_b64decode(raw + "=" * (-len(raw) % 4)).decode("utf-8")
+            except (ValueError, UnicodeDecodeError):
+                return href
+    return href
+
+
+def _default_cache_path() -> str:
+    base = os.path.dirname(os.getenv("APP_DATA_DB_PATH", "data/app_data.db")) or "data"
+    return os.getenv("REDIRECT_CACHE_DB_PATH", "").strip() or os.path.join(base, "redirect_cache.db")
+
+
+class RedirectResolver:
+    """Thread-safe; share one instance (see `get_redirect_resolver`)."""
+
+    def __init__(
+        self,
+        cache_path: Optional[str] = None,
+        ttl_s: Optional[float] = None,
+        concurrency: Optional[int] = None,
+        timeout_s: Optional[float] = None,
+        session: Any = None,
+    ):
+        self.cache_path = cache_path
+        self._cache: Optional[SQLiteState] = None
+        self.ttl_s = float(ttl_s if ttl_s is not None else os.getenv("REDIRECT_CACHE_TTL_S", "604800") or "604800")
+        self.concurrency = max(1, int(concurrency or os.getenv("REDIRECT_CONCURRENCY", "8") or "8"))
+        self.timeout_s = float(timeout_s or os.getenv("REDIRECT_TIMEOUT_S", "8") or "8")
+        self._session = session
+        self._session_lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self.stats = {"unwrapped": 0, "cache_hits": 0, "fetched": 0, "errors": 0}
+
+    @property
+    def cache(self) -> SQLiteState:
+        # Opened (and the path resolved) on first use, so a resolver built before
+        # APP_DATA_DB_PATH is configured, or never used, writes no file.
+        if self._cache is None:
+            with self._session_lock:
+                if self._cache is None:
+                    self._cache = SQLiteState(self.cache_path or _default_cache_path())
+        return self._cache
+
+    def _http(self) -> Any:
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=self.concurrency, pool_maxsize=self.concurrency)
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    session.headers.update({"User-Agent": _UA})
+                    self._session = session
+        return self._session
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._session_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="redirect")
+        return self._pool
+
+    def _fetch(self, url: str) -> Optional[str]:
+        """Final URL after redirects, without downloading the body; None on failure."""
+        try:
+            http = self._http()
+            r = http.head(url, allow_redirects=True, timeout=self.timeout_s)
+            final = r.url or url
+            if r.status_code < 400 and final != url:
+                return final
+            # HEAD refused / not redirected (some redirectors only answer GET): stream, never read the body.
+            r = http.get(url, allow_redirects=True, timeout=self.timeout_s, stream=True)
+            try:
+                return r.url or url
+            finally:
+                r.close()
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.debug("redirect resolve failed url=%s err=%s", url[:200], e)
+            return None
+
+    def resolve_many(self, urls: Iterable[str], skip: Optional[Callable[[str], bool]] = None) -> Dict[str, str]:
+        """
+        Map each input URL to its final URL. URLs for which `skip(url)` is true
+        (already a job-board link) map to themselves; failures also map to the input.
+        """
+        out: Dict[str, str] = {}
+        pending: List[str] = []
+        for url in urls:
+            if not url or url in out:
+                continue
+            unwrapped = unwrap_redirect(url)
+            if unwrapped != url:
+                self.stats["unwrapped"] += 1
+                out[url] = unwrapped or url
+            elif skip is not None and skip(url):
+                out[url] = url
+            else:
+                out[url] = url
+                pending.append(url)
+        if not pending:
+            return out
+
+        try:
+            cached = self.cache.get_many(_NS, pending)
+        except Exception:
+            logger.exception("redirect cache read failed")
+            cached = {}
+        self.stats["cache_hits"] += len(cached)
+        out.update(cached)
+        misses = [u for u in pending if u not in cached]
+        if not misses:
+            return out
+
+        if len(misses) == 1:
+            finals = [self._fetch(misses[0])]
+        else:
+            finals = list(self._executor().map(self._fetch, misses))
+        self.stats["fetched"] += len(misses)
+        resolved = {u: f for u, f in zip(misses, finals) if f}
+        out.update(resolved)
+        if resolved:
+            try:
+                self.cache.set_many(_NS, resolved, ttl_s=self.ttl_s)
+            except Exception:
+                logger.exception("redirect cache write failed")
+        return out
+
+    def resolve(self, url: str, skip: Optional[Callable[[str], bool]] = None) -> str:
+        return self.resolve_many([url], skip=skip).get(url, url)
+
+
+_resolver: Optional[RedirectResolver] = None
+_resolver_lock = threading.Lock()
+
+
+def get_redirect_resolver() -> RedirectResolver:
+    global _resolver
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                _resolver = RedirectResolver()
+    return _resolver
@@ -10,8 +10,11 @@ import random
 from datetime import datetime, timedelta
 from urllib.parse import quote
 
+from app.core.performance import metrics
+from app.core.single_flight import ThreadSingleFlight, content_key
 from app.services.application_record_service import ApplicationRecordService
 from app.services.job_providers.base import JobSearchParams
+from app.services.job_providers.circuit_breaker import ProviderUnavailable, get_provider_health
 from app.services.job_providers.jooble_provider import JoobleProvider
 from app.services.job_providers.bing_provider import BingWebSearchProvider
 from app.services.job_providers.baidu_provider import BaiduSearchProvider
@@ -35,6 +38,10 @@ class RealJobService:
         self.baidu = BaiduSearchProvider()
         self.brave = BraveSearchProvider()
         self.openclaw = OpenClawBrowserProvider()
+        # Identical searches running at the same time share one provider call.
+        self._search_flight = ThreadSingleFlight("provider_search")
+        # Per-provider circuit breakers; their health scores order the provider chain.
+        self.health = get_provider_health()
 
         # 本地岗位数据库（fallback；用于无API Key时的演示/离线运行）
         self.real_jobs_database = self._load_real_jobs()
@@ -282,6 +289,41 @@ class RealJobService:
         # Local synthetic jobs are allowed only when explicitly requested.
         return self.provider_name in ("local", "offline") or self.allow_local_fallback
     
+    def _provider_chain(self) -> List[Any]:
+        """
+        Live providers to try: priority order, unhealthy ones last.
+
+        The enabled provider (see `_use_*`) leads; in auto mode the other API
+        providers that have a key follow as fallbacks, so an error or an open
+        breaker on the first one falls through instead of failing the search.
+        """
+        enabled = [
+            (self._use_jooble, self.jooble),
+            (self._use_openclaw, self.openclaw),
+            (self._use_brave, self.brave),
+            (self._use_bing, self.bing),
+            (self._use_baidu, self.baidu),
+        ]
+        chain = [p for use, p in enabled if use()]
+        if self.provider_name == "auto":
+            chain += [p for p in (self.jooble, self.brave, self.bing) if p not in chain and getattr(p, "api_key", None)]
+        by_name = {p.name: p for p in chain}
+        return [by_name[n] for n in self.health.order(by_name)]
+
+    def provider_chain(self) -> List[str]:
+        return [p.name for p in self._provider_chain()]
+
+    def _provider_search(self, provider, params: JobSearchParams, **kwargs) -> List[Dict[str, Any]]:
+        """Run one provider search through its breaker, recording latency and failures per provider."""
+        with metrics.timer("provider_search_duration_seconds", provider=provider.name):
+            try:
+                return self.health.call(provider.name, lambda: provider.search_jobs(params, **kwargs))
+            except ProviderUnavailable:
+                raise
+            except Exception:
+                metrics.inc("provider_failures_total", provider=provider.name)
+                raise
+
     def search_jobs(self, 
                    keywords: List[str] = None,
                    location: str = None,
@@ -301,54 +343,24 @@ class RealJobService:
         
         Returns:
             匹配的岗位列表
+
+        Concurrent calls with the same arguments are coalesced into one provider
+        search; only the first caller's progress_callback receives updates.
         """
         
         keywords = keywords or []
+        key = content_key(keywords, location, salary_min, experience, limit)
+        jobs = self._search_flight.do(
+            key,
+            lambda: self._search_jobs(keywords, location, salary_min, experience, limit, progress_callback),
+        )
+        # Callers reorder / filter the list they get back; the job dicts themselves are shared.
+        return list(jobs)
 
-        # Real-time provider path.
-        if self._use_jooble():
-            params = JobSearchParams(
-                keywords=keywords,
-                location=location,
-                salary_min=salary_min,
-                experience=experience,
-                limit=limit,
-            )
-            return self.jooble.search_jobs(params)
-
-        if self._use_openclaw():
-            params = JobSearchParams(
-                keywords=keywords,
-                location=location,
-                salary_min=salary_min,
-                experience=experience,
-                limit=limit,
-            )
-            return self.openclaw.search_jobs(params, progress_callback=progress_callback)
-
-        if self._use_brave():
-            params = JobSearchParams(
-                keywords=keywords,
-                location=location,
-                salary_min=salary_min,
-                experience=experience,
-                limit=limit,
-            )
-            return self.brave.search_jobs(params)
-
-        # Real-time link discovery via search engine.
-        if self._use_bing():
-            params = JobSearchParams(
-                keywords=keywords,
-                location=location,
-                salary_min=salary_min,
-                experience=experience,
-                limit=limit,
-            )
-            return self.bing.search_jobs(params)
-
-        # No-key China-friendly option: Baidu SERP -> real job URLs.
-        if self._use_baidu():
+    def _search_jobs(self, keywords, location, salary_min, experience, limit, progress_callback) -> List[Dict[str, Any]]:
+        # Real-time provider path (priority order; open breakers are skipped without a request).
+        chain = self._provider_chain()
+        if chain:
             params = JobSearchParams(
                 keywords=keywords,
                 location=location,
@@ -356,7 +368,18 @@ class RealJobService:
                 experience=experience,
                 limit=limit,
             )
-            return self.baidu.search_jobs(params)
+            errors: List[Exception] = []
+            for provider in chain:
+                kwargs = {"progress_callback": progress_callback} if provider is self.openclaw else {}
+                try:
+                    # An empty answer from a working provider is the result: only errors
+                    # and open breakers fall through to the next provider.
+                    return self._provider_search(provider, params, **kwargs)
+                except Exception as e:
+                    errors.append(e)
+            # Prefer a real failure over "circuit open" when reporting why nothing answered.
+            real = [e for e in errors if not isinstance(e, ProviderUnavailable)]
+            raise (real or errors)[0]
 
         if not self._use_local_dataset():
             return []
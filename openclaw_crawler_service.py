@@ -4,209 +4,37 @@ OpenClaw爬虫服务 - 本地运行，定时爬取Boss直聘岗位并推送到
 
 import os
 import time
-import json
 import requests
 from datetime import datetime
 from typing import List, Dict, Any
 import schedule
+from app.services.crawl_scheduler import DemandScheduler
+from app.services.crawler_engine import BatchUploader, CrawlTask, CrawlerEngine, DomainBudget
 from app.services.job_providers.openclaw_browser_provider import OpenClawBrowserProvider
 from app.services.job_providers.base import JobSearchParams
 
-class OpenClawCrawlerService:
-    """OpenClaw爬虫服务 - 本地运行"""
-    
-    def __init__(self, cloud_api_url: str, api_key: str):
-        """
-        初始化爬虫服务
-        
-        Args:
-            cloud_api_url: 云端API地址，如 https://your-app.railway.app
-            api_key: API密钥，用于认证
-        """
-        self.cloud_api_url = cloud_api_url.rstrip('/')
-        self.api_key = api_key
-        self.openclaw = OpenClawBrowserProvider()
-        
-        # 预定义的热门搜索关键词
-        self.hot_keywords = [
-            ["Python", "后端开发"],
-            ["Java", "Spring Boot"],
-            ["前端", "React", "Vue"],
-            ["算法工程师", "机器学习"],
-            ["数据分析", "SQL"],
-            ["产品经理"],
-            ["测试工程师", "自动化"],
-            ["运维", "DevOps", "Kubernetes"],
-        ]
-        
-        self.hot_cities = ["北京", "上海", "深圳", "杭州", "广州", "成都"]
-    
-    def crawl_jobs(self, keywords: List[str], location: str, limit: int = 20) -> List[Dict[str, Any]]:
-        """
-        爬取岗位数据
-        
-        Args:
-            keywords: 搜索关键词列表
-            location: 城市
-            limit: 数量限制
-            
-        Returns:
-            岗位列表
-        """
-        print(f"🔍 开始爬取：{keywords} @ {location}")
-        
-        try:
-            params = JobSearchParams(
-                keywords=keywords,
-                location=location,
-                limit=limit
-            )
-            
-            jobs = self.openclaw.search_jobs(params)
-            print(f"✅ 爬取成功：{len(jobs)} 个岗位")
-            return jobs
-            
-        except Exception as e:
-            print(f"❌ 爬取失败：{str(e)}")
-            return []
-    
-    def push_to_cloud(self, jobs: List[Dict[str, Any]]) -> bool:
-        """
-        推送岗位数据到云端
-        
-        Args:
-            jobs: 岗位列表
-            
-        Returns:
-            是否成功
-        """
-        if not jobs:
-            return False
-        
-        try:
-            url = f"{self.cloud_api_url}/api/crawler/upload"
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            data = {
-                "jobs": jobs,
-                "timestamp": datetime.now().isoformat(),
-                "source": "openclaw_local"
-            }
-            
-            response = requests.post(url, json=data, headers=headers, timeout=30)
-            
-            if response.status_code == 200:
-                print(f"✅ 推送成功：{len(jobs)} 个岗位")
-                return True
-            else:
-                print(f"❌ 推送失败：{response.status_code} - {response.text}")
-                return False
-                
-        except Exception as e:
-            print(f"❌ 推送异常：{str(e)}")
-            return False
-    
-    def crawl_and_push_all(self):
-        """爬取所有热门关键词并推送"""
-        print("\n" + "="*60)
-        print(f"🚀 开始定时爬取任务 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print("="*60)
-        
-        total_jobs = 0
-        
-        for keywords in self.hot_keywords:
-            for city in self.hot_cities:
-                # 爬取岗位
-                jobs = self.crawl_jobs(keywords, city, limit=10)
-                
-                if jobs:
-                    # 推送到云端
-                    if self.push_to_cloud(jobs):
-                        total_jobs += len(jobs)
-                
-                # 避免请求过快
-                time.sleep(5)
-        
-        print("\n" + "="*60)
-        print(f"✅ 本次任务完成：共爬取并推送 {total_jobs} 个岗位")
-        print("="*60 + "\n")
-    
-    def start_scheduled_crawling(self, interval_hours: int = 6):
-        """
-        启动定时爬取
-        
-        Args:
-            interval_hours: 爬取间隔（小时）
-        """
-        print("\n" + "🤖"*30)
-        print("OpenClaw爬虫服务启动")
-        print("🤖"*30)
-        print(f"\n📋 配置信息：")
-        print(f"  - 云端API: {self.cloud_api_url}")
-        print(f"  - 爬取间隔: 每 {interval_hours} 小时")
-        print(f"  - 关键词数: {len(self.hot_keywords)}")
-        print(f"  - 城市数: {len(self.hot_cities)}")
-        print(f"\n⚠️ 请确保：")
-        print(f"  1. Chrome已打开Boss直聘并登录")
-        print(f"  2. OpenClaw扩展已Attach到标签页")
-        print(f"  3. 保持浏览器窗口不要关闭")
-        print(f"\n🔄 首次爬取将在启动后立即开始...\n")
-        
-        # 立即执行一次
-        self.crawl_and_push_all()
-        
-        # 设置定时任务
-        schedule.every(interval_hours).hours.do(self.crawl_and_push_all)
-        
-        print(f"⏰ 下次爬取时间：{interval_hours} 小时后")
-        print(f"💡 按 Ctrl+C 停止服务\n")
-        
-        # 运行定时任务
-        while True:
-            schedule.run_pending()
-            time.sleep(60)  # 每分钟检查一次
-
 
-if __name__ == "__main__":
-    # 配置
-    CLOUD_API_URL = os.getenv("CLOUD_API_URL", "https://your-app.railway.app")
-    API_KEY = os.getenv("CRAWLER_API_KEY", "your-secret-key")
-    INTERVAL_HOURS = int(os.getenv("CRAWL_INTERVAL_HOURS", "6"))
-    
-    # 启动爬虫服务
-    crawler = OpenClawCrawlerService(
-        cloud_api_url=CLOUD_API_URL,
-        api_key=API_KEY
-    )
-    
+def _env_int(name: str, default: int) -> int:
     try:
-        crawler.start_scheduled_crawling(interval_hours=INTERVAL_HOURS)
-    except KeyboardInterrupt:
-        print("\n\n👋 爬虫服务已停止")
+        return int(os.getenv(name, "") or default)
+    except ValueError:
+        return default
 
-OpenClaw爬虫服务 - 本地运行，定时爬取Boss直聘岗位并推送到云端
-"""
 
-import os
-import time
-import json
-import requests
-from datetime import datetime
-from typing import List, Dict, Any
-import schedule
-from app.services.job_providers.openclaw_browser_provider import OpenClawBrowserProvider
-from app.services.job_providers.base import JobSearchParams
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, "") or default)
+    except ValueError:
+        return default
+
 
 class OpenClawCrawlerService:
     """OpenClaw爬虫服务 - 本地运行"""
-    
+
     def __init__(self, cloud_api_url: str, api_key: str):
         """
         初始化爬虫服务
-        
+
         Args:
             cloud_api_url: 云端API地址，如 https://your-app.railway.app
             api_key: API密钥，用于认证
@@ -214,7 +42,7 @@ class OpenClawCrawlerService:
         self.cloud_api_url = cloud_api_url.rstrip('/')
         self.api_key = api_key
         self.openclaw = OpenClawBrowserProvider()
-        
+
         # 预定义的热门搜索关键词
         self.hot_keywords = [
             ["Python", "后端开发"],
@@ -226,482 +54,204 @@ class OpenClawCrawlerService:
             ["测试工程师", "自动化"],
             ["运维", "DevOps", "Kubernetes"],
         ]
-        
+
         self.hot_cities = ["北京", "上海", "深圳", "杭州", "广州", "成都"]
-    
+
+        # 抓取引擎配置
+        # OpenClaw 目前只驱动一个已 Attach 的标签页，所以默认单 worker；
+        # 同一站点的请求间隔由 DomainBudget 控制，不再固定 sleep(5)。
+        self.max_workers = _env_int("CRAWLER_MAX_WORKERS", 1)
+        self.domain_interval_s = _env_float("CRAWLER_DOMAIN_INTERVAL_S", 3.0)
+        self.domain_concurrency = _env_int("CRAWLER_DOMAIN_CONCURRENCY", 1)
+        self.max_retries = _env_int("CRAWLER_MAX_RETRIES", 2)
+        self.upload_batch_size = _env_int("CRAWLER_UPLOAD_BATCH", 200)
+        self.upload_gzip = os.getenv("CRAWLER_UPLOAD_GZIP", "1").strip().lower() in {"1", "true", "yes", "on"}
+        self.per_task_limit = _env_int("CRAWLER_PER_TASK_LIMIT", 10)
+        # 增量同步：先交换 {key, hash} 清单，只上传新增/变更岗位
+        self.upload_delta = os.getenv("CRAWLER_UPLOAD_DELTA", "1").strip().lower() in {"1", "true", "yes", "on"}
+        # 云端已确认的 key -> 内容哈希，跨轮次复用
+        self.known_hashes: Dict[str, str] = {}
+
+        # 需求驱动调度：每轮固定预算，优先用户常搜且云端缓存未命中的组合
+        self.scheduler = DemandScheduler(
+            seed_keywords=self.hot_keywords,
+            seed_cities=self.hot_cities,
+            budget=_env_int("CRAWLER_CYCLE_BUDGET", len(self.hot_keywords) * len(self.hot_cities)),
+            seed_share=_env_float("CRAWLER_SEED_SHARE", 0.25),
+        )
+        self.demand_days = _env_int("CRAWLER_DEMAND_DAYS", 7)
+
     def crawl_jobs(self, keywords: List[str], location: str, limit: int = 20) -> List[Dict[str, Any]]:
         """
         爬取岗位数据
-        
+
         Args:
             keywords: 搜索关键词列表
             location: 城市
             limit: 数量限制
-            
+
         Returns:
             岗位列表
         """
         print(f"🔍 开始爬取：{keywords} @ {location}")
-        
+
         try:
-            params = JobSearchParams(
-                keywords=keywords,
-                location=location,
-                limit=limit
-            )
-            
-            jobs = self.openclaw.search_jobs(params)
+            jobs = self._fetch(keywords, location, limit)
             print(f"✅ 爬取成功：{len(jobs)} 个岗位")
             return jobs
-            
+
         except Exception as e:
             print(f"❌ 爬取失败：{str(e)}")
             return []
-    
+
+    def _fetch(self, keywords: List[str], location: str, limit: int) -> List[Dict[str, Any]]:
+        params = JobSearchParams(
+            keywords=keywords,
+            location=location,
+            limit=limit
+        )
+        return self.openclaw.search_jobs(params)
+
+    def _crawl_domain(self) -> str:
+        """同一批站点共享一个礼貌预算（按启用站点的域名归组）"""
+        hosts: List[str] = []
+        for _, _, site_hosts in self.openclaw._build_urls(JobSearchParams(keywords=[])):
+            hosts.extend(site_hosts)
+        return ",".join(sorted(set(hosts))) or "openclaw"
+
     def push_to_cloud(self, jobs: List[Dict[str, Any]]) -> bool:
         """
-        推送岗位数据到云端
-        
+        推送岗位数据到云端（单批，未压缩；批量推送见 BatchUploader）
+
         Args:
             jobs: 岗位列表
-            
+
         Returns:
             是否成功
         """
         if not jobs:
             return False
-        
+
         try:
             url = f"{self.cloud_api_url}/api/crawler/upload"
             headers = {
                 "Authorization": f"Bearer {self.api_key}",
                 "Content-Type": "application/json"
             }
-            
+
             data = {
                 "jobs": jobs,
                 "timestamp": datetime.now().isoformat(),
                 "source": "openclaw_local"
             }
-            
+
             response = requests.post(url, json=data, headers=headers, timeout=30)
-            
+
             if response.status_code == 200:
                 print(f"✅ 推送成功：{len(jobs)} 个岗位")
                 return True
             else:
                 print(f"❌ 推送失败：{response.status_code} - {response.text}")
                 return False
-                
+
         except Exception as e:
             print(f"❌ 推送异常：{str(e)}")
             return False
-    
-    def crawl_and_push_all(self):
-        """爬取所有热门关键词并推送"""
-        print("\n" + "="*60)
-        print(f"🚀 开始定时爬取任务 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print("="*60)
-        
-        total_jobs = 0
-        
-        for keywords in self.hot_keywords:
-            for city in self.hot_cities:
-                # 爬取岗位
-                jobs = self.crawl_jobs(keywords, city, limit=10)
-                
-                if jobs:
-                    # 推送到云端
-                    if self.push_to_cloud(jobs):
-                        total_jobs += len(jobs)
-                
-                # 避免请求过快
-                time.sleep(5)
-        
-        print("\n" + "="*60)
-        print(f"✅ 本次任务完成：共爬取并推送 {total_jobs} 个岗位")
-        print("="*60 + "\n")
-    
-    def start_scheduled_crawling(self, interval_hours: int = 6):
-        """
-        启动定时爬取
-        
-        Args:
-            interval_hours: 爬取间隔（小时）
-        """
-        print("\n" + "🤖"*30)
-        print("OpenClaw爬虫服务启动")
-        print("🤖"*30)
-        print(f"\n📋 配置信息：")
-        print(f"  - 云端API: {self.cloud_api_url}")
-        print(f"  - 爬取间隔: 每 {interval_hours} 小时")
-        print(f"  - 关键词数: {len(self.hot_keywords)}")
-        print(f"  - 城市数: {len(self.hot_cities)}")
-        print(f"\n⚠️ 请确保：")
-        print(f"  1. Chrome已打开Boss直聘并登录")
-        print(f"  2. OpenClaw扩展已Attach到标签页")
-        print(f"  3. 保持浏览器窗口不要关闭")
-        print(f"\n🔄 首次爬取将在启动后立即开始...\n")
-        
-        # 立即执行一次
-        self.crawl_and_push_all()
-        
-        # 设置定时任务
-        schedule.every(interval_hours).hours.do(self.crawl_and_push_all)
-        
-        print(f"⏰ 下次爬取时间：{interval_hours} 小时后")
-        print(f"💡 按 Ctrl+C 停止服务\n")
-        
-        # 运行定时任务
-        while True:
-            schedule.run_pending()
-            time.sleep(60)  # 每分钟检查一次
-
-
-if __name__ == "__main__":
-    # 配置
-    CLOUD_API_URL = os.getenv("CLOUD_API_URL", "https://your-app.railway.app")
-    API_KEY = os.getenv("CRAWLER_API_KEY", "your-secret-key")
-    INTERVAL_HOURS = int(os.getenv("CRAWL_INTERVAL_HOURS", "6"))
-    
-    # 启动爬虫服务
-    crawler = OpenClawCrawlerService(
-        cloud_api_url=CLOUD_API_URL,
-        api_key=API_KEY
-    )
-    
-    try:
-        crawler.start_scheduled_crawling(interval_hours=INTERVAL_HOURS)
-    except KeyboardInterrupt:
-        print("\n\n👋 爬虫服务已停止")
-
-OpenClaw爬虫服务 - 本地运行，定时爬取Boss直聘岗位并推送到云端
-"""
-
-import os
-import time
-import json
-import requests
-from datetime import datetime
-from typing import List, Dict, Any
-import schedule
-from app.services.job_providers.openclaw_browser_provider import OpenClawBrowserProvider
-from app.services.job_providers.base import JobSearchParams
 
-class OpenClawCrawlerService:
-    """OpenClaw爬虫服务 - 本地运行"""
-    
-    def __init__(self, cloud_api_url: str, api_key: str):
-        """
-        初始化爬虫服务
-        
-        Args:
-            cloud_api_url: 云端API地址，如 https://your-app.railway.app
-            api_key: API密钥，用于认证
-        """
-        self.cloud_api_url = cloud_api_url.rstrip('/')
-        self.api_key = api_key
-        self.openclaw = OpenClawBrowserProvider()
-        
-        # 预定义的热门搜索关键词
-        self.hot_keywords = [
-            ["Python", "后端开发"],
-            ["Java", "Spring Boot"],
-            ["前端", "React", "Vue"],
-            ["算法工程师", "机器学习"],
-            ["数据分析", "SQL"],
-            ["产品经理"],
-            ["测试工程师", "自动化"],
-            ["运维", "DevOps", "Kubernetes"],
-        ]
-        
-        self.hot_cities = ["北京", "上海", "深圳", "杭州", "广州", "成都"]
-    
-    def crawl_jobs(self, keywords: List[str], location: str, limit: int = 20) -> List[Dict[str, Any]]:
-        """
-        爬取岗位数据
-        
-        Args:
-            keywords: 搜索关键词列表
-            location: 城市
-            limit: 数量限制
-            
-        Returns:
-            岗位列表
-        """
-        print(f"🔍 开始爬取：{keywords} @ {location}")
-        
+    def fetch_demand(self) -> Dict[str, Any]:
+        """从云端拉取搜索需求与每轮命中率；失败时返回空（退回静态关键词）"""
         try:
-            params = JobSearchParams(
-                keywords=keywords,
-                location=location,
-                limit=limit
+            response = requests.get(
+                f"{self.cloud_api_url}/api/crawler/demand",
+                params={"days": self.demand_days, "limit": 200},
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=30,
             )
-            
-            jobs = self.openclaw.search_jobs(params)
-            print(f"✅ 爬取成功：{len(jobs)} 个岗位")
-            return jobs
-            
-        except Exception as e:
-            print(f"❌ 爬取失败：{str(e)}")
-            return []
-    
-    def push_to_cloud(self, jobs: List[Dict[str, Any]]) -> bool:
-        """
-        推送岗位数据到云端
-        
-        Args:
-            jobs: 岗位列表
-            
-        Returns:
-            是否成功
-        """
-        if not jobs:
-            return False
-        
-        try:
-            url = f"{self.cloud_api_url}/api/crawler/upload"
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            data = {
-                "jobs": jobs,
-                "timestamp": datetime.now().isoformat(),
-                "source": "openclaw_local"
-            }
-            
-            response = requests.post(url, json=data, headers=headers, timeout=30)
-            
             if response.status_code == 200:
-                print(f"✅ 推送成功：{len(jobs)} 个岗位")
-                return True
-            else:
-                print(f"❌ 推送失败：{response.status_code} - {response.text}")
-                return False
-                
+                return response.json() or {}
+            print(f"⚠️ 获取搜索需求失败：{response.status_code}，使用静态关键词")
         except Exception as e:
-            print(f"❌ 推送异常：{str(e)}")
-            return False
-    
-    def crawl_and_push_all(self):
-        """爬取所有热门关键词并推送"""
-        print("\n" + "="*60)
-        print(f"🚀 开始定时爬取任务 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print("="*60)
-        
-        total_jobs = 0
-        
-        for keywords in self.hot_keywords:
-            for city in self.hot_cities:
-                # 爬取岗位
-                jobs = self.crawl_jobs(keywords, city, limit=10)
-                
-                if jobs:
-                    # 推送到云端
-                    if self.push_to_cloud(jobs):
-                        total_jobs += len(jobs)
-                
-                # 避免请求过快
-                time.sleep(5)
-        
-        print("\n" + "="*60)
-        print(f"✅ 本次任务完成：共爬取并推送 {total_jobs} 个岗位")
-        print("="*60 + "\n")
-    
-    def start_scheduled_crawling(self, interval_hours: int = 6):
-        """
-        启动定时爬取
-        
-        Args:
-            interval_hours: 爬取间隔（小时）
-        """
-        print("\n" + "🤖"*30)
-        print("OpenClaw爬虫服务启动")
-        print("🤖"*30)
-        print(f"\n📋 配置信息：")
-        print(f"  - 云端API: {self.cloud_api_url}")
-        print(f"  - 爬取间隔: 每 {interval_hours} 小时")
-        print(f"  - 关键词数: {len(self.hot_keywords)}")
-        print(f"  - 城市数: {len(self.hot_cities)}")
-        print(f"\n⚠️ 请确保：")
-        print(f"  1. Chrome已打开Boss直聘并登录")
-        print(f"  2. OpenClaw扩展已Attach到标签页")
-        print(f"  3. 保持浏览器窗口不要关闭")
-        print(f"\n🔄 首次爬取将在启动后立即开始...\n")
-        
-        # 立即执行一次
-        self.crawl_and_push_all()
-        
-        # 设置定时任务
-        schedule.every(interval_hours).hours.do(self.crawl_and_push_all)
-        
-        print(f"⏰ 下次爬取时间：{interval_hours} 小时后")
-        print(f"💡 按 Ctrl+C 停止服务\n")
-        
-        # 运行定时任务
-        while True:
-            schedule.run_pending()
-            time.sleep(60)  # 每分钟检查一次
+            print(f"⚠️ 获取搜索需求异常：{str(e)}，使用静态关键词")
+        return {}
 
+    def build_engine(self, cycle_id: str = "") -> CrawlerEngine:
+        uploader = BatchUploader(
+            cloud_api_url=self.cloud_api_url,
+            api_key=self.api_key,
+            batch_size=self.upload_batch_size,
+            compress=self.upload_gzip,
+            delta=self.upload_delta,
+            known_hashes=self.known_hashes,
+            cycle_id=cycle_id,
+        )
 
-if __name__ == "__main__":
-    # 配置
-    CLOUD_API_URL = os.getenv("CLOUD_API_URL", "https://your-app.railway.app")
-    API_KEY = os.getenv("CRAWLER_API_KEY", "your-secret-key")
-    INTERVAL_HOURS = int(os.getenv("CRAWL_INTERVAL_HOURS", "6"))
-    
-    # 启动爬虫服务
-    crawler = OpenClawCrawlerService(
-        cloud_api_url=CLOUD_API_URL,
-        api_key=API_KEY
-    )
-    
-    try:
-        crawler.start_scheduled_crawling(interval_hours=INTERVAL_HOURS)
-    except KeyboardInterrupt:
-        print("\n\n👋 爬虫服务已停止")
+        def _fetch_task(task: CrawlTask) -> List[Dict[str, Any]]:
+            jobs = self._fetch(task.keywords, task.location, task.limit)
+            print(f"✅ {task.keywords} @ {task.location}：{len(jobs)} 个岗位")
+            return jobs
 
-OpenClaw爬虫服务 - 本地运行，定时爬取Boss直聘岗位并推送到云端
-"""
+        return CrawlerEngine(
+            fetch=_fetch_task,
+            uploader=uploader,
+            max_workers=self.max_workers,
+            budget=DomainBudget(
+                min_interval_s=self.domain_interval_s,
+                max_inflight=self.domain_concurrency,
+            ),
+            max_retries=self.max_retries,
+            on_result=lambda task, jobs: self.scheduler.mark_crawled(
+                [{"keywords": task.keywords, "location": task.location}]
+            ),
+        )
 
-import os
-import time
-import json
-import requests
-from datetime import datetime
-from typing import List, Dict, Any
-import schedule
-from app.services.job_providers.openclaw_browser_provider import OpenClawBrowserProvider
-from app.services.job_providers.base import JobSearchParams
-
-class OpenClawCrawlerService:
-    """OpenClaw爬虫服务 - 本地运行"""
-    
-    def __init__(self, cloud_api_url: str, api_key: str):
-        """
-        初始化爬虫服务
-        
-        Args:
-            cloud_api_url: 云端API地址，如 https://your-app.railway.app
-            api_key: API密钥，用于认证
-        """
-        self.cloud_api_url = cloud_api_url.rstrip('/')
-        self.api_key = api_key
-        self.openclaw = OpenClawBrowserProvider()
-        
-        # 预定义的热门搜索关键词
-        self.hot_keywords = [
-            ["Python", "后端开发"],
-            ["Java", "Spring Boot"],
-            ["前端", "React", "Vue"],
-            ["算法工程师", "机器学习"],
-            ["数据分析", "SQL"],
-            ["产品经理"],
-            ["测试工程师", "自动化"],
-            ["运维", "DevOps", "Kubernetes"],
-        ]
-        
-        self.hot_cities = ["北京", "上海", "深圳", "杭州", "广州", "成都"]
-    
-    def crawl_jobs(self, keywords: List[str], location: str, limit: int = 20) -> List[Dict[str, Any]]:
-        """
-        爬取岗位数据
-        
-        Args:
-            keywords: 搜索关键词列表
-            location: 城市
-            limit: 数量限制
-            
-        Returns:
-            岗位列表
-        """
-        print(f"🔍 开始爬取：{keywords} @ {location}")
-        
-        try:
-            params = JobSearchParams(
-                keywords=keywords,
-                location=location,
-                limit=limit
-            )
-            
-            jobs = self.openclaw.search_jobs(params)
-            print(f"✅ 爬取成功：{len(jobs)} 个岗位")
-            return jobs
-            
-        except Exception as e:
-            print(f"❌ 爬取失败：{str(e)}")
-            return []
-    
-    def push_to_cloud(self, jobs: List[Dict[str, Any]]) -> bool:
-        """
-        推送岗位数据到云端
-        
-        Args:
-            jobs: 岗位列表
-            
-        Returns:
-            是否成功
-        """
-        if not jobs:
-            return False
-        
-        try:
-            url = f"{self.cloud_api_url}/api/crawler/upload"
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            data = {
-                "jobs": jobs,
-                "timestamp": datetime.now().isoformat(),
-                "source": "openclaw_local"
-            }
-            
-            response = requests.post(url, json=data, headers=headers, timeout=30)
-            
-            if response.status_code == 200:
-                print(f"✅ 推送成功：{len(jobs)} 个岗位")
-                return True
-            else:
-                print(f"❌ 推送失败：{response.status_code} - {response.text}")
-                return False
-                
-        except Exception as e:
-            print(f"❌ 推送异常：{str(e)}")
-            return False
-    
-    def crawl_and_push_all(self):
+    def crawl_and_push_all(self) -> Dict[str, Any]:
         """爬取所有热门关键词并推送"""
         print("\n" + "="*60)
         print(f"🚀 开始定时爬取任务 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print("="*60)
-        
-        total_jobs = 0
-        
-        for keywords in self.hot_keywords:
-            for city in self.hot_cities:
-                # 爬取岗位
-                jobs = self.crawl_jobs(keywords, city, limit=10)
-                
-                if jobs:
-                    # 推送到云端
-                    if self.push_to_cloud(jobs):
-                        total_jobs += len(jobs)
-                
-                # 避免请求过快
-                time.sleep(5)
-        
+
+        demand = self.fetch_demand()
+        plan = self.scheduler.plan(demand.get("pairs") or [])
+        from_demand = sum(1 for p in plan if p["source"] == "demand")
+        print(f"📋 本轮计划：{len(plan)} 个组合（需求驱动 {from_demand}，静态补位 {len(plan) - from_demand}）")
+
+        cycle_id = datetime.now().strftime("%Y%m%d%H%M%S")
+        engine = self.build_engine(cycle_id=cycle_id)
+        domain = self._crawl_domain()
+        tasks = [
+            engine.make_task(p["keywords"], p["location"], limit=self.per_task_limit, domain=domain)
+            for p in plan
+        ]
+        stats = engine.run(tasks)
+        stats["cycle_id"] = cycle_id
+        stats["plan"] = {"pairs": len(plan), "from_demand": from_demand}
+        upload = stats.get("upload", {})
+
+        for err in stats.get("errors", [])[:10]:
+            print(f"❌ 爬取失败：{err['keywords']} @ {err['location']} - {err['error']}")
+
         print("\n" + "="*60)
-        print(f"✅ 本次任务完成：共爬取并推送 {total_jobs} 个岗位")
+        print(
+            f"✅ 本次任务完成：{stats['succeeded']}/{stats['tasks']} 个任务成功，"
+            f"爬取 {stats['jobs']} 个岗位，推送 {upload.get('uploaded', 0)} 个"
+            f"（{upload.get('batches', 0)} 批，新增 {upload.get('new', 0)}，"
+            f"更新 {upload.get('updated', 0)}，未变跳过 {upload.get('skipped_unchanged', 0)}），"
+            f"耗时 {stats['elapsed_s']:.0f} 秒"
+        )
+        cycles = [c for c in (demand.get("cycles") or []) if c.get("hit_rate_pct") is not None]
+        if cycles:
+            print("📈 云端缓存命中率（按爬取轮次）：")
+            for c in cycles[-5:]:
+                delta = c.get("delta_pct")
+                delta_txt = f"（{delta:+.1f}）" if delta is not None else ""
+                print(f"  - {c['started_at'][:16]}：{c['hit_rate_pct']:.1f}%{delta_txt}，{c['searches']} 次搜索")
         print("="*60 + "\n")
-    
+        return stats
+
     def start_scheduled_crawling(self, interval_hours: int = 6):
         """
         启动定时爬取
-        
+
         Args:
             interval_hours: 爬取间隔（小时）
         """
@@ -713,21 +263,26 @@ class OpenClawCrawlerService:
         print(f"  - 爬取间隔: 每 {interval_hours} 小时")
         print(f"  - 关键词数: {len(self.hot_keywords)}")
         print(f"  - 城市数: {len(self.hot_cities)}")
+        print(f"  - 并发数: {self.max_workers}（单站点间隔 {self.domain_interval_s}s）")
+        print(
+            f"  - 推送批大小: {self.upload_batch_size}"
+            f"（gzip: {'开' if self.upload_gzip else '关'}，增量同步: {'开' if self.upload_delta else '关'}）"
+        )
         print(f"\n⚠️ 请确保：")
         print(f"  1. Chrome已打开Boss直聘并登录")
         print(f"  2. OpenClaw扩展已Attach到标签页")
         print(f"  3. 保持浏览器窗口不要关闭")
         print(f"\n🔄 首次爬取将在启动后立即开始...\n")
-        
+
         # 立即执行一次
         self.crawl_and_push_all()
-        
+
         # 设置定时任务
         schedule.every(interval_hours).hours.do(self.crawl_and_push_all)
-        
+
         print(f"⏰ 下次爬取时间：{interval_hours} 小时后")
         print(f"💡 按 Ctrl+C 停止服务\n")
-        
+
         # 运行定时任务
         while True:
             schedule.run_pending()
@@ -739,17 +294,14 @@ if __name__ == "__main__":
     CLOUD_API_URL = os.getenv("CLOUD_API_URL", "https://your-app.railway.app")
     API_KEY = os.getenv("CRAWLER_API_KEY", "your-secret-key")
     INTERVAL_HOURS = int(os.getenv("CRAWL_INTERVAL_HOURS", "6"))
-    
+
     # 启动爬虫服务
     crawler = OpenClawCrawlerService(
         cloud_api_url=CLOUD_API_URL,
         api_key=API_KEY
     )
-    
+
     try:
         crawler.start_scheduled_crawling(interval_hours=INTERVAL_HOURS)
     except KeyboardInterrupt:
         print("\n\n👋 爬虫服务已停止")
-
-
-
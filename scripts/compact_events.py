@@ -0,0 +1,51 @@
+"""
+Archive old rows of the `events` table into monthly gzip JSONL partitions.
+
+    python scripts/compact_events.py --retain-days 30
+    python scripts/compact_events.py --export events.jsonl --since 2026-01-01
+
+Rollups keep the full history, so funnel metrics and the weekly report are
+unchanged; `--export` reads archived + hot events as one stream.
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.services.business_service import BusinessService
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Archive old events and vacuum app_data.db incrementally")
+    parser.add_argument("--db-path", default=os.getenv("APP_DATA_DB_PATH", "data/app_data.db"))
+    parser.add_argument("--retain-days", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--export", default="", help="write archived + hot events as JSONL instead of compacting")
+    parser.add_argument("--event", default="")
+    parser.add_argument("--since", default="")
+    parser.add_argument("--until", default="")
+    args = parser.parse_args()
+
+    svc = BusinessService(db_path=args.db_path)
+    if args.export:
+        n = 0
+        with open(args.export, "w", encoding="utf-8") as f:
+            for row in svc.iter_events(event_name=args.event, since=args.since, until=args.until):
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+                n += 1
+        print(json.dumps({"exported": n, "path": args.export}, ensure_ascii=False))
+        return 0
+
+    stats = svc.compact_events(retain_days=args.retain_days, batch_size=args.batch_size)
+    print(json.dumps(stats, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,6 +1,5 @@
 import argparse
 import os
-import sqlite3
 import sys
 from datetime import UTC, datetime, timedelta
 from pathlib import Path
@@ -16,27 +15,8 @@ from app.services.business_service import BusinessService
 def daily_event_counts(db_path: str, days: int = 7) -> List[Dict[str, int]]:
     end = datetime.now(UTC).date()
     start = end - timedelta(days=days - 1)
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    try:
-        rows = conn.execute(
-            """
-            SELECT substr(created_at,1,10) AS day, event_name, COUNT(*) AS c
-            FROM events
-            WHERE created_at >= ?
-            GROUP BY day, event_name
-            ORDER BY day ASC
-            """,
-            (start.isoformat(),),
-        ).fetchall()
-    finally:
-        conn.close()
-
-    by_day: Dict[str, Dict[str, int]] = {}
-    for r in rows:
-        d = str(r["day"])
-        by_day.setdefault(d, {})
-        by_day[d][str(r["event_name"])] = int(r["c"])
+    # Pre-aggregated per-day counters; no scan of the events table.
+    by_day = BusinessService(db_path=db_path).daily_event_counts(start.isoformat())
 
     out: List[Dict[str, int]] = []
     for i in range(days):
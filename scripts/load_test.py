@@ -0,0 +1,231 @@
+"""
+Offline load test: ramp concurrent users through upload -> process -> search.
+
+By default it starts the local stubs (OpenAI-compatible LLM, Baidu/Bing/DDG
+result pages), launches `uvicorn web_app:app` against them and ramps users:
+
+    python scripts/load_test.py --stages 1,5,10,20 --stage-seconds 30
+    python scripts/load_test.py --llm-latency-ms 800 --llm-429-share 0.1
+    python scripts/load_test.py --base-url http://127.0.0.1:8000   # existing app
+    python scripts/load_test.py --stubs-only                       # print env, serve stubs
+
+Output is JSON: per stage and per step request count, errors, throughput and p50/p99.
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.perf.fakes import FakeLLMServer, FakeSERPServer
+from scripts.perf.stats import summarize_ms
+from scripts.perf.synthetic import make_queries, make_resumes
+
+STEPS = ("upload", "process", "search")
+
+
+def stub_env(llm: FakeLLMServer, serp: FakeSERPServer, data_dir: str) -> Dict[str, str]:
+    """Environment that routes every outbound dependency of web_app to the stubs."""
+    return {
+        "OPENAI_COMPAT_BASE_URL": f"{llm.base_url}/v1",
+        "OPENAI_COMPAT_API_KEY": "load-test",
+        "BAIDU_SEARCH_URL": f"{serp.base_url}/s",
+        "BING_HTML_SEARCH_URL": f"{serp.base_url}/search",
+        "DDG_HTML_SEARCH_URL": f"{serp.base_url}/html/",
+        "JOB_DATA_PROVIDER": "baidu",
+        "JOOBLE_API_KEY": "",
+        "BING_SEARCH_API_KEY": "",
+        "BRAVE_SEARCH_API_KEY": "",
+        "ENTERPRISE_JOB_API_URL": "",
+        "APP_DATA_DB_PATH": os.path.join(data_dir, "app_data.db"),
+        "APP_LOG_LEVEL": "WARNING",
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return int(s.getsockname()[1])
+
+
+def launch_app(env: Dict[str, str], port: int, timeout_s: float = 60.0) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "web_app:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=str(ROOT),
+        env={**os.environ, **env},
+    )
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"web_app exited with code {proc.returncode}")
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/api/ping", timeout=1).ok:
+                return proc
+        except Exception:
+            time.sleep(0.3)
+    proc.terminate()
+    raise RuntimeError("web_app did not become ready")
+
+
+def _timed(fn: Any, *args: Any, **kwargs: Any) -> Tuple[bool, float, int]:
+    t0 = time.perf_counter()
+    try:
+        resp = fn(*args, **kwargs)
+        ok, status = resp.status_code < 400, resp.status_code
+    except Exception:
+        ok, status = False, 0
+    return ok, time.perf_counter() - t0, status
+
+
+def journey(session: Any, base: str, resume: str, query: Dict[str, Any], timeout_s: float) -> List[Tuple[str, bool, float, int]]:
+    """One user session: upload the resume file, process it, then search jobs."""
+    out: List[Tuple[str, bool, float, int]] = []
+    ok, took, status = _timed(
+        session.post,
+        f"{base}/api/upload",
+        files={"file": ("resume.txt", resume.encode("utf-8"), "text/plain")},
+        timeout=timeout_s,
+    )
+    out.append(("upload", ok, took, status))
+    ok, took, status = _timed(session.post, f"{base}/api/process", json={"resume": resume}, timeout=timeout_s)
+    out.append(("process", ok, took, status))
+    params = {"keywords": ",".join(query["keywords"]), "limit": 10}
+    if query.get("location"):
+        params["location"] = query["location"]
+    ok, took, status = _timed(session.get, f"{base}/api/jobs/search", params=params, timeout=timeout_s)
+    out.append(("search", ok, took, status))
+    return out
+
+
+def run_stage(base: str, users: int, duration_s: float, timeout_s: float = 120.0) -> Dict[str, Any]:
+    """Keep `users` sessions looping through the journey for `duration_s`."""
+    resumes = make_resumes(max(10, users))
+    queries = make_queries(64)
+    samples: List[Tuple[str, bool, float, int]] = []
+    lock = threading.Lock()
+    journeys = [0]
+    deadline = time.time() + duration_s
+
+    def _user(idx: int) -> None:
+        session = requests.Session()
+        i = 0
+        while time.time() < deadline:
+            rows = journey(session, base, resumes[(idx + i) % len(resumes)], queries[(idx * 7 + i) % len(queries)], timeout_s)
+            with lock:
+                samples.extend(rows)
+                journeys[0] += 1
+            i += 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=_user, args=(i,), daemon=True) for i in range(users)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return summarize_stage(users, time.perf_counter() - started, journeys[0], samples)
+
+
+def summarize_stage(
+    users: int, elapsed_s: float, journeys: int, samples: List[Tuple[str, bool, float, int]]
+) -> Dict[str, Any]:
+    steps: Dict[str, Any] = {}
+    for step in STEPS:
+        rows = [s for s in samples if s[0] == step]
+        statuses: Dict[str, int] = {}
+        for _, _, _, status in rows:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        errors = sum(1 for _, ok, _, _ in rows if not ok)
+        steps[step] = {
+            "requests": len(rows),
+            "errors": errors,
+            "error_rate_pct": round(errors * 100.0 / len(rows), 2) if rows else 0.0,
+            "throughput_rps": round(len(rows) / elapsed_s, 2) if elapsed_s > 0 else 0.0,
+            **summarize_ms([took for _, ok, took, _ in rows if ok]),
+            "statuses": statuses,
+        }
+    return {
+        "users": users,
+        "elapsed_s": round(elapsed_s, 2),
+        "journeys": journeys,
+        "journeys_per_s": round(journeys / elapsed_s, 2) if elapsed_s > 0 else 0.0,
+        "steps": steps,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Ramp concurrent users through upload -> process -> search")
+    parser.add_argument("--base-url", default="", help="target an already running app instead of launching one")
+    parser.add_argument("--stages", default="1,5,10,20", help="concurrent users per ramp stage")
+    parser.add_argument("--stage-seconds", type=float, default=30.0)
+    parser.add_argument("--timeout-s", type=float, default=120.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=500.0)
+    parser.add_argument("--llm-token-latency-ms", type=float, default=0.0)
+    parser.add_argument("--llm-429-share", type=float, default=0.0)
+    parser.add_argument("--serp-latency-ms", type=float, default=200.0)
+    parser.add_argument("--serp-captcha-share", type=float, default=0.0)
+    parser.add_argument("--stubs-only", action="store_true", help="start the stubs, print their env and block")
+    parser.add_argument("--out", default="", help="also write the JSON report here")
+    args = parser.parse_args()
+
+    stages = [max(1, int(x)) for x in args.stages.split(",") if x.strip()]
+    llm = FakeLLMServer(
+        latency_s=args.llm_latency_ms / 1000.0,
+        token_latency_s=args.llm_token_latency_ms / 1000.0,
+        rate_limit_share=args.llm_429_share,
+    )
+    serp = FakeSERPServer(latency_s=args.serp_latency_ms / 1000.0, captcha_share=args.serp_captcha_share)
+    proc: Optional[subprocess.Popen] = None
+    with tempfile.TemporaryDirectory(prefix="ajh-load-") as data_dir, llm, serp:
+        env = stub_env(llm, serp, data_dir)
+        if args.stubs_only:
+            for k, v in env.items():
+                print(f"{k}={v}")
+            try:
+                while True:
+                    time.sleep(3600)
+            except KeyboardInterrupt:
+                return 0
+
+        base = args.base_url.rstrip("/")
+        try:
+            if not base:
+                port = _free_port()
+                proc = launch_app(env, port)
+                base = f"http://127.0.0.1:{port}"
+            report = {
+                "base": base,
+                "stubs": {"llm": llm.base_url, "serp": serp.base_url},
+                "stages": [run_stage(base, users, args.stage_seconds, args.timeout_s) for users in stages],
+                "stub_counters": {
+                    "llm_requests": llm.requests,
+                    "llm_rate_limited": llm.rate_limited,
+                    "serp_requests": serp.requests,
+                },
+            }
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait(timeout=10)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).write_text(text, encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Offline performance harness: synthetic data, local fakes and benchmark helpers."""
@@ -0,0 +1,352 @@
+from __future__ import annotations
+
+import html as html_lib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import parse_qs, quote, urlparse
+
+from scripts.perf.synthetic import make_jobs
+
+
+class Reply:
+    """A stub response: JSON dict, HTML string, or an SSE chunk iterator."""
+
+    def __init__(
+        self,
+        status: int = 200,
+        json_body: Any = None,
+        html: Optional[str] = None,
+        stream: Optional[Iterator[bytes]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        self.status = status
+        self.json_body = json_body
+        self.html = html
+        self.stream = stream
+        self.headers = headers or {}
+
+
+class _FakeServer:
+    """Run a ThreadingHTTPServer on 127.0.0.1:<port> (ephemeral by default) in a daemon thread."""
+
+    def __init__(self, latency_s: float = 0.0, port: int = 0):
+        self.latency_s = max(0.0, float(latency_s))
+        self.port = int(port)
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        if not self._httpd:
+            raise RuntimeError("server_not_started")
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _next_request(self) -> int:
+        with self._lock:
+            self.requests += 1
+            return self.requests
+
+    def handle(self, method: str, path: str, query: Dict[str, List[str]], body: bytes) -> Reply:
+        raise NotImplementedError
+
+    def start(self) -> "_FakeServer":
+        owner = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _dispatch(self, method: str) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                parsed = urlparse(self.path)
+                if owner.latency_s:
+                    time.sleep(owner.latency_s)
+                reply = owner.handle(method, parsed.path, parse_qs(parsed.query), body)
+                self.send_response(reply.status)
+                for k, v in reply.headers.items():
+                    self.send_header(k, v)
+                if reply.stream is not None:
+                    # No Content-Length: close the connection to delimit the event stream.
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.send_header("Cache-Control", "no-cache")
+                    self.send_header("Connection", "close")
+                    self.end_headers()
+                    self.close_connection = True
+                    for chunk in reply.stream:
+                        self.wfile.write(chunk)
+                        self.wfile.flush()
+                    return
+                if reply.html is not None:
+                    data = reply.html.encode("utf-8")
+                    ctype = "text/html; charset=utf-8"
+                else:
+                    data = json.dumps(reply.json_body, ensure_ascii=False).encode("utf-8")
+                    ctype = "application/json"
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self) -> None:  # noqa: N802
+                self._dispatch("GET")
+
+            def do_POST(self) -> None:  # noqa: N802
+                self._dispatch("POST")
+
+            def log_message(self, *args: Any) -> None:
+                return
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self) -> "_FakeServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+class FakeLLMServer(_FakeServer):
+    """
+    OpenAI-compatible `/v1/chat/completions`.
+
+    - `latency_s`: time to first byte for every request.
+    - `stream: true` requests get SSE chunks, one per `token_chars` characters,
+      `token_latency_s` apart, ending with `data: [DONE]`.
+    - `rate_limit_share`: fraction of requests answered with 429 + Retry-After
+      (seeded, so a load run is reproducible).
+
+    Point the app at it with OPENAI_COMPAT_BASE_URL=<base_url>/v1 before the
+    LLM clients are constructed (i.e. before importing web_app).
+    """
+
+    def __init__(
+        self,
+        latency_s: float = 0.05,
+        reply: str = "【基准测试】模拟的模型回复。",
+        token_latency_s: float = 0.0,
+        token_chars: int = 4,
+        rate_limit_share: float = 0.0,
+        retry_after_s: int = 1,
+        seed: int = 0,
+        port: int = 0,
+    ):
+        super().__init__(latency_s=latency_s, port=port)
+        self.reply = reply
+        self.token_latency_s = max(0.0, float(token_latency_s))
+        self.token_chars = max(1, int(token_chars))
+        self.rate_limit_share = max(0.0, min(1.0, float(rate_limit_share)))
+        self.retry_after_s = max(0, int(retry_after_s))
+        self.rate_limited = 0
+        self._rng = random.Random(seed)
+
+    def _should_throttle(self) -> bool:
+        if self.rate_limit_share <= 0:
+            return False
+        with self._lock:
+            hit = self._rng.random() < self.rate_limit_share
+            if hit:
+                self.rate_limited += 1
+            return hit
+
+    def _stream(self, rid: str, model: str) -> Iterator[bytes]:
+        created = int(time.time())
+        text = self.reply
+        for i in range(0, len(text), self.token_chars):
+            if self.token_latency_s:
+                time.sleep(self.token_latency_s)
+            chunk = {
+                "id": rid,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": text[i : i + self.token_chars]}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8")
+        done = {
+            "id": rid,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        }
+        yield f"data: {json.dumps(done)}\n\n".encode("utf-8")
+        yield b"data: [DONE]\n\n"
+
+    def handle(self, method: str, path: str, query: Dict[str, List[str]], body: bytes) -> Reply:
+        n = self._next_request()
+        if method != "POST" or not path.rstrip("/").endswith("/chat/completions"):
+            return Reply(404, {"error": {"message": "not_found"}})
+        if self._should_throttle():
+            return Reply(
+                429,
+                {"error": {"message": "Rate limit reached", "type": "rate_limit_error", "code": "rate_limit_exceeded"}},
+                headers={"Retry-After": str(self.retry_after_s)},
+            )
+        try:
+            req = json.loads(body or b"{}")
+        except ValueError:
+            return Reply(400, {"error": {"message": "invalid_json"}})
+        rid = f"chatcmpl-fake-{n}"
+        model = req.get("model") or "fake-model"
+        if req.get("stream"):
+            return Reply(200, stream=self._stream(rid, model))
+        prompt_chars = sum(len(str(m.get("content") or "")) for m in req.get("messages") or [])
+        return Reply(
+            200,
+            {
+                "id": rid,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": self.reply},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": prompt_chars // 2,
+                    "completion_tokens": len(self.reply) // 2,
+                    "total_tokens": (prompt_chars + len(self.reply)) // 2,
+                },
+            },
+        )
+
+
+def _match_corpus(corpus: List[Dict[str, Any]], query: str, limit: int) -> List[Dict[str, Any]]:
+    words = [w.lower() for w in str(query or "").split() if w and ":" not in w and w.upper() != "OR"]
+    rows: List[Dict[str, Any]] = []
+    for job in corpus:
+        text = f"{job['title']} {job['company']} {job['location']}".lower()
+        if words and not any(w in text for w in words):
+            continue
+        rows.append(job)
+        if len(rows) >= limit:
+            break
+    return rows
+
+
+class FakeProviderServer(_FakeServer):
+    """
+    Enterprise job API stand-in (`ENTERPRISE_JOB_API_URL=<base_url>/jobs`).
+
+    Serves `{"jobs": [...]}` from a synthetic corpus, filtered by query/location
+    the way a real upstream would, so the response size tracks the request.
+    """
+
+    def __init__(self, latency_s: float = 0.05, corpus_size: int = 2000, seed: int = 7, port: int = 0):
+        super().__init__(latency_s=latency_s, port=port)
+        self.corpus = make_jobs(corpus_size, seed=seed, noise_share=0.0)
+
+    def handle(self, method: str, path: str, query: Dict[str, List[str]], body: bytes) -> Reply:
+        self._next_request()
+        if path.rstrip("/") != "/jobs":
+            return Reply(404, {"error": "not_found"})
+        params: Dict[str, Any] = {k: v[-1] for k, v in query.items()}
+        if method == "POST" and body:
+            try:
+                params.update(json.loads(body))
+            except ValueError:
+                return Reply(400, {"error": "invalid_json"})
+        location = str(params.get("location") or "").strip()
+        limit = max(1, min(int(params.get("limit") or 10), 50))
+        rows = _match_corpus(self.corpus, str(params.get("query") or ""), len(self.corpus))
+        if location:
+            rows = [j for j in rows if location in j["location"]]
+        return Reply(200, {"jobs": rows[:limit]})
+
+
+class FakeSERPServer(_FakeServer):
+    """
+    Search-result pages in the markup the no-browser parsers scrape.
+
+      /s?wd=         Baidu      (BAIDU_SEARCH_URL=<base_url>/s)
+      /search?q=     Bing HTML  (BING_HTML_SEARCH_URL=<base_url>/search)
+      /html/?q=      DuckDuckGo (DDG_HTML_SEARCH_URL=<base_url>/html/)
+
+    Result links point at real job-board URLs from the synthetic corpus, padded
+    with non-job results so the domain filters do some work.
+    """
+
+    def __init__(
+        self,
+        latency_s: float = 0.1,
+        corpus_size: int = 2000,
+        results_per_page: int = 10,
+        captcha_share: float = 0.0,
+        seed: int = 7,
+        port: int = 0,
+    ):
+        super().__init__(latency_s=latency_s, port=port)
+        self.corpus = make_jobs(corpus_size, seed=seed, noise_share=0.0)
+        self.results_per_page = max(1, int(results_per_page))
+        self.captcha_share = max(0.0, min(1.0, float(captcha_share)))
+        self._rng = random.Random(seed)
+
+    def _results(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        rows = _match_corpus(self.corpus, query, limit)
+        pad = [
+            {"title": f"{query[:12]} 百科", "link": f"https://baike.example.com/item/{quote(query[:12])}"},
+            {"title": "职场资讯", "link": "https://news.example.com/career"},
+        ]
+        return rows + pad
+
+    @staticmethod
+    def _page(items: List[str]) -> str:
+        return "<!DOCTYPE html><html><head><meta charset=\"utf-8\"></head><body>" + "".join(items) + "</body></html>"
+
+    def handle(self, method: str, path: str, query: Dict[str, List[str]], body: bytes) -> Reply:
+        self._next_request()
+        if self.captcha_share:
+            with self._lock:
+                blocked = self._rng.random() < self.captcha_share
+            if blocked:
+                return Reply(200, html=self._page(["<div>安全验证</div><p>请输入验证码</p>"]))
+
+        route = path.rstrip("/") or "/"
+        if route == "/s":
+            q = (query.get("wd") or [""])[-1]
+            n = int((query.get("rn") or [self.results_per_page])[-1])
+            items = [
+                f'<div class="result c-container"><h3 class="t"><a href="{html_lib.escape(r["link"])}" target="_blank">'
+                f'{html_lib.escape(r["title"])}_<em>{html_lib.escape(r.get("company", ""))}</em></a></h3></div>'
+                for r in self._results(q, n)
+            ]
+            return Reply(200, html=self._page(items))
+        if route == "/search":
+            q = (query.get("q") or [""])[-1]
+            n = int((query.get("count") or [self.results_per_page])[-1])
+            items = [
+                f'<li class="b_algo" data-bm="{i}"><h2><a href="{html_lib.escape(r["link"])}" h="ID=SERP">'
+                f'{html_lib.escape(r["title"])} - {html_lib.escape(r.get("company", ""))}</a></h2></li>'
+                for i, r in enumerate(self._results(q, n))
+            ]
+            return Reply(200, html=self._page(["<ol id=\"b_results\">"] + items + ["</ol>"]))
+        if route == "/html":
+            q = (query.get("q") or [""])[-1]
+            items = [
+                f'<div class="result"><a rel="nofollow" class="result__a" '
+                f'href="//duckduckgo.com/l/?uddg={quote(r["link"], safe="")}&amp;rut=x">'
+                f'{html_lib.escape(r["title"])} - {html_lib.escape(r.get("company", ""))}</a></div>'
+                for r in self._results(q, self.results_per_page)
+            ]
+            return Reply(200, html=self._page(items))
+        return Reply(404, {"error": "not_found"})
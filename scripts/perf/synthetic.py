@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import random
+from typing import Any, Dict, List
+
+TITLES = [
+    "Python后端工程师",
+    "Java开发工程师",
+    "前端开发工程师",
+    "数据分析师",
+    "算法工程师",
+    "产品经理",
+    "DevOps工程师",
+    "测试开发工程师",
+    "Go后端开发",
+    "AI应用工程师",
+]
+COMPANIES = ["字节跳动", "腾讯", "阿里巴巴", "美团", "京东", "百度", "网易", "小红书", "快手", "拼多多"]
+CITIES = ["北京", "上海", "深圳", "杭州", "广州", "成都", "南京", "武汉"]
+PLATFORMS = [
+    ("Boss直聘", "https://www.zhipin.com/job_detail/{id}.html"),
+    ("猎聘", "https://www.liepin.com/job/{id}.shtml"),
+    ("智联招聘", "https://jobs.zhaopin.com/{id}.htm"),
+    ("前程无忧", "https://jobs.51job.com/beijing/{id}.html"),
+]
+SKILLS = [
+    "Python", "Java", "Go", "React", "Vue", "TypeScript", "Django", "FastAPI", "Spring",
+    "MySQL", "PostgreSQL", "Redis", "Docker", "Kubernetes", "Pandas", "PyTorch", "TensorFlow",
+]
+SCHOOLS = ["清华大学", "浙江大学", "华中科技大学", "南京大学", "四川大学"]
+DEGREES = ["本科", "硕士", "博士"]
+
+# Share of rows the production filters must reject (seed/demo ids, search entry pages),
+# so the benchmark exercises the filtering branches and not only the happy path.
+NOISE_SHARE = 0.15
+
+
+def make_jobs(n: int, seed: int = 7, noise_share: float = NOISE_SHARE) -> List[Dict[str, Any]]:
+    """Deterministic job corpus shaped like crawler uploads / cloud cache rows."""
+    rng = random.Random(seed)
+    out: List[Dict[str, Any]] = []
+    for i in range(max(0, int(n))):
+        title = rng.choice(TITLES)
+        platform, link_tpl = rng.choice(PLATFORMS)
+        low = rng.randint(10, 40)
+        job: Dict[str, Any] = {
+            "id": f"bench_{i}",
+            "title": f"{title} {i % 97}",
+            "company": rng.choice(COMPANIES),
+            "location": rng.choice(CITIES),
+            "salary": f"{low}-{low + rng.randint(5, 30)}K",
+            "platform": platform,
+            "link": link_tpl.format(id=f"b{i:07d}"),
+            "skills": rng.sample(SKILLS, 4),
+            "updated": f"2026-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}",
+        }
+        roll = rng.random()
+        if roll < noise_share / 3:
+            job["id"] = f"demo_{i}"
+        elif roll < noise_share * 2 / 3:
+            job["link"] = f"https://www.zhipin.com/web/geek/job?query={title}"
+        elif roll < noise_share:
+            job["link"] = ""
+        out.append(job)
+    return out
+
+
+def make_resume(seed: int = 0) -> str:
+    """A plain-text resume in the format users paste into the workspace."""
+    rng = random.Random(seed)
+    skills = rng.sample(SKILLS, 6)
+    years = rng.randint(1, 10)
+    lines = [
+        f"姓名：候选人{seed}",
+        f"学历：{rng.choice(DEGREES)} {rng.choice(SCHOOLS)} 计算机科学",
+        f"工作经验：{years}年",
+        f"求职意向：{rng.choice(TITLES)}",
+        f"期望城市：{rng.choice(CITIES)}",
+        "技能：" + "、".join(skills),
+        "",
+        "项目经验：",
+    ]
+    for p in range(rng.randint(2, 5)):
+        used = "、".join(rng.sample(skills, 3))
+        lines.append(f"{p + 1}. 负责{rng.choice(COMPANIES)}内部系统重构，使用{used}，QPS 提升 {rng.randint(20, 300)}%")
+    lines.append("")
+    lines.append("自我评价：" + "热爱技术，擅长跨团队协作。" * rng.randint(3, 12))
+    return "\n".join(lines)
+
+
+def make_resumes(n: int, seed: int = 11) -> List[str]:
+    return [make_resume(seed + i) for i in range(max(0, int(n)))]
+
+
+def make_queries(n: int, seed: int = 3) -> List[Dict[str, Any]]:
+    """Search queries; roughly one in five misses the corpus on purpose."""
+    rng = random.Random(seed)
+    out: List[Dict[str, Any]] = []
+    for _ in range(max(0, int(n))):
+        if rng.random() < 0.2:
+            out.append({"keywords": ["Haskell", "Erlang"], "location": "拉萨"})
+        else:
+            out.append(
+                {
+                    "keywords": [rng.choice(TITLES)[:4], rng.choice(SKILLS)],
+                    "location": rng.choice(CITIES + [None]),
+                }
+            )
+    return out
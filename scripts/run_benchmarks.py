@@ -0,0 +1,345 @@
+"""
+Offline benchmark suite for the request hot paths.
+
+Everything runs against synthetic data and local fakes (OpenAI-compatible LLM,
+enterprise job API), so results do not depend on network or third-party quota.
+
+    python scripts/run_benchmarks.py                       # 1k/10k/100k corpora
+    python scripts/run_benchmarks.py --sizes 1000,500000 --only cloud_cache_query
+    python scripts/run_benchmarks.py --update-baseline     # record current numbers
+
+Baselines are machine specific: record them on the box that runs the check.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.perf.fakes import FakeLLMServer, FakeProviderServer
+from scripts.perf.stats import summarize_ms
+from scripts.perf.synthetic import make_jobs, make_queries, make_resumes
+
+DEFAULT_BASELINE = ROOT / "scripts" / "perf" / "baseline.json"
+ALL_BENCHES = (
+    "normalize_real_jobs",
+    "cloud_cache_query",
+    "resume_extract_info",
+    "consume_credits",
+    "concurrent_debit",
+    "enterprise_provider",
+    "api_process",
+    "import_web_app",
+)
+
+
+def measure(
+    name: str,
+    fn: Callable[[int], Any],
+    iterations: int,
+    size: int = 0,
+    units_per_call: int = 1,
+    warmup: int = 1,
+) -> Dict[str, Any]:
+    """
+    Time `fn(i)` per call and track peak Python heap over the measured loop.
+
+    Throughput is `units_per_call` per second (e.g. postings scanned), so
+    numbers stay comparable across corpus sizes.
+    """
+    for i in range(max(0, warmup)):
+        fn(i)
+    latencies: List[float] = []
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        for i in range(max(1, iterations)):
+            t0 = time.perf_counter()
+            fn(i)
+            latencies.append(time.perf_counter() - t0)
+        total = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "name": name,
+        "size": int(size),
+        "iterations": len(latencies),
+        "throughput_per_s": round(units_per_call * len(latencies) / total, 2) if total > 0 else 0.0,
+        **summarize_ms(latencies),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def bench_normalize_real_jobs(web_app: Any, size: int, iterations: int) -> Dict[str, Any]:
+    corpus = make_jobs(size)
+    # limit=size forces a full scan instead of the early exit after `limit` hits.
+    return measure(
+        "normalize_real_jobs",
+        lambda _i: web_app._normalize_real_jobs(corpus, limit=size),
+        iterations,
+        size=size,
+        units_per_call=size,
+    )
+
+
+def bench_cloud_cache_query(web_app: Any, size: int, iterations: int) -> Dict[str, Any]:
+    queries = make_queries(64)
+    previous = web_app.cloud_jobs_cache
+    web_app.cloud_jobs_cache = make_jobs(size)
+    try:
+        return measure(
+            "cloud_cache_query",
+            lambda i: web_app._filter_cloud_cache_by_query(
+                queries[i % len(queries)]["keywords"], queries[i % len(queries)]["location"], 10
+            ),
+            iterations,
+            size=size,
+            units_per_call=size,
+        )
+    finally:
+        web_app.cloud_jobs_cache = previous
+
+
+def bench_resume_extract_info(web_app: Any, size: int, iterations: int) -> Dict[str, Any]:
+    resumes = make_resumes(50)
+    return measure(
+        "resume_extract_info",
+        lambda i: web_app.analyzer.extract_info(resumes[i % len(resumes)]),
+        iterations,
+    )
+
+
+def bench_consume_credits(tmp_dir: str, iterations: int) -> Dict[str, Any]:
+    from app.services.commerce_service import CommerceService
+
+    svc = CommerceService(db_path=os.path.join(tmp_dir, "bench_commerce.db"))
+    buyer_id = ""
+    funded = 0
+    while funded < iterations + 1:
+        checkout = svc.create_credit_checkout("offer", email="bench@example.com", name="bench")
+        order = checkout.get("order") or {}
+        buyer_id = str(order.get("buyer_id") or buyer_id)
+        svc.update_order(str(order.get("order_id") or ""), {"payment_status": "paid"})
+        funded += int(order.get("credits") or 0)
+    return measure(
+        "consume_credits",
+        lambda i: svc.consume_credits(1, "bench_debit", buyer_id=buyer_id, note=f"bench {i}"),
+        iterations,
+    )
+
+
+def bench_concurrent_debit(tmp_dir: str, workers: int, debits_per_worker: int, use_holds: bool = False) -> Dict[str, Any]:
+    """
+    `workers` threads, each with its own CommerceService (own process-local
+    lock, like separate uvicorn workers), race to debit one wallet that holds
+    fewer credits than requested. Reports throughput plus correctness counters:
+    any overdraft or ledger/balance mismatch is a failure.
+    """
+    import threading
+
+    from app.services.commerce_service import CommerceService
+
+    name = "concurrent_hold_capture" if use_holds else "concurrent_debit"
+    db_path = os.path.join(tmp_dir, f"bench_{name}.db")
+    svc = CommerceService(db_path=db_path)
+    order = svc.create_credit_checkout("offer", email=f"{name}@example.com", name="bench").get("order") or {}
+    buyer_id = str(order.get("buyer_id") or "")
+    svc.update_order(str(order.get("order_id") or ""), {"payment_status": "paid"})
+    funded = int(svc.get_wallet_by_buyer_id(buyer_id)["wallet"]["balance"])
+
+    latencies: List[float] = []
+    ok_count = [0]
+    lock = threading.Lock()
+
+    def _worker(idx: int) -> None:
+        own = CommerceService(db_path=db_path)
+        for i in range(debits_per_worker):
+            t0 = time.perf_counter()
+            if use_holds:
+                hold = own.authorize_credits(1, "bench_hold", buyer_id=buyer_id)
+                ok = bool(hold.get("ok"))
+                if ok:
+                    own.capture_credits(hold["hold_id"])
+            else:
+                ok = bool(own.consume_credits(1, "bench_debit", buyer_id=buyer_id, idempotency_key=f"{idx}:{i}").get("ok"))
+            took = time.perf_counter() - t0
+            with lock:
+                latencies.append(took)
+                ok_count[0] += int(ok)
+        own.settle_captures()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=_worker, args=(i,)) for i in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    total = time.perf_counter() - started
+
+    wallet = svc.get_wallet_by_buyer_id(buyer_id)["wallet"]
+    debited = sum(
+        int(row["amount"]) for row in svc.iter_export("credit_ledger") if row["buyer_id"] == buyer_id and row["direction"] == "debit"
+    )
+    return {
+        "name": name,
+        "size": workers,
+        "iterations": len(latencies),
+        "throughput_per_s": round(len(latencies) / total, 2) if total > 0 else 0.0,
+        **summarize_ms(latencies),
+        "peak_kib": 0.0,
+        "funded": funded,
+        "succeeded": ok_count[0],
+        "overdraft": wallet["balance"] < 0,
+        "consistent": wallet["balance"] + wallet["held"] == funded - debited and debited == ok_count[0],
+    }
+
+
+def bench_enterprise_provider(web_app: Any, provider_url: str, iterations: int) -> Dict[str, Any]:
+    queries = make_queries(32)
+    os.environ["ENTERPRISE_JOB_API_URL"] = provider_url
+    return measure(
+        "enterprise_provider",
+        lambda i: web_app._search_jobs_enterprise_api(
+            queries[i % len(queries)]["keywords"], queries[i % len(queries)]["location"], limit=10
+        ),
+        iterations,
+    )
+
+
+def bench_api_process(web_app: Any, size: int, iterations: int) -> Dict[str, Any]:
+    from fastapi.testclient import TestClient
+
+    client = TestClient(web_app.app)
+    resumes = make_resumes(20)
+    previous = web_app.cloud_jobs_cache
+    web_app.cloud_jobs_cache = make_jobs(size)
+
+    def _call(i: int) -> None:
+        resp = client.post("/api/process", json={"resume": resumes[i % len(resumes)]})
+        if resp.status_code != 200:
+            raise RuntimeError(f"/api/process -> {resp.status_code}: {resp.text[:200]}")
+
+    try:
+        return measure("api_process", _call, iterations, size=size)
+    finally:
+        web_app.cloud_jobs_cache = previous
+
+
+def bench_import_web_app(env: Dict[str, str], iterations: int) -> Dict[str, Any]:
+    """Cold `import web_app` in a fresh interpreter (what a restarted free-tier dyno pays)."""
+    child_env = {**os.environ, **env}
+
+    def _import(_i: int) -> None:
+        subprocess.run([sys.executable, "-c", "import web_app"], cwd=str(ROOT), env=child_env, check=True)
+
+    return measure("import_web_app", _import, iterations)
+
+
+def compare_to_baseline(
+    results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float
+) -> List[Dict[str, Any]]:
+    """A result regresses when p95 latency or peak memory grows beyond `tolerance`."""
+    regressions: List[Dict[str, Any]] = []
+    for row in results:
+        key = f"{row['name']}@{row['size']}"
+        base = baseline.get(key)
+        if not base:
+            continue
+        for field in ("p95_ms", "peak_kib"):
+            old = float(base.get(field) or 0)
+            new = float(row.get(field) or 0)
+            if old > 0 and new > old * (1 + tolerance):
+                regressions.append(
+                    {"bench": key, "metric": field, "baseline": old, "current": new, "ratio": round(new / old, 2)}
+                )
+    return regressions
+
+
+def run(
+    sizes: List[int],
+    iterations: int,
+    only: Optional[List[str]] = None,
+    llm_latency_ms: float = 50.0,
+    provider_latency_ms: float = 30.0,
+) -> List[Dict[str, Any]]:
+    selected = [b for b in ALL_BENCHES if not only or b in only]
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="ajh-bench-") as tmp_dir, FakeLLMServer(
+        latency_s=llm_latency_ms / 1000.0
+    ) as llm, FakeProviderServer(latency_s=provider_latency_ms / 1000.0) as provider:
+        # LLM clients are built at import time, so wire the fakes in first.
+        os.environ["OPENAI_COMPAT_BASE_URL"] = f"{llm.base_url}/v1"
+        os.environ["OPENAI_COMPAT_API_KEY"] = "bench"
+        os.environ["APP_DATA_DB_PATH"] = os.path.join(tmp_dir, "app_data.db")
+        os.environ.setdefault("APP_LOG_LEVEL", "WARNING")
+        import web_app
+
+        for size in sizes:
+            if "normalize_real_jobs" in selected:
+                results.append(bench_normalize_real_jobs(web_app, size, iterations))
+            if "cloud_cache_query" in selected:
+                results.append(bench_cloud_cache_query(web_app, size, iterations))
+        if "resume_extract_info" in selected:
+            results.append(bench_resume_extract_info(web_app, 0, iterations * 10))
+        if "consume_credits" in selected:
+            results.append(bench_consume_credits(tmp_dir, iterations * 10))
+        if "concurrent_debit" in selected:
+            for use_holds in (False, True):
+                results.append(bench_concurrent_debit(tmp_dir, 8, iterations * 5, use_holds=use_holds))
+        if "enterprise_provider" in selected:
+            results.append(bench_enterprise_provider(web_app, f"{provider.base_url}/jobs", iterations))
+        if "api_process" in selected:
+            results.append(bench_api_process(web_app, min(sizes), max(3, iterations // 4)))
+        if "import_web_app" in selected:
+            env = {k: os.environ[k] for k in ("OPENAI_COMPAT_BASE_URL", "OPENAI_COMPAT_API_KEY", "APP_DATA_DB_PATH")}
+            results.append(bench_import_web_app(env, max(3, iterations // 4)))
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run offline hot-path benchmarks")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma separated corpus sizes (1k-500k)")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--only", default="", help=f"comma separated subset of: {','.join(ALL_BENCHES)}")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    parser.add_argument("--provider-latency-ms", type=float, default=30.0)
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed growth before failing (0.25 = +25%%)")
+    args = parser.parse_args()
+
+    sizes = sorted({max(1, int(s)) for s in args.sizes.split(",") if s.strip()})
+    only = [x.strip() for x in args.only.split(",") if x.strip()] or None
+    results = run(sizes, args.iterations, only, args.llm_latency_ms, args.provider_latency_ms)
+
+    baseline_path = Path(args.baseline)
+    baseline: Dict[str, Any] = {}
+    if baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8") or "{}")
+
+    if args.update_baseline:
+        for row in results:
+            baseline[f"{row['name']}@{row['size']}"] = row
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(baseline, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+        regressions: List[Dict[str, Any]] = []
+    else:
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+
+    print(json.dumps({"results": results, "regressions": regressions}, ensure_ascii=False, indent=2))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
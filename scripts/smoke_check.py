@@ -23,7 +23,7 @@ def check(url: str, path: str, timeout: int = 20, retries: int = 2) -> Dict:
 
 def main() -> int:
     base = os.getenv("SMOKE_BASE_URL", "http://127.0.0.1:8000")
-    endpoints = ["/api/ping", "/api/version", "/api/ready", "/api/health"]
+    endpoints = ["/api/ping", "/api/health/live", "/api/version", "/api/ready", "/api/health"]
     rows = [check(base, p) for p in endpoints]
     all_ok = all(x["ok"] for x in rows)
     print(json.dumps({"base": base, "all_ok": all_ok, "checks": rows}, ensure_ascii=False, indent=2))
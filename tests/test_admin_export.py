@@ -0,0 +1,45 @@
+import csv
+import io
+import json
+
+from app.services.admin_export import iter_csv, iter_export_bytes
+from app.services.commerce_service import CommerceService
+
+
+def test_iter_export_walks_all_rows_in_chunks(tmp_path):
+    svc = CommerceService(db_path=str(tmp_path / "app.db"))
+    ids = [svc.create_bundle(name=f"buyer{i}")["buyer_id"] for i in range(7)]
+
+    rows = list(svc.iter_export("buyers", chunk_size=2))
+    assert sorted(r["buyer_id"] for r in rows) == sorted(ids)
+    assert [r["created_at"] for r in rows] == sorted(r["created_at"] for r in rows)
+    assert list(svc.iter_export("buyers", since="2999-01-01")) == []
+
+
+def test_jsonl_and_csv_encoders_stream_json_columns(tmp_path):
+    svc = CommerceService(db_path=str(tmp_path / "app.db"))
+    code = svc.create_bundle(name="buyer")["access_code"]
+    svc.enqueue_local_task(code, task_type="apply", payload={"jobs": ["a", "b"]})
+    columns = svc.export_columns("local_tasks")
+    assert "payload" in columns and "payload_json" not in columns
+
+    lines = b"".join(iter_export_bytes(svc.iter_export("local_tasks"), columns, "jsonl")).decode("utf-8").splitlines()
+    assert json.loads(lines[0])["payload"] == {"jobs": ["a", "b"]}
+
+    text = b"".join(iter_export_bytes(svc.iter_export("local_tasks"), columns, "csv")).decode("utf-8-sig")
+    parsed = list(csv.DictReader(io.StringIO(text)))
+    assert json.loads(parsed[0]["payload"]) == {"jobs": ["a", "b"]}
+
+
+def test_csv_encoder_flushes_in_bounded_chunks():
+    rows = ({"id": i, "note": "x" * 100} for i in range(1000))
+    chunks = list(iter_csv(rows, ["id", "note"], flush_bytes=4096))
+    assert len(chunks) > 10
+    assert max(len(c) for c in chunks) < 4096 + 200
+
+
+def test_csv_neutralises_formula_cells():
+    rows = [{"name": "=HYPERLINK(\"http://x\")", "note": "@SUM(A1)", "phone": "+86 138", "balance": -5, "ok": "plain"}]
+    text = b"".join(iter_csv(rows, ["name", "note", "phone", "balance", "ok"])).decode("utf-8-sig")
+    row = next(csv.DictReader(io.StringIO(text)))
+    assert row == {"name": "'=HYPERLINK(\"http://x\")", "note": "'@SUM(A1)", "phone": "'+86 138", "balance": "-5", "ok": "plain"}
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from app.core.admission import FREE, PAID, AdmissionController, AdmissionRejected
+
+
+def test_paid_lane_served_before_free_and_positions_reported():
+    ctl = AdmissionController(max_concurrent=1, max_queue=10, deadline_s=1000, expected_run_s=1)
+    order = []
+    positions = {}
+
+    async def run(name, lane, gate):
+        async def on_position(pos, eta_s):
+            positions.setdefault(name, []).append(pos)
+
+        async with ctl.slot(lane, on_position=on_position):
+            order.append(name)
+            await gate.wait()
+
+    async def main():
+        gate = asyncio.Event()
+        first = asyncio.ensure_future(run("first", FREE, gate))
+        await asyncio.sleep(0)
+        free = asyncio.ensure_future(run("free", FREE, gate))
+        await asyncio.sleep(0)
+        paid = asyncio.ensure_future(run("paid", PAID, gate))
+        await asyncio.sleep(0.01)
+        assert ctl.stats()["waiting"] == {PAID: 1, FREE: 1}
+        gate.set()
+        await asyncio.gather(first, free, paid)
+
+    asyncio.run(main())
+    assert order == ["first", "paid", "free"]
+    assert positions["free"][0] == 1 and 2 in positions["free"]  # pushed back by the paid request
+    assert positions["paid"][0] == 1
+    assert ctl.stats()["active"] == 0
+
+
+def test_rejects_fast_when_wait_exceeds_deadline_or_queue_full():
+    ctl = AdmissionController(max_concurrent=1, max_queue=1, deadline_s=90, expected_run_s=60)
+
+    async def main():
+        gate = asyncio.Event()
+
+        async def hold():
+            async with ctl.slot(FREE):
+                await gate.wait()
+
+        running = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        queued = asyncio.ensure_future(hold())  # position 1 -> ~60s, admitted to the queue
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as err:
+            async with ctl.slot(FREE):
+                pass
+        assert err.value.reason == "queue_full" and err.value.retry_after_s == 60
+
+        ctl.max_queue = 10
+        with pytest.raises(AdmissionRejected) as err:
+            async with ctl.slot(FREE):  # position 2 -> ~120s > 90s deadline
+                pass
+        assert err.value.reason == "deadline" and err.value.retry_after_s == 30
+        gate.set()
+        await asyncio.gather(running, queued)
+
+    asyncio.run(main())
+    assert ctl.stats()["rejected"] == 2 and ctl.stats()["admitted"] == 2
+
+
+def test_cancelled_waiter_leaves_queue():
+    ctl = AdmissionController(max_concurrent=1, max_queue=10, deadline_s=1000)
+
+    async def main():
+        gate = asyncio.Event()
+
+        async def hold():
+            async with ctl.slot(FREE):
+                await gate.wait()
+
+        running = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        assert ctl.queued() == 0
+        gate.set()
+        await running
+        async with ctl.slot(FREE):
+            assert ctl.stats()["active"] == 1
+
+    asyncio.run(main())
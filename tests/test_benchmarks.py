@@ -0,0 +1,97 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from app.services.job_providers import redirect_resolver
+from app.services.job_providers.baidu_provider import BaiduSearchProvider
+from app.services.job_providers.base import JobSearchParams
+from scripts.load_test import summarize_stage
+from scripts.perf.fakes import FakeLLMServer, FakeProviderServer, FakeSERPServer
+from scripts.perf.synthetic import make_jobs, make_resume
+from scripts.run_benchmarks import compare_to_baseline, measure
+
+
+pytestmark = pytest.mark.performance
+
+
+def _post(url, payload):
+    req = urllib.request.Request(
+        url, data=json.dumps(payload).encode("utf-8"), headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(req, timeout=5) as resp:
+        return json.loads(resp.read())
+
+
+def test_synthetic_corpus_is_deterministic_and_noisy():
+    a = make_jobs(500)
+    assert a == make_jobs(500)
+    assert any(j["id"].startswith("demo_") for j in a)
+    assert any("web/geek/job?" in j["link"] for j in a)
+    assert "求职意向" in make_resume(1)
+
+
+def test_fake_llm_speaks_openai_chat_completions():
+    with FakeLLMServer(latency_s=0.0, reply="ok") as llm:
+        data = _post(f"{llm.base_url}/v1/chat/completions", {"model": "m", "messages": [{"role": "user", "content": "hi"}]})
+    assert data["choices"][0]["message"]["content"] == "ok"
+    assert llm.requests == 1
+
+
+def test_fake_llm_streams_sse_and_injects_429():
+    with FakeLLMServer(latency_s=0.0, reply="abcdefgh", token_chars=3) as llm:
+        req = urllib.request.Request(
+            f"{llm.base_url}/v1/chat/completions",
+            data=json.dumps({"model": "m", "stream": True, "messages": []}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(req, timeout=5) as resp:
+            assert resp.headers["Content-Type"] == "text/event-stream"
+            events = [line[6:] for line in resp.read().decode("utf-8").splitlines() if line.startswith("data: ")]
+    assert events[-1] == "[DONE]"
+    deltas = [json.loads(e)["choices"][0]["delta"].get("content", "") for e in events[:-1]]
+    assert "".join(deltas) == "abcdefgh"
+
+    with FakeLLMServer(latency_s=0.0, rate_limit_share=1.0) as llm:
+        with pytest.raises(urllib.error.HTTPError) as err:
+            _post(f"{llm.base_url}/v1/chat/completions", {"messages": []})
+    assert err.value.code == 429
+    assert err.value.headers["Retry-After"] == "1"
+
+
+def test_baidu_parser_reads_stub_serp(monkeypatch, tmp_path):
+    # Keep the redirect cache out of the repo's data/ directory.
+    monkeypatch.setenv("REDIRECT_CACHE_DB_PATH", str(tmp_path / "redirect_cache.db"))
+    monkeypatch.setattr(redirect_resolver, "_resolver", None)
+    with FakeSERPServer(latency_s=0.0, corpus_size=200) as serp:
+        monkeypatch.setenv("BAIDU_SEARCH_URL", f"{serp.base_url}/s")
+        jobs = BaiduSearchProvider().search_jobs(JobSearchParams(keywords=["Python"], location="北京", limit=5))
+    assert jobs
+    assert any(j["platform"] in {"Boss直聘", "猎聘", "智联招聘", "前程无忧"} for j in jobs)
+
+
+def test_load_stage_summary_reports_p99_per_step():
+    samples = [("upload", True, 0.01, 200)] * 98 + [("upload", True, 1.0, 200)] * 2 + [("process", False, 2.0, 500)]
+    report = summarize_stage(users=2, elapsed_s=10.0, journeys=50, samples=samples)
+    assert report["steps"]["upload"]["requests"] == 100
+    assert report["steps"]["upload"]["p99_ms"] == 1000.0
+    assert report["steps"]["process"]["errors"] == 1
+    assert report["steps"]["process"]["statuses"] == {"500": 1}
+
+
+def test_fake_provider_filters_by_query():
+    with FakeProviderServer(latency_s=0.0, corpus_size=200) as provider:
+        data = _post(f"{provider.base_url}/jobs", {"query": "Python", "location": "北京", "limit": 5})
+    assert 0 < len(data["jobs"]) <= 5
+    assert all(j["location"] == "北京" for j in data["jobs"])
+
+
+def test_measure_and_baseline_regression_check():
+    row = measure("noop", lambda _i: sum(range(100)), iterations=10, size=1)
+    assert row["iterations"] == 10 and row["p50_ms"] <= row["p99_ms"]
+
+    baseline = {"noop@1": {"p95_ms": 1.0, "peak_kib": 10.0}}
+    slow = dict(row, p95_ms=2.0, peak_kib=10.0)
+    assert [r["metric"] for r in compare_to_baseline([slow], baseline, 0.25)] == ["p95_ms"]
+    assert compare_to_baseline([dict(slow, p95_ms=1.1)], baseline, 0.25) == []
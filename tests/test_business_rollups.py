@@ -0,0 +1,55 @@
+import json
+import sqlite3
+from datetime import UTC, datetime
+
+from app.services.business_service import BusinessService
+
+
+def test_metrics_read_rollups_maintained_at_insert(tmp_path):
+    svc = BusinessService(db_path=str(tmp_path / "app.db"))
+    svc.track_event("resume_uploaded", {})
+    svc.track_event("resume_uploaded", {})
+    svc.track_event("resume_processed", {"ok": True})
+    svc.track_event("resume_processed", {"ok": False})
+    svc.track_event("process_quality_gate", {"passed": False})
+    svc.track_event("process_quality_gate", {"passed": "True"})
+    svc.track_event("api_error", {"api": "/x"})
+
+    m = svc.metrics()
+    assert (m["funnel"]["uploads"], m["funnel"]["process_runs"]) == (2, 2)
+    assert m["funnel"]["process_success_pct"] == 50.0
+    assert m["quality"]["gate_failures"] == 1
+    assert m["stability"]["api_errors"] == 1
+
+    today = datetime.now(UTC).date().isoformat()
+    assert svc.daily_event_counts(today)[today]["resume_uploaded"] == 2
+
+
+def test_legacy_events_are_backfilled_into_columns_and_rollups(tmp_path):
+    db = tmp_path / "legacy.db"
+    conn = sqlite3.connect(db)
+    conn.execute(
+        "CREATE TABLE events (id INTEGER PRIMARY KEY AUTOINCREMENT, event_name TEXT NOT NULL, payload_json TEXT, created_at TEXT NOT NULL)"
+    )
+    rows = [
+        ("resume_processed", {"ok": True}, "2026-01-02T10:00:00+00:00"),
+        ("resume_processed", {"ok": False}, "2026-01-02T11:00:00+00:00"),
+        ("process_quality_gate", {"passed": "false"}, "2026-01-03T09:00:00+00:00"),
+    ]
+    conn.executemany(
+        "INSERT INTO events(event_name, payload_json, created_at) VALUES(?, ?, ?)",
+        [(n, json.dumps(p), t) for n, p, t in rows],
+    )
+    conn.commit()
+    conn.close()
+
+    svc = BusinessService(db_path=str(db))
+    m = svc.metrics()
+    assert m["funnel"]["process_runs"] == 2
+    assert m["funnel"]["process_success_pct"] == 50.0
+    assert m["quality"]["gate_failures"] == 1
+    assert svc.daily_event_counts("2026-01-01") == {
+        "2026-01-02": {"resume_processed": 2},
+        "2026-01-03": {"process_quality_gate": 1},
+    }
+    assert svc.rebuild_rollups() == 2
@@ -0,0 +1,79 @@
+import sqlite3
+
+from app.services.commerce_service import CommerceService
+
+
+def _seed(svc):
+    a = svc.create_bundle(name="张三", phone="138-0013-8000", email="Zhang.San@Example.com", product_name="冲刺版")
+    b = svc.create_bundle(name="李四", phone="139 0000 1111", email="lisi@example.com", product_name="起步版")
+    return a, b
+
+
+def test_fts_search_matches_substrings_phone_and_email(tmp_path):
+    svc = CommerceService(db_path=str(tmp_path / "app.db"))
+    a, b = _seed(svc)
+    assert svc._fts_enabled
+
+    def buyer_ids(q):
+        return [row["buyer_id"] for row in svc.list_buyers(search=q)]
+
+    assert buyer_ids("13800138000") == [a["buyer_id"]]
+    assert buyer_ids("139-0000-1111") == [b["buyer_id"]]
+    assert buyer_ids("zhang.san@example") == [a["buyer_id"]]
+    assert buyer_ids("李四") == [b["buyer_id"]]  # 2 chars -> LIKE fallback
+    assert [o["buyer_id"] for o in svc.list_orders(search="冲刺版")] == [a["buyer_id"]]
+
+    svc.create_ticket(buyer_id=a["buyer_id"], subject="发票问题", content="需要开具增值税发票")
+    assert len(svc.list_tickets(search="增值税发票")) == 1
+
+    svc.update_access_code(a["access_code"], {"label": "vip renewal"})
+    assert [c["code"] for c in svc.list_access_codes(search="renewal")] == [a["access_code"]]
+    assert [c["code"] for c in svc.list_access_codes(search="默认访问码")] == [b["access_code"]]
+
+
+def test_keyset_pagination_walks_every_row_once(tmp_path):
+    svc = CommerceService(db_path=str(tmp_path / "app.db"))
+    created = {svc.create_bundle(name=f"buyer{i}")["buyer_id"] for i in range(7)}
+    seen, cursor = [], ""
+    while True:
+        page = svc.list_buyers(limit=3, cursor=cursor)
+        seen.extend(row["buyer_id"] for row in page)
+        cursor = CommerceService.page_cursor(page, "buyer_id", limit=3)
+        if not cursor:
+            break
+    assert len(seen) == 7 and set(seen) == created
+
+
+def test_existing_rows_are_backfilled_into_index(tmp_path):
+    db = str(tmp_path / "app.db")
+    svc = CommerceService(db_path=db)
+    a, _ = _seed(svc)
+    conn = sqlite3.connect(db)
+    conn.execute("DROP TABLE buyers_fts")
+    conn.commit()
+    conn.close()
+    assert [row["buyer_id"] for row in CommerceService(db_path=db).list_buyers(search="example.com")] != []
+    assert [row["buyer_id"] for row in CommerceService(db_path=db).list_buyers(search="13800138000")] == [a["buyer_id"]]
+
+
+def test_digit_stripping_only_applies_to_the_phone_column(tmp_path):
+    db = str(tmp_path / "app.db")
+    svc = CommerceService(db_path=db)
+    paren = svc.create_bundle(name="王五", phone="+86 (138) 1234-5678")
+    dated = svc.create_bundle(name="活动 2024-05-01 报名")
+    svc.create_bundle(name="批次20240501")
+
+    def buyer_ids(q):
+        return [row["buyer_id"] for row in svc.list_buyers(search=q)]
+
+    assert buyer_ids("8613812345678") == [paren["buyer_id"]]
+    assert buyer_ids("(138) 1234-5678") == [paren["buyer_id"]]
+    assert buyer_ids("2024-05-01") == [dated["buyer_id"]]
+
+    # An index built with the old single-column layout is rebuilt on start.
+    conn = sqlite3.connect(db)
+    conn.execute("DROP TABLE buyers_fts")
+    conn.execute("CREATE VIRTUAL TABLE buyers_fts USING fts5(body, content='', tokenize='trigram')")
+    conn.commit()
+    conn.close()
+    assert [row["buyer_id"] for row in CommerceService(db_path=db).list_buyers(search="8613812345678")] == [paren["buyer_id"]]
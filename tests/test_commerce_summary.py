@@ -0,0 +1,71 @@
+import sqlite3
+
+from app.services.commerce_service import CommerceService
+
+
+def _full_scan_summary(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        q = lambda sql: int(conn.execute(sql).fetchone()[0] or 0)
+        return {
+            "buyers_total": q("SELECT COUNT(*) FROM buyers"),
+            "paid_orders": q("SELECT COUNT(*) FROM orders WHERE payment_status = 'paid'"),
+            "pending_orders": q("SELECT COUNT(*) FROM orders WHERE payment_status = 'pending'"),
+            "open_tickets": q("SELECT COUNT(*) FROM support_tickets WHERE status IN ('open', 'todo', 'pending')"),
+            "queued_tasks": q("SELECT COUNT(*) FROM local_tasks WHERE status = 'queued'"),
+            "wallets_total": q("SELECT COUNT(*) FROM wallets"),
+            "total_credit_balance": q("SELECT COALESCE(SUM(balance), 0) FROM wallets"),
+            "total_credits_granted": q("SELECT COALESCE(SUM(granted_total), 0) FROM wallets"),
+            "total_credits_consumed": q("SELECT COALESCE(SUM(consumed_total), 0) FROM wallets"),
+        }
+    finally:
+        conn.close()
+
+
+def test_summary_counters_follow_mutations(tmp_path):
+    svc = CommerceService(db_path=str(tmp_path / "app.db"))
+    bundle = svc.create_bundle(name="a")
+    checkout = svc.create_credit_checkout("starter", email="b@example.com", name="b")["order"]
+    assert svc.summary()["pending_orders"] >= 1
+
+    svc.update_order(checkout["order_id"], {"payment_status": "paid"})
+    svc.consume_credits(3, "render", buyer_id=checkout["buyer_id"])
+    svc.create_ticket(buyer_id=bundle["buyer_id"], subject="help", content="cannot log in")
+    svc.enqueue_local_task(bundle["access_code"], task_type="apply", payload={})
+
+    summary = svc.summary()
+    expected = _full_scan_summary(svc.db_path)
+    assert {k: summary[k] for k in expected} == expected
+    assert summary["total_credits_consumed"] == 3 and summary["active_codes"] >= 1
+
+
+def test_reconcile_repairs_drift_from_out_of_band_writes(tmp_path):
+    svc = CommerceService(db_path=str(tmp_path / "app.db"))
+    svc.create_bundle(name="a")
+    conn = sqlite3.connect(svc.db_path)
+    conn.execute("UPDATE commerce_counters SET value = value + 5 WHERE name = 'buyers_total'")
+    conn.commit()
+    conn.close()
+
+    assert svc.reconcile_summary_counters()["drift"] == {"buyers_total": -5}
+    assert svc.summary()["buyers_total"] == 1
+
+
+def test_counters_tolerate_null_status_columns(tmp_path):
+    svc = CommerceService(db_path=str(tmp_path / "app.db"))
+    bundle = svc.create_bundle(name="a")
+    svc.create_ticket(buyer_id=bundle["buyer_id"], subject="help", content="cannot log in")
+    conn = sqlite3.connect(svc.db_path)
+    # Legacy imports and manual fixes write NULL statuses; the triggers must not reject them.
+    conn.execute("UPDATE orders SET payment_status = NULL")
+    conn.execute("UPDATE support_tickets SET status = NULL")
+    conn.commit()
+    assert svc.summary()["paid_orders"] == 0 and svc.summary()["open_tickets"] == 0
+
+    conn.execute("UPDATE orders SET payment_status = 'paid'")
+    conn.commit()
+    conn.close()
+    summary = svc.summary()
+    expected = _full_scan_summary(svc.db_path)
+    assert {k: summary[k] for k in expected} == expected
+    assert summary["paid_orders"] == 1
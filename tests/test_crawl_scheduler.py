@@ -0,0 +1,64 @@
+from app.services.business_service import BusinessService
+from app.services.crawl_scheduler import DemandScheduler
+
+
+class _Clock:
+    def __init__(self):
+        self.t = 1_000_000.0
+
+    def __call__(self):
+        return self.t
+
+
+def test_plan_prioritises_missed_demand_and_reserves_seed_share():
+    sched = DemandScheduler([["Python"], ["Java"]], ["北京", "上海"], budget=4, seed_share=0.5)
+    demand = [
+        {"keywords": ["golang"], "location": "深圳", "searches": 10, "misses": 0},
+        {"keywords": ["rust"], "location": "杭州", "searches": 3, "misses": 3},
+        {"keywords": ["scala"], "location": "成都", "searches": 1, "misses": 0},
+    ]
+    plan = sched.plan(demand)
+    assert [(p["keywords"], p["location"], p["source"]) for p in plan] == [
+        (["golang"], "深圳", "demand"),
+        (["rust"], "杭州", "demand"),
+        (["Python"], "北京", "seed"),
+        (["Python"], "上海", "seed"),
+    ]
+
+
+def test_recently_crawled_pairs_yield_budget_to_stale_ones():
+    clock = _Clock()
+    sched = DemandScheduler([["Python"], ["Java"]], ["北京"], budget=1, seed_share=1.0, now_fn=clock)
+    first = sched.plan()
+    assert first[0]["keywords"] == ["Python"]
+    sched.mark_crawled(first)
+
+    clock.t += 3600
+    second = sched.plan()
+    assert second[0]["keywords"] == ["Java"]
+
+
+def test_search_demand_and_hit_rate_by_cycle(tmp_path):
+    svc = BusinessService(db_path=str(tmp_path / "app.db"))
+    for hit in (False, False, True):
+        svc.track_event(
+            "job_search",
+            {"query_key": "python", "keywords": ["python"], "location": "北京", "cache_hit": hit, "cloud_mode": True},
+        )
+    svc.track_event("crawler_upload", {"new": 5, "cycle_id": "c1"})
+    svc.track_event("crawler_upload", {"new": 2, "cycle_id": "c1"})
+    svc.track_event(
+        "job_search",
+        {"query_key": "python", "keywords": ["python"], "location": "北京", "cache_hit": True, "cloud_mode": True},
+    )
+
+    rows = svc.search_demand(days=7)
+    assert len(rows) == 1
+    assert rows[0]["keywords"] == ["python"]
+    assert (rows[0]["searches"], rows[0]["misses"]) == (4, 2)
+
+    cycles = svc.cache_hit_rate_by_cycle()
+    assert len(cycles) == 1
+    assert cycles[0]["cycle_id"] == "c1"
+    assert cycles[0]["new_jobs"] == 7
+    assert (cycles[0]["searches"], cycles[0]["hits"], cycles[0]["hit_rate_pct"]) == (1, 1, 100.0)
@@ -0,0 +1,167 @@
+import gzip
+import json
+import threading
+
+from app.services.crawler_engine import BatchUploader, CrawlerEngine, DomainBudget
+
+
+class _Resp:
+    def __init__(self, status_code=200, payload=None):
+        self.status_code = status_code
+        self._payload = payload or {}
+        self.text = json.dumps(self._payload)
+
+    def json(self):
+        return self._payload
+
+
+def _job(i):
+    return {"id": f"openclaw_{i}", "title": f"Python后端 {i}", "link": f"https://www.zhipin.com/job_detail/{i}.html"}
+
+
+def test_uploader_batches_and_gzips_payload():
+    calls = []
+
+    def _post(url, data=None, headers=None, timeout=0):
+        calls.append(json.loads(gzip.decompress(data)))
+        assert headers["Content-Encoding"] == "gzip"
+        assert headers["Authorization"] == "Bearer k"
+        return _Resp(200, {"new": len(calls[-1]["jobs"])})
+
+    up = BatchUploader("https://cloud.example/", "k", batch_size=3, post_fn=_post)
+    up.add([_job(i) for i in range(2)])
+    assert calls == []
+    up.add([_job(i) for i in range(2, 7)])
+    assert [len(c["jobs"]) for c in calls] == [3, 3]
+    up.close()
+    assert [len(c["jobs"]) for c in calls] == [3, 3, 1]
+    assert up.stats["uploaded"] == 7
+    assert up.stats["batches"] == 3
+
+
+def test_uploader_does_not_retry_auth_errors():
+    calls = []
+
+    def _post(url, data=None, headers=None, timeout=0):
+        calls.append(1)
+        return _Resp(401, {"error": "bad key"})
+
+    up = BatchUploader("https://cloud.example", "k", batch_size=1, backoff_base_s=0, post_fn=_post)
+    up.add([_job(1)])
+    assert len(calls) == 1
+    assert up.stats["dropped"] == 1
+
+
+def test_engine_retries_failed_tasks_and_uploads_results():
+    attempts = {}
+    lock = threading.Lock()
+    uploaded = []
+
+    def _fetch(task):
+        key = (tuple(task.keywords), task.location)
+        with lock:
+            attempts[key] = attempts.get(key, 0) + 1
+            n = attempts[key]
+        if task.location == "上海" and n == 1:
+            raise RuntimeError("transient")
+        return [_job(f"{task.keywords[0]}_{task.location}")]
+
+    def _post(url, data=None, headers=None, timeout=0):
+        uploaded.extend(json.loads(gzip.decompress(data))["jobs"])
+        return _Resp(200, {"new": 1})
+
+    engine = CrawlerEngine(
+        fetch=_fetch,
+        uploader=BatchUploader("https://cloud.example", "k", batch_size=50, post_fn=_post),
+        max_workers=4,
+        budget=DomainBudget(min_interval_s=0, max_inflight=2),
+        max_retries=1,
+        backoff_base_s=0,
+    )
+    tasks = [engine.make_task([kw], city, domain="zhipin.com") for kw in ["Python", "Java"] for city in ["北京", "上海"]]
+    stats = engine.run(tasks)
+
+    assert stats["succeeded"] == 4
+    assert stats["failed"] == 0
+    assert stats["retries"] == 2
+    assert len(uploaded) == 4
+    assert stats["upload"]["batches"] == 1
+
+
+def test_engine_respects_per_domain_inflight_budget():
+    inflight = {"zhipin.com": 0, "liepin.com": 0}
+    peak = {"zhipin.com": 0, "liepin.com": 0}
+    lock = threading.Lock()
+
+    def _fetch(task):
+        with lock:
+            inflight[task.domain] += 1
+            peak[task.domain] = max(peak[task.domain], inflight[task.domain])
+        threading.Event().wait(0.01)
+        with lock:
+            inflight[task.domain] -= 1
+        return []
+
+    engine = CrawlerEngine(fetch=_fetch, max_workers=6, budget=DomainBudget(min_interval_s=0, max_inflight=1))
+    tasks = [engine.make_task(["Python"], str(i), domain=d) for i in range(5) for d in ["zhipin.com", "liepin.com"]]
+    stats = engine.run(tasks)
+
+    assert stats["succeeded"] == 10
+    assert peak == {"zhipin.com": 1, "liepin.com": 1}
+
+
+def test_engine_gives_up_after_max_retries():
+    def _fetch(task):
+        raise RuntimeError("captcha")
+
+    engine = CrawlerEngine(fetch=_fetch, max_workers=2, budget=DomainBudget(min_interval_s=0), max_retries=2, backoff_base_s=0)
+    stats = engine.run([engine.make_task(["Python"], "北京", domain="zhipin.com")])
+    assert stats["failed"] == 1
+    assert stats["retries"] == 2
+    assert stats["errors"][0]["error"] == "captcha"
+
+
+def test_delta_uploader_only_sends_jobs_the_cloud_needs():
+    manifests, uploads = [], []
+
+    def _post(url, data=None, headers=None, timeout=0):
+        body = gzip.decompress(data)
+        if url.endswith("/api/crawler/manifest"):
+            items = json.loads(body)["items"]
+            manifests.append(items)
+            # Cloud already has job 0 with the same content.
+            return _Resp(200, {"need": [it["key"] for it in items if not it["key"].endswith("/0.html")]})
+        assert headers["Content-Type"] == "application/x-ndjson"
+        rows = [json.loads(line) for line in body.decode("utf-8").splitlines()]
+        uploads.append(rows)
+        return _Resp(200, {"new": len(rows)})
+
+    known = {}
+    up = BatchUploader("https://cloud.example", "k", batch_size=10, delta=True, known_hashes=known, post_fn=_post)
+    up.add([_job(i) for i in range(3)])
+    up.close()
+    assert [r["id"] for r in uploads[0]] == ["openclaw_1", "openclaw_2"]
+    assert len(known) == 3
+
+    # Second cycle with identical postings: nothing hits the network.
+    up2 = BatchUploader("https://cloud.example", "k", batch_size=10, delta=True, known_hashes=known, post_fn=_post)
+    up2.add([_job(i) for i in range(3)])
+    up2.close()
+    assert len(manifests) == 1
+    assert up2.stats["skipped_unchanged"] == 3
+
+
+def test_delta_uploader_falls_back_to_full_upload_on_old_server():
+    uploads = []
+
+    def _post(url, data=None, headers=None, timeout=0):
+        if url.endswith("/api/crawler/manifest"):
+            return _Resp(404, {"detail": "Not Found"})
+        uploads.append(json.loads(gzip.decompress(data))["jobs"])
+        return _Resp(200, {"new": 2})
+
+    up = BatchUploader("https://cloud.example", "k", batch_size=10, delta=True, post_fn=_post)
+    up.add([_job(1), _job(2)])
+    up.close()
+    assert up.delta is False
+    assert len(uploads[0]) == 2
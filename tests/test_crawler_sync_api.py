@@ -0,0 +1,69 @@
+import gzip
+import json
+
+from fastapi.testclient import TestClient
+
+import web_app
+from app.services.crawler_engine import encode_ndjson, job_content_hash, job_sync_key
+
+
+client = TestClient(web_app.app)
+AUTH = {"Authorization": "Bearer test-crawler-key"}
+
+
+def _job(i, salary="20-30K"):
+    return {
+        "id": f"openclaw_{i}",
+        "title": f"Python后端工程师 {i}",
+        "company": "字节跳动",
+        "location": "北京",
+        "salary": salary,
+        "platform": "Boss直聘",
+        "link": f"https://www.zhipin.com/job_detail/sync{i}.html",
+    }
+
+
+def _isolate(monkeypatch):
+    monkeypatch.setattr(web_app, "CRAWLER_API_KEY", "test-crawler-key")
+    monkeypatch.setattr(web_app, "cloud_jobs_cache", [])
+    monkeypatch.setattr(web_app, "cloud_jobs_by_key", {})
+    monkeypatch.setattr(web_app, "cloud_jobs_hashes", {})
+
+
+def test_gzip_ndjson_upload_is_ingested_incrementally(monkeypatch):
+    _isolate(monkeypatch)
+    body = gzip.compress(encode_ndjson([_job(1), _job(2)]))
+    headers = {**AUTH, "Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"}
+    resp = client.post("/api/crawler/upload", content=body, headers=headers)
+    assert resp.status_code == 200
+    assert resp.json()["new"] == 2
+
+    body = gzip.compress(encode_ndjson([_job(1), _job(2, salary="25-40K")]))
+    resp = client.post("/api/crawler/upload", content=body, headers=headers)
+    data = resp.json()
+    assert (data["new"], data["updated"], data["unchanged"], data["total"]) == (0, 1, 1, 2)
+    assert web_app.cloud_jobs_cache[1]["salary"] == "25-40K"
+
+
+def test_manifest_reports_only_missing_or_changed_keys(monkeypatch):
+    _isolate(monkeypatch)
+    client.post("/api/crawler/upload", json={"jobs": [_job(1), _job(2)]}, headers=AUTH)
+
+    changed = _job(2, salary="50K")
+    items = [
+        {"key": job_sync_key(j), "hash": job_content_hash(j)}
+        for j in (_job(1), changed, _job(3))
+    ]
+    resp = client.post(
+        "/api/crawler/manifest",
+        content=gzip.compress(json.dumps({"items": items}).encode("utf-8")),
+        headers={**AUTH, "Content-Type": "application/json", "Content-Encoding": "gzip"},
+    )
+    assert resp.status_code == 200
+    assert resp.json()["need"] == [job_sync_key(changed), job_sync_key(_job(3))]
+
+
+def test_manifest_requires_crawler_key(monkeypatch):
+    _isolate(monkeypatch)
+    resp = client.post("/api/crawler/manifest", json={"items": []})
+    assert resp.status_code == 401
@@ -0,0 +1,88 @@
+import gzip
+import json
+import sqlite3
+from datetime import UTC, datetime, timedelta
+
+from app.services.business_service import BusinessService
+
+
+def _seed_old_events(svc, days_ago, n):
+    created = (datetime.now(UTC) - timedelta(days=days_ago)).isoformat()
+    conn = sqlite3.connect(svc.db_path)
+    conn.executemany(
+        "INSERT INTO events(event_name, payload_json, created_at, ok) VALUES(?, ?, ?, ?)",
+        [("resume_processed", json.dumps({"ok": True, "i": i}), created, 1) for i in range(n)],
+    )
+    conn.commit()
+    conn.close()
+    svc.rebuild_rollups()
+
+
+def test_compaction_archives_old_events_and_keeps_metrics(tmp_path):
+    svc = BusinessService(db_path=str(tmp_path / "app.db"))
+    _seed_old_events(svc, days_ago=90, n=120)
+    svc.track_event("resume_processed", {"ok": True})
+    before = svc.metrics()
+
+    stats = svc.compact_events(retain_days=30, batch_size=50)
+    assert stats["archived"] == 120 and stats["hot_events"] == 1
+    month = next(iter(stats["partitions"]))
+    path = tmp_path / "archive" / "events" / f"events-{month}.jsonl.gz"
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        assert sum(1 for _ in f) == 120
+
+    assert svc.metrics()["funnel"] == before["funnel"]
+    # Rebuilding rollups from the hot table must not drop archived days.
+    svc.rebuild_rollups()
+    assert svc.metrics()["funnel"] == before["funnel"]
+    assert svc.compact_events(retain_days=30)["archived"] == 0
+
+
+def test_iter_events_reads_archive_and_hot_rows(tmp_path):
+    svc = BusinessService(db_path=str(tmp_path / "app.db"))
+    _seed_old_events(svc, days_ago=60, n=3)
+    svc.track_event("job_search", {"q": "python"})
+    svc.compact_events(retain_days=30)
+
+    rows = list(svc.iter_events())
+    assert [r["event_name"] for r in rows] == ["resume_processed"] * 3 + ["job_search"]
+    assert rows[0]["payload"]["i"] == 0 and rows[-1]["payload"] == {"q": "python"}
+    assert [r["event_name"] for r in svc.iter_events(event_name="job_search")] == ["job_search"]
+    recent = (datetime.now(UTC) - timedelta(days=1)).isoformat()
+    assert len(list(svc.iter_events(since=recent))) == 1
+
+
+def test_rollups_survive_compacting_every_event(tmp_path):
+    svc = BusinessService(db_path=str(tmp_path / "app.db"))
+    _seed_old_events(svc, days_ago=90, n=5)
+    before = svc.metrics()["funnel"]
+
+    assert svc.compact_events(retain_days=30)["hot_events"] == 0
+    svc.rebuild_rollups()
+    conn = sqlite3.connect(svc.db_path)
+    total = conn.execute("SELECT SUM(total) FROM event_rollups WHERE event_name = 'resume_processed'").fetchone()[0]
+    conn.close()
+    assert total == 5
+    assert svc.metrics()["funnel"] == before
+
+
+def test_batch_interrupted_before_delete_is_not_read_twice(tmp_path):
+    svc = BusinessService(db_path=str(tmp_path / "app.db"))
+    _seed_old_events(svc, days_ago=60, n=3)
+    month = next(iter(svc.compact_events(retain_days=30)["partitions"]))
+    _seed_old_events(svc, days_ago=60, n=2)
+
+    # A crash after the archive append but before the DELETE commits: the rows are in both places.
+    conn = sqlite3.connect(svc.db_path)
+    pending = conn.execute("SELECT id, event_name, payload_json, created_at FROM events").fetchall()
+    conn.close()
+    path = tmp_path / "archive" / "events" / f"events-{month}.jsonl.gz"
+    with gzip.open(path, "at", encoding="utf-8") as f:
+        for rid, name, payload, created in pending:
+            f.write(json.dumps({"id": rid, "event_name": name, "payload_json": payload, "created_at": created}) + "\n")
+    assert len(list(svc.iter_events())) == 5
+
+    svc.compact_events(retain_days=30)  # re-archives the same two rows
+    rows = list(svc.iter_events())
+    assert [r["payload"]["i"] for r in rows] == [0, 1, 2, 0, 1]
+    assert len({r["id"] for r in rows}) == 5
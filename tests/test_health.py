@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+import web_app
+from app.core.health import SnapshotCache
+
+
+client = TestClient(web_app.app)
+
+
+class _Clock:
+    def __init__(self):
+        self.t = 100.0
+
+    def __call__(self):
+        return self.t
+
+
+def test_snapshot_serves_stale_value_while_refreshing_in_background():
+    clock = _Clock()
+    calls = []
+
+    def _load():
+        calls.append(clock.t)
+        return {"n": len(calls)}
+
+    cache = SnapshotCache("t", _load, ttl_s=10, now_fn=clock)
+    value, meta = cache.get()
+    assert value == {"n": 1} and meta["stale"] is False
+    assert cache.get()[0] == {"n": 1} and len(calls) == 1
+
+    clock.t += 11
+    value, meta = cache.get()
+    assert value == {"n": 1} and meta["stale"] is True
+    deadline = time.time() + 2
+    while cache.meta()["refreshing"] and time.time() < deadline:
+        time.sleep(0.01)
+    assert cache.get()[0] == {"n": 2}
+
+
+def test_snapshot_keeps_last_value_when_refresh_fails():
+    state = {"fail": False}
+
+    def _load():
+        if state["fail"]:
+            raise RuntimeError("db locked")
+        return {"ok": True}
+
+    cache = SnapshotCache("t", _load, ttl_s=0)
+    assert cache.get()[0] == {"ok": True}
+    state["fail"] = True
+    value, meta = cache.refresh()
+    assert value == {"ok": True}
+    assert meta["last_error"] == "db locked"
+
+
+def test_cold_async_get_loads_off_the_event_loop():
+    threads = []
+
+    def _load():
+        threads.append(threading.current_thread())
+        return {"ok": True}
+
+    cache = SnapshotCache("t", _load, ttl_s=10)
+    assert asyncio.run(cache.aget())[0] == {"ok": True}
+    assert threads and threads[0] is not threading.main_thread()
+
+
+def test_health_probes_do_not_rescan_db(monkeypatch):
+    calls = []
+
+    def _load():
+        calls.append(1)
+        return {"business": {"leads": {"total": 3}}, "job_database": {"provider_mode": "baidu"}}
+
+    monkeypatch.setattr(web_app, "health_snapshot", SnapshotCache("health", _load, ttl_s=60))
+    assert client.get("/api/health/live").json()["status"] == "alive"
+    assert calls == []
+    for _ in range(5):
+        body = client.get("/api/health").json()
+    assert len(calls) == 1
+    assert body["business"]["leads_total"] == 3
+    assert body["snapshot"]["stale"] is False
+
+
+def test_deep_check_refreshes_and_honours_admin_token(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        web_app,
+        "health_snapshot",
+        SnapshotCache("health", lambda: calls.append(1) or {"business": {}, "job_database": {}}, ttl_s=60),
+    )
+    monkeypatch.setenv("ADMIN_METRICS_TOKEN", "adm")
+    assert client.get("/api/health/deep").status_code == 403
+    resp = client.get("/api/health/deep", headers={"x-admin-token": "adm"})
+    assert resp.json()["checks"]["database"]["ok"] is True
+    assert len(calls) == 1
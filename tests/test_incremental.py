@@ -0,0 +1,82 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import app.core.market_driven_engine as mde
+from app.core.incremental import StageMemo
+from app.core.shared_state import MemoryState
+
+RESUME = "张三\nPython 后端工程师，5年经验\n技能：Python、FastAPI、Redis、Docker\n项目：订单系统重构，QPS 提升 3 倍\n"
+
+
+class _FakeCompletions:
+    def __init__(self):
+        self.prompts = []
+
+    async def create(self, model, messages, temperature, max_tokens):
+        prompt = messages[-1]["content"]
+        self.prompts.append(prompt)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f"answer #{len(self.prompts)}"))])
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    completions = _FakeCompletions()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(mde, "get_async_llm_client", lambda: client)
+    monkeypatch.setattr(mde, "_stages", StageMemo(MemoryState()))
+    return mde.MarketDrivenPipeline(), completions
+
+
+def test_editing_a_project_line_only_reruns_the_resume_optimizer(pipeline):
+    p, completions = pipeline
+    first = asyncio.run(p.process_resume(RESUME))
+    assert sorted(first["stage_trace"]["recomputed"]) == ["interview_prep", "market_advice", "resume_optimizer"]
+    assert len(completions.prompts) == 3
+
+    edited = RESUME.replace("QPS 提升 3 倍", "QPS 提升 5 倍，P99 降至 80ms")
+    second = asyncio.run(p.process_resume(edited))
+    assert second["stage_trace"] == {"reused": ["market_advice", "interview_prep"], "recomputed": ["resume_optimizer"]}
+    assert len(completions.prompts) == 4 and "P99 降至 80ms" in completions.prompts[-1]
+    assert second["interview_prep"] == first["interview_prep"]
+    assert second["optimized_resume"] != first["optimized_resume"]
+
+
+def test_new_skill_reruns_dependent_stages(pipeline):
+    p, completions = pipeline
+    asyncio.run(p.process_resume(RESUME))
+    second = asyncio.run(p.process_resume(RESUME.replace("Docker", "Docker、Kubernetes")))
+    assert {"market_advice", "resume_optimizer"} <= set(second["stage_trace"]["recomputed"])
+
+
+def test_failed_stage_is_not_stored():
+    memo = StageMemo(MemoryState())
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise TimeoutError("LLM timeout")
+        return "ok"
+
+    async def main():
+        with pytest.raises(TimeoutError):
+            await memo.run("market_advice", {"skills": ["Python"]}, flaky)
+        assert await memo.run("market_advice", {"skills": ["Python"]}, flaky) == "ok"
+        assert await memo.run("market_advice", {"skills": ["Python"]}, flaky) == "ok"
+
+    asyncio.run(main())
+    assert len(calls) == 2 and memo.stats()["reused"] == 1
+
+
+def test_refresh_recomputes_every_stage_and_overwrites(pipeline):
+    p, completions = pipeline
+    first = asyncio.run(p.process_resume(RESUME))
+    refreshed = asyncio.run(p.process_resume(RESUME, refresh=True))
+    assert refreshed["stage_trace"]["reused"] == [] and len(completions.prompts) == 6
+    assert refreshed["optimized_resume"] != first["optimized_resume"]
+
+    again = asyncio.run(p.process_resume(RESUME))
+    assert len(again["stage_trace"]["reused"]) == 3
+    assert again["optimized_resume"] == refreshed["optimized_resume"]
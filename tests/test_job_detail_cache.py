@@ -0,0 +1,45 @@
+from app.core.shared_state import SQLiteState
+from app.services.job_providers.detail_cache import JobDetailCache
+
+
+def _job(i, pad=0):
+    return {"id": f"baidu_{i}", "title": "Python" + "x" * pad}
+
+
+def test_lru_evicts_least_recently_used_by_count():
+    cache = JobDetailCache(max_items=3)
+    view = cache.view("baidu")
+    view.update({f"baidu_{i}": _job(i) for i in range(3)})
+    assert view.get("baidu_0")["id"] == "baidu_0"  # touch -> most recent
+    view["baidu_3"] = _job(3)
+    assert "baidu_1" not in view
+    assert "baidu_0" in view and "baidu_3" in view
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_budget_ttl_and_provider_prefix():
+    now = [0.0]
+    cache = JobDetailCache(max_items=100, max_bytes=600, ttl_s=10, now_fn=lambda: now[0])
+    for i in range(5):
+        cache.put("bing", f"id{i}", _job(i, pad=200))
+    stats = cache.stats()
+    assert stats["bytes"] <= 600 and stats["items"] < 5
+
+    cache.put("jooble", "id4", {"id": "id4", "title": "other"})
+    assert cache.get("bing", "id4")["title"].startswith("Python")
+    assert cache.get("jooble", "id4")["title"] == "other"
+
+    now[0] = 11.0
+    assert cache.get("bing", "id4") is None
+    stats = cache.stats()
+    assert stats["expired"] == 1 and stats["hits"] == 2 and stats["misses"] == 1
+    assert stats["hit_rate"] == round(2 / 3, 4)
+
+
+def test_shared_backend_serves_other_workers(tmp_path):
+    path = str(tmp_path / "shared.db")
+    a = JobDetailCache(state=SQLiteState(path))
+    b = JobDetailCache(state=SQLiteState(path))
+    a.view("brave")["brave_1"] = {"id": "brave_1", "title": "Go"}
+    assert b.view("brave").get("brave_1") == {"id": "brave_1", "title": "Go"}
+    assert b.stats()["items"] == 1
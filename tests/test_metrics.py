@@ -0,0 +1,69 @@
+import threading
+
+from fastapi.testclient import TestClient
+
+import web_app
+from app.core.performance import LatencyHistogram, MetricsRegistry, _sql_op
+
+
+client = TestClient(web_app.app)
+
+
+def test_histogram_percentiles_reflect_tail_latency():
+    h = LatencyHistogram()
+    for _ in range(98):
+        h.observe(0.02)
+    h.observe(4.0)
+    h.observe(4.0)
+    snap = h.snapshot()
+    assert snap["count"] == 100
+    assert snap["p50"] <= 0.025
+    assert snap["p99"] > 2.5
+
+
+def test_histogram_merges_per_thread_shards():
+    h = LatencyHistogram()
+
+    def _work():
+        for _ in range(500):
+            h.observe(0.1)
+
+    threads = [threading.Thread(target=_work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert h.snapshot()["count"] == 2000
+
+
+def test_prometheus_rendering_is_cumulative():
+    reg = MetricsRegistry()
+    reg.observe("x_seconds", 0.003, route="/a")
+    reg.observe("x_seconds", 0.2, route="/a")
+    reg.inc("hits_total", cache="c", result="hit")
+    text = reg.render_prometheus()
+    assert '# TYPE x_seconds histogram' in text
+    assert 'x_seconds_bucket{route="/a",le="0.005"} 1' in text
+    assert 'x_seconds_bucket{route="/a",le="+Inf"} 2' in text
+    assert 'hits_total{cache="c",result="hit"} 1' in text
+
+
+def test_sql_op_labels_have_low_cardinality():
+    assert _sql_op("SELECT COUNT(*) FROM events WHERE event_name='x'") == "SELECT events"
+    assert _sql_op("INSERT INTO leads(email) VALUES(?)") == "INSERT leads"
+    assert _sql_op("CREATE TABLE IF NOT EXISTS t (id INTEGER)") == "DDL"
+
+
+def test_metrics_endpoint_exposes_route_histograms(monkeypatch):
+    monkeypatch.delenv("METRICS_TOKEN", raising=False)
+    client.get("/api/ping")
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/api/ping",status="200"' in resp.text
+
+
+def test_metrics_endpoint_honours_token(monkeypatch):
+    monkeypatch.setenv("METRICS_TOKEN", "s3cret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
@@ -1,6 +1,17 @@
+import pytest
+
+from app.services import real_job_service
+from app.services.application_record_service import ApplicationRecordService
 from app.services.real_job_service import RealJobService
 
 
+@pytest.fixture(autouse=True)
+def _records_in_tmp(tmp_path, monkeypatch):
+    # RealJobService() creates its application log; keep it out of the repo's data/.
+    path = str(tmp_path / "applications.json")
+    monkeypatch.setattr(real_job_service, "ApplicationRecordService", lambda: ApplicationRecordService(path))
+
+
 def test_local_dataset_not_used_by_default(monkeypatch):
     monkeypatch.setenv("JOB_DATA_PROVIDER", "auto")
     monkeypatch.delenv("ALLOW_LOCAL_JOB_FALLBACK", raising=False)
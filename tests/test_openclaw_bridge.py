@@ -0,0 +1,110 @@
+import sys
+import textwrap
+import threading
+import time
+
+import pytest
+
+from app.services.job_providers import openclaw_bridge
+from app.services.job_providers.base import JobSearchParams
+from app.services.job_providers.openclaw_browser_provider import OpenClawBrowserProvider, _extract_json
+
+FAKE_CONTROLLER = textwrap.dedent(
+    """
+    import json, os, sys, threading, time
+
+    with open(os.environ["FAKE_OC_LOG"], "a") as f:
+        f.write("start\\n")
+    out_lock = threading.Lock()
+    pages = {}
+
+    def handle(req):
+        p = req.get("params") or {}
+        tab = p.get("tab", "main")
+        m = req["method"]
+        if m == "tab.open":
+            result = {"tab": "t%d" % req["id"]}
+        elif m == "navigate":
+            pages[tab] = p["url"]
+            result = {"ok": True}
+        elif m == "wait":
+            time.sleep(0.3 if "load" in p else 0.0)
+            result = {"ok": True}
+        elif m == "evaluate" and p["fn"] == "(() => 1)":
+            result = 1
+        elif m == "evaluate":
+            host = pages.get(tab, "").split("/")[2]
+            result = [{"href": "https://%s/job_detail/%d.html" % (host, i), "text": "Python 工程师 %d" % i} for i in range(5)]
+        else:
+            result = {"ok": True}
+        with out_lock:
+            print("[plugin] log noise")
+            print(json.dumps({"id": req["id"], "result": result}), flush=True)
+
+    for line in sys.stdin:
+        threading.Thread(target=handle, args=(json.loads(line),), daemon=True).start()
+    """
+)
+
+
+@pytest.fixture
+def fake_bridge(tmp_path, monkeypatch):
+    script = tmp_path / "fake_openclaw.py"
+    script.write_text(FAKE_CONTROLLER, encoding="utf-8")
+    log = tmp_path / "starts.log"
+    monkeypatch.setenv("FAKE_OC_LOG", str(log))
+    monkeypatch.setenv("OPENCLAW_BRIDGE_CMD", f'"{sys.executable}" "{script}"')
+    monkeypatch.setenv("OPENCLAW_JOB_SITES", "boss,liepin,zhaopin")
+    yield log
+    openclaw_bridge.close_bridges()
+
+
+def test_extract_json_skips_plugin_noise():
+    assert _extract_json('\x1b[33mwarn\x1b[0m {not json}\n{"result": [1, 2]}\n') == {"result": [1, 2]}
+    assert _extract_json('[{"a": 1}]') == [{"a": 1}]
+
+
+def test_bridge_runs_sites_in_parallel_tabs_over_one_process(fake_bridge):
+    provider = OpenClawBrowserProvider(browser_profile="test")
+    t0 = time.perf_counter()
+    jobs = provider.search_jobs(JobSearchParams(keywords=["Python"], limit=30))
+    elapsed = time.perf_counter() - t0
+
+    assert {j["platform"] for j in jobs} == {"Boss直聘", "猎聘", "智联招聘"}
+    # Three sites each block 0.3s on `wait --load`; sequential would be >= 0.9s.
+    assert elapsed < 0.8
+    assert provider.get_job_detail(jobs[0]["id"])["link"] == jobs[0]["link"]
+
+    provider.search_jobs(JobSearchParams(keywords=["Java"], limit=30))
+    assert fake_bridge.read_text().splitlines() == ["start"]
+
+
+def test_bridge_caches_attachment_probe(fake_bridge):
+    bridge = openclaw_bridge.get_bridge("test")
+    calls = []
+    real_call = bridge.call
+    bridge.call = lambda method, params=None, timeout_s=60.0: calls.append(method) or real_call(method, params, timeout_s)
+    bridge.ensure_attached()
+    bridge.ensure_attached()
+    assert calls == ["evaluate"]
+    bridge.invalidate_attachment()
+    bridge.ensure_attached()
+    assert calls == ["evaluate", "evaluate"]
+
+
+def test_dead_process_only_fails_its_own_requests(fake_bridge):
+    bridge = openclaw_bridge.get_bridge("test")
+    bridge.ensure_attached()
+    old = bridge._proc
+    old.kill()
+    old.wait()
+    time.sleep(0.1)  # let the old reader thread see EOF
+
+    results = []
+    worker = threading.Thread(target=lambda: results.append(bridge.call("wait", {"load": "load"})))
+    worker.start()
+    time.sleep(0.1)
+    assert bridge._proc is not old and bridge._pending.get(bridge._proc)
+    bridge._read_loop(old)  # a late EOF from the dead process must not touch the new one's futures
+    worker.join(5)
+    assert results == [{"ok": True}]
@@ -0,0 +1,50 @@
+from app.core.pipeline_cache import PipelineResultCache, resume_fingerprint
+from app.core.shared_state import MemoryState
+
+RESUME = "张三\r\nPython 后端工程师\n\n\n\n技能：Python，FastAPI   Redis\n"
+
+
+def test_fingerprint_ignores_whitespace_and_width_but_not_content():
+    assert resume_fingerprint(RESUME) == resume_fingerprint("  张三\nPython\u3000后端工程师\n\n技能：Python,FastAPI Redis")
+    assert resume_fingerprint(RESUME) != resume_fingerprint(RESUME.replace("Redis", "MySQL"))
+    assert resume_fingerprint(RESUME) != resume_fingerprint(RESUME.replace("Python 后端", "python 后端"))
+
+
+def test_lookup_hit_miss_refresh_and_version_change():
+    now = [1000.0]
+    version = ["process_response.v2|market_prompts.v1|deepseek-chat"]
+    cache = PipelineResultCache(MemoryState(), lambda: version[0], ttl_s=60, now_fn=lambda: now[0])
+
+    assert cache.lookup(RESUME) == (None, {"status": "MISS", "age_s": 0})
+    cache.store_result(RESUME, {"career_analysis": "ok"})
+    now[0] += 30
+    payload, meta = cache.lookup(RESUME + "\n\n")
+    assert payload == {"career_analysis": "ok"} and meta == {"status": "HIT", "age_s": 30}
+    assert cache.lookup(RESUME, refresh=True)[1]["status"] == "REFRESH"
+
+    version[0] = "process_response.v2|market_prompts.v2|deepseek-chat"  # prompt changed
+    assert cache.lookup(RESUME)[0] is None
+    stats = cache.stats()
+    assert (stats["hit"], stats["miss"], stats["refresh"], stats["stored"]) == (1, 2, 1, 1)
+    assert stats["hit_ratio"] == 0.333
+
+
+def test_bounded_and_disabled():
+    store = MemoryState()
+    cache = PipelineResultCache(store, lambda: "v1", max_entries=2)
+    for i in range(3):
+        cache.store_result(f"resume {i}", {"i": i})
+    assert store.count("pipeline_results") == 2 and cache.lookup("resume 0")[0] is None
+
+    off = PipelineResultCache(store, lambda: "v1", enabled=False)
+    off.store_result("resume 9", {"i": 9})
+    assert off.lookup("resume 9") == (None, {"status": "BYPASS", "age_s": 0})
+
+
+def test_store_read_failure_is_a_miss():
+    class BrokenStore(MemoryState):
+        def get(self, ns, key):
+            raise ConnectionError("redis down")
+
+    cache = PipelineResultCache(BrokenStore(), lambda: "v1")
+    assert cache.lookup(RESUME) == (None, {"status": "MISS", "age_s": 0})
@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+
+from app.core.admission import FREE, AdmissionController, AdmissionRejected
+from app.core.process_jobs import ProcessJobRunner
+from app.core.shared_state import MemoryState, SQLiteState
+
+
+def _runner(execute, store=None, **admission):
+    bus = MemoryState()
+    return ProcessJobRunner(execute, AdmissionController(**admission), bus=bus, store=store or bus, ttl_s=60)
+
+
+def test_submit_returns_immediately_and_events_stream_to_done():
+    gate = asyncio.Event()
+
+    async def execute(resume_text, progress):
+        await progress(1, "分析市场匹配度...", "市场分析引擎")
+        await gate.wait()
+        await progress(3, "优化简历...", "简历优化引擎")
+        return {"career_analysis": resume_text.upper()}
+
+    runner = _runner(execute)
+
+    async def main():
+        job = await runner.submit("python resume", lane=FREE)
+        assert job["status"] == "queued"
+        events = []
+
+        async def consume():
+            async for event in runner.events(job["job_id"]):
+                events.append(event)
+
+        consumer = asyncio.ensure_future(consume())
+        await asyncio.sleep(0.01)
+        assert runner.get(job["job_id"])["status"] == "running"
+        gate.set()
+        await asyncio.wait_for(consumer, 2)
+        return job["job_id"], events
+
+    job_id, events = asyncio.run(main())
+    kinds = [e["event"] for e in events]
+    assert kinds[0] == "snapshot" and kinds[-1] == "done"
+    assert "progress" in kinds
+    done = events[-1]["job"]
+    assert done["status"] == "succeeded" and done["result"] == {"career_analysis": "PYTHON RESUME"}
+    assert runner.get(job_id)["progress"]["percentage"] == 100
+
+
+def test_failed_job_is_recorded_and_persisted(tmp_path):
+    async def execute(resume_text, progress):
+        raise RuntimeError("LLM timeout")
+
+    path = str(tmp_path / "jobs.db")
+    runner = _runner(execute, store=SQLiteState(path))
+
+    async def main():
+        job = await runner.submit("resume")
+        await asyncio.sleep(0.05)
+        return job["job_id"]
+
+    job_id = asyncio.run(main())
+    again = _runner(execute, store=SQLiteState(path))  # e.g. after a restart / on another worker
+    record = again.get(job_id)
+    assert record["status"] == "failed" and "LLM timeout" in record["error"]
+
+
+def test_submit_rejected_when_queue_is_full():
+    gate = asyncio.Event()
+
+    async def execute(resume_text, progress):
+        await gate.wait()
+        return {}
+
+    runner = _runner(execute, max_concurrent=1, max_queue=1, deadline_s=1000)
+
+    async def main():
+        running = await runner.submit("a")
+        await asyncio.sleep(0)
+        queued = await runner.submit("b")
+        await asyncio.sleep(0.01)
+        assert runner.get(queued["job_id"])["queue"]["position"] == 1
+        with pytest.raises(AdmissionRejected):
+            await runner.submit("c")
+        gate.set()
+        await asyncio.sleep(0.01)
+        return running["job_id"], queued["job_id"]
+
+    first, second = asyncio.run(main())
+    assert runner.get(first)["status"] == runner.get(second)["status"] == "succeeded"
+
+
+def test_cached_result_is_recorded_without_queueing():
+    async def execute(resume_text, progress):
+        raise AssertionError("pipeline must not run for a cached answer")
+
+    runner = _runner(execute, max_concurrent=1, max_queue=0)
+
+    async def main():
+        return await runner.submit("resume", result={"career_analysis": "cached"})
+
+    job = asyncio.run(main())
+    stored = runner.get(job["job_id"])
+    assert stored["status"] == "succeeded" and stored["result"] == {"career_analysis": "cached"}
+    assert stored["progress"]["percentage"] == 100
+
+
+def test_job_left_running_by_a_dead_worker_is_reported_interrupted(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    store = SQLiteState(path)
+    # A record written by a worker that died mid-run: it will never heartbeat again.
+    store.set("process_jobs", "orphan", {"job_id": "orphan", "status": "running", "lane": FREE, "updated_at": 1.0, "heartbeat_at": 1.0})
+
+    async def execute(resume_text, progress):
+        return {}
+
+    runner = _runner(execute, store=SQLiteState(path))
+    record = runner.get("orphan")
+    assert record["status"] == "failed" and record["error"] == "interrupted"
+    assert SQLiteState(path).get("process_jobs", "orphan")["status"] == "failed"
+
+
+def test_owner_heartbeat_keeps_a_long_job_alive():
+    gate = asyncio.Event()
+
+    async def execute(resume_text, progress):
+        await gate.wait()
+        return {"ok": True}
+
+    bus = MemoryState()
+    runner = ProcessJobRunner(execute, AdmissionController(), bus=bus, store=bus, ttl_s=60, heartbeat_s=0.01)
+    observer = ProcessJobRunner(execute, AdmissionController(), bus=bus, store=bus, ttl_s=60, heartbeat_s=0.01)
+
+    async def main():
+        job = await runner.submit("resume")
+        await asyncio.sleep(0.1)  # far past 4 heartbeats without any progress event
+        assert observer.get(job["job_id"])["status"] == "running"
+        gate.set()
+        await asyncio.sleep(0.05)
+        return job["job_id"]
+
+    job_id = asyncio.run(main())
+    assert observer.get(job_id)["status"] == "succeeded"
@@ -0,0 +1,163 @@
+import pytest
+
+from app.services import real_job_service
+from app.services.application_record_service import ApplicationRecordService
+from app.services.job_providers.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    ProviderBlocked,
+    ProviderHealth,
+    ProviderUnavailable,
+    _breaker_from_env,
+    check_response,
+)
+from app.services.real_job_service import RealJobService
+
+
+@pytest.fixture(autouse=True)
+def _records_in_tmp(tmp_path, monkeypatch):
+    # RealJobService() creates its application log; keep it out of the repo's data/.
+    path = str(tmp_path / "applications.json")
+    monkeypatch.setattr(real_job_service, "ApplicationRecordService", lambda: ApplicationRecordService(path))
+
+
+class _Resp:
+    def __init__(self, status_code=200, url="https://html.duckduckgo.com/html/", text="", headers=None):
+        self.status_code = status_code
+        self.url = url
+        self.text = text
+        self.headers = headers or {}
+
+
+def test_breaker_opens_after_failures_and_recovers_via_half_open_probe():
+    now = [0.0]
+    b = CircuitBreaker("bing_html", failures=2, open_s=10, now_fn=lambda: now[0])
+    b.record_failure(TimeoutError("read timed out"))
+    assert b.state == CLOSED and b.snapshot()["last_error_kind"] == "timeout"
+    b.record_failure(RuntimeError("HTTP 502"))
+    assert b.state == OPEN and b.score() == 0.0 and not b.allow()
+
+    now[0] = 11
+    assert b.allow() and b.state == HALF_OPEN
+    assert not b.allow()  # one probe at a time
+    b.record_failure(RuntimeError("boom"))
+    assert b.state == OPEN and b.snapshot()["retry_in_s"] == 20  # cooldown doubled
+
+    now[0] = 32
+    assert b.allow()
+    b.record_success(0.2)
+    assert b.state == CLOSED and b.allow()
+
+
+def test_captcha_and_rate_limit_open_immediately():
+    now = [0.0]
+    b = CircuitBreaker("baidu", failures=5, open_s=10, captcha_open_s=600, now_fn=lambda: now[0])
+    with pytest.raises(ProviderBlocked):
+        check_response(_Resp(url="https://wappass.baidu.com/static/captcha/tuxing.html"), "baidu")
+    b.record_failure(ProviderBlocked("captcha"))
+    assert b.state == OPEN and b.snapshot()["retry_in_s"] == 600
+
+    r = CircuitBreaker("duckduckgo", failures=5, now_fn=lambda: now[0])
+    try:
+        check_response(_Resp(status_code=429, headers={"Retry-After": "42"}), "duckduckgo")
+    except Exception as e:
+        r.record_failure(e)
+    assert r.state == OPEN and r.snapshot()["retry_in_s"] == 42
+
+    check_response(_Resp(text="<li class='b_algo'>安全验证工程师</li>"), "bing_html")  # a job title, not a captcha
+
+
+def test_health_orders_chain_and_skips_open_providers():
+    health = ProviderHealth(lambda name: CircuitBreaker(name, failures=1, open_s=60))
+    assert health.order(["enterprise_api", "bing_html", "duckduckgo"]) == ["enterprise_api", "bing_html", "duckduckgo"]
+
+    calls = []
+
+    @health.protect("bing_html")
+    def search():
+        calls.append(1)
+        raise ProviderBlocked("anti-bot page")
+
+    assert search() == [] and search() == []
+    assert len(calls) == 1  # second call skipped while open
+    assert health.order(["enterprise_api", "bing_html", "duckduckgo"]) == ["enterprise_api", "duckduckgo", "bing_html"]
+    with pytest.raises(ProviderUnavailable):
+        health.call("bing_html", lambda: [])
+    assert health.snapshot()["bing_html"]["skipped"] == 2
+
+
+def test_real_job_service_falls_through_to_next_healthy_provider(monkeypatch):
+    monkeypatch.setenv("JOB_DATA_PROVIDER", "auto")
+    service = RealJobService()
+    service.health = ProviderHealth(lambda name: CircuitBreaker(name, failures=1, open_s=60))
+    service.jooble.api_key = "k"
+    service.brave.api_key = "k"
+    service.bing.api_key = ""
+    calls = []
+
+    def jooble_search(params):
+        calls.append("jooble")
+        raise RuntimeError("Jooble API 返回异常: HTTP 503")
+
+    def brave_search(params):
+        calls.append("brave")
+        return [{"id": "brave_1", "title": "Python"}]
+
+    monkeypatch.setattr(service.jooble, "search_jobs", jooble_search)
+    monkeypatch.setattr(service.brave, "search_jobs", brave_search)
+
+    assert service.search_jobs(keywords=["Python"], limit=5) == [{"id": "brave_1", "title": "Python"}]
+    assert service.search_jobs(keywords=["Go"], limit=5)[0]["id"] == "brave_1"
+    assert calls == ["jooble", "brave", "brave"]  # jooble's breaker is open: no second request
+    assert service.provider_chain() == ["brave", "jooble"]
+
+
+def test_slow_threshold_is_per_provider(monkeypatch):
+    monkeypatch.delenv("PROVIDER_BREAKER_SLOW_S_OPENCLAW", raising=False)
+    openclaw = _breaker_from_env("openclaw")
+    for _ in range(5):
+        openclaw.record_success(30.0)  # a normal multi-site browser search
+    assert openclaw.state == CLOSED
+
+    monkeypatch.setenv("PROVIDER_BREAKER_SLOW_S_BING_HTML", "0")
+    bing = _breaker_from_env("bing_html")
+    for _ in range(5):
+        bing.record_success(30.0)
+    assert bing.state == CLOSED and bing.score() == 1.0
+
+    ddg = _breaker_from_env("duckduckgo")  # global default (8s) still applies
+    for _ in range(3):
+        ddg.record_success(30.0)
+    assert ddg.state == OPEN
+
+
+def test_healthy_primary_keeps_its_place_after_successful_calls():
+    health = ProviderHealth(lambda name: CircuitBreaker(name, failures=3, slow_s=8))
+    chain = ["jooble", "brave", "bing"]
+    assert health.order(chain) == chain
+    for latency in (1.0, 2.5, 0.4, 6.0):
+        health.breaker("jooble").record_success(latency)
+    health.breaker("brave").record_success(0.1)
+    assert health.order(chain) == chain
+
+    # Two failures in a row (breaker still closed) drop the success EWMA below 0.5: demoted.
+    health.breaker("jooble").record_failure(RuntimeError("HTTP 502"))
+    health.breaker("jooble").record_failure(RuntimeError("HTTP 502"))
+    assert health.breaker("jooble").state == CLOSED
+    assert health.order(chain) == ["brave", "bing", "jooble"]
+
+
+def test_empty_answer_from_a_healthy_provider_does_not_fall_through(monkeypatch):
+    monkeypatch.setenv("JOB_DATA_PROVIDER", "auto")
+    service = RealJobService()
+    service.health = ProviderHealth(lambda name: CircuitBreaker(name, failures=1, open_s=60))
+    service.jooble.api_key = "k"
+    service.brave.api_key = "k"
+    calls = []
+    monkeypatch.setattr(service.jooble, "search_jobs", lambda params: calls.append("jooble") or [])
+    monkeypatch.setattr(service.brave, "search_jobs", lambda params: calls.append("brave") or [{"id": "b"}])
+
+    assert service.search_jobs(keywords=["COBOL"], limit=5) == []
+    assert calls == ["jooble"]
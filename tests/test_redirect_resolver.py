@@ -0,0 +1,93 @@
+import base64
+import threading
+import time
+
+from app.services.job_providers.redirect_resolver import RedirectResolver, unwrap_redirect
+
+
+class _Resp:
+    def __init__(self, url, status_code=200):
+        self.url = url
+        self.status_code = status_code
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class _FakeSession:
+    """HEAD follows `/link?url=<target>`; `head_blocked` URLs answer 405 and need a streamed GET."""
+
+    def __init__(self, head_blocked=()):
+        self.calls = []
+        self.head_blocked = set(head_blocked)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _target(self, url):
+        return url.split("url=", 1)[1] if "url=" in url else url
+
+    def head(self, url, allow_redirects=True, timeout=None):
+        with self._lock:
+            self.calls.append(("HEAD", url))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.05)
+        with self._lock:
+            self.in_flight -= 1
+        if url in self.head_blocked:
+            return _Resp(url, 405)
+        return _Resp(self._target(url))
+
+    def get(self, url, allow_redirects=True, timeout=None, stream=False):
+        assert stream, "body must not be downloaded"
+        self.calls.append(("GET", url))
+        return _Resp(self._target(url))
+
+
+def test_unwrap_known_redirectors_without_requests():
+    ddg = "//duckduckgo.com/l/?uddg=https%3A%2F%2Fwww.zhipin.com%2Fjob_detail%2F1.html&amp;rut=x"
+    assert unwrap_redirect(ddg) == "https://www.zhipin.com/job_detail/1.html"
+    assert unwrap_redirect("/l/?rut=x") == ""
+    target = "https://www.liepin.com/job/123.shtml"
+    u = "a1" + base64.urlsafe_b64encode(target.encode()).decode().rstrip("=")
+    assert unwrap_redirect(f"https://www.bing.com/ck/a?!&&p=abc&u={u}&ntb=1") == target
+    assert unwrap_redirect("https://www.zhipin.com/x") == "https://www.zhipin.com/x"
+
+
+def test_resolve_many_is_concurrent_cached_and_skips_job_boards(tmp_path):
+    links = [f"https://www.baidu.com/link?url=https://www.liepin.com/job/{i}.shtml" for i in range(10)]
+    direct = "https://www.zhipin.com/job_detail/9.html"
+    blocked = links[0]
+    session = _FakeSession(head_blocked={blocked})
+    resolver = RedirectResolver(cache_path=str(tmp_path / "r.db"), concurrency=5, session=session)
+
+    t0 = time.perf_counter()
+    finals = resolver.resolve_many(links + [direct, links[1]], skip=lambda u: "zhipin.com" in u)
+    elapsed = time.perf_counter() - t0
+
+    assert finals[links[3]] == "https://www.liepin.com/job/3.shtml"
+    assert finals[blocked] == "https://www.liepin.com/job/0.shtml"
+    assert finals[direct] == direct
+    assert ("GET", blocked) in session.calls
+    assert session.max_in_flight > 1 and elapsed < 0.4  # 10 x 50ms sequential would be >= 0.5s
+    assert len([c for c in session.calls if c[0] == "HEAD"]) == 10
+
+    # Second resolver on the same file: every link is served from the persistent cache.
+    session2 = _FakeSession()
+    again = RedirectResolver(cache_path=str(tmp_path / "r.db"), session=session2).resolve_many(links)
+    assert again == {u: finals[u] for u in links}
+    assert session2.calls == []
+
+
+def test_failed_resolution_falls_back_and_is_not_cached(tmp_path):
+    class _Down(_FakeSession):
+        def head(self, url, allow_redirects=True, timeout=None):
+            raise OSError("boom")
+
+    resolver = RedirectResolver(cache_path=str(tmp_path / "r.db"), session=_Down())
+    url = "https://www.baidu.com/link?url=x"
+    assert resolver.resolve(url) == url
+    assert resolver.stats["errors"] == 1
+    assert resolver.cache.get_many("redirects", [url]) == {}
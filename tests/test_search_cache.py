@@ -0,0 +1,65 @@
+import threading
+
+from app.core.query_cache import SearchResultCache, canonical_city, search_cache_key
+
+
+def test_query_key_normalization():
+    a = search_cache_key([" Python", "后端", "python"], "北京市", 10)
+    b = search_cache_key(["后端", "PYTHON"], "beijing", 10)
+    assert a == b
+    assert search_cache_key(["python"], "全国", 10) == search_cache_key(["python"], "", 10)
+    assert search_cache_key(["python"], "上海", 10) != search_cache_key(["python"], "上海", 20)
+    assert search_cache_key(["python"], "", 10, allow_portal=True) != search_cache_key(["python"], "", 10)
+    assert canonical_city("香港特别行政区") == "香港"
+
+
+def test_hit_stale_while_revalidate_and_provider_ttl():
+    now = [0.0]
+    cache = SearchResultCache(provider_ttls={"baidu": 100}, stale_s=1000, now_fn=lambda: now[0])
+    calls = []
+    refreshed = threading.Event()
+
+    def loader():
+        calls.append(now[0])
+        return {"jobs": [{"id": len(calls)}], "provider_mode": "baidu"}
+
+    def refresh():
+        payload = loader()
+        refreshed.set()
+        return payload
+
+    payload, meta = cache.get_or_load("k", loader)
+    assert meta["status"] == "MISS" and payload["jobs"] == [{"id": 1}]
+    now[0] = 50
+    payload, meta = cache.get_or_load("k", loader)
+    assert meta["status"] == "HIT" and meta["age_s"] == 50 and len(calls) == 1
+
+    now[0] = 150  # past the baidu TTL, inside the stale window
+    payload, meta = cache.get_or_load("k", loader, refresh_loader=refresh)
+    assert meta["status"] == "STALE" and payload["jobs"] == [{"id": 1}]
+    assert refreshed.wait(2)
+    payload, meta = cache.get_or_load("k", loader)
+    assert meta["status"] == "HIT" and payload["jobs"] == [{"id": 2}]
+
+    now[0] = 10_000  # past the stale window: synchronous reload
+    assert cache.get_or_load("k", loader)[1]["status"] == "MISS"
+
+
+def test_negative_results_cached_briefly_and_invalidate_by_prefix():
+    now = [0.0]
+    cache = SearchResultCache(negative_ttl_s=30, now_fn=lambda: now[0])
+    calls = []
+
+    def empty():
+        calls.append(1)
+        return {"jobs": [], "provider_mode": "no_real_jobs"}
+
+    assert cache.get_or_load("cloud:x", empty)[1]["status"] == "MISS"
+    assert cache.get_or_load("cloud:x", empty)[1]["status"] == "NEGATIVE"
+    now[0] = 31
+    assert cache.get_or_load("cloud:x", empty)[1]["status"] == "MISS"
+    assert len(calls) == 2
+
+    cache.get_or_load("live:y", lambda: {"jobs": [1], "provider_mode": "baidu"})
+    assert cache.invalidate("cloud:") == 1
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,90 @@
+import time
+
+import pytest
+
+from app.core.realtime_progress import RealtimeProgressTracker
+from app.core.shared_state import MemoryState, SQLiteState
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def state(request, tmp_path):
+    if request.param == "memory":
+        return MemoryState()
+    return SQLiteState(str(tmp_path / "shared.db"), poll_s=0.02)
+
+
+def test_kv_ttl_trim_and_incr(state):
+    state.set_many("ns", {"a": {"v": 1}, "b": {"v": 2}})
+    state.set("ns", "c", {"v": 3}, ttl_s=0.05)
+    assert state.get("ns", "a") == {"v": 1}
+    assert state.count("ns") == 3
+    time.sleep(0.08)
+    assert state.get("ns", "c", "gone") == "gone"
+
+    state.set("ns", "d", {"v": 4})
+    assert state.trim("ns", 2) >= 1
+    assert [k for k, _ in state.items("ns")] == ["b", "d"]
+
+    assert state.incr("ctr", "n") == 1
+    assert state.incr("ctr", "n", 4) == 5
+
+
+def test_shared_map_behaves_like_a_dict(state):
+    m = state.mapping("tasks")
+    m["t1"] = {"status": "running", "progress": {"done": 0}}
+    task = m["t1"]
+    task["progress"]["done"] = 3
+    m["t1"] = task
+    assert "t1" in m and "t2" not in m and len(m) == 1
+    assert m.get("t1")["progress"]["done"] == 3
+    m.update({"t2": {"status": "done"}})
+    assert [t["status"] for t in m.values()] == ["running", "done"]
+    del m["t1"]
+    with pytest.raises(KeyError):
+        m["t1"]
+
+
+def test_sqlite_state_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "shared.db")
+    a, b = SQLiteState(path, poll_s=0.02), SQLiteState(path, poll_s=0.02)
+    a.mapping("recent").update({"j1": {"title": "Python"}})
+    assert b.mapping("recent")["j1"]["title"] == "Python"
+
+    got = []
+    b.subscribe("progress", got.append)
+    a.publish("progress", {"origin": "a", "data": {"step": 2}})
+    deadline = time.time() + 2
+    while not got and time.time() < deadline:
+        time.sleep(0.02)
+    assert got == [{"origin": "a", "data": {"step": 2}}]
+
+
+def test_progress_tracker_relays_between_workers(tmp_path):
+    import asyncio
+
+    path = str(tmp_path / "shared.db")
+    w1, w2 = RealtimeProgressTracker(), RealtimeProgressTracker()
+
+    class _Socket:
+        def __init__(self):
+            self.sent = []
+
+        async def send_text(self, text):
+            self.sent.append(text)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        w1.attach(SQLiteState(path, poll_s=0.02), loop, origin="w1")
+        w2.attach(SQLiteState(path, poll_s=0.02), loop, origin="w2")
+        sock = _Socket()
+        w2.connections.append(sock)
+        await w1.update_progress(2, "parsing", "analyst")
+        for _ in range(100):
+            if sock.sent:
+                break
+            await asyncio.sleep(0.02)
+        return sock
+
+    sock = asyncio.run(run())
+    assert len(sock.sent) == 1 and "parsing" in sock.sent[0]
+    assert w2.current_progress["step"] == 2
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core.single_flight import SingleFlight, ThreadSingleFlight, content_key
+
+
+def test_content_key_ignores_dict_order():
+    a = content_key("m", [{"role": "user", "content": "hi"}], 0.7)
+    b = content_key("m", [{"content": "hi", "role": "user"}], 0.7)
+    assert a == b
+    assert a != content_key("m", [{"role": "user", "content": "hi"}], 0.2)
+
+
+def test_async_callers_share_one_call_and_errors():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def boom():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("nope")
+
+    async def main():
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+        assert results == ["answer"] * 5 and len(calls) == 1
+        assert flight.inflight() == 0
+
+        # Once finished, the next call runs again (no caching).
+        assert await flight.do("k", work) == "answer" and len(calls) == 2
+
+        errors = await asyncio.gather(*(flight.do("e", boom) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(e, ValueError) for e in errors) and len(calls) == 3
+
+    asyncio.run(main())
+
+
+def test_cancelled_leader_does_not_cancel_waiters():
+    flight = SingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return 42
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await follower == 42
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+    asyncio.run(main())
+
+
+def test_threads_coalesce_blocking_calls():
+    flight = ThreadSingleFlight("test")
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(2)
+        return ["job"]
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("k", work)))
+    leader.start()
+    assert started.wait(2)
+    followers = [threading.Thread(target=lambda: results.append(flight.do("k", work))) for _ in range(4)]
+    for t in followers:
+        t.start()
+    time.sleep(0.1)  # let the followers block on the leader's future
+    release.set()
+    for t in [leader, *followers]:
+        t.join(2)
+    assert len(calls) == 1 and results == [["job"]] * 5
+    assert flight.inflight() == 0
@@ -0,0 +1,62 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from app.core.startup import LazyService, StartupReport
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+class _Svc:
+    built = 0
+
+    def __init__(self):
+        _Svc.built += 1
+        self.value = 1
+
+    def ping(self):
+        return "pong"
+
+
+def test_lazy_service_builds_once_on_first_use():
+    report = StartupReport()
+    _Svc.built = 0
+    svc = LazyService(_Svc, "svc", report=report)
+    assert not svc.built and _Svc.built == 0
+
+    assert svc.ping() == "pong"
+    svc.value = 5
+    assert svc.value == 5 and _Svc.built == 1
+    assert [row["service"] for row in report.snapshot()["lazy_services"]] == ["svc"]
+
+
+def test_startup_report_phases():
+    report = StartupReport()
+    report.mark("imports")
+    report.ready()
+    snap = report.snapshot()
+    assert [p["phase"] for p in snap["phases"]] == ["imports", "app_startup"]
+    assert snap["ready_ms"] >= snap["import_ms"]
+
+
+def test_importing_web_app_defers_heavy_work(tmp_path):
+    probe = (
+        "import json, sys, web_app\n"
+        "print(json.dumps({\n"
+        "  'built': [n for n in ('pipeline', 'real_job_service', 'business_service', 'market_engine')"
+        " if getattr(web_app, n).built],\n"
+        "  'heavy_modules': [m for m in ('openai', 'PyPDF2', 'docx', 'pytesseract', 'playwright') if m in sys.modules],\n"
+        "  'phases': [p['phase'] for p in web_app.startup_report.snapshot()['phases']],\n"
+        "}))\n"
+    )
+    env = {**os.environ, "APP_DATA_DB_PATH": str(tmp_path / "app.db")}
+    out = subprocess.run(
+        [sys.executable, "-c", probe], cwd=str(ROOT), env=env, capture_output=True, text=True, check=True
+    )
+    data = json.loads(out.stdout.strip().splitlines()[-1])
+    assert data["built"] == []
+    assert data["heavy_modules"] == []
+    assert data["phases"] == ["framework_imports", "app_imports", "module_body"]
@@ -3,34 +3,59 @@ AI求职助手 - Web界面
 一个漂亮的网页界面，让您直接在浏览器中使用
 """
 
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.core.startup import LazyService, startup_report
+
 from fastapi import FastAPI, Request, UploadFile, File, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
+from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-import uvicorn
-import os
-import sys
 from typing import Optional, List, Dict, Any, Tuple
 import asyncio
 from datetime import datetime
-from urllib.parse import quote_plus, urlparse, parse_qs, unquote
+from urllib.parse import quote_plus, urlparse
 import re
 import html as html_lib
 import requests
 import logging
-import time
+import gzip
+import hashlib
+import io
+import json
+import zlib
 import uuid
+import threading
 
-sys.path.insert(0, os.path.dirname(__file__))
+startup_report.mark("framework_imports")
 
 from app.core.multi_ai_debate import JobApplicationPipeline
-from app.core.fast_ai_engine import fast_pipeline, HighPerformanceAIEngine
-from app.core.market_driven_engine import market_driven_pipeline
+from app.core.market_driven_engine import PROMPT_VERSION as MARKET_PROMPT_VERSION, market_driven_pipeline
 from app.core.llm_client import get_public_llm_config
 from app.services.resume_analyzer import ResumeAnalyzer
 from app.services.real_job_service import RealJobService
 from app.services.business_service import BusinessService
+from app.services.commerce_service import CommerceService
 from app.core.realtime_progress import progress_tracker
+from app.core.shared_state import WORKER_ID, SharedMap, get_shared_state
+from app.core.single_flight import SingleFlight, content_key
+from app.core.admission import FREE as FREE_LANE, PAID as PAID_LANE, AdmissionRejected, admission_from_env
+from app.core.health import SnapshotCache
+from app.core.query_cache import search_cache_from_env, search_cache_key
+from app.core.performance import metrics, monitor
+from app.core.incremental import get_stage_memo
+from app.core.pipeline_cache import pipeline_cache_from_env
+from app.core.process_jobs import ProcessJobRunner
+from app.services.crawler_engine import job_content_hash, job_sync_key
+from app.services.job_providers.circuit_breaker import check_response, get_provider_health
+from app.services.job_providers.detail_cache import get_job_detail_cache
+from app.services.job_providers.redirect_resolver import unwrap_redirect
+
+startup_report.mark("app_imports")
 
 app = FastAPI(title="AI求职助手")
 APP_BOOT_TS = datetime.now().isoformat()
@@ -59,6 +84,20 @@ app.add_middleware(
 )
 
 
+def _observe_request(request: Request, status_code: int, took_ms: float) -> None:
+    """Feed route latency histograms; label by route template to bound cardinality."""
+    route = request.scope.get("route")
+    route_path = getattr(route, "path", None) or "unmatched"
+    metrics.observe(
+        "http_request_duration_seconds",
+        took_ms / 1000.0,
+        route=route_path,
+        method=request.method,
+        status=str(status_code),
+    )
+    monitor.record_request(took_ms / 1000.0, is_error=int(status_code or 0) >= 500)
+
+
 @app.middleware("http")
 async def request_context_middleware(request: Request, call_next):
     """Attach request id + process time headers for observability."""
@@ -77,6 +116,7 @@ async def request_context_middleware(request: Request, call_next):
             took_ms,
             str(e)[:300],
         )
+        _observe_request(request, 500, took_ms)
         return JSONResponse(
             {"success": False, "error": "internal_error", "request_id": rid},
             status_code=500,
@@ -84,6 +124,7 @@ async def request_context_middleware(request: Request, call_next):
         )
 
     took_ms = (time.perf_counter() - start) * 1000
+    _observe_request(request, getattr(response, "status_code", 0), took_ms)
     response.headers["x-request-id"] = rid
     response.headers["x-process-time-ms"] = f"{took_ms:.1f}"
     if request.url.path.startswith("/api"):
@@ -97,21 +138,140 @@ async def request_context_middleware(request: Request, call_next):
         )
     return response
 
-# 全局变量
-pipeline = JobApplicationPipeline()
+# 全局变量（重服务在首次使用时才构建，见 app/core/startup.py）
+pipeline = LazyService(JobApplicationPipeline, "job_pipeline")
 analyzer = ResumeAnalyzer()
-real_job_service = RealJobService()  # 真实招聘数据服务
-business_service = BusinessService()
+real_job_service = LazyService(RealJobService, "real_job_service")  # 真实招聘数据服务
+business_service = LazyService(BusinessService, "business_service")
+commerce_service = LazyService(CommerceService, "commerce_service")  # 访问码 -> credits 钱包（付费优先通道）
+# /api/process 并发上限 + 分级排队（付费访问码优先），预计等待超过期限直接 429
+process_admission = admission_from_env()
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "").strip().lower() in {"1", "true", "yes", "on"}
+# 事件表保留策略：超过 N 天的事件归档为按月压缩 JSONL（0 = 不自动归档）
+EVENTS_RETENTION_DAYS = int(os.getenv("EVENTS_RETENTION_DAYS", "0") or "0")
+EVENTS_COMPACT_INTERVAL_S = max(60.0, float(os.getenv("EVENTS_COMPACT_INTERVAL_S", "21600") or "21600"))
+# credits 预授权：定期结算已 capture 的 hold，并释放超时未 capture 的 hold（仅在启用 hold 的部署上运行）
+CREDIT_HOLDS_ENABLED = os.getenv("CREDIT_HOLDS_ENABLED", "").strip().lower() in {"1", "true", "yes", "on"}
+CREDIT_SETTLE_INTERVAL_S = max(1.0, float(os.getenv("CREDIT_SETTLE_INTERVAL_S", "10") or "10"))
+
+
+def _load_health_snapshot() -> Dict[str, Any]:
+    return {
+        "business": business_service.metrics(),
+        "job_database": real_job_service.get_statistics(),
+    }
+
+
+# 健康检查/投资人视图共用的指标快照：过期后后台刷新，探针不再直接扫库
+health_snapshot = SnapshotCache(
+    "health",
+    _load_health_snapshot,
+    ttl_s=float(os.getenv("HEALTH_SNAPSHOT_TTL_S", "30") or "30"),
+    max_stale_s=float(os.getenv("HEALTH_SNAPSHOT_MAX_STALE_S", "300") or "300"),
+)
+
+
+def _cached_business_metrics() -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    snap, meta = health_snapshot.get()
+    if not snap:
+        raise RuntimeError(meta.get("last_error") or "metrics_snapshot_unavailable")
+    return snap.get("business") or {}, meta
 
-# 云端岗位缓存（内存）
+
+def _warm_services() -> None:
+    for svc in (business_service, real_job_service, market_engine):
+        try:
+            svc.get()
+        except Exception:
+            logger.exception("startup warmup failed")
+    # First health probe then reads a ready snapshot instead of loading it.
+    health_snapshot.get()
+
+
+async def _events_compaction_loop() -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(EVENTS_COMPACT_INTERVAL_S)
+        try:
+            stats = await loop.run_in_executor(None, business_service.compact_events, EVENTS_RETENTION_DAYS)
+            if stats.get("archived"):
+                logger.info("events compacted archived=%s hot=%s", stats["archived"], stats["hot_events"])
+        except Exception:
+            logger.exception("events compaction failed")
+
+
+def _settle_credit_holds() -> None:
+    if not commerce_service.built:
+        # No hold can exist before something used the commerce service; do not build it here.
+        return
+    stats = commerce_service.settle_captures()
+    released = commerce_service.release_expired_holds()["released"]
+    if stats["settled"] or stats["failed"] or released:
+        logger.info("credit holds settled=%s failed=%s released=%s", stats["settled"], stats["failed"], released)
+
+
+async def _credit_settlement_loop() -> None:
+    while True:
+        await asyncio.sleep(CREDIT_SETTLE_INTERVAL_S)
+        try:
+            await asyncio.to_thread(_settle_credit_holds)
+        except Exception:
+            logger.exception("credit settlement failed")
+
+
+@app.on_event("startup")
+async def _on_startup():
+    startup_report.ready()
+    if STARTUP_WARMUP:
+        # Build heavy services off the event loop so the port opens first.
+        asyncio.get_running_loop().run_in_executor(None, _warm_services)
+    if EVENTS_RETENTION_DAYS > 0:
+        asyncio.get_running_loop().create_task(_events_compaction_loop())
+    if CREDIT_HOLDS_ENABLED:
+        asyncio.get_running_loop().create_task(_credit_settlement_loop())
+    if shared_state.shared:
+        # 其他 worker 的进度广播转发到本 worker 持有的 WebSocket
+        progress_tracker.attach(shared_state, asyncio.get_running_loop(), origin=WORKER_ID)
+
+
+@app.on_event("shutdown")
+async def _on_shutdown():
+    if commerce_service.built:
+        # Charge what was captured before the worker goes away instead of waiting for the next run.
+        try:
+            await asyncio.to_thread(commerce_service.settle_captures)
+        except Exception:
+            logger.exception("credit settlement on shutdown failed")
+
+# 跨 worker 状态（SHARED_STATE_BACKEND=memory|sqlite|redis，默认 memory = 单 worker）
+shared_state = get_shared_state()
+
+# 云端岗位缓存（本地镜像；共享后端下以 shared_state 的 "cloud_jobs" 为准）
 cloud_jobs_cache: List[Dict[str, Any]] = []
+CLOUD_JOBS_CACHE_MAX = 5000
+# 增量同步索引：sync key -> 缓存中的岗位对象 / 内容哈希
+cloud_jobs_by_key: Dict[str, Dict[str, Any]] = {}
+cloud_jobs_hashes: Dict[str, str] = {}
 CN_JOB_DOMAINS = ("zhipin.com", "liepin.com", "zhaopin.com", "51job.com", "lagou.com")
 cloud_jobs_meta: Dict[str, Any] = {
     "last_push_at": None,
     "last_received": 0,
     "last_new": 0,
+    "last_updated": 0,
+    "last_unchanged": 0,
 }
-recent_search_jobs: Dict[str, Dict[str, Any]] = {}
+_cloud_jobs_version = 0
+# 镜像既被事件循环（爬虫上传）也被搜索缓存的后台刷新线程读写：锁只包住列表/字典的替换和快照，
+# 从不包住 shared_state 读取；入库的岗位 dict 不再原地修改，读者拿到快照后无需持锁
+_cloud_jobs_lock = threading.RLock()
+# 相同查询（归一化关键词 + 城市）直接复用结果，过期后后台刷新
+search_cache = search_cache_from_env()
+
+# 最近搜索结果：与各 provider 共用同一个有界岗位详情 LRU
+job_detail_cache = get_job_detail_cache()
+recent_search_jobs = job_detail_cache.view("search")
+# 各数据源熔断器 + 健康评分（验证码/限流/超时后暂时跳过，恢复后自动放行）
+provider_health = get_provider_health()
 
 
 def _api_success(payload: Dict[str, Any], status_code: int = 200) -> JSONResponse:
@@ -132,7 +292,7 @@ def _build_investor_readiness_snapshot() -> Dict[str, Any]:
     Financing-oriented readiness snapshot.
     Provides one consolidated view for product, traction, reliability and GTM.
     """
-    metrics = business_service.metrics()
+    metrics, snapshot_meta = _cached_business_metrics()
     funnel = metrics.get("funnel", {})
     leads = metrics.get("leads", {})
     feedback = metrics.get("feedback", {})
@@ -215,6 +375,7 @@ def _build_investor_readiness_snapshot() -> Dict[str, Any]:
             "feedback_total": int(feedback.get("total", 0) or 0),
         },
         "metrics": metrics,
+        "snapshot": snapshot_meta,
         "next_30d_targets": {
             "uploads": max(uploads + 80, 120),
             "process_runs": max(process_runs + 60, 100),
@@ -233,24 +394,45 @@ def _track_event(name: str, payload: Optional[Dict[str, Any]] = None) -> None:
         pass
 
 
-def _cache_recent_jobs(jobs: List[Dict[str, Any]], max_size: int = 2000) -> None:
+def _cache_recent_jobs(jobs: List[Dict[str, Any]]) -> None:
     now = datetime.now().isoformat()
+    rows: Dict[str, Dict[str, Any]] = {}
     for j in jobs or []:
         jid = str(j.get("id") or "").strip()
         if not jid:
             continue
         row = dict(j)
         row["_cached_at"] = now
-        recent_search_jobs[jid] = row
-    if len(recent_search_jobs) > max_size:
-        # Keep newest max_size by cached time.
-        items = sorted(
-            recent_search_jobs.items(),
-            key=lambda x: str(x[1].get("_cached_at") or ""),
-            reverse=True,
-        )[:max_size]
-        recent_search_jobs.clear()
-        recent_search_jobs.update(items)
+        rows[jid] = row
+    # One batched write; the LRU evicts the oldest entries itself.
+    recent_search_jobs.update(rows)
+
+
+def _refresh_cloud_jobs() -> None:
+    """Reload the local crawler-job mirror when another worker has ingested since (shared backends only)."""
+    global _cloud_jobs_version
+    if not shared_state.shared:
+        return
+    version = int(shared_state.get("cloud_jobs_meta", "version", 0) or 0)
+    if version == _cloud_jobs_version:
+        return
+    # The full scan runs without the lock; only the swap below holds it.
+    rows = shared_state.items("cloud_jobs")
+    meta = shared_state.get("cloud_jobs_meta", "meta", {}) or {}
+    jobs = [row["job"] for _, row in rows]
+    by_key = {key: job for (key, _), job in zip(rows, jobs)}
+    hashes = {key: str(row.get("hash") or "") for key, row in rows}
+    with _cloud_jobs_lock:
+        if _cloud_jobs_version >= version:
+            return  # another thread already loaded this (or a newer) version
+        cloud_jobs_cache[:] = jobs
+        cloud_jobs_by_key.clear()
+        cloud_jobs_by_key.update(by_key)
+        cloud_jobs_hashes.clear()
+        cloud_jobs_hashes.update(hashes)
+        cloud_jobs_meta.update(meta)
+        _cloud_jobs_version = version
+    search_cache.invalidate("cloud:")
 
 
 def _is_seed_or_demo_job(job: Dict[str, Any]) -> bool:
@@ -535,6 +717,19 @@ def _validate_process_response_shape(payload: Dict[str, Any]) -> List[str]:
 def _filter_cloud_cache_by_query(
     keywords: List[str], location: Optional[str], limit: int
 ) -> List[Dict[str, Any]]:
+    return _query_cloud_cache(keywords, location, limit)[0]
+
+
+def _search_query_key(keywords: List[str]) -> str:
+    """Order/case-insensitive key for a keyword set (used for crawl demand stats)."""
+    return ",".join(sorted({k.strip().lower() for k in (keywords or []) if k and k.strip()}))
+
+
+def _query_cloud_cache(
+    keywords: List[str], location: Optional[str], limit: int
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """Return (jobs, cache_hit); on a miss the whole cache is used as a fallback."""
+    _refresh_cloud_jobs()
     kw = [k.strip().lower() for k in (keywords or []) if k and k.strip()]
 
     def hit(job: Dict[str, Any]) -> bool:
@@ -545,10 +740,14 @@ def _filter_cloud_cache_by_query(
             return False
         return True
 
-    matched = [j for j in cloud_jobs_cache if hit(j)]
+    # Runs in search-cache refresh threads too: filter a snapshot, never hold the lock while scanning.
+    with _cloud_jobs_lock:
+        snapshot = list(cloud_jobs_cache)
+    matched = [j for j in snapshot if hit(j)]
     if not matched:
-        matched = list(cloud_jobs_cache)
-    return _normalize_real_jobs(matched, limit=limit)
+        return _normalize_real_jobs(snapshot, limit=limit), False
+    jobs = _normalize_real_jobs(matched, limit=limit)
+    return jobs, bool(jobs)
 
 
 def _search_jobs_without_browser(
@@ -577,25 +776,14 @@ def _search_jobs_without_browser(
     else:
         first_error = None
 
-    enterprise_jobs = _search_jobs_enterprise_api(keywords, location, limit=limit)
-    enterprise_jobs = _normalize_real_jobs(enterprise_jobs, limit=limit)
-    enterprise_jobs = _enforce_cn_market_jobs(enterprise_jobs)
-    if enterprise_jobs:
-        return enterprise_jobs, "enterprise_api", None
-
-    # CN market fallback: no-browser HTML search on Chinese job sites.
-    bing_html_jobs = _search_jobs_bing_html(keywords, location, limit=limit)
-    bing_html_jobs = _normalize_real_jobs(bing_html_jobs, limit=limit)
-    bing_html_jobs = _enforce_cn_market_jobs(bing_html_jobs)
-    if bing_html_jobs:
-        return bing_html_jobs, "bing_html", None
-
-    # Last fallback: DuckDuckGo HTML search (no key, no browser).
-    ddg_jobs = _search_jobs_duckduckgo(keywords, location, limit=limit)
-    ddg_jobs = _normalize_real_jobs(ddg_jobs, limit=limit)
-    ddg_jobs = _enforce_cn_market_jobs(ddg_jobs)
-    if ddg_jobs:
-        return ddg_jobs, "duckduckgo", None
+    # Enterprise API, then CN market HTML search (Bing, DuckDuckGo): no key, no browser.
+    # Healthiest first; a provider whose breaker is open is skipped without a request.
+    for name in provider_health.order(NO_BROWSER_PROVIDERS):
+        rows = NO_BROWSER_PROVIDERS[name](keywords, location, limit=limit)
+        rows = _normalize_real_jobs(rows, limit=limit)
+        rows = _enforce_cn_market_jobs(rows)
+        if rows:
+            return rows, name, None
 
     # Optional global fallback. Disabled by default to keep CN market realism.
     if os.getenv("ENABLE_GLOBAL_JOB_FALLBACK", "").strip().lower() in {"1", "true", "yes", "on"}:
@@ -659,6 +847,8 @@ def _infer_company_from_title(title: str, platform: str = "") -> str:
     return ""
 
 
+@provider_health.protect("enterprise_api")
+@metrics.timed("provider_search_duration_seconds", provider="enterprise_api")
 def _search_jobs_enterprise_api(
     keywords: List[str], location: Optional[str], limit: int = 10
 ) -> List[Dict[str, Any]]:
@@ -688,16 +878,15 @@ def _search_jobs_enterprise_api(
     if api_key:
         headers[auth_header] = f"{auth_scheme} {api_key}".strip() if auth_scheme else api_key
 
-    try:
-        if method == "POST":
-            resp = requests.post(url, json=payload, headers=headers, timeout=timeout_s)
-        else:
-            resp = requests.get(url, params=payload, headers=headers, timeout=timeout_s)
-        if resp.status_code >= 400:
-            return []
-        data = resp.json() if resp.content else {}
-    except Exception:
-        return []
+    # Errors propagate to the circuit breaker (`protect` turns them into []).
+    if method == "POST":
+        resp = requests.post(url, json=payload, headers=headers, timeout=timeout_s)
+    else:
+        resp = requests.get(url, params=payload, headers=headers, timeout=timeout_s)
+    check_response(resp, "enterprise_api")
+    if resp.status_code >= 400:
+        raise RuntimeError(f"enterprise job API HTTP {resp.status_code}")
+    data = resp.json() if resp.content else {}
 
     rows: List[Dict[str, Any]] = []
     if isinstance(data, list):
@@ -746,23 +935,12 @@ def _search_jobs_enterprise_api(
 
 
 def _normalize_ddg_redirect(href: str) -> str:
-    href = html_lib.unescape((href or "").strip())
-    if not href:
-        return ""
-    if href.startswith("//"):
-        href = "https:" + href
-    # Absolute DuckDuckGo redirect URL.
-    if href.startswith("http://duckduckgo.com/l/?") or href.startswith("https://duckduckgo.com/l/?"):
-        qs = parse_qs(urlparse(href).query)
-        uddg = (qs.get("uddg") or [""])[0]
-        return unquote(uddg) if uddg else ""
-    if href.startswith("/l/?"):
-        qs = parse_qs(urlparse("https://duckduckgo.com" + href).query)
-        uddg = (qs.get("uddg") or [""])[0]
-        return unquote(uddg) if uddg else ""
-    return href
+    # DuckDuckGo embeds the target (`/l/?uddg=...`): decoded locally, no request.
+    return unwrap_redirect(href)
 
 
+@provider_health.protect("duckduckgo")
+@metrics.timed("provider_search_duration_seconds", provider="duckduckgo")
 def _search_jobs_duckduckgo(
     keywords: List[str], location: Optional[str], limit: int = 10
 ) -> List[Dict[str, Any]]:
@@ -772,19 +950,19 @@ def _search_jobs_duckduckgo(
     q_parts.append("招聘 职位 site:zhipin.com OR site:liepin.com OR site:zhaopin.com OR site:51job.com OR site:lagou.com")
     q = " ".join(q_parts).strip() or "招聘 职位 site:zhipin.com"
 
-    url = f"https://html.duckduckgo.com/html/?q={quote_plus(q)}"
-    try:
-        resp = requests.get(
-            url,
-            headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/124",
-                "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
-            },
-            timeout=12,
-        )
-        text = resp.text or ""
-    except Exception:
-        return []
+    base_url = os.getenv("DDG_HTML_SEARCH_URL", "").strip() or "https://html.duckduckgo.com/html/"
+    url = f"{base_url}?q={quote_plus(q)}"
+    resp = requests.get(
+        url,
+        headers={
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/124",
+            "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+        },
+        timeout=12,
+    )
+    # Anti-bot page / 429 -> the breaker opens and later searches skip DuckDuckGo.
+    check_response(resp, "duckduckgo")
+    text = resp.text or ""
 
     # result__a href="...">title</a>
     pattern = re.compile(r'<a[^>]*class="[^"]*result__a[^"]*"[^>]*href="([^"]+)"[^>]*>(.*?)</a>', re.I | re.S)
@@ -823,6 +1001,8 @@ def _search_jobs_duckduckgo(
     return _normalize_and_filter_jobs(out, limit=limit)
 
 
+@provider_health.protect("bing_html")
+@metrics.timed("provider_search_duration_seconds", provider="bing_html")
 def _search_jobs_bing_html(
     keywords: List[str], location: Optional[str], limit: int = 10
 ) -> List[Dict[str, Any]]:
@@ -832,25 +1012,25 @@ def _search_jobs_bing_html(
     q_parts.append("招聘 职位 site:zhipin.com OR site:liepin.com OR site:zhaopin.com OR site:51job.com OR site:lagou.com")
     q = " ".join(q_parts).strip() or "招聘 职位 site:zhipin.com"
 
-    try:
-        resp = requests.get(
-            "https://www.bing.com/search",
-            params={"q": q, "count": max(10, min(int(limit or 10) * 2, 50))},
-            headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/124",
-                "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
-            },
-            timeout=12,
-        )
-        text = resp.text or ""
-    except Exception:
-        return []
+    resp = requests.get(
+        os.getenv("BING_HTML_SEARCH_URL", "").strip() or "https://www.bing.com/search",
+        params={"q": q, "count": max(10, min(int(limit or 10) * 2, 50))},
+        headers={
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/124",
+            "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+        },
+        timeout=12,
+    )
+    check_response(resp, "bing_html")
+    text = resp.text or ""
 
     # <li class="b_algo"> ... <h2><a href="...">title</a>
     pattern = re.compile(r'<li class="b_algo"[^>]*>.*?<h2><a href="([^"]+)"[^>]*>(.*?)</a>', re.I | re.S)
     out: List[Dict[str, Any]] = []
     seen: set[str] = set()
-    for link, raw_title in pattern.findall(text):
+    for href, raw_title in pattern.findall(text):
+        # Bing may wrap results in `/ck/a?...&u=a1<base64>` click-tracking links.
+        link = unwrap_redirect(href)
         if not link.startswith(("http://", "https://")):
             continue
         low = link.lower()
@@ -880,22 +1060,30 @@ def _search_jobs_bing_html(
     return _normalize_and_filter_jobs(out, limit=limit)
 
 
+# No-browser chain of `_search_jobs_without_browser`, in priority order (ties keep it).
+NO_BROWSER_PROVIDERS = {
+    "enterprise_api": _search_jobs_enterprise_api,
+    "bing_html": _search_jobs_bing_html,
+    "duckduckgo": _search_jobs_duckduckgo,
+}
+
+
+@provider_health.protect("remotive")
+@metrics.timed("provider_search_duration_seconds", provider="remotive")
 def _search_jobs_remotive(
     keywords: List[str], location: Optional[str], limit: int = 10
 ) -> List[Dict[str, Any]]:
     # Remotive is a public job API and currently reachable in cloud environments.
     cleaned = [k.strip() for k in (keywords or []) if k and k.strip()]
     q = cleaned[0] if cleaned else "python"
-    try:
-        resp = requests.get(
-            "https://remotive.com/api/remote-jobs",
-            params={"search": q},
-            headers={"User-Agent": "Mozilla/5.0"},
-            timeout=15,
-        )
-        data = resp.json() if resp.content else {}
-    except Exception:
-        return []
+    resp = requests.get(
+        "https://remotive.com/api/remote-jobs",
+        params={"search": q},
+        headers={"User-Agent": "Mozilla/5.0"},
+        timeout=15,
+    )
+    check_response(resp, "remotive")
+    data = resp.json() if resp.content else {}
 
     jobs = data.get("jobs") or []
     base_rows: List[Dict[str, Any]] = []
@@ -1583,6 +1771,90 @@ async def investor_page():
             return HTMLResponse(content=f.read())
     return HTMLResponse(content="<h1>Investor Dashboard</h1><p>/api/investor/readiness</p>")
 
+class _ResumeParseError(Exception):
+    """A resume file that could not be turned into text; the message is shown to the user."""
+
+
+def _parse_resume_bytes(file_ext: str, content: bytes) -> str:
+    """Extract text from an uploaded resume (blocking: PDF / Word / OCR)."""
+    text = ""
+    # 解析文件
+    if file_ext == '.txt':
+        # 文本文件
+        try:
+            text = content.decode('utf-8')
+        except:
+            text = content.decode('gbk', errors='ignore')
+
+    elif file_ext == '.pdf':
+        # PDF文件
+        try:
+            import PyPDF2
+            import io
+            pdf_reader = PyPDF2.PdfReader(io.BytesIO(content))
+            for page in pdf_reader.pages:
+                page_text = page.extract_text()
+                if page_text:
+                    text += page_text + "\n"
+        except Exception as e:
+            raise _ResumeParseError(f"PDF解析失败: {str(e)}。请确保PDF不是扫描件，或上传图片格式。")
+
+    elif file_ext in ['.docx', '.doc']:
+        # Word文件
+        try:
+            from docx import Document
+            import io
+            doc = Document(io.BytesIO(content))
+
+            # 提取段落文本
+            for paragraph in doc.paragraphs:
+                if paragraph.text.strip():
+                    text += paragraph.text + "\n"
+
+            # 提取表格文本
+            for table in doc.tables:
+                for row in table.rows:
+                    for cell in row.cells:
+                        if cell.text.strip():
+                            text += cell.text + " "
+                    text += "\n"
+
+        except Exception as e:
+            raise _ResumeParseError(f"Word文档解析失败: {str(e)}。请确保文件未损坏。")
+
+    elif file_ext in ['.jpg', '.jpeg', '.png', '.bmp', '.gif']:
+        # 图片文件 - 使用OCR
+        try:
+            from PIL import Image
+            import pytesseract
+            import io
+
+            # 打开图片
+            image = Image.open(io.BytesIO(content))
+
+            # OCR识别（支持中英文）
+            text = pytesseract.image_to_string(image, lang='chi_sim+eng')
+
+            if not text.strip():
+                raise _ResumeParseError("图片识别失败，未能提取到文字。请确保图片清晰，或尝试其他格式。")
+
+        except _ResumeParseError:
+            raise
+        except ImportError:
+            raise _ResumeParseError("图片OCR功能未安装。正在安装依赖，请稍后重试...")
+        except Exception as e:
+            raise _ResumeParseError(f"图片识别失败: {str(e)}。请确保图片清晰可读。")
+
+    # 检查是否成功提取到内容
+    if not text.strip():
+        raise _ResumeParseError("文件解析成功，但未能提取到有效内容。请检查文件是否为空或格式是否正确。")
+    return text
+
+
+# The same file uploaded by several users at once (shared templates) is parsed once.
+resume_parse_flight = SingleFlight("resume_parse")
+
+
 @app.post("/api/upload")
 async def upload_resume(file: UploadFile = File(...)):
     """上传简历文件（支持PDF、Word、TXT、图片）"""
@@ -1598,89 +1870,16 @@ async def upload_resume(file: UploadFile = File(...)):
         
         # 读取文件内容
         content = await file.read()
-        resume_text = ""
         
         try:
-            # 解析文件
-            if file_ext == '.txt':
-                # 文本文件
-                try:
-                    resume_text = content.decode('utf-8')
-                except:
-                    resume_text = content.decode('gbk', errors='ignore')
-                    
-            elif file_ext == '.pdf':
-                # PDF文件
-                try:
-                    import PyPDF2
-                    import io
-                    pdf_reader = PyPDF2.PdfReader(io.BytesIO(content))
-                    for page in pdf_reader.pages:
-                        text = page.extract_text()
-                        if text:
-                            resume_text += text + "\n"
-                except Exception as e:
-                    return JSONResponse({
-                        "error": f"PDF解析失败: {str(e)}。请确保PDF不是扫描件，或上传图片格式。"
-                    }, status_code=500)
-                    
-            elif file_ext in ['.docx', '.doc']:
-                # Word文件
-                try:
-                    from docx import Document
-                    import io
-                    doc = Document(io.BytesIO(content))
-                    
-                    # 提取段落文本
-                    for paragraph in doc.paragraphs:
-                        if paragraph.text.strip():
-                            resume_text += paragraph.text + "\n"
-                    
-                    # 提取表格文本
-                    for table in doc.tables:
-                        for row in table.rows:
-                            for cell in row.cells:
-                                if cell.text.strip():
-                                    resume_text += cell.text + " "
-                            resume_text += "\n"
-                            
-                except Exception as e:
-                    return JSONResponse({
-                        "error": f"Word文档解析失败: {str(e)}。请确保文件未损坏。"
-                    }, status_code=500)
-                    
-            elif file_ext in ['.jpg', '.jpeg', '.png', '.bmp', '.gif']:
-                # 图片文件 - 使用OCR
-                try:
-                    from PIL import Image
-                    import pytesseract
-                    import io
-                    
-                    # 打开图片
-                    image = Image.open(io.BytesIO(content))
-                    
-                    # OCR识别（支持中英文）
-                    resume_text = pytesseract.image_to_string(image, lang='chi_sim+eng')
-                    
-                    if not resume_text.strip():
-                        return JSONResponse({
-                            "error": "图片识别失败，未能提取到文字。请确保图片清晰，或尝试其他格式。"
-                        }, status_code=500)
-                        
-                except ImportError:
-                    return JSONResponse({
-                        "error": "图片OCR功能未安装。正在安装依赖，请稍后重试..."
-                    }, status_code=500)
-                except Exception as e:
-                    return JSONResponse({
-                        "error": f"图片识别失败: {str(e)}。请确保图片清晰可读。"
-                    }, status_code=500)
-            
-            # 检查是否成功提取到内容
-            if not resume_text.strip():
-                return JSONResponse({
-                    "error": "文件解析成功，但未能提取到有效内容。请检查文件是否为空或格式是否正确。"
-                }, status_code=500)
+            # 解析文件（线程池中执行；同一文件并发上传只解析一次）
+            try:
+                resume_text = await resume_parse_flight.do(
+                    content_key(file_ext, hashlib.sha256(content).hexdigest()),
+                    lambda: asyncio.to_thread(_parse_resume_bytes, file_ext, content),
+                )
+            except _ResumeParseError as e:
+                return JSONResponse({"error": str(e)}, status_code=500)
 
             _track_event(
                 "resume_uploaded",
@@ -1718,28 +1917,133 @@ async def websocket_progress(websocket: WebSocket):
     except WebSocketDisconnect:
         progress_tracker.disconnect(websocket)
 
+
+def _buyer_access_code_from_request(request: Request) -> str:
+    return str(
+        request.cookies.get("jobhelper_access_code")
+        or request.headers.get("x-access-code")
+        or ""
+    ).strip().upper()
+
+
+async def _process_lane(request: Request) -> str:
+    """Access codes with credits left (CommerceService wallet) get the paid lane."""
+    access_code = _buyer_access_code_from_request(request)
+    if not access_code:
+        return FREE_LANE
+    try:
+        wallet_payload = await asyncio.to_thread(commerce_service.get_wallet_by_access_code, access_code)
+    except Exception:
+        return FREE_LANE
+    wallet = wallet_payload.get("wallet") if isinstance(wallet_payload, dict) else {}
+    return PAID_LANE if int((wallet or {}).get("balance") or 0) > 0 else FREE_LANE
+
+
 @app.post("/api/process")
 async def process_resume(request: Request):
-    """处理简历的API接口 - 市场驱动"""
+    """处理简历的API接口 - 市场驱动（准入控制：超出并发上限时排队，预计等待过长直接 429）"""
     try:
         data = await request.json()
         resume_text = data.get("resume", "")
         
         if not resume_text:
             return _api_error("简历内容不能为空", status_code=400, code="empty_resume")
+        refresh = _wants_refresh(request, data)
+        cached, cache_meta = await asyncio.to_thread(pipeline_cache.lookup, resume_text, refresh)
+        if cached is not None:
+            # Same resume, same pipeline version: no queue slot, no LLM calls.
+            _track_event("resume_process_cached", {"age_s": int(cache_meta["age_s"])})
+            progress_tracker.reset()
+            await progress_tracker.complete()
+            return _with_pipeline_cache_headers(_api_success(cached), cache_meta)
+        lane = await _process_lane(request)
+        client_id = str(data.get("client_id") or "")[:64]
+    except Exception as e:
+        _track_event("api_error", {"api": "/api/process", "error": str(e)[:300]})
+        return _api_error(str(e), status_code=500, code="process_failed")
 
+    async def report_queue_position(position: int, eta_s: float):
+        await progress_tracker.queue_position(position, eta_s, lane=lane, client_id=client_id)
+
+    try:
+        async with process_admission.slot(lane, on_position=report_queue_position):
+            return _with_pipeline_cache_headers(await _run_process_pipeline(resume_text, refresh), cache_meta)
+    except AdmissionRejected as e:
+        _track_event("process_rejected", {"lane": lane, "reason": e.reason, "queued": e.queued})
+        return _overloaded_response(e)
+
+
+async def _run_process_pipeline(resume_text: str, refresh: bool = False) -> JSONResponse:
+    # 重置进度
+    progress_tracker.reset()
+
+    # 定义进度回调
+    async def update_progress_callback(step, message, agent):
+        await progress_tracker.update_progress(step, message, agent)
+        await progress_tracker.add_ai_message(agent, message)
+
+    try:
+        payload = await _process_resume_payload(resume_text, update_progress_callback, refresh=refresh)
+    except _ProcessContractError as e:
+        return _api_error(str(e), status_code=500, code="process_contract_failed")
+    except Exception as e:
+        _track_event("api_error", {"api": "/api/process", "error": str(e)[:300]})
+        await progress_tracker.error(f"处理出错: {str(e)}")
+        return _api_error(str(e), status_code=500, code="process_failed")
+
+    # 完成
+    await progress_tracker.complete()
+    await progress_tracker.add_ai_message("系统", "🎉 市场分析完成！")
+    return _api_success(payload)
+
+
+class _ProcessContractError(Exception):
+    pass
+
+
+def _process_pipeline_version() -> str:
+    """Anything that changes the answer for the same resume: response schema, prompts, models."""
+    llm = get_public_llm_config()
+    return "|".join((PROCESS_RESPONSE_SCHEMA_VERSION, MARKET_PROMPT_VERSION, llm["chat_model"], llm["reasoning_model"]))
+
+
+# 整条流水线结果缓存：同一份简历（归一化指纹）+ 同一流水线版本直接返回上次的完整结果
+pipeline_cache = pipeline_cache_from_env(shared_state, _process_pipeline_version)
+
+
+def _wants_refresh(request: Request, data: Dict[str, Any]) -> bool:
+    flag = str(data.get("refresh") or request.query_params.get("refresh") or "")
+    return flag.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _with_pipeline_cache_headers(response: JSONResponse, cache_meta: Dict[str, Any]) -> JSONResponse:
+    response.headers["X-Cache"] = cache_meta["status"]
+    response.headers["Age"] = str(int(cache_meta["age_s"]))
+    return response
+
+
+def _cacheable_process_payload(payload: Dict[str, Any], resume_text: str) -> bool:
+    """Only complete answers: a degraded run (LLM fallbacks, no live jobs) must not be replayed for hours."""
+    if not (payload.get("quality_gate") or {}).get("passed"):
+        return False
+    if not payload.get("recommended_jobs"):
+        return False
+    # optimize_resume_for_market returns the input unchanged when the LLM call fails.
+    return payload.get("optimized_resume", "").strip() != resume_text.strip()
+
+
+async def _process_resume_payload(resume_text: str, progress_callback=None, refresh: bool = False) -> Dict[str, Any]:
+    """
+    Market-driven pipeline + real job recommendations -> the /api/process payload.
+    Shared by the synchronous endpoint and the async job API; raises on failure.
+    `refresh` regenerates every LLM stage instead of reusing stored stage outputs.
+    """
+    try:
         _track_event("resume_process_started", {"chars": len(resume_text)})
 
-        # 重置进度
-        progress_tracker.reset()
-        
-        # 定义进度回调
-        async def update_progress_callback(step, message, agent):
-            await progress_tracker.update_progress(step, message, agent)
-            await progress_tracker.add_ai_message(agent, message)
-        
         # 使用市场驱动引擎处理
-        results = await market_engine.process_resume(resume_text, update_progress_callback)
+        results = await market_engine.process_resume(resume_text, progress_callback, refresh=refresh)
+        stage_trace = results.pop("stage_trace", None) or {}
 
         # Seed job search (Boss/OpenClaw) from resume text, so frontend can auto-search links.
         info = analyzer.extract_info(resume_text)
@@ -1821,36 +2125,17 @@ async def process_resume(request: Request):
             kw = seed_keywords[:10]
             loc = seed_location
 
-            if cfg_mode == 'cloud' or cloud_jobs_cache:
-                cached = _filter_cloud_cache_by_query(kw, loc, limit=10)
-                cached = _enforce_cn_market_jobs(cached)
-                if cached:
-                    return cached, 'cloud'
-                # Cache empty/insufficient: fallback to cloud-safe real-time providers.
-                fallback_jobs, fallback_mode, _ = _search_jobs_without_browser(
-                    kw,
-                    loc,
-                    limit=10,
-                    allow_portal_fallback=allow_portal_fallback,
-                )
-                return _enforce_cn_market_jobs(fallback_jobs), fallback_mode
-
+            # Same cache entry as `/api/jobs/search?keywords=...&limit=10`.
+            _refresh_cloud_jobs()
+            search_args = dict(allow_portal=allow_portal_fallback)
             try:
-                jobs = _normalize_real_jobs(
-                    real_job_service.search_jobs(keywords=kw, location=loc, limit=10),
-                    limit=10,
+                payload, _ = search_cache.get_or_load(
+                    _job_search_cache_key(kw, loc, 10, **search_args),
+                    lambda: _run_job_search(kw, loc, 10, **search_args),
                 )
-                jobs = _enforce_cn_market_jobs(jobs)
-                mode = (real_job_service.get_statistics() or {}).get('provider_mode', '') or cfg_mode
-                return jobs[:10], mode
             except Exception:
-                fallback_jobs, fallback_mode, _ = _search_jobs_without_browser(
-                    kw,
-                    loc,
-                    limit=10,
-                    allow_portal_fallback=allow_portal_fallback,
-                )
-                return _enforce_cn_market_jobs(fallback_jobs), fallback_mode or cfg_mode
+                return [], 'no_real_jobs'
+            return payload["jobs"][:10], payload["provider_mode"] or cfg_mode
 
         real_jobs, real_mode = await _get_real_jobs_for_recommendation()
         public_jobs = _public_job_payload(_enforce_cn_market_jobs(real_jobs), limit=10)
@@ -1858,9 +2143,6 @@ async def process_resume(request: Request):
         results, quality_gate = _run_output_quality_gate(results, resume_text, info, public_jobs)
         provider_mode = real_mode
 
-        # 完成
-        await progress_tracker.complete()
-        await progress_tracker.add_ai_message("系统", "🎉 市场分析完成！")
         _track_event(
             "process_quality_gate",
             {
@@ -1883,6 +2165,7 @@ async def process_resume(request: Request):
                 "skills_count": len(seed_keywords),
                 "real_jobs_count": len(public_jobs),
                 "quality_gate_passed": bool(quality_gate.get("passed", True)),
+                "stages_reused": stage_trace.get("reused") or [],
             },
         )
 
@@ -1915,37 +2198,127 @@ async def process_resume(request: Request):
                     "sample": shape_errors[:3],
                 },
             )
-            return _api_error("输出JSON未通过契约校验", status_code=500, code="process_contract_failed")
+            raise _ProcessContractError("输出JSON未通过契约校验")
 
-        return _api_success(response_payload)
-        
+        if _cacheable_process_payload(response_payload, resume_text):
+            await asyncio.to_thread(pipeline_cache.store_result, resume_text, response_payload)
+        return response_payload
+
+    except _ProcessContractError:
+        raise
     except Exception as e:
         _track_event("resume_process_failed", {"error": str(e)[:300]})
         _track_event("resume_processed", {"ok": False, "error": str(e)[:300]})
-        _track_event("api_error", {"api": "/api/process", "error": str(e)[:300]})
-        await progress_tracker.error(f"处理出错: {str(e)}")
-        return _api_error(str(e), status_code=500, code="process_failed")
+        raise
+
+
+# ---- 异步任务 API：提交后立即返回 job_id，轮询 / SSE / WebSocket 获取进度与结果 ----
+
+process_jobs = ProcessJobRunner(_process_resume_payload, admission=process_admission, bus=shared_state)
+
+
+def _overloaded_response(e: AdmissionRejected) -> JSONResponse:
+    response = _api_error("当前排队人数过多，请稍后重试", status_code=429, code=f"process_overloaded_{e.reason}")
+    response.headers["Retry-After"] = str(int(e.retry_after_s))
+    return response
+
+
+@app.post("/api/process/jobs")
+async def submit_process_job(request: Request):
+    """提交简历处理任务（立即返回 job_id；结果通过轮询 / SSE / WebSocket 获取）"""
+    try:
+        data = await request.json()
+        resume_text = data.get("resume", "")
+        if not resume_text:
+            return _api_error("简历内容不能为空", status_code=400, code="empty_resume")
+        refresh = _wants_refresh(request, data)
+        cached, cache_meta = await asyncio.to_thread(pipeline_cache.lookup, resume_text, refresh)
+        lane = await _process_lane(request)
+        job = await process_jobs.submit(
+            resume_text,
+            lane=lane,
+            meta={"chars": len(resume_text), "pipeline_cache": cache_meta["status"]},
+            result=cached,
+            options={"refresh": refresh},
+        )
+    except AdmissionRejected as e:
+        _track_event("process_rejected", {"lane": lane, "reason": e.reason, "queued": e.queued})
+        return _overloaded_response(e)
+    except Exception as e:
+        _track_event("api_error", {"api": "/api/process/jobs", "error": str(e)[:300]})
+        return _api_error(str(e), status_code=500, code="process_submit_failed")
+
+    job_id = job["job_id"]
+    return _api_success(
+        {
+            "job_id": job_id,
+            "status": job["status"],
+            "lane": job["lane"],
+            "queue": job["queue"],
+            "status_url": f"/api/process/jobs/{job_id}",
+            "events_url": f"/api/process/jobs/{job_id}/events",
+            "ws_url": f"/ws/process/{job_id}",
+        },
+        status_code=202,
+    )
+
+
+@app.get("/api/process/jobs/{job_id}")
+async def get_process_job(job_id: str):
+    """轮询任务状态；完成后 result 与 /api/process 的返回结构相同"""
+    job = await asyncio.to_thread(process_jobs.get, job_id)
+    if job is None:
+        return _api_error("任务不存在或已过期", status_code=404, code="process_job_not_found")
+    return _api_success({"job": job})
+
+
+@app.get("/api/process/jobs/{job_id}/events")
+async def stream_process_job(job_id: str):
+    """Server-Sent Events：snapshot、queue、progress、status 事件，done 后结束"""
+    if await asyncio.to_thread(process_jobs.get, job_id) is None:
+        return _api_error("任务不存在或已过期", status_code=404, code="process_job_not_found")
+
+    async def stream():
+        async for event in process_jobs.events(job_id):
+            yield f"event: {event['event']}\ndata: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+
+    return StreamingResponse(
+        stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.websocket("/ws/process/{job_id}")
+async def websocket_process_job(websocket: WebSocket, job_id: str):
+    """WebSocket 版任务事件流（与 SSE 相同的事件）"""
+    await websocket.accept()
+    try:
+        async for event in process_jobs.events(job_id):
+            await websocket.send_json(json.loads(json.dumps(event, ensure_ascii=False, default=str)))
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+@app.get("/api/health/live")
+async def liveness():
+    """Liveness probe: O(1), touches neither the DB nor any provider."""
+    return _api_success({"status": "alive", "uptime_s": round(time.perf_counter() - APP_BOOT_MONO, 1)})
+
 
 @app.get("/api/health")
 async def health_check():
-    """健康检查"""
-    stats = real_job_service.get_statistics()
-    biz = business_service.metrics()
-    
-    # 检查OpenClaw状态
-    openclaw_status = None
-    if stats.get("provider_mode") == "openclaw":
-        from app.services.job_providers.openclaw_browser_provider import OpenClawBrowserProvider
-        openclaw = OpenClawBrowserProvider()
-        openclaw_status = openclaw.health_check()
-    
+    """健康检查（读取缓存快照；深度检查见 /api/health/deep）"""
+    snap, snapshot_meta = await health_snapshot.aget()
+    snap = snap or {}
+    stats = snap.get("job_database") or {}
+    biz = snap.get("business") or {}
+
     return _api_success({
         "status": "ok",
         "message": "AI求职助手运行正常",
         "boot_ts": APP_BOOT_TS,
         "uptime_s": round(time.perf_counter() - APP_BOOT_MONO, 1),
         "job_database": stats,
-        "openclaw": openclaw_status,
+        "openclaw": None,
         "business": {
             "leads_total": biz.get("leads", {}).get("total", 0),
             "uploads": biz.get("funnel", {}).get("uploads", 0),
@@ -1953,10 +2326,17 @@ async def health_check():
             "searches": biz.get("funnel", {}).get("searches", 0),
             "applies": biz.get("funnel", {}).get("applies", 0),
         },
+        "snapshot": snapshot_meta,
+        "deep_check": "/api/health/deep",
         "config": {
             "job_data_provider": os.getenv("JOB_DATA_PROVIDER", "auto"),
             "cloud_cache_total": len(cloud_jobs_cache),
             "cloud_last_push_at": cloud_jobs_meta.get("last_push_at"),
+            "job_detail_cache": job_detail_cache.stats(),
+            "process_admission": process_admission.stats(),
+            "process_jobs": process_jobs.stats(),
+            "pipeline_cache": pipeline_cache.stats(),
+            "pipeline_stages": get_stage_memo().stats(),
             "no_browser_fallback_enabled": True,
             "enterprise_job_api_configured": bool(os.getenv("ENTERPRISE_JOB_API_URL", "").strip()),
             "llm": get_public_llm_config(),
@@ -1964,6 +2344,53 @@ async def health_check():
     })
 
 
+@app.get("/api/health/deep")
+async def health_deep_check(request: Request):
+    """Deep check: refresh the DB snapshot now and probe OpenClaw when it is the active provider."""
+    token = os.getenv("ADMIN_METRICS_TOKEN", "").strip()
+    supplied = request.headers.get("x-admin-token", "").strip()
+    if token and supplied != token:
+        return _api_error("forbidden", status_code=403, code="forbidden")
+
+    checks: Dict[str, Any] = {}
+    snap, snapshot_meta = await asyncio.to_thread(health_snapshot.refresh)
+    checks["database"] = {
+        "ok": bool(snap) and not snapshot_meta.get("last_error"),
+        "ms": snapshot_meta.get("refresh_ms"),
+        "error": snapshot_meta.get("last_error") or None,
+    }
+
+    stats = (snap or {}).get("job_database") or {}
+    openclaw_status = None
+    if stats.get("provider_mode") == "openclaw":
+        from app.services.job_providers.openclaw_browser_provider import OpenClawBrowserProvider
+
+        t0 = time.perf_counter()
+        openclaw_status = await asyncio.to_thread(OpenClawBrowserProvider().health_check)
+        checks["openclaw"] = {
+            "ok": bool(openclaw_status.get("available")),
+            "ms": round((time.perf_counter() - t0) * 1000, 2),
+            "status": openclaw_status,
+        }
+    checks["llm"] = {"ok": bool(get_public_llm_config().get("api_key_configured"))}
+
+    ok = all(c.get("ok") for c in checks.values())
+    return _api_success(
+        {"status": "ok" if ok else "degraded", "checks": checks, "snapshot": snapshot_meta},
+        status_code=200 if ok else 503,
+    )
+
+
+@app.get("/api/health/providers")
+async def provider_health_status():
+    """Circuit-breaker state and health score of every job provider this worker has called."""
+    return _api_success({
+        "worker": WORKER_ID,
+        "providers": provider_health.snapshot(),
+        "no_browser_order": provider_health.order(NO_BROWSER_PROVIDERS),
+        "real_job_service_order": real_job_service.provider_chain(),
+    })
+
 
 @app.get("/api/version")
 async def version():
@@ -1973,9 +2400,22 @@ async def version():
         "railway_git_commit_sha": os.getenv("RAILWAY_GIT_COMMIT_SHA"),
         "github_sha": os.getenv("GITHUB_SHA"),
         "app_boot_ts": APP_BOOT_TS,
+        "startup": startup_report.snapshot(),
     })
 
 
+@app.get("/metrics")
+async def prometheus_metrics(request: Request):
+    """Prometheus text exposition of latency histograms and counters."""
+    token = os.getenv("METRICS_TOKEN", "").strip()
+    if token and request.headers.get("authorization", "") != f"Bearer {token}":
+        return PlainTextResponse("unauthorized\n", status_code=401)
+    return PlainTextResponse(
+        metrics.render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 @app.get("/api/ping")
 async def ping():
     """Ultra-light probe for availability checks."""
@@ -1986,6 +2426,7 @@ async def ping():
 async def ready():
     """Release gate probe used by QA/ops before Go/No-Go."""
     cfg_mode = os.getenv("JOB_DATA_PROVIDER", "auto").strip().lower()
+    _refresh_cloud_jobs()
     cache_total = len(cloud_jobs_cache)
     checks = {
         "api_alive": True,
@@ -2004,6 +2445,7 @@ async def ready():
             "provider_mode": cfg_mode,
             "cloud_cache_total": cache_total,
             "boot_ts": APP_BOOT_TS,
+            "snapshot": health_snapshot.meta(),
         }
     )
 
@@ -2095,7 +2537,7 @@ async def feedback_summary(request: Request, days: int = 7, limit: int = 20):
 async def business_public_proof():
     """Public-safe proof counters used on landing page."""
     try:
-        m = business_service.metrics()
+        m, _ = await asyncio.to_thread(_cached_business_metrics)
         funnel = m.get("funnel", {})
         engagement = m.get("engagement", {})
         quality = m.get("quality", {})
@@ -2141,7 +2583,7 @@ async def business_readiness(request: Request):
     if token and supplied != token:
         return JSONResponse({"error": "forbidden"}, status_code=403)
     try:
-        m = business_service.metrics()
+        m, _ = await asyncio.to_thread(_cached_business_metrics)
         funnel = m.get("funnel", {})
         leads = m.get("leads", {})
         feedback = m.get("feedback", {})
@@ -2176,7 +2618,7 @@ async def investor_readiness(request: Request):
     if token and supplied != token:
         return _api_error("forbidden", status_code=403, code="forbidden")
     try:
-        return _api_success(_build_investor_readiness_snapshot())
+        return _api_success(await asyncio.to_thread(_build_investor_readiness_snapshot))
     except Exception as e:
         _track_event("api_error", {"api": "/api/investor/readiness", "error": str(e)[:300]})
         return _api_error(str(e), status_code=500, code="investor_readiness_failed")
@@ -2190,7 +2632,7 @@ async def investor_summary(request: Request):
     if token and supplied != token:
         return _api_error("forbidden", status_code=403, code="forbidden")
     try:
-        snap = _build_investor_readiness_snapshot()
+        snap = await asyncio.to_thread(_build_investor_readiness_snapshot)
         p = snap.get("pillars", {})
         narrative = [
             f"Current financing readiness status: {snap.get('status')} (score {snap.get('overall_score')}).",
@@ -2213,6 +2655,80 @@ async def investor_summary(request: Request):
         _track_event("api_error", {"api": "/api/investor/summary", "error": str(e)[:300]})
         return _api_error(str(e), status_code=500, code="investor_summary_failed")
 
+def _run_job_search(
+    kw: List[str],
+    location: Optional[str],
+    n: int,
+    salary_min: Optional[int] = None,
+    experience: Optional[str] = None,
+    allow_portal: bool = False,
+    progress_cb=None,
+) -> Dict[str, Any]:
+    """Provider work behind /api/jobs/search (and the /api/process seed search); result is cacheable."""
+    cfg_mode = os.getenv("JOB_DATA_PROVIDER", "auto").strip().lower()
+    # Cloud mode: prefer crawler cache; fallback to cloud-safe real-time providers.
+    _refresh_cloud_jobs()
+    if cfg_mode == "cloud" or cloud_jobs_cache:
+        jobs, cache_hit = _query_cloud_cache(kw, location, limit=n)
+        jobs = _enforce_cn_market_jobs(jobs)
+        cache_hit = cache_hit and bool(jobs)
+        metrics.inc("cache_requests_total", cache="cloud_jobs", result="hit" if cache_hit else "miss")
+        warning = None
+        mode = "cloud"
+        if not jobs:
+            fallback_jobs, fallback_mode, fallback_err = _search_jobs_without_browser(
+                kw,
+                location,
+                limit=n,
+                allow_portal_fallback=allow_portal,
+            )
+            jobs = _enforce_cn_market_jobs(fallback_jobs)
+            mode = fallback_mode or "cloud"
+            warning = (
+                f"cloud cache is empty; switched to no-browser provider: {mode}"
+                if jobs
+                else (
+                    f"cloud cache empty and no-browser search failed: {fallback_err}"
+                    if fallback_err
+                    else "cloud cache is empty and no real jobs were found"
+                )
+            )
+        _cache_recent_jobs(jobs)
+        return {"jobs": jobs, "provider_mode": mode, "warning": warning, "cloud_mode": True, "cache_hit": cache_hit}
+
+    try:
+        jobs = real_job_service.search_jobs(
+            keywords=kw,
+            location=location,
+            salary_min=salary_min,
+            experience=experience,
+            limit=n,
+            progress_callback=progress_cb,
+        )
+        jobs = _normalize_real_jobs(jobs, limit=n)
+        jobs = _enforce_cn_market_jobs(jobs)
+        mode = (real_job_service.get_statistics() or {}).get("provider_mode", cfg_mode)
+    except Exception as e:
+        jobs, mode, _ = _search_jobs_without_browser(
+            kw,
+            location,
+            limit=n,
+            allow_portal_fallback=allow_portal,
+        )
+        jobs = _enforce_cn_market_jobs(jobs)
+        if not jobs:
+            raise e
+    _cache_recent_jobs(jobs)
+    return {"jobs": jobs, "provider_mode": mode, "cloud_mode": False, "cache_hit": False}
+
+
+def _job_search_cache_key(kw: List[str], location: Optional[str], n: int, **options: Any) -> str:
+    # Cloud-answered entries share a prefix so crawler uploads can drop just those.
+    cfg_mode = os.getenv("JOB_DATA_PROVIDER", "auto").strip().lower()
+    source = "cloud" if (cfg_mode == "cloud" or cloud_jobs_cache) else "live"
+    return f"{source}:{search_cache_key(kw, location, n, **options)}"
+
+
 @app.get("/api/jobs/search")
 async def search_jobs(
     keywords: str = None,
@@ -2224,7 +2740,6 @@ async def search_jobs(
 ):
     """搜索真实岗位"""
     try:
-        cfg_mode = os.getenv("JOB_DATA_PROVIDER", "auto").strip().lower()
         n = int(limit) if limit is not None else 50
         n = max(1, min(n, 100))
         keyword_list = keywords.split(",") if keywords else []
@@ -2233,46 +2748,6 @@ async def search_jobs(
             os.getenv("ALLOW_CN_PORTAL_FALLBACK", "").strip().lower() in {"1", "true", "yes", "on"}
         )
 
-        # Cloud mode: prefer crawler cache; fallback to cloud-safe real-time providers.
-        if cfg_mode == "cloud" or cloud_jobs_cache:
-            jobs = _filter_cloud_cache_by_query(kw, location, limit=n)
-            jobs = _enforce_cn_market_jobs(jobs)
-            warning = None
-            mode = "cloud"
-            if not jobs:
-                fallback_jobs, fallback_mode, fallback_err = _search_jobs_without_browser(
-                    kw,
-                    location,
-                    limit=n,
-                    allow_portal_fallback=allow_portal,
-                )
-                jobs = _enforce_cn_market_jobs(fallback_jobs)
-                mode = fallback_mode or "cloud"
-                warning = (
-                    f"cloud cache is empty; switched to no-browser provider: {mode}"
-                    if jobs
-                    else (
-                        f"cloud cache empty and no-browser search failed: {fallback_err}"
-                        if fallback_err
-                        else "cloud cache is empty and no real jobs were found"
-                    )
-                )
-            _track_event(
-                "job_search",
-                {
-                    "provider_mode": mode,
-                    "result_count": len(jobs),
-                    "cloud_mode": True,
-                },
-            )
-            _cache_recent_jobs(jobs)
-            return _api_success({
-                "total": len(jobs),
-                "jobs": jobs,
-                "provider_mode": mode,
-                "warning": warning,
-            })
-
         # Stream progress to the same WebSocket channel as the AI pipeline.
         # Frontend listens for `type=job_search`.
         import asyncio
@@ -2284,42 +2759,40 @@ async def search_jobs(
                 )
             )
 
-        try:
-            jobs = real_job_service.search_jobs(
-                keywords=kw,
-                location=location,
-                salary_min=salary_min,
-                experience=experience,
-                limit=n,
-                progress_callback=progress_cb,
-            )
-            jobs = _normalize_real_jobs(jobs, limit=n)
-            jobs = _enforce_cn_market_jobs(jobs)
-            mode = (real_job_service.get_statistics() or {}).get("provider_mode", cfg_mode)
-        except Exception as e:
-            jobs, mode, _ = _search_jobs_without_browser(
-                kw,
-                location,
-                limit=n,
-                allow_portal_fallback=allow_portal,
-            )
-            jobs = _enforce_cn_market_jobs(jobs)
-            if not jobs:
-                raise e
+        _refresh_cloud_jobs()
+        search_args = dict(salary_min=salary_min, experience=experience, allow_portal=allow_portal)
+        payload, cache_meta = search_cache.get_or_load(
+            _job_search_cache_key(kw, location, n, **search_args),
+            lambda: _run_job_search(kw, location, n, progress_cb=progress_cb, **search_args),
+            # Background revalidation runs off the event loop: no WebSocket progress.
+            refresh_loader=lambda: _run_job_search(kw, location, n, **search_args),
+        )
+        jobs = payload["jobs"]
+        mode = payload["provider_mode"]
         _track_event(
             "job_search",
             {
                 "provider_mode": mode,
                 "result_count": len(jobs),
-                "cloud_mode": False,
+                "cloud_mode": payload["cloud_mode"],
+                "cache_hit": payload["cache_hit"],
+                "result_cache": cache_meta["status"],
+                "query_key": _search_query_key(kw),
+                "keywords": kw[:8],
+                "location": (location or "").strip(),
             },
         )
-        _cache_recent_jobs(jobs)
-        return _api_success({
+        body: Dict[str, Any] = {
             "total": len(jobs),
             "jobs": jobs,
             "provider_mode": mode,
-        })
+        }
+        if payload["cloud_mode"]:
+            body["warning"] = payload.get("warning")
+        resp = _api_success(body)
+        resp.headers["X-Cache"] = cache_meta["status"]
+        resp.headers["Age"] = str(int(cache_meta["age_s"]))
+        return resp
     except Exception as e:
         _track_event("api_error", {"api": "/api/jobs/search", "error": str(e)[:300]})
         return _api_error(str(e), status_code=500, code="job_search_failed")
@@ -2328,7 +2801,9 @@ async def search_jobs(
 async def get_job_detail(job_id: str):
     """获取岗位详情"""
     try:
-        job = real_job_service.get_job_detail(job_id)
+        # Provider ids resolve through their own cache slice; cloud / fallback results via the search slice.
+        job = real_job_service.get_job_detail(job_id) or recent_search_jobs.get(job_id)
+        metrics.inc("cache_requests_total", cache="job_detail", result="hit" if job else "miss")
         if job:
             return JSONResponse({"success": True, "job": job})
         else:
@@ -2428,72 +2903,255 @@ from fastapi import Header
 
 # 简单的API密钥验证
 CRAWLER_API_KEY = os.getenv("CRAWLER_API_KEY", "your-secret-key-change-this")
+# 解压后的上传体上限，防止 gzip 炸弹
+CRAWLER_UPLOAD_MAX_BYTES = int(os.getenv("CRAWLER_UPLOAD_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+async def _read_crawler_payload(request: Request) -> Dict[str, Any]:
+    """Parse a crawler upload body; accepts plain JSON or `Content-Encoding: gzip`."""
+    raw = await request.body()
+    encoding = (request.headers.get("content-encoding") or "").strip().lower()
+    if encoding == "gzip":
+        d = gzip.GzipFile(fileobj=io.BytesIO(raw))
+        raw = d.read(CRAWLER_UPLOAD_MAX_BYTES + 1)
+    if len(raw) > CRAWLER_UPLOAD_MAX_BYTES:
+        raise ValueError("payload_too_large")
+    data = json.loads(raw.decode("utf-8") or "{}")
+    if not isinstance(data, dict):
+        raise ValueError("invalid_payload")
+    return data
+
+
+async def _iter_crawler_ndjson(request: Request):
+    """Stream-decode an NDJSON upload (optionally gzip) without buffering the whole body."""
+    gz = (request.headers.get("content-encoding") or "").strip().lower() == "gzip"
+    decomp = zlib.decompressobj(16 + zlib.MAX_WBITS) if gz else None
+    total = 0
+    pending = b""
+    async for chunk in request.stream():
+        if decomp is not None:
+            chunk = decomp.decompress(chunk)
+        total += len(chunk)
+        if total > CRAWLER_UPLOAD_MAX_BYTES:
+            raise ValueError("payload_too_large")
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield json.loads(line.decode("utf-8"))
+    if decomp is not None:
+        pending += decomp.flush()
+    if pending.strip():
+        yield json.loads(pending.decode("utf-8"))
+
+
+def _check_crawler_auth(authorization: Optional[str]) -> Optional[JSONResponse]:
+    if not authorization or not authorization.startswith("Bearer "):
+        return JSONResponse({"error": "未授权：缺少API密钥"}, status_code=401)
+    api_key = authorization.replace("Bearer ", "")
+    if api_key != CRAWLER_API_KEY:
+        return JSONResponse({"error": "未授权：API密钥无效"}, status_code=401)
+    return None
+
+
+def _ingest_cloud_jobs(jobs: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Incrementally merge crawler jobs into `cloud_jobs_cache`.
+
+    Postings whose content hash already matches the cache are skipped before
+    normalization; changed postings are updated in place, new ones appended.
+    """
+    global _cloud_jobs_version
+    with _cloud_jobs_lock:
+        _refresh_cloud_jobs()
+        stats = {"received": 0, "new": 0, "updated": 0, "unchanged": 0}
+        candidates: List[Dict[str, Any]] = []
+        for job in jobs or []:
+            if not isinstance(job, dict):
+                continue
+            stats["received"] += 1
+            key = job_sync_key(job)
+            if key and cloud_jobs_hashes.get(key) == job_content_hash(job):
+                stats["unchanged"] += 1
+                continue
+            candidates.append(job)
+        if not candidates:
+            return stats
+
+        now = datetime.now().isoformat()
+        changed: Dict[str, Dict[str, Any]] = {}
+        replaced: Dict[int, Dict[str, Any]] = {}
+        replaced_from: Dict[int, Dict[str, Any]] = {}
+        evicted: List[str] = []
+        # 存储到缓存（去重 + 过滤 seed/demo + 必须可跳转）
+        for job in _normalize_and_filter_jobs(candidates, limit=len(candidates)):
+            key = job_sync_key(job)
+            if not key:
+                continue
+            # 添加接收时间戳
+            job["received_at"] = now
+            h = job_content_hash(job)
+            existing = cloud_jobs_by_key.get(key)
+            if existing is not None:
+                # Replaced, not mutated: snapshots taken by readers stay consistent.
+                listed = replaced_from.get(id(existing), existing)  # the object still in the list
+                replaced[id(listed)] = job
+                replaced_from[id(job)] = listed
+                stats["updated"] += 1
+            else:
+                cloud_jobs_cache.append(job)
+                stats["new"] += 1
+            cloud_jobs_by_key[key] = job
+            cloud_jobs_hashes[key] = h
+            changed[key] = {"job": job, "hash": h}
+        if replaced:
+            cloud_jobs_cache[:] = [replaced.get(id(j), j) for j in cloud_jobs_cache]
+
+        # 限制缓存大小（保留最新的5000个）
+        if len(cloud_jobs_cache) > CLOUD_JOBS_CACHE_MAX:
+            for old in cloud_jobs_cache[:-CLOUD_JOBS_CACHE_MAX]:
+                key = job_sync_key(old)
+                cloud_jobs_by_key.pop(key, None)
+                cloud_jobs_hashes.pop(key, None)
+                evicted.append(key)
+            cloud_jobs_cache[:] = cloud_jobs_cache[-CLOUD_JOBS_CACHE_MAX:]
+
+        if shared_state.shared and (changed or evicted):
+            shared_state.set_many("cloud_jobs", changed)
+            shared_state.delete("cloud_jobs", *evicted)
+            shared_state.trim("cloud_jobs", CLOUD_JOBS_CACHE_MAX)
+            version = shared_state.incr("cloud_jobs_meta", "version")
+            # Another worker wrote in between: leave the version stale so the next read reloads.
+            if version == _cloud_jobs_version + 1:
+                _cloud_jobs_version = version
+        return stats
+
+
+@app.post("/api/crawler/manifest")
+async def crawler_manifest(request: Request, authorization: str = Header(None)):
+    """增量同步：爬虫先上报 {key, hash} 清单，云端返回需要上传的 key"""
+    denied = _check_crawler_auth(authorization)
+    if denied is not None:
+        return denied
+    try:
+        data = await _read_crawler_payload(request)
+    except (ValueError, OSError, EOFError) as e:
+        return JSONResponse({"error": f"无法解析清单：{str(e)[:200]}"}, status_code=400)
+
+    items = data.get("items") or []
+    if not isinstance(items, list):
+        return JSONResponse({"error": "items 必须是列表"}, status_code=400)
+    _refresh_cloud_jobs()
+    need: List[str] = []
+    for it in items:
+        if not isinstance(it, dict):
+            continue
+        key = str(it.get("key") or "").strip().lower()
+        if key and cloud_jobs_hashes.get(key) != str(it.get("hash") or ""):
+            need.append(key)
+    return JSONResponse({
+        "success": True,
+        "need": need,
+        "checked": len(items),
+        "total": len(cloud_jobs_cache),
+    })
+
 
 @app.post("/api/crawler/upload")
 async def receive_crawler_data(request: Request, authorization: str = Header(None)):
-    """接收本地爬虫推送的岗位数据"""
+    """接收本地爬虫推送的岗位数据（JSON 或 NDJSON，均可 gzip）"""
     try:
         # 验证API密钥
-        if not authorization or not authorization.startswith("Bearer "):
-            return JSONResponse({"error": "未授权：缺少API密钥"}, status_code=401)
-        
-        api_key = authorization.replace("Bearer ", "")
-        if api_key != CRAWLER_API_KEY:
-            return JSONResponse({"error": "未授权：API密钥无效"}, status_code=401)
-        
-        # 解析数据
-        data = await request.json()
-        jobs = data.get("jobs", [])
-        
-        if not jobs:
-            return JSONResponse({"error": "岗位数据为空"}, status_code=400)
-        
-        # 添加接收时间戳
-        for job in jobs:
-            job["received_at"] = datetime.now().isoformat()
+        denied = _check_crawler_auth(authorization)
+        if denied is not None:
+            return denied
 
-        # 存储到缓存（去重 + 过滤 seed/demo + 必须可跳转）
-        incoming = _normalize_and_filter_jobs(jobs, limit=5000)
-        existing_keys = {
-            str(j.get("link") or j.get("apply_url") or j.get("id") or "").strip().lower()
-            for j in cloud_jobs_cache
-        }
-        new_jobs = []
-        for job in incoming:
-            key = str(job.get("link") or job.get("apply_url") or job.get("id") or "").strip().lower()
-            if key and key not in existing_keys:
-                existing_keys.add(key)
-                new_jobs.append(job)
-
-        cloud_jobs_cache.extend(new_jobs)
-
-        # 限制缓存大小（保留最新的5000个）
-        if len(cloud_jobs_cache) > 5000:
-            cloud_jobs_cache[:] = cloud_jobs_cache[-5000:]
+        content_type = (request.headers.get("content-type") or "").lower()
+        stats = {"received": 0, "new": 0, "updated": 0, "unchanged": 0}
+        try:
+            if "ndjson" in content_type:
+                # 流式解析，分块增量入库
+                chunk: List[Dict[str, Any]] = []
+                async for job in _iter_crawler_ndjson(request):
+                    chunk.append(job)
+                    if len(chunk) >= 500:
+                        for k, v in _ingest_cloud_jobs(chunk).items():
+                            stats[k] += v
+                        chunk = []
+                if chunk:
+                    for k, v in _ingest_cloud_jobs(chunk).items():
+                        stats[k] += v
+            else:
+                # 解析数据（批量推送默认 gzip 压缩）
+                data = await _read_crawler_payload(request)
+                jobs = data.get("jobs", [])
+                if not jobs:
+                    return JSONResponse({"error": "岗位数据为空"}, status_code=400)
+                stats = _ingest_cloud_jobs(jobs)
+        except (ValueError, OSError, EOFError, zlib.error) as e:
+            return JSONResponse({"error": f"无法解析上传数据：{str(e)[:200]}"}, status_code=400)
+
+        if not stats["received"]:
+            return JSONResponse({"error": "岗位数据为空"}, status_code=400)
 
-        cloud_jobs_meta["last_push_at"] = datetime.now().isoformat()
-        cloud_jobs_meta["last_received"] = len(jobs)
-        cloud_jobs_meta["last_new"] = len(new_jobs)
+        with _cloud_jobs_lock:
+            cloud_jobs_meta["last_push_at"] = datetime.now().isoformat()
+            cloud_jobs_meta["last_received"] = stats["received"]
+            cloud_jobs_meta["last_new"] = stats["new"]
+            cloud_jobs_meta["last_updated"] = stats["updated"]
+            cloud_jobs_meta["last_unchanged"] = stats["unchanged"]
+        if stats["new"] or stats["updated"]:
+            # Cached searches answered from the crawler cache are now out of date.
+            search_cache.invalidate("cloud:")
+        if shared_state.shared:
+            with _cloud_jobs_lock:
+                meta = dict(cloud_jobs_meta)
+            shared_state.set("cloud_jobs_meta", "meta", meta)
+        cycle_id = (request.headers.get("x-crawl-cycle") or "").strip()[:64]
         _track_event(
             "crawler_upload",
-            {"received": len(jobs), "new": len(new_jobs), "total": len(cloud_jobs_cache)},
+            {**stats, "total": len(cloud_jobs_cache), **({"cycle_id": cycle_id} if cycle_id else {})},
+        )
+
+        print(
+            f"✅ 接收爬虫数据：{stats['new']} 个新岗位，{stats['updated']} 个更新，"
+            f"{stats['unchanged']} 个未变（总计：{len(cloud_jobs_cache)}）"
         )
 
-        print(f"✅ 接收爬虫数据：{len(new_jobs)} 个新岗位（总计：{len(cloud_jobs_cache)}）")
-        
         return JSONResponse({
             "success": True,
-            "received": len(jobs),
-            "new": len(new_jobs),
+            **stats,
             "total": len(cloud_jobs_cache)
         })
-        
+
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+@app.get("/api/crawler/demand")
+async def get_crawler_demand(days: int = 7, limit: int = 100, authorization: str = Header(None)):
+    """按搜索需求（次数 / 缓存未命中）给本地爬虫排序关键词×城市，并返回每轮爬取后的命中率"""
+    denied = _check_crawler_auth(authorization)
+    if denied is not None:
+        return denied
+    try:
+        pairs = business_service.search_demand(days=days, limit=limit)
+        cycles = business_service.cache_hit_rate_by_cycle(cycles=10)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
+    _refresh_cloud_jobs()
+    return JSONResponse({
+        "success": True,
+        "days": days,
+        "pairs": pairs,
+        "cycles": cycles,
+        "total": len(cloud_jobs_cache),
+    })
+
 
 @app.get("/api/crawler/status")
 async def get_crawler_status():
     """获取爬虫数据状态"""
+    _refresh_cloud_jobs()
     if not cloud_jobs_cache:
         return JSONResponse({
             "status": "empty",
@@ -2501,6 +3159,8 @@ async def get_crawler_status():
             "last_push_at": cloud_jobs_meta.get("last_push_at"),
             "last_received": cloud_jobs_meta.get("last_received", 0),
             "last_new": cloud_jobs_meta.get("last_new", 0),
+            "last_updated": cloud_jobs_meta.get("last_updated", 0),
+            "last_unchanged": cloud_jobs_meta.get("last_unchanged", 0),
         })
 
     return JSONResponse({
@@ -2509,6 +3169,8 @@ async def get_crawler_status():
         "last_push_at": cloud_jobs_meta.get("last_push_at"),
         "last_received": cloud_jobs_meta.get("last_received", 0),
         "last_new": cloud_jobs_meta.get("last_new", 0),
+        "last_updated": cloud_jobs_meta.get("last_updated", 0),
+        "last_unchanged": cloud_jobs_meta.get("last_unchanged", 0),
     })
 
 
@@ -2517,9 +3179,40 @@ async def get_crawler_status():
 # ========================================
 
 # 全局任务管理
-auto_apply_tasks: Dict[str, Dict[str, Any]] = {}
+# 任务记录放在共享状态里，状态/历史/WebSocket 请求可以落在任意 worker 上。
+# 读出来的是副本：嵌套字段改完后必须写回（_patch_apply_task）。
+auto_apply_tasks: SharedMap = shared_state.mapping("auto_apply_tasks")
 task_lock = asyncio.Lock()
 
+
+def _patch_apply_task(
+    task_id: str,
+    progress: Optional[Dict[str, Any]] = None,
+    platform: str = "",
+    platform_progress: Optional[Dict[str, Any]] = None,
+    **fields: Any,
+) -> None:
+    """Read-modify-write one task record (top-level fields, progress fields, one platform's progress)."""
+    task = auto_apply_tasks.get(task_id)
+    if task is None:
+        return
+    task.update(fields)
+    if progress:
+        task.setdefault('progress', {}).update(progress)
+    if platform and platform_progress is not None:
+        task.setdefault('progress', {}).setdefault('platform_progress', {})[platform] = platform_progress
+    auto_apply_tasks[task_id] = task
+
+
+def _redact_apply_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Task records may be persisted by the shared-state backend: never store login secrets there."""
+    def _scrub(value: Any) -> Any:
+        if isinstance(value, dict):
+            return {k: ("***" if k in {"password", "cookie", "cookies", "token"} else _scrub(v)) for k, v in value.items()}
+        return value
+
+    return _scrub(config)
+
 # 平台映射
 PLATFORM_APPLIERS = {
     'boss': 'app.services.auto_apply.boss_applier.BossApplier',
@@ -2560,7 +3253,7 @@ async def start_auto_apply(request: Request):
         auto_apply_tasks[task_id] = {
             'task_id': task_id,
             'status': 'starting',
-            'config': config,
+            'config': _redact_apply_config(config),
             'progress': {
                 'applied': 0,
                 'failed': 0,
@@ -2592,8 +3285,7 @@ async def _run_auto_apply_task(task_id: str, config: Dict[str, Any], jobs: List[
         from app.core.llm_client import LLMClient
 
         # 更新状态
-        auto_apply_tasks[task_id]['status'] = 'running'
-        auto_apply_tasks[task_id]['started_at'] = datetime.now().isoformat()
+        _patch_apply_task(task_id, status='running', started_at=datetime.now().isoformat())
 
         # 创建投递器
         llm_client = LLMClient() if config.get('use_ai_answers', True) else None
@@ -2606,8 +3298,7 @@ async def _run_auto_apply_task(task_id: str, config: Dict[str, Any], jobs: List[
         if email and password:
             login_success = applier.login(email, password)
             if not login_success:
-                auto_apply_tasks[task_id]['status'] = 'failed'
-                auto_apply_tasks[task_id]['error'] = '登录失败'
+                _patch_apply_task(task_id, status='failed', error='登录失败')
                 return
 
         # 如果没有提供职位列表，则搜索
@@ -2618,25 +3309,26 @@ async def _run_auto_apply_task(task_id: str, config: Dict[str, Any], jobs: List[
                 filters={}
             )
 
-        auto_apply_tasks[task_id]['progress']['total'] = len(jobs)
+        _patch_apply_task(task_id, progress={'total': len(jobs)})
 
         # 批量投递
         result = applier.batch_apply(jobs, config.get('max_apply_per_session', 50))
 
         # 更新最终状态
-        auto_apply_tasks[task_id]['status'] = 'completed'
-        auto_apply_tasks[task_id]['completed_at'] = datetime.now().isoformat()
-        auto_apply_tasks[task_id]['result'] = result
-        auto_apply_tasks[task_id]['progress']['applied'] = result['applied']
-        auto_apply_tasks[task_id]['progress']['failed'] = result['failed']
+        _patch_apply_task(
+            task_id,
+            status='completed',
+            completed_at=datetime.now().isoformat(),
+            result=result,
+            progress={'applied': result['applied'], 'failed': result['failed']},
+        )
 
         # 清理资源
         applier.cleanup()
 
     except Exception as e:
         logger.exception(f"自动投递任务失败: {task_id}")
-        auto_apply_tasks[task_id]['status'] = 'failed'
-        auto_apply_tasks[task_id]['error'] = str(e)
+        _patch_apply_task(task_id, status='failed', error=str(e))
 
 
 @app.post("/api/auto-apply/stop")
@@ -2657,6 +3349,7 @@ async def stop_auto_apply(request: Request):
         # 设置停止标志（实际停止逻辑在 applier 中处理）
         task['status'] = 'stopped'
         task['completed_at'] = datetime.now().isoformat()
+        auto_apply_tasks[task_id] = task
 
         return _api_success({
             'message': '停止指令已发送'
@@ -2780,7 +3473,7 @@ async def start_multi_platform_apply(request: Request):
                 'task_id': task_id,
                 'status': 'starting',
                 'platforms': platforms,
-                'config': config,
+                'config': _redact_apply_config(config),
                 'progress': {
                     'total_platforms': len(platforms),
                     'completed_platforms': 0,
@@ -2810,8 +3503,7 @@ async def _run_multi_platform_apply(task_id: str, platforms: List[str], config:
     """运行多平台投递任务"""
     try:
         # 更新状态
-        auto_apply_tasks[task_id]['status'] = 'running'
-        auto_apply_tasks[task_id]['started_at'] = datetime.now().isoformat()
+        _patch_apply_task(task_id, status='running', started_at=datetime.now().isoformat())
 
         # 并发执行多个平台
         tasks = []
@@ -2835,15 +3527,16 @@ async def _run_multi_platform_apply(task_id: str, platforms: List[str], config:
                 total_failed += result.get('failed', 0)
 
         # 更新最终状态
-        auto_apply_tasks[task_id]['status'] = 'completed'
-        auto_apply_tasks[task_id]['completed_at'] = datetime.now().isoformat()
-        auto_apply_tasks[task_id]['progress']['total_applied'] = total_applied
-        auto_apply_tasks[task_id]['progress']['total_failed'] = total_failed
+        _patch_apply_task(
+            task_id,
+            status='completed',
+            completed_at=datetime.now().isoformat(),
+            progress={'total_applied': total_applied, 'total_failed': total_failed},
+        )
 
     except Exception as e:
         logger.exception(f"多平台投递任务失败: {task_id}")
-        auto_apply_tasks[task_id]['status'] = 'failed'
-        auto_apply_tasks[task_id]['error'] = str(e)
+        _patch_apply_task(task_id, status='failed', error=str(e))
 
 
 async def _run_single_platform_apply(task_id: str, platform: str, config: Dict[str, Any]):
@@ -2902,25 +3595,29 @@ async def _run_single_platform_apply(task_id: str, platform: str, config: Dict[s
         )
 
         # 更新进度
-        auto_apply_tasks[task_id]['progress']['platform_progress'][platform] = {
+        _patch_apply_task(task_id, platform=platform, platform_progress={
             'status': 'running',
             'total': len(jobs),
             'applied': 0,
             'failed': 0
-        }
+        })
 
         # 批量投递
         result = applier.batch_apply(jobs, platform_config.get('max_apply_per_session', 50))
 
         # 更新平台进度
-        auto_apply_tasks[task_id]['progress']['platform_progress'][platform] = {
-            'status': 'completed',
-            'total': len(jobs),
-            'applied': result['applied'],
-            'failed': result['failed']
-        }
-
-        auto_apply_tasks[task_id]['progress']['completed_platforms'] += 1
+        task = auto_apply_tasks.get(task_id) or {}
+        _patch_apply_task(
+            task_id,
+            platform=platform,
+            platform_progress={
+                'status': 'completed',
+                'total': len(jobs),
+                'applied': result['applied'],
+                'failed': result['failed']
+            },
+            progress={'completed_platforms': int(task.get('progress', {}).get('completed_platforms', 0)) + 1},
+        )
 
         # 清理资源
         applier.cleanup()
@@ -2929,10 +3626,10 @@ async def _run_single_platform_apply(task_id: str, platform: str, config: Dict[s
 
     except Exception as e:
         logger.exception(f"平台 {platform} 投递失败")
-        auto_apply_tasks[task_id]['progress']['platform_progress'][platform] = {
+        _patch_apply_task(task_id, platform=platform, platform_progress={
             'status': 'failed',
             'error': str(e)
-        }
+        })
         return {'applied': 0, 'failed': 0}
 
 
@@ -3094,9 +3791,13 @@ async def test_platform_config(request: Request):
         return _api_error(str(e), 500)
 
 
+startup_report.mark("module_body")
+
+
 if __name__ == "__main__":
     import webbrowser
     import threading
+    import uvicorn
     
     port = int(os.getenv("PORT", 8000))
     
@@ -37,6 +37,7 @@ from app.services.real_job_service import RealJobService
 from app.services.job_source_registry import get_job_source_registry_payload
 from app.services.business_service import BusinessService
 from app.services.commerce_service import CommerceService
+from app.services.admin_export import EXPORT_FORMATS, iter_export_bytes
 from app.services.user_auth_service import UserAuthService
 from app.services.resume_profile_service import ResumeProfileService
 from app.services.resume_render_service import ResumeRenderService
@@ -4413,19 +4414,21 @@ async def list_ops_bundles(request: Request, limit: int = 50, search: str = ""):
 
 
 @app.get("/api/ops/buyers")
-async def list_ops_buyers(request: Request, limit: int = 50, search: str = ""):
+async def list_ops_buyers(request: Request, limit: int = 50, search: str = "", cursor: str = ""):
     deny = _require_ops_secret(request)
     if deny:
         return deny
-    return _api_success({"buyers": commerce_service.list_buyers(limit=limit, search=search)})
+    rows = commerce_service.list_buyers(limit=limit, search=search, cursor=cursor)
+    return _api_success({"buyers": rows, "next_cursor": commerce_service.page_cursor(rows, "buyer_id", limit=limit)})
 
 
 @app.get("/api/ops/orders")
-async def list_ops_orders(request: Request, limit: int = 50, search: str = ""):
+async def list_ops_orders(request: Request, limit: int = 50, search: str = "", cursor: str = ""):
     deny = _require_ops_secret(request)
     if deny:
         return deny
-    return _api_success({"orders": commerce_service.list_orders(limit=limit, search=search)})
+    rows = commerce_service.list_orders(limit=limit, search=search, cursor=cursor)
+    return _api_success({"orders": rows, "next_cursor": commerce_service.page_cursor(rows, "order_id", limit=limit)})
 
 
 @app.patch("/api/ops/orders/{order_id}")
@@ -4455,11 +4458,12 @@ async def list_ops_wallets(request: Request, limit: int = 50, search: str = ""):
 
 
 @app.get("/api/ops/credit-ledger")
-async def list_ops_credit_ledger(request: Request, limit: int = 50, search: str = ""):
+async def list_ops_credit_ledger(request: Request, limit: int = 50, search: str = "", cursor: str = ""):
     deny = _require_ops_secret(request)
     if deny:
         return deny
-    return _api_success({"items": commerce_service.list_credit_ledger(limit=limit, search=search)})
+    rows = commerce_service.list_credit_ledger(limit=limit, search=search, cursor=cursor)
+    return _api_success({"items": rows, "next_cursor": commerce_service.page_cursor(rows, "ledger_id", limit=limit)})
 
 
 @app.get("/api/ops/payment-proofs")
@@ -4469,20 +4473,19 @@ async def list_ops_payment_proofs(
     search: str = "",
     status: str = "",
     order_id: str = "",
+    cursor: str = "",
 ):
     deny = _require_ops_secret(request)
     if deny:
         return deny
-    return _api_success(
-        {
-            "items": commerce_service.list_payment_proofs(
-                limit=limit,
-                search=search,
-                status=status,
-                order_id=order_id,
-            )
-        }
+    rows = commerce_service.list_payment_proofs(
+        limit=limit,
+        search=search,
+        status=status,
+        order_id=order_id,
+        cursor=cursor,
     )
+    return _api_success({"items": rows, "next_cursor": commerce_service.page_cursor(rows, "proof_id", limit=limit)})
 
 
 @app.patch("/api/ops/payment-proofs/{proof_id}")
@@ -4527,11 +4530,12 @@ async def download_ops_payment_proof(proof_id: str, request: Request):
 
 
 @app.get("/api/ops/access-codes")
-async def list_ops_access_codes(request: Request, limit: int = 50, search: str = ""):
+async def list_ops_access_codes(request: Request, limit: int = 50, search: str = "", cursor: str = ""):
     deny = _require_ops_secret(request)
     if deny:
         return deny
-    return _api_success({"access_codes": commerce_service.list_access_codes(limit=limit, search=search)})
+    rows = commerce_service.list_access_codes(limit=limit, search=search, cursor=cursor)
+    return _api_success({"access_codes": rows, "next_cursor": commerce_service.page_cursor(rows, "code", limit=limit)})
 
 
 @app.patch("/api/ops/access-codes/{code}")
@@ -4553,11 +4557,12 @@ async def patch_ops_access_code(code: str, request: Request):
 
 
 @app.get("/api/ops/tickets")
-async def list_ops_tickets(request: Request, limit: int = 50, search: str = ""):
+async def list_ops_tickets(request: Request, limit: int = 50, search: str = "", cursor: str = ""):
     deny = _require_ops_secret(request)
     if deny:
         return deny
-    return _api_success({"tickets": commerce_service.list_tickets(limit=limit, search=search)})
+    rows = commerce_service.list_tickets(limit=limit, search=search, cursor=cursor)
+    return _api_success({"tickets": rows, "next_cursor": commerce_service.page_cursor(rows, "ticket_id", limit=limit)})
 
 
 @app.post("/api/ops/tickets")
@@ -4615,11 +4620,34 @@ async def list_ops_local_agents(request: Request, limit: int = 50, search: str =
 
 
 @app.get("/api/ops/local-tasks")
-async def list_ops_local_tasks(request: Request, limit: int = 50, search: str = ""):
+async def list_ops_local_tasks(request: Request, limit: int = 50, search: str = "", cursor: str = ""):
     deny = _require_ops_secret(request)
     if deny:
         return deny
-    return _api_success({"tasks": commerce_service.list_local_tasks(limit=limit, search=search)})
+    rows = commerce_service.list_local_tasks(limit=limit, search=search, cursor=cursor)
+    return _api_success({"tasks": rows, "next_cursor": commerce_service.page_cursor(rows, "task_id", limit=limit)})
+
+
+@app.get("/api/ops/export/{kind}")
+async def export_ops_rows(request: Request, kind: str, format: str = "csv", since: str = "", until: str = ""):
+    deny = _require_ops_secret(request)
+    if deny:
+        return deny
+    fmt = str(format or "csv").strip().lower()
+    if fmt not in EXPORT_FORMATS:
+        return _api_error("unsupported_export_format", status_code=400, code="export_failed")
+    try:
+        columns = commerce_service.export_columns(kind)
+    except ValueError as e:
+        return _api_error(str(e), status_code=404, code="export_failed")
+    # 同步生成器由 Starlette 在线程池中逐块迭代，SQLite 按 keyset 分批读取
+    body = iter_export_bytes(commerce_service.iter_export(kind, since=since, until=until), columns, fmt)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{kind}_{stamp}.{fmt}"'},
+    )
 
 
 @app.post("/api/ops/local-tasks")